@@ -50,7 +50,33 @@ def calculate_rhr_from_sleep(log: DailyLog) -> dict:
     true_rhr = sum(relevant_samples) / len(relevant_samples)
     return {"rhr": true_rhr, "source": "main_sleep", "sleep_segment": main_sleep}
 
-def calculate_recovery_score(log: DailyLog) -> dict:
+def calculate_rhr_from_series(log: DailyLog, series) -> dict:
+    """
+    Same result as calculate_rhr_from_sleep, with the heart-rate samples given
+    as a HeartRateSeries (flat arrays from a packed log) instead of
+    log.heart_rate_samples, so no per-sample objects are built.
+    """
+    if series is None or not len(series):
+        if log.sleep_segments:
+            return {"rhr": 60.0, "source": "estimate", "note": "No HR data available"}
+        return {"rhr": None, "note": "No HR or sleep data"}
+    
+    if not log.sleep_segments:
+        from datetime import datetime as dt
+        start_fallback = dt.combine(log.date, dt.min.time()).replace(hour=2)
+        end_fallback = dt.combine(log.date, dt.min.time()).replace(hour=6)
+        rhr = series.mean_between(start_fallback, end_fallback)
+        if rhr is None:
+            return {"rhr": None, "note": "No HR data in fallback window"}
+        return {"rhr": rhr, "source": "fallback_2am_6am"}
+    
+    main_sleep = max(log.sleep_segments, key=lambda x: x.duration_minutes)
+    rhr = series.mean_between(main_sleep.start_time, main_sleep.end_time)
+    if rhr is None:
+        return {"rhr": None, "note": "No HR data during main sleep"}
+    return {"rhr": rhr, "source": "main_sleep", "sleep_segment": main_sleep}
+
+def calculate_recovery_score(log: DailyLog, rhr_data: Optional[dict] = None) -> dict:
     """
     Calculates Recovery Score (0-100) and Status.
     
@@ -61,8 +87,9 @@ def calculate_recovery_score(log: DailyLog) -> dict:
     - Previous Workout Strain
     """
     
-    # Dynamic RHR Calculation
-    rhr_data = calculate_rhr_from_sleep(log)
+    # Dynamic RHR Calculation (callers holding a HeartRateSeries pass it precomputed)
+    if rhr_data is None:
+        rhr_data = calculate_rhr_from_sleep(log)
     true_rhr = rhr_data.get("rhr", 60.0)
     
     # Deep Sleep Calculation
@@ -197,3 +224,41 @@ def calculate_weekly_stats(logs: List[DailyLog]) -> dict:
         "favorite_activity": top_activity,
         "avg_recovery_score": round(avg_recovery, 1)
     }
+
+def calculate_weekly_stats_from_summaries(summaries: List[Dict[str, Any]]) -> dict:
+    """
+    Same result as calculate_weekly_stats, from user_daily_summary rows
+    (one pre-summed row per day) instead of full DailyLogs.
+    """
+    if not summaries:
+        return {}
+    
+    days = len(summaries)
+    total_steps = sum(r.get("total_steps") or 0 for r in summaries)
+    total_calories = sum(r.get("active_calories") or 0 for r in summaries)
+    total_sleep_mins = sum(r.get("total_sleep_minutes") or 0 for r in summaries)
+    deep_sleep_mins = sum(r.get("deep_sleep_minutes") or 0 for r in summaries)
+    workout_count = sum(r.get("workout_count") or 0 for r in summaries)
+    
+    counts = {}
+    for r in summaries:
+        for activity, n in (r.get("activity_counts") or {}).items():
+            counts[activity] = counts.get(activity, 0) + n
+    top_activity = max(counts, key=counts.get) if counts else "None"
+    
+    recovery = [r["recovery_score"] for r in summaries if r.get("recovery_score") is not None]
+    avg_recovery = sum(recovery) / len(recovery) if recovery else 0
+    
+    return {
+        "period_days": days,
+        "total_steps": int(total_steps),
+        "avg_steps": int(total_steps / days),
+        "total_calories": int(total_calories),
+        "avg_calories": int(total_calories / days),
+        "total_sleep_hours": round(total_sleep_mins / 60, 1),
+        "avg_sleep_hours": round(total_sleep_mins / (60 * days), 1),
+        "deep_sleep_minutes": int(deep_sleep_mins),
+        "total_workouts": int(workout_count),
+        "favorite_activity": top_activity,
+        "avg_recovery_score": round(avg_recovery, 1)
+    }
@@ -0,0 +1,217 @@
+"""
+Compact storage encoding for the bulky parts of a stored DailyLog
+
+heart_rate_samples and sleep_segments are the only lists in a log that grow
+with the length of the night. With DAILY_LOG_ENCODING=packed they are stored
+inside the JSON document as typed arrays (base64):
+
+    "heart_rate_samples": {"_enc": "hr-v1", "start": <epoch s>, "tz": <utc offset s|null>,
+                           "dt": <int32 deltas, s>, "bpm": <uint16>}
+    "sleep_segments":     {"_enc": "sleep-v1", "start": <epoch s>, "tz": ..., "offsets": <int32>,
+                           "lengths": <int32 end-start, s>, "minutes": <uint16>, "stages": "dlr"}
+
+Decoding is a base64 decode plus a memoryview cast, no per-sample objects.
+Anything that can't be packed losslessly (sub-second or mixed-offset
+timestamps, out-of-order samples, unknown fields) stays a plain JSON list,
+and rows written before packing existed are plain lists too. The clients'
+get_daily_logs_* readers return rows as stored, so every consumer goes
+through sleep_segments / HeartRateSeries (or decode_log when it needs the
+DailyLog model), which accept both.
+"""
+
+import base64
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Any, Dict, List, Optional
+
+# "json" (default, legacy layout) or "packed"
+DAILY_LOG_ENCODING = os.getenv("DAILY_LOG_ENCODING", "json").lower()
+
+HR_ENCODING = "hr-v1"
+SLEEP_ENCODING = "sleep-v1"
+PACKED_MARKER = '"_enc"'
+
+_STAGE_CODES = {"deep": "d", "light": "l", "rem": "r"}
+_STAGE_NAMES = {v: k for k, v in _STAGE_CODES.items()}
+_HR_FIELDS = {"timestamp", "bpm"}
+_SLEEP_FIELDS = {"start_time", "end_time", "stage", "duration_minutes"}
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _pack(typecode: str, values) -> str:
+    arr = array(typecode, values)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return base64.b64encode(arr.tobytes()).decode("ascii")
+
+
+def _unpack(typecode: str, data: str) -> memoryview:
+    raw = base64.b64decode(data)
+    if sys.byteorder == "big":
+        arr = array(typecode, raw)
+        arr.byteswap()
+        return memoryview(arr)
+    return memoryview(raw).cast(typecode)
+
+
+def _parse_ts(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _epoch(ts: datetime) -> int:
+    """Whole seconds of the wall-clock time (offset stored separately)"""
+    return int((ts.replace(tzinfo=None) - _EPOCH).total_seconds())
+
+
+def _offset(ts: datetime) -> Optional[int]:
+    off = ts.utcoffset()
+    return None if off is None else int(off.total_seconds())
+
+
+def _format_ts(epoch: int, tz: Optional[int]) -> str:
+    ts = _EPOCH + timedelta(seconds=epoch)
+    if tz is not None:
+        ts = ts.replace(tzinfo=timezone(timedelta(seconds=tz)))
+    return ts.isoformat()
+
+
+def is_packed(value: Any) -> bool:
+    return isinstance(value, dict) and "_enc" in value
+
+
+def _common_offset(stamps: List[datetime]):
+    offsets = {_offset(ts) for ts in stamps}
+    if len(offsets) != 1 or any(ts.microsecond for ts in stamps):
+        raise ValueError("not packable")
+    return offsets.pop()
+
+
+def pack_heart_rate_samples(samples: List[Dict]) -> Any:
+    """Packed form of heart_rate_samples, or the list unchanged if it can't be packed losslessly"""
+    if not samples or is_packed(samples):
+        return samples
+    try:
+        if any(set(s) != _HR_FIELDS for s in samples):
+            return samples
+        stamps = [_parse_ts(s["timestamp"]) for s in samples]
+        tz = _common_offset(stamps)
+        seconds = [_epoch(ts) for ts in stamps]
+        deltas = [0] + [b - a for a, b in zip(seconds, seconds[1:])]
+        if min(deltas) < 0:
+            return samples
+        return {"_enc": HR_ENCODING, "start": seconds[0], "tz": tz, "dt": _pack("i", deltas), "bpm": _pack("H", [int(s["bpm"]) for s in samples])}
+    except (ValueError, TypeError, OverflowError, KeyError):
+        return samples
+
+
+def pack_sleep_segments(segments: List[Dict]) -> Any:
+    """Packed form of sleep_segments, or the list unchanged if it can't be packed losslessly"""
+    if not segments or is_packed(segments):
+        return segments
+    try:
+        if any(set(s) != _SLEEP_FIELDS or getattr(s["stage"], "value", s["stage"]) not in _STAGE_CODES for s in segments):
+            return segments
+        starts = [_parse_ts(s["start_time"]) for s in segments]
+        ends = [_parse_ts(s["end_time"]) for s in segments]
+        tz = _common_offset(starts + ends)
+        start_s = [_epoch(ts) for ts in starts]
+        return {
+            "_enc": SLEEP_ENCODING,
+            "start": start_s[0],
+            "tz": tz,
+            "offsets": _pack("i", [s - start_s[0] for s in start_s]),
+            "lengths": _pack("i", [_epoch(e) - s for e, s in zip(ends, start_s)]),
+            "minutes": _pack("H", [int(s["duration_minutes"]) for s in segments]),
+            "stages": "".join(_STAGE_CODES[getattr(s["stage"], "value", s["stage"])] for s in segments),
+        }
+    except (ValueError, TypeError, OverflowError, KeyError):
+        return segments
+
+
+def encode_log(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of log with heart_rate_samples / sleep_segments packed where possible"""
+    out = dict(log)
+    if isinstance(out.get("heart_rate_samples"), list):
+        out["heart_rate_samples"] = pack_heart_rate_samples(out["heart_rate_samples"])
+    if isinstance(out.get("sleep_segments"), list):
+        out["sleep_segments"] = pack_sleep_segments(out["sleep_segments"])
+    return out
+
+
+def sleep_segments(log: Dict[str, Any]) -> Optional[List[Dict]]:
+    """sleep_segments as a list of dicts whether stored packed or not (None if absent)"""
+    segments = log.get("sleep_segments")
+    if not is_packed(segments):
+        return segments
+    start, tz = segments["start"], segments["tz"]
+    offsets = _unpack("i", segments["offsets"])
+    lengths = _unpack("i", segments["lengths"])
+    minutes = _unpack("H", segments["minutes"])
+    return [
+        {
+            "start_time": _format_ts(start + off, tz),
+            "end_time": _format_ts(start + off + length, tz),
+            "stage": _STAGE_NAMES[code],
+            "duration_minutes": mins,
+        }
+        for off, length, mins, code in zip(offsets, lengths, minutes, segments["stages"])
+    ]
+
+
+class HeartRateSeries:
+    """Read-only view over heart-rate samples: epoch seconds and bpm as flat arrays"""
+
+    __slots__ = ("times", "bpm", "tz")
+
+    def __init__(self, times, bpm, tz: Optional[int]):
+        self.times = times
+        self.bpm = bpm
+        self.tz = tz
+
+    @classmethod
+    def from_log(cls, log: Dict[str, Any]) -> Optional["HeartRateSeries"]:
+        samples = log.get("heart_rate_samples")
+        if not samples:
+            return None
+        if is_packed(samples):
+            deltas = _unpack("i", samples["dt"])
+            return cls(array("q", accumulate(deltas, initial=samples["start"]))[1:], _unpack("H", samples["bpm"]), samples["tz"])
+        packed = pack_heart_rate_samples(samples)
+        if is_packed(packed):
+            return cls.from_log({"heart_rate_samples": packed})
+        return None
+
+    def __len__(self) -> int:
+        return len(self.bpm)
+
+    def _wall(self, ts: datetime) -> int:
+        if ts.tzinfo is not None and self.tz is not None:
+            ts = ts.astimezone(timezone(timedelta(seconds=self.tz)))
+        return _epoch(ts)
+
+    def mean_between(self, start: datetime, end: datetime) -> Optional[float]:
+        """Mean bpm of samples with start <= timestamp <= end (inclusive, like the model-based path)"""
+        lo = bisect_left(self.times, self._wall(start))
+        hi = bisect_right(self.times, self._wall(end))
+        if hi <= lo:
+            return None
+        return sum(self.bpm[lo:hi]) / (hi - lo)
+
+    def to_samples(self) -> List[Dict]:
+        return [{"timestamp": _format_ts(t, self.tz), "bpm": b} for t, b in zip(self.times, self.bpm)]
+
+
+def decode_log(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of log with packed fields expanded back to the plain JSON layout"""
+    out = dict(log)
+    if is_packed(out.get("heart_rate_samples")):
+        out["heart_rate_samples"] = HeartRateSeries.from_log(out).to_samples()
+    if is_packed(out.get("sleep_segments")):
+        out["sleep_segments"] = sleep_segments(out)
+    return out
@@ -1,7 +1,173 @@
 import aiomysql
+import asyncio
 import json
 import os
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterable, Optional, Sequence
+from backend.database import log_codec
+from backend.database.query_cache import QueryCache
+from backend.database.query_stats import QueryStats, caller_name
+from backend.services import battle_history, battle_lifecycle, battle_partials, daily_summary, leases, pagination, post_counters, social_posts, team_timeline, xp_ledger
+from backend.services.daily_summary import USER_SUMMARY_COLUMNS, TEAM_SUMMARY_COLUMNS
+from backend.services.log_metrics import METRIC_COLUMNS
+
+# Rows per multi-row INSERT statement used by the *_bulk write methods
+BULK_CHUNK_SIZE = int(os.getenv("MYSQL_BULK_CHUNK_SIZE", 500))
+
+# Rows per batch yielded by iter_rows (server-side cursor scans)
+STREAM_BATCH_SIZE = int(os.getenv("MYSQL_STREAM_BATCH_SIZE", 500))
+
+# Auto-increment ids can commit out of order under concurrent writers, so the
+# battle aggregator only folds daily_logs rows older than this (seconds)
+AGGREGATION_SETTLE_SECONDS = int(os.getenv("MYSQL_AGGREGATION_SETTLE_SECONDS", 30))
+
+UPSERT_USER_SQL = """
+INSERT INTO users (user_id, username, team_id, level, xp, strength, vitality, stamina)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    username = VALUES(username),
+    team_id = VALUES(team_id),
+    level = VALUES(level),
+    xp = VALUES(xp),
+    strength = VALUES(strength),
+    vitality = VALUES(vitality),
+    stamina = VALUES(stamina)
+"""
+
+INSERT_DAILY_LOG_SQL = """
+INSERT INTO daily_logs (user_id, date, data, total_steps, deep_sleep_minutes, total_sleep_minutes,
+                        active_calories, workout_score, battle_score, workout_count)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+UPSERT_USER_SUMMARY_SQL = f"""
+INSERT INTO user_daily_summary ({", ".join(USER_SUMMARY_COLUMNS)})
+VALUES ({", ".join(["%s"] * len(USER_SUMMARY_COLUMNS))})
+ON DUPLICATE KEY UPDATE
+    {", ".join(f"{c} = VALUES({c})" for c in USER_SUMMARY_COLUMNS[2:])}
+"""
+
+# Team rows are additive: each write adds the difference it made to the day's totals
+ADD_TEAM_SUMMARY_SQL = f"""
+INSERT INTO team_daily_summary ({", ".join(TEAM_SUMMARY_COLUMNS)})
+VALUES ({", ".join(["%s"] * len(TEAM_SUMMARY_COLUMNS))})
+ON DUPLICATE KEY UPDATE
+    {", ".join(f"{c} = {c} + VALUES({c})" for c in TEAM_SUMMARY_COLUMNS[2:])}
+"""
+
+ADD_BATTLE_PARTIAL_SQL = """
+INSERT INTO battle_partials (battle_id, team_id, date, log_count, battle_score)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    log_count = log_count + VALUES(log_count),
+    battle_score = battle_score + VALUES(battle_score)
+"""
+
+SET_BATTLE_WATERMARK_SQL = """
+INSERT INTO battle_aggregates (battle_id, last_log_id)
+VALUES (%s, %s)
+ON DUPLICATE KEY UPDATE
+    last_log_id = VALUES(last_log_id)
+"""
+
+UPSERT_BATTLE_HISTORY_SQL = """
+INSERT INTO battle_score_history (battle_id, resolution, bucket_start, team_a_score, team_b_score)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    team_a_score = VALUES(team_a_score),
+    team_b_score = VALUES(team_b_score),
+    samples = samples + 1
+"""
+
+# Bucket rows are additive: each grant adds its XP to the period's total
+ADD_XP_BUCKET_SQL = f"""
+INSERT INTO xp_buckets ({", ".join(xp_ledger.BUCKET_COLUMNS)})
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    team_id = VALUES(team_id),
+    xp = xp + VALUES(xp)
+"""
+
+INSERT_META_IF_ABSENT_SQL = """
+INSERT IGNORE INTO meta (key_name, value_data)
+VALUES (%s, %s)
+"""
+
+INSERT_SOCIAL_POST_SQL = """
+INSERT INTO social_feed (post_id, user_id, type, timestamp, content)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    content = VALUES(content)
+"""
+# insert_social_post(upsert=True): re-posting an id also moves it to the new timestamp
+UPSERT_SOCIAL_POST_SQL = """
+INSERT INTO social_feed (post_id, user_id, type, timestamp, content)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    content = VALUES(content),
+    timestamp = VALUES(timestamp)
+"""
+
+# Coalesced like/comment count deltas (services/post_counters.py); counts never go below zero
+ADD_POST_COUNTS_SQL = """
+UPDATE social_feed
+SET likes = GREATEST(likes + %s, 0), comments_count = GREATEST(comments_count + %s, 0)
+WHERE post_id = %s
+"""
+# params (user_id, post_id); a post that does not exist inserts nothing
+LIKE_POST_SQL = "INSERT IGNORE INTO post_likes (post_id, user_id) SELECT post_id, %s FROM social_feed WHERE post_id = %s"
+
+# Team timeline copies: one post (fan-out on insert) or all of one user's posts (rebuild)
+FAN_OUT_POST_SQL = team_timeline.copy_sql("INSERT IGNORE INTO", "sf.post_id = %s")
+REBUILD_USER_TIMELINE_SQL = team_timeline.copy_sql("INSERT IGNORE INTO", "sf.user_id = %s")
+
+
+def _user_params(user_data: Dict) -> tuple:
+    return (
+        user_data.get("user_id"),
+        user_data.get("username"),
+        user_data.get("team_id"),
+        user_data.get("level", 1),
+        user_data.get("xp", 0),
+        user_data.get("strength", 0),
+        user_data.get("vitality", 0),
+        user_data.get("stamina", 0),
+    )
+
+
+def _daily_log_row(user_id: str, date, log) -> tuple:
+    """(INSERT_DAILY_LOG_SQL params, rollup summary) for one log; log may be a dict or JSON string"""
+    if isinstance(log, str):
+        log_json = log
+        try:
+            log = json.loads(log)
+        except Exception:
+            log = {}
+    else:
+        log_json = json.dumps(log)
+    if log_codec.DAILY_LOG_ENCODING == "packed" and isinstance(log, dict):
+        log = log_codec.encode_log(log)
+        log_json = json.dumps(log)
+    summary = daily_summary.log_summary(user_id, date, log if isinstance(log, dict) else {})
+    return (user_id, date, log_json) + tuple(summary[c] for c in METRIC_COLUMNS), summary
+
+
+def _log_json(data) -> str:
+    """Stored log as a JSON string, packed fields left packed (readers decode them with log_codec)"""
+    return data if isinstance(data, str) else json.dumps(data)
+
+
+def _social_post_params(post_data: Dict) -> tuple:
+    return (
+        post_data.get("post_id"),
+        post_data.get("user_id"),
+        post_data.get("type"),
+        post_data.get("timestamp"),
+        social_posts.encode_content(post_data.get("content")),
+    )
+
 
 class MySQLClient:
     def __init__(
@@ -11,6 +177,10 @@ class MySQLClient:
         password: str = None,
         database: str = None,
         port: int = None,
+        minsize: int = None,
+        maxsize: int = None,
+        acquire_timeout: float = None,
+        cache: QueryCache = None,
     ):
         # Allow configuration via environment variables
         # MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DB, MYSQL_PORT
@@ -19,7 +189,26 @@ class MySQLClient:
         self.password = password or os.getenv("MYSQL_PASSWORD", "")
         self.database = database or os.getenv("MYSQL_DB", "vital_quest")
         self.port = int(port or os.getenv("MYSQL_PORT", 3306))
+        # Pool sizing: MYSQL_POOL_MINSIZE, MYSQL_POOL_MAXSIZE, MYSQL_POOL_ACQUIRE_TIMEOUT (seconds)
+        self.minsize = int(minsize or os.getenv("MYSQL_POOL_MINSIZE", 5))
+        self.maxsize = int(maxsize or os.getenv("MYSQL_POOL_MAXSIZE", 10))
+        self.acquire_timeout = float(acquire_timeout or os.getenv("MYSQL_POOL_ACQUIRE_TIMEOUT", 10))
         self.pool = None
+        # Read-through cache for hot reads (see query_cache.py); writes below invalidate it
+        self.cache = cache or QueryCache()
+        # Called after daily log writes commit (see add_log_listener)
+        self.log_listeners: List[Callable[[List[Dict]], None]] = []
+        self.user_listeners: List[Callable[[List[Dict]], None]] = []
+        # Per-statement latency histograms and slow query log (see query_stats.py)
+        self.query_stats = QueryStats()
+
+        # Pool telemetry
+        self._in_use = 0
+        self._waiters = 0
+        self._acquire_count = 0
+        self._acquire_timeouts = 0
+        self._acquire_total_ms = 0.0
+        self._acquire_max_ms = 0.0
 
     async def init(self):
         """Initialize connection pool"""
@@ -29,8 +218,8 @@ class MySQLClient:
             user=self.user,
             password=self.password,
             db=self.database,
-            minsize=5,
-            maxsize=10
+            minsize=self.minsize,
+            maxsize=self.maxsize
         )
 
     async def close(self):
@@ -38,81 +227,275 @@ class MySQLClient:
         if self.pool:
             self.pool.close()
             await self.pool.wait_closed()
+            self.pool = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Acquire a pooled connection, recording wait time and in-use counts"""
+        start = time.perf_counter()
+        self._waiters += 1
+        try:
+            conn = await asyncio.wait_for(self.pool.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._acquire_timeouts += 1
+            raise
+        finally:
+            self._waiters -= 1
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._acquire_count += 1
+        self._acquire_total_ms += elapsed_ms
+        self._acquire_max_ms = max(self._acquire_max_ms, elapsed_ms)
+
+        self._in_use += 1
+        try:
+            yield conn
+        finally:
+            self._in_use -= 1
+            await self.pool.release(conn)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live pool counters for the admin endpoint"""
+        size = self.pool.size if self.pool else 0
+        idle = self.pool.freesize if self.pool else 0
+        avg_ms = self._acquire_total_ms / self._acquire_count if self._acquire_count else 0.0
+        return {
+            "minsize": self.minsize,
+            "maxsize": self.maxsize,
+            "size": size,
+            "in_use": self._in_use,
+            "idle": idle,
+            "waiters": self._waiters,
+            "acquire_timeout_s": self.acquire_timeout,
+            "acquires": self._acquire_count,
+            "acquire_timeouts": self._acquire_timeouts,
+            "avg_acquire_ms": round(avg_ms, 3),
+            "max_acquire_ms": round(self._acquire_max_ms, 3),
+        }
+
+    @asynccontextmanager
+    async def _timed(self, query: str, params):
+        """Record latency/rows for one statement; the body sets result["rows"]"""
+        result = {"rows": 0}
+        error = False
+        start = time.perf_counter()
+        try:
+            yield result
+        except BaseException:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            caller = caller_name()
+            if self.query_stats.record(query, caller, elapsed_ms, result["rows"], error) and not error:
+                self.query_stats.log_slow(query, params, caller, elapsed_ms, result["rows"], self._explain)
+
+    async def _explain(self, query: str, params) -> List[Dict]:
+        """Run an EXPLAIN for the slow query log (not itself recorded)"""
+        async with self.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchall()
 
     async def execute(self, query: str, params: tuple = ()):
         """Execute query without returning results"""
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute(query, params)
+                async with self._timed(query, params) as result:
+                    await cursor.execute(query, params)
+                    await conn.commit()
+                    result["rows"] = cursor.rowcount
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Yield a cursor inside a single transaction (commit on success, rollback on error)"""
+        async with self.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    yield cursor
                 await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+    async def execute_many(self, query: str, rows: Iterable[Sequence], chunk_size: int = None,
+                           after_chunk: Callable = None) -> Dict[str, Any]:
+        """Write rows with multi-row statements, chunk_size rows at a time, in one transaction.
+
+        after_chunk(cursor, chunk) is awaited after each chunk, on the same transaction.
+        Returns {"rows", "chunks", "seconds", "rows_per_sec"}.
+        """
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        rows = list(rows)
+        start = time.perf_counter()
+        chunks = 0
+        if rows:
+            async with self._timed(query, rows[:1]) as result:
+                async with self.transaction() as cursor:
+                    for i in range(0, len(rows), chunk_size):
+                        # aiomysql rewrites INSERT ... VALUES (...) into a single multi-row statement
+                        chunk = rows[i:i + chunk_size]
+                        await cursor.executemany(query, chunk)
+                        if after_chunk is not None:
+                            await after_chunk(cursor, chunk)
+                        chunks += 1
+                result["rows"] = len(rows)
+        seconds = time.perf_counter() - start
+        return {
+            "rows": len(rows),
+            "chunks": chunks,
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(len(rows) / seconds, 1) if seconds > 0 else 0.0,
+        }
 
     async def fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict]:
         """Fetch single row"""
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
-                await cursor.execute(query, params)
-                return await cursor.fetchone()
+                async with self._timed(query, params) as result:
+                    await cursor.execute(query, params)
+                    row = await cursor.fetchone()
+                    result["rows"] = int(row is not None)
+                return row
 
     async def fetch_all(self, query: str, params: tuple = ()) -> List[Dict]:
         """Fetch all rows"""
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
+                async with self._timed(query, params) as result:
+                    await cursor.execute(query, params)
+                    rows = await cursor.fetchall()
+                    result["rows"] = len(rows)
+                return rows
+
+    async def iter_rows(self, query: str, params: tuple = (), batch_size: int = None) -> AsyncIterator[List[Dict]]:
+        """Stream a result set in batches of dicts through a server-side cursor.
+
+        Memory stays bounded by batch_size no matter how large the scan is. The
+        connection is held until the iterator is exhausted or closed.
+        """
+        batch_size = batch_size or STREAM_BATCH_SIZE
+        async with self.acquire() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
                 await cursor.execute(query, params)
-                return await cursor.fetchall()
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
 
     # User operations
     async def upsert_user(self, user_data: Dict):
         """Insert or update user"""
-        query = """
-        INSERT INTO users (user_id, username, team_id, level, xp, strength, vitality, stamina)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            username = VALUES(username),
-            team_id = VALUES(team_id),
-            level = VALUES(level),
-            xp = VALUES(xp),
-            strength = VALUES(strength),
-            vitality = VALUES(vitality),
-            stamina = VALUES(stamina)
+        params = _user_params(user_data)
+        await self.execute(UPSERT_USER_SQL, params)
+        await self._invalidate_users(user_data.get("user_id"))
+        self._users_written([params])
+
+    async def upsert_users_bulk(self, users: Iterable[Dict], chunk_size: int = None) -> Dict[str, Any]:
+        """Insert or update many users in one transaction"""
+        params = [_user_params(u) for u in users]
+        result = await self.execute_many(UPSERT_USER_SQL, params, chunk_size)
+        await self._invalidate_users()
+        self._users_written(params)
+        return result
+
+    def add_user_listener(self, listener: Callable[[List[Dict]], None]):
+        """Call listener(users) after every committed upsert_user / upsert_users_bulk.
+
+        users are the rows as written (user_id, username, level, xp). Listeners
+        run on the event loop and must not block.
         """
-        params = (
-            user_data.get("user_id"),
-            user_data.get("username"),
-            user_data.get("team_id"),
-            user_data.get("level", 1),
-            user_data.get("xp", 0),
-            user_data.get("strength", 0),
-            user_data.get("vitality", 0),
-            user_data.get("stamina", 0),
-        )
-        await self.execute(query, params)
+        self.user_listeners.append(listener)
+
+    def _users_written(self, params: List[tuple]):
+        if not self.user_listeners:
+            return
+        users = [{"user_id": p[0], "username": p[1], "level": p[3], "xp": p[4]} for p in params]
+        for listener in self.user_listeners:
+            try:
+                listener(users)
+            except Exception as e:
+                print(f"[DB] User listener failed: {e}")
+
+    async def update_user_fcm_token(self, user_id: str, fcm_token: str):
+        """Set a user's FCM device token"""
+        await self.execute("UPDATE users SET fcm_token = %s WHERE user_id = %s", (fcm_token, user_id))
+        await self.cache.invalidate("user", user_id)
+
+    async def _invalidate_users(self, user_id: str = None):
+        """Drop cached users (one, or all) and the leaderboards derived from them"""
+        if user_id:
+            await self.cache.invalidate("user", user_id)
+        else:
+            await self.cache.invalidate_namespace("user")
+        await self.cache.invalidate_namespace("global_leaderboard")
+        await self.cache.invalidate_namespace("team_leaderboard")
 
     async def get_user(self, user_id: str) -> Optional[Dict]:
-        """Get user by ID"""
-        query = "SELECT * FROM users WHERE user_id = %s"
-        return await self.fetch_one(query, (user_id,))
+        """Get user by ID (read-through cached)"""
+        async def load():
+            query = "SELECT * FROM users WHERE user_id = %s"
+            return await self.fetch_one(query, (user_id,))
+        return await self.cache.get_or_load("user", (user_id,), load)
+
+    def add_log_listener(self, listener: Callable[[List[Dict]], None]):
+        """Call listener(rows) after every committed daily log write.
+
+        rows are the user_daily_summary rows written (user_id, date, team_id and
+        the metric columns). Listeners run on the event loop and must not block.
+        """
+        self.log_listeners.append(listener)
+
+    def _logs_written(self, rows: List[Dict]):
+        for listener in self.log_listeners:
+            try:
+                listener(rows)
+            except Exception as e:
+                print(f"[DB] Log listener failed: {e}")
 
     async def insert_health(self, health_data: Dict):
         """Insert health data (stored in daily_logs)"""
-        query = """
-        INSERT INTO daily_logs (user_id, date, data)
-        VALUES (%s, %s, %s)
-        """
-        params = (
-            health_data.get("user_id"),
-            health_data.get("date"),
-            json.dumps(health_data),
-        )
-        await self.execute(query, params)
+        async with self.transaction() as cursor:
+            written = await self._write_daily_logs(cursor, [_daily_log_row(health_data.get("user_id"), health_data.get("date"), health_data)])
+        self._logs_written(written)
 
     async def insert_daily_log(self, user_id: str, date: str, log_json: str):
         """Insert daily log"""
-        query = """
-        INSERT INTO daily_logs (user_id, date, data)
-        VALUES (%s, %s, %s)
+        async with self.transaction() as cursor:
+            written = await self._write_daily_logs(cursor, [_daily_log_row(user_id, date, log_json)])
+        self._logs_written(written)
+
+    async def insert_daily_logs_bulk(self, logs: Iterable[Sequence], chunk_size: int = None) -> Dict[str, Any]:
+        """Insert many daily logs in one transaction.
+
+        logs: iterable of (user_id, date, log_json) tuples, same as insert_daily_log.
+        Returns {"rows", "chunks", "seconds", "rows_per_sec"} like execute_many.
         """
-        params = (user_id, date, log_json)
-        await self.execute(query, params)
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        rows = [_daily_log_row(user_id, date, log_json) for user_id, date, log_json in logs]
+        start = time.perf_counter()
+        chunks = 0
+        if rows:
+            written = []
+            async with self.transaction() as cursor:
+                for i in range(0, len(rows), chunk_size):
+                    written += await self._write_daily_logs(cursor, rows[i:i + chunk_size])
+                    chunks += 1
+            self._logs_written(written)
+        seconds = time.perf_counter() - start
+        return {
+            "rows": len(rows),
+            "chunks": chunks,
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(len(rows) / seconds, 1) if seconds > 0 else 0.0,
+        }
+
+    async def _write_daily_logs(self, cursor, rows: List[tuple]) -> List[Dict]:
+        """Insert logs and update their daily rollups on the caller's transaction"""
+        await cursor.executemany(INSERT_DAILY_LOG_SQL, [params for params, _ in rows])
+        return await daily_summary.write_summaries(cursor, [summary for _, summary in rows], UPSERT_USER_SUMMARY_SQL, ADD_TEAM_SUMMARY_SQL)
 
     async def get_daily_logs_for_user_range(self, user_id: str, start_date: str, end_date: str) -> List[str]:
         """Get all daily logs for user in date range"""
@@ -123,7 +506,7 @@ class MySQLClient:
         ORDER BY date DESC
         """
         rows = await self.fetch_all(query, (user_id, start_date, end_date))
-        return [row["data"] if isinstance(row["data"], str) else json.dumps(row["data"]) for row in rows]
+        return [_log_json(row["data"]) for row in rows]
 
     async def get_daily_logs_for_team_range(self, team_id: str, start_date: str, end_date: str) -> List[str]:
         """Get all daily logs for team in date range"""
@@ -135,56 +518,165 @@ class MySQLClient:
         ORDER BY dl.date DESC
         """
         rows = await self.fetch_all(query, (team_id, start_date, end_date))
-        return [row["data"] if isinstance(row["data"], str) else json.dumps(row["data"]) for row in rows]
+        return [_log_json(row["data"]) for row in rows]
 
-    async def insert_social_post(self, post_data: Dict):
-        """Insert social feed post"""
+    async def iter_daily_logs_for_team_range(self, team_id: str, start_date: str, end_date: str, batch_size: int = None) -> AsyncIterator[List[str]]:
+        """Stream a team's daily logs in a date range as batches of JSON strings"""
         query = """
-        INSERT INTO social_feed (post_id, user_id, type, timestamp, content)
-        VALUES (%s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            content = VALUES(content)
+        SELECT dl.data
+        FROM daily_logs dl
+        JOIN users u ON dl.user_id = u.user_id
+        WHERE u.team_id = %s AND dl.date BETWEEN %s AND %s
         """
-        params = (
-            post_data.get("post_id"),
-            post_data.get("user_id"),
-            post_data.get("type"),
-            post_data.get("timestamp"),
-            json.dumps(post_data.get("content", {})),
-        )
-        await self.execute(query, params)
+        async for rows in self.iter_rows(query, (team_id, start_date, end_date), batch_size):
+            yield [_log_json(row["data"]) for row in rows]
 
-    async def get_user_feed(self, user_id: str, limit: int = 20) -> List[Dict]:
-        """Get user's social feed"""
+    async def get_daily_metrics_for_user_range(self, user_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """Materialized metric columns (no JSON) for a user's logs in a date range, newest first"""
+        query = f"""
+        SELECT date, {", ".join(METRIC_COLUMNS)}
+        FROM daily_logs
+        WHERE user_id = %s AND date BETWEEN %s AND %s
+        ORDER BY date DESC
+        """
+        return await self.fetch_all(query, (user_id, str(start_date), str(end_date)))
+
+    async def get_workouts_for_user_range(self, user_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """manual_workouts from a user's logs in a date range; only logs with workouts are decoded"""
         query = """
-        SELECT post_id, user_id, type, timestamp, content
-        FROM social_feed
-        WHERE user_id = %s
-        ORDER BY timestamp DESC
-        LIMIT %s
+        SELECT data
+        FROM daily_logs
+        WHERE user_id = %s AND date BETWEEN %s AND %s AND workout_count > 0
         """
-        rows = await self.fetch_all(query, (user_id, limit))
-        for row in rows:
-            if isinstance(row["content"], str):
-                row["content"] = json.loads(row["content"])
-        return rows
+        workouts = []
+        for row in await self.fetch_all(query, (user_id, str(start_date), str(end_date))):
+            data = row["data"]
+            try:
+                data = json.loads(data) if isinstance(data, str) else (data or {})
+            except Exception:
+                data = {}
+            workouts.extend(data.get("manual_workouts", []) or [])
+        return workouts
+
+    async def upsert_user_daily_summaries(self, rows: Iterable[Sequence]) -> Dict[str, Any]:
+        """Upsert user_daily_summary rows (params in USER_SUMMARY_COLUMNS order)"""
+        return await self.execute_many(UPSERT_USER_SUMMARY_SQL, rows)
 
-    async def get_team_feed(self, team_id: str, limit: int = 20) -> List[Dict]:
-        """Get team's social feed"""
+    async def get_user_daily_summaries(self, user_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """One pre-summed row per day for a user, oldest first"""
         query = """
-        SELECT sf.post_id, sf.user_id, sf.type, sf.timestamp, sf.content
-        FROM social_feed sf
-        JOIN users u ON sf.user_id = u.user_id
-        WHERE u.team_id = %s
-        ORDER BY sf.timestamp DESC
-        LIMIT %s
+        SELECT *
+        FROM user_daily_summary
+        WHERE user_id = %s AND date BETWEEN %s AND %s
+        ORDER BY date
         """
-        rows = await self.fetch_all(query, (team_id, limit))
+        rows = await self.fetch_all(query, (user_id, str(start_date), str(end_date)))
         for row in rows:
-            if isinstance(row["content"], str):
-                row["content"] = json.loads(row["content"])
+            if isinstance(row.get("activity_counts"), str):
+                row["activity_counts"] = json.loads(row["activity_counts"])
         return rows
 
+    async def get_team_daily_summaries(self, team_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """One pre-summed row per day for a team, oldest first"""
+        query = """
+        SELECT *
+        FROM team_daily_summary
+        WHERE team_id = %s AND date BETWEEN %s AND %s
+        ORDER BY date
+        """
+        return await self.fetch_all(query, (team_id, str(start_date), str(end_date)))
+
+    async def insert_social_post(self, post_data: Dict, upsert: bool = False):
+        """Insert social feed post and fan it out to the author's team timeline (one transaction).
+
+        With upsert, an existing post_id also takes the new timestamp and its timeline row moves with it.
+        """
+        async with self.transaction() as cursor:
+            await cursor.execute(UPSERT_SOCIAL_POST_SQL if upsert else INSERT_SOCIAL_POST_SQL, _social_post_params(post_data))
+            await team_timeline.fan_out(cursor, [post_data.get("post_id")], FAN_OUT_POST_SQL, replace=upsert)
+        await self._invalidate_feeds()
+
+    async def insert_social_posts_bulk(self, posts: Iterable[Dict], chunk_size: int = None) -> Dict[str, Any]:
+        """Insert many social feed posts and fan them out to team timelines, all in one transaction"""
+        params = [_social_post_params(p) for p in posts]
+
+        async def fan_out(cursor, chunk):
+            await team_timeline.fan_out(cursor, [p[0] for p in chunk], FAN_OUT_POST_SQL)
+        result = await self.execute_many(INSERT_SOCIAL_POST_SQL, params, chunk_size, after_chunk=fan_out)
+        await self._invalidate_feeds()
+        return result
+
+    async def rebuild_team_timelines(self, user_ids: Iterable[str] = None, fence: leases.Lease = None) -> int:
+        """Re-copy the posts of user_ids (default: users with stale timeline rows) under their current team.
+
+        With fence, the transaction is rejected (LeaseLost) unless that lease is still current.
+        """
+        if user_ids is None:
+            user_ids = [r["user_id"] for r in await self.fetch_all(team_timeline.STALE_USERS_QUERY)]
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        async with self.transaction() as cursor:
+            if fence is not None:
+                await leases.check_fence(cursor, fence)
+            rebuilt = await team_timeline.rebuild_users(cursor, user_ids, REBUILD_USER_TIMELINE_SQL)
+        await self.cache.invalidate_namespace("team_feed")
+        return rebuilt
+
+    async def add_post_counts(self, rows: Iterable[Sequence], likes: Dict = None) -> int:
+        """Apply count delta rows and like intents in one transaction (services/post_counters.write_batch)"""
+        async with self.transaction() as cursor:
+            written = await post_counters.write_batch(cursor, rows, likes or {}, LIKE_POST_SQL, ADD_POST_COUNTS_SQL)
+        await self._invalidate_feeds()
+        return written
+
+    async def post_exists(self, post_id: str) -> bool:
+        return await self.fetch_one("SELECT post_id FROM social_feed WHERE post_id = %s", (post_id,)) is not None
+
+    async def add_post_comment(self, comment: Dict):
+        """Insert a comment row (the post's comments_count is bumped through the counter buffer)"""
+        await self.execute(social_posts.INSERT_COMMENT_SQL, tuple(comment.get(c) for c in social_posts.COMMENT_COLUMNS))
+
+    async def get_post_comments(self, post_id: str, limit: int = 20, after: str = None) -> List[Dict]:
+        """A post's comments, newest first; after is the comment_id of the previous page's last comment"""
+        query = social_posts.comments_query(after=after is not None)
+        return await self.fetch_all(query, (post_id, *((after,) if after is not None else ()), limit))
+
+    async def _invalidate_feeds(self):
+        # feed keys include the limit and team feeds span users, so drop both namespaces
+        await self.cache.invalidate_namespace("user_feed")
+        await self.cache.invalidate_namespace("team_feed")
+
+    async def get_user_feed(self, user_id: str, limit: int = 20, fields: Sequence[str] = social_posts.POST_FIELDS) -> List[Dict]:
+        """Get user's social feed, selecting only fields (read-through cached)"""
+        fields = tuple(fields)
+
+        async def load():
+            query = f"""
+            SELECT {social_posts.select_list(fields)}
+            FROM social_feed
+            WHERE user_id = %s
+            ORDER BY timestamp DESC
+            LIMIT %s
+            """
+            return social_posts.decode_rows(await self.fetch_all(query, (user_id, limit)))
+        return await self.cache.get_or_load("user_feed", (user_id, limit, fields), load)
+
+    async def get_team_feed(self, team_id: str, limit: int = 20, after: Sequence = None,
+                            fields: Sequence[str] = social_posts.POST_FIELDS) -> List[Dict]:
+        """Get team's social feed from its timeline (read-through cached).
+
+        after is the (timestamp, post_id) of the previous page's last post
+        (keyset pagination, see services/pagination.py). Rows hold fields
+        plus timestamp and post_id.
+        """
+        fields = tuple(fields)
+
+        async def load():
+            query = team_timeline.feed_query(after=after is not None, fields=fields)
+            return social_posts.decode_rows(await self.fetch_all(query, (team_id, *(after or ()), limit)))
+        return await self.cache.get_or_load("team_feed", (team_id, limit, tuple(after or ()), fields), load)
+
     # Battle operations
     async def create_battle(self, battle_id: str, team_a: str, team_b: str, start_date: str, end_date: str):
         """Create new battle"""
@@ -193,16 +685,19 @@ class MySQLClient:
         INSERT INTO battles (battle_id, team_a_id, team_b_id, start_date, end_date, status, scores)
         VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
-        params = (battle_id, team_a, team_b, start_date, end_date, "active", scores)
+        params = (battle_id, team_a, team_b, start_date, end_date, battle_lifecycle.initial_status(start_date), scores)
         await self.execute(query, params)
+        await self.cache.invalidate("battle", battle_id)
 
     async def get_battle(self, battle_id: str) -> Optional[Dict]:
-        """Get battle by ID"""
-        query = "SELECT * FROM battles WHERE battle_id = %s"
-        row = await self.fetch_one(query, (battle_id,))
-        if row and isinstance(row.get("scores"), str):
-            row["scores"] = json.loads(row["scores"])
-        return row
+        """Get battle by ID (read-through cached)"""
+        async def load():
+            query = "SELECT * FROM battles WHERE battle_id = %s"
+            row = await self.fetch_one(query, (battle_id,))
+            if row and isinstance(row.get("scores"), str):
+                row["scores"] = json.loads(row["scores"])
+            return row
+        return await self.cache.get_or_load("battle", (battle_id,), load)
 
     async def get_active_battles(self) -> List[Dict]:
         """Get all active battles"""
@@ -218,28 +713,196 @@ class MySQLClient:
         query = "UPDATE battles SET scores = %s WHERE battle_id = %s"
         params = (json.dumps(scores), battle_id)
         await self.execute(query, params)
+        await self.cache.invalidate("battle", battle_id)
 
-    # Leaderboard operations
-    async def get_global_leaderboard(self, limit: int = 10) -> List[Dict]:
-        """Get global leaderboard"""
-        query = """
-        SELECT user_id, username, level, xp
-        FROM users
-        ORDER BY xp DESC, level DESC
+    async def get_live_battle_scores(self, battle: Dict) -> Dict[str, float]:
+        """team_id -> battle_score summed from team_daily_summary (includes logs the aggregator hasn't folded)"""
+        teams = (battle["team_a_id"], battle["team_b_id"])
+        rows = await self.fetch_all(
+            """
+            SELECT team_id, SUM(battle_score) AS score
+            FROM team_daily_summary
+            WHERE team_id IN (%s, %s) AND date BETWEEN %s AND %s
+            GROUP BY team_id
+            """,
+            (*teams, str(battle["start_date"]), str(battle["end_date"])),
+        )
+        sums = {r["team_id"]: float(r["score"] or 0) for r in rows}
+        return {t: sums.get(t, 0.0) for t in teams}
+
+    # Lifecycle (see services/battle_lifecycle.py)
+    async def activate_battles(self, today: str) -> int:
+        """Move scheduled battles whose start_date has arrived to active; returns how many"""
+        async with self.transaction() as cursor:
+            await cursor.execute(
+                "UPDATE battles SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE status = %s AND start_date <= %s",
+                (battle_lifecycle.ACTIVE, battle_lifecycle.SCHEDULED, str(today)),
+            )
+            activated = cursor.rowcount
+        if activated:
+            await self.cache.invalidate_namespace("battle")
+        return activated
+
+    async def complete_battles(self, battle_ids: Sequence[str], completed_at: str, fence: leases.Lease = None) -> List[Dict]:
+        """Freeze final scores into battle_archive and mark the battles completed (one transaction)"""
+        async with self.transaction() as cursor:
+            if fence is not None:
+                await leases.check_fence(cursor, fence)
+            archived = await battle_lifecycle.complete_battles(cursor, battle_ids, completed_at)
+        for battle in archived:
+            await self.cache.invalidate("battle", battle["battle_id"])
+        return archived
+
+    async def get_battle_archive(self, battle_id: str) -> Optional[Dict]:
+        """Frozen result of a completed battle"""
+        row = await self.fetch_one("SELECT * FROM battle_archive WHERE battle_id = %s", (battle_id,))
+        if row and isinstance(row.get("final_scores"), str):
+            row["final_scores"] = json.loads(row["final_scores"])
+        return row
+
+    # Incremental battle aggregation (see services/battle_partials.py)
+    async def get_log_watermark_ceiling(self) -> int:
+        """Highest daily_logs.id the aggregator may fold (rows settled for AGGREGATION_SETTLE_SECONDS)"""
+        # walks the primary key backwards, so it only touches rows inside the settle window
+        query = "SELECT id FROM daily_logs WHERE created_at <= NOW() - INTERVAL %s SECOND ORDER BY id DESC LIMIT 1"
+        row = await self.fetch_one(query, (AGGREGATION_SETTLE_SECONDS,))
+        return int(row["id"]) if row else 0
+
+    async def get_battle_watermarks(self, battle_ids: Sequence[str]) -> Dict[str, int]:
+        """battle_id -> last folded daily_logs.id, for battles that have been built"""
+        if not battle_ids:
+            return {}
+        marks = ", ".join(["%s"] * len(battle_ids))
+        query = f"SELECT battle_id, last_log_id FROM battle_aggregates WHERE battle_id IN ({marks})"
+        return {r["battle_id"]: int(r["last_log_id"]) for r in await self.fetch_all(query, tuple(battle_ids))}
+
+    async def get_battle_log_scores(self, after_id: int, upto_id: int, team_ids: Sequence[str], limit: int) -> List[Dict]:
+        """daily_logs rows with after_id < id <= upto_id for members of team_ids, by id"""
+        marks = ", ".join(["%s"] * len(team_ids))
+        query = f"""
+        SELECT dl.id, dl.date, dl.battle_score, u.team_id
+        FROM daily_logs dl
+        JOIN users u ON u.user_id = dl.user_id
+        WHERE dl.id > %s AND dl.id <= %s AND u.team_id IN ({marks})
+        ORDER BY dl.id
         LIMIT %s
         """
-        return await self.fetch_all(query, (limit,))
+        return await self.fetch_all(query, (after_id, upto_id, *team_ids, limit))
 
-    async def get_team_leaderboard(self, team_id: str, limit: int = 50) -> List[Dict]:
-        """Get team leaderboard"""
+    async def get_team_battle_partials(self, team_id: str, start_date: str, end_date: str, upto_id: int) -> List[Dict]:
+        """Per-day log count and battle_score sum of a team's logs with id <= upto_id (for rebuilds)"""
         query = """
-        SELECT user_id, username, level, xp
-        FROM users
-        WHERE team_id = %s
-        ORDER BY xp DESC, level DESC
-        LIMIT %s
+        SELECT dl.date, COUNT(*) AS log_count, SUM(dl.battle_score) AS battle_score
+        FROM daily_logs dl
+        JOIN users u ON u.user_id = dl.user_id
+        WHERE u.team_id = %s AND dl.date BETWEEN %s AND %s AND dl.id <= %s
+        GROUP BY dl.date
+        """
+        return await self.fetch_all(query, (team_id, str(start_date), str(end_date), upto_id))
+
+    async def write_battle_updates(self, updates: Iterable[battle_partials.BattleUpdate], at: datetime = None,
+                                   fence: leases.Lease = None) -> Dict[str, Dict[str, float]]:
+        """Write a whole aggregation pass (partials, watermarks, scores, history snapshot) in one transaction.
+
+        With fence, the transaction is rejected (LeaseLost) unless that lease is still current.
         """
-        return await self.fetch_all(query, (team_id, limit))
+        updates = list(updates)
+        async with self.transaction() as cursor:
+            if fence is not None:
+                await leases.check_fence(cursor, fence)
+            scores = await battle_partials.write_updates(cursor, updates, ADD_BATTLE_PARTIAL_SQL, SET_BATTLE_WATERMARK_SQL)
+            await battle_history.append_snapshots(cursor, updates, scores, UPSERT_BATTLE_HISTORY_SQL, at)
+        for update in updates:
+            await self.cache.invalidate("battle", update.battle_id)
+        return scores
+
+    async def get_battle_score_history(self, battle_id: str, resolution: str, start: str, end: str) -> List[Dict]:
+        """Buckets of one resolution with start <= bucket_start <= end, oldest first (one primary key range read)"""
+        query = """
+        SELECT bucket_start, team_a_score, team_b_score, samples
+        FROM battle_score_history
+        WHERE battle_id = %s AND resolution = %s AND bucket_start BETWEEN %s AND %s
+        ORDER BY bucket_start
+        """
+        return await self.fetch_all(query, (battle_id, resolution, str(start), str(end)))
+
+    # Leaderboard operations
+    async def record_xp(self, user_id: str, team_id: Optional[str], xp: int, source: str = None,
+                        earned_at: datetime = None) -> int:
+        """Append an XP grant to xp_ledger and add it to the user's period buckets (one transaction)"""
+        entry = {"user_id": user_id, "team_id": team_id, "xp": xp, "source": source, "earned_at": earned_at or datetime.utcnow()}
+        async with self.transaction() as cursor:
+            written = await xp_ledger.append_entries(cursor, [entry], ADD_XP_BUCKET_SQL)
+        if written:
+            await self.cache.invalidate_namespace("global_leaderboard")
+            await self.cache.invalidate_namespace("team_leaderboard")
+        return written
+
+    async def grant_xp(self, user_data: Dict, xp: int, source: str = None, earned_at: datetime = None) -> int:
+        """upsert_user with the user's new XP totals plus record_xp for the grant, in one transaction.
+
+        The ledger is the source of truth for period leaderboards, so a grant is never
+        applied to the user row without its ledger entry (or the other way round).
+        """
+        params = _user_params(user_data)
+        entry = {"user_id": user_data.get("user_id"), "team_id": user_data.get("team_id"), "xp": xp, "source": source,
+                 "earned_at": earned_at or datetime.utcnow()}
+        async with self.transaction() as cursor:
+            await cursor.execute(UPSERT_USER_SQL, params)
+            written = await xp_ledger.append_entries(cursor, [entry], ADD_XP_BUCKET_SQL)
+        await self._invalidate_users(user_data.get("user_id"))
+        self._users_written([params])
+        return written
+
+    async def get_global_leaderboard(self, limit: int = 10, period: str = None, start: str = None,
+                                     after: Sequence = None) -> List[Dict]:
+        """Get global leaderboard (read-through cached).
+
+        period None ranks users by (xp, level, user_id); "daily", "weekly" or
+        "monthly" ranks the XP earned in the period starting at start (default:
+        current) by (xp, user_id). after is the key of the previous page's last
+        row (keyset pagination, see services/pagination.py).
+        """
+        if period is not None:
+            start = start or xp_ledger.current_start(period)
+
+            async def load_period():
+                query = xp_ledger.leaderboard_query(team=False, after=after is not None)
+                return await self.fetch_all(query, (period, start, *(after or ()), limit))
+            return await self.cache.get_or_load("global_leaderboard", (limit, period, start, after), load_period)
+
+        async def load():
+            query = f"""
+            SELECT user_id, username, level, xp
+            FROM users
+            {"WHERE " + pagination.after_clause(pagination.LEADERBOARD_KEY) if after is not None else ""}
+            ORDER BY xp DESC, level DESC, user_id DESC
+            LIMIT %s
+            """
+            return await self.fetch_all(query, (*(after or ()), limit))
+        return await self.cache.get_or_load("global_leaderboard", (limit, after), load)
+
+    async def get_team_leaderboard(self, team_id: str, limit: int = 50, period: str = None, start: str = None,
+                                   after: Sequence = None) -> List[Dict]:
+        """Get team leaderboard (read-through cached); period, start and after as in get_global_leaderboard"""
+        if period is not None:
+            start = start or xp_ledger.current_start(period)
+
+            async def load_period():
+                query = xp_ledger.leaderboard_query(team=True, after=after is not None)
+                return await self.fetch_all(query, (period, start, team_id, *(after or ()), limit))
+            return await self.cache.get_or_load("team_leaderboard", (team_id, limit, period, start, after), load_period)
+
+        async def load():
+            query = f"""
+            SELECT user_id, username, level, xp
+            FROM users
+            WHERE team_id = %s{" AND " + pagination.after_clause(pagination.LEADERBOARD_KEY) if after is not None else ""}
+            ORDER BY xp DESC, level DESC, user_id DESC
+            LIMIT %s
+            """
+            return await self.fetch_all(query, (team_id, *(after or ()), limit))
+        return await self.cache.get_or_load("team_leaderboard", (team_id, limit, after), load)
 
     # Meta operations
     async def get_meta(self, key: str) -> Optional[str]:
@@ -258,3 +921,18 @@ class MySQLClient:
         """
         params = (key, value)
         await self.execute(query, params)
+
+    async def insert_meta_if_absent(self, key: str, value: str) -> bool:
+        """Create a meta key; False if it already exists"""
+        async with self.transaction() as cursor:
+            await cursor.execute(INSERT_META_IF_ABSENT_SQL, (key, value))
+            return cursor.rowcount == 1
+
+    async def compare_and_set_meta(self, key: str, expected: str, value: str) -> bool:
+        """Replace a meta value only if it still equals expected (atomic compare-and-set)"""
+        async with self.transaction() as cursor:
+            await cursor.execute(
+                "UPDATE meta SET value_data = %s, updated_at = CURRENT_TIMESTAMP WHERE key_name = %s AND value_data = %s",
+                (value, key, expected),
+            )
+            return cursor.rowcount == 1
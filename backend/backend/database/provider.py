@@ -0,0 +1,60 @@
+"""
+Database provider - one app-wide database client (and connection pool)
+
+The pool is created once in the FastAPI lifespan (see backend/main.py) and
+handed to routers through the `get_db` dependency.
+
+DB_BACKEND selects the backend: "mysql" (default) or "sqlite" for a single
+node without MySQL (SQLITE_PATH, default ./vital_quest.db).
+"""
+
+import asyncio
+import os
+from typing import Optional
+from backend.database.mysql_client import MySQLClient
+from backend.database.sqlite_client import SQLiteClient, DB_PATH
+
+_db: Optional[MySQLClient] = None
+# serializes init_db: concurrent first requests must not open two pools
+_init_lock = asyncio.Lock()
+
+
+def create_client():
+    """Build a client for the configured backend"""
+    if os.getenv("DB_BACKEND", "mysql").lower() == "sqlite":
+        return SQLiteClient(os.getenv("SQLITE_PATH", DB_PATH))
+    return MySQLClient()
+
+
+async def init_db() -> MySQLClient:
+    """Create the shared client and open its pool"""
+    global _db
+    async with _init_lock:
+        # re-checked under the lock: a concurrent caller may have opened it already
+        if _db is None:
+            _db = create_client()
+        if _db.pool is None:
+            await _db.init()
+            print(f"[DATABASE] {type(_db).__name__} pool ready")
+        return _db
+
+
+async def close_db():
+    """Close the shared pool"""
+    global _db, _init_lock
+    if _db is not None:
+        await _db.close()
+        print("[DATABASE] Pool closed")
+    _db = None
+    _init_lock = asyncio.Lock()  # the next init may run on another event loop
+
+
+async def get_db() -> MySQLClient:
+    """FastAPI dependency returning the shared client.
+
+    Falls back to lazy initialization when the app is used without its
+    lifespan (scripts, ad-hoc test clients).
+    """
+    if _db is None or _db.pool is None:
+        return await init_db()
+    return _db
@@ -0,0 +1,173 @@
+"""
+Read-through query cache for the database clients
+
+QueryCache keys entries by namespace (usually the client method) and the
+call's arguments. Storage is pluggable: LRUCacheBackend (in-process, LRU +
+TTL) is the default; anything implementing CacheBackend (e.g. a Redis
+adapter shared by several workers) can be passed instead.
+
+Writes invalidate either one key (`invalidate`) or a whole namespace
+(`invalidate_namespace`). Namespace invalidation bumps a generation number
+that is part of every key, so entries loaded before the write can never be
+served after it. Single-key invalidation is a plain delete: a read racing
+the write may re-cache the old row, bounded by the TTL.
+
+Config: DB_CACHE_ENABLED (1), DB_CACHE_MAXSIZE (4096 entries), DB_CACHE_TTL (30 s)
+"""
+
+import copy
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+DB_CACHE_ENABLED = os.getenv("DB_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+DB_CACHE_MAXSIZE = int(os.getenv("DB_CACHE_MAXSIZE", 4096))
+DB_CACHE_TTL = float(os.getenv("DB_CACHE_TTL", 30))
+
+
+class CacheBackend:
+    """Storage adapter interface. Values handed in and out must not be shared with callers."""
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value)"""
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        """Atomically increment a counter that is never evicted; return the new value"""
+        raise NotImplementedError
+
+    async def counter(self, key: str) -> int:
+        """Current value of a counter (0 if never incremented)"""
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU with per-entry TTL. Values are deep-copied in and out."""
+
+    def __init__(self, maxsize: int = None):
+        self.maxsize = int(maxsize or DB_CACHE_MAXSIZE)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, copy.deepcopy(value)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "lru",
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class QueryCache:
+    """Read-through cache with hit/miss counters per namespace"""
+
+    def __init__(self, backend: CacheBackend = None, ttl: float = None, enabled: bool = None):
+        self.backend = backend or LRUCacheBackend()
+        self.ttl = float(ttl if ttl is not None else DB_CACHE_TTL)
+        self.enabled = DB_CACHE_ENABLED if enabled is None else enabled
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._by_namespace: Dict[str, Dict[str, int]] = {}
+
+    async def _key(self, namespace: str, args: tuple) -> str:
+        generation = await self.backend.counter(f"gen:{namespace}")
+        return f"{namespace}:{generation}:{json.dumps(args, default=str)}"
+
+    def _count(self, namespace: str, outcome: str):
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        ns = self._by_namespace.setdefault(namespace, {"hits": 0, "misses": 0})
+        ns[outcome] += 1
+
+    async def get_or_load(self, namespace: str, args: tuple, loader: Callable[[], Awaitable[Any]], ttl: float = None) -> Any:
+        """Return the cached value for (namespace, args), calling loader() on a miss"""
+        if not self.enabled:
+            return await loader()
+        key = await self._key(namespace, args)
+        hit, value = await self.backend.get(key)
+        if hit:
+            self._count(namespace, "hits")
+            return value
+        self._count(namespace, "misses")
+        value = await loader()
+        await self.backend.set(key, value, self.ttl if ttl is None else ttl)
+        return value
+
+    async def invalidate(self, namespace: str, *args):
+        """Drop the entry for one (namespace, args) key"""
+        if not self.enabled:
+            return
+        self.invalidations += 1
+        await self.backend.delete(await self._key(namespace, args))
+
+    async def invalidate_namespace(self, namespace: str):
+        """Drop every entry in a namespace"""
+        if not self.enabled:
+            return
+        self.invalidations += 1
+        await self.backend.incr(f"gen:{namespace}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "namespaces": {ns: dict(c) for ns, c in self._by_namespace.items()},
+            **self.backend.stats(),
+        }
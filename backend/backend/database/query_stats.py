@@ -0,0 +1,180 @@
+"""
+Query metrics for the database clients
+
+Every execute/fetch_one/fetch_all/execute_many call is recorded under
+(fingerprint, caller): the SQL with literals and IN-lists normalized, and
+the method that issued it (e.g. MySQLClient.get_user or
+NotificationScheduler.check_inactivity_and_notify). Each key keeps a
+latency histogram, row counts and errors.
+
+Statements slower than DB_SLOW_QUERY_MS (default 200) are logged with their
+parameters and EXPLAIN plan and kept in a small ring buffer for /admin/db-stats.
+"""
+
+import asyncio
+import os
+import re
+import sys
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG_SIZE = 50
+PARAMS_PREVIEW_CHARS = 200
+
+# Histogram bucket upper bounds in ms; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Frames from these modules are never reported as the caller
+_INTERNAL_FILES = ("query_stats.py", "mysql_client.py", "sqlite_client.py", "contextlib.py")
+_PLUMBING = ("caller_name", "execute", "fetch_one", "fetch_all", "execute_many", "_timed", "acquire", "__aenter__", "__aexit__")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Normalize a statement so calls that differ only in literals share a key"""
+    q = _STRING_LITERAL.sub("?", query)
+    q = _NUMBER.sub("?", q)
+    q = q.replace("%s", "?")
+    q = _PLACEHOLDER_LIST.sub("(?+)", q)
+    return _WHITESPACE.sub(" ", q).strip()
+
+
+def caller_name(depth: int = 1) -> str:
+    """Qualified name of the nearest function outside the database layer.
+
+    Client methods count as callers (get_user), but their inner read-through
+    loaders are folded into the method (MySQLClient.get_user.<locals>.load).
+    """
+    frame = sys._getframe(depth)
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name).split(".<locals>")[0]
+        if not code.co_filename.endswith(_INTERNAL_FILES):
+            return fallback or name
+        if fallback is None and name.rsplit(".", 1)[-1] not in _PLUMBING:
+            fallback = name
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+def _preview(params: Any) -> str:
+    text = repr(params)
+    return text if len(text) <= PARAMS_PREVIEW_CHARS else text[:PARAMS_PREVIEW_CHARS] + "..."
+
+
+class _QueryMetric:
+    __slots__ = ("calls", "errors", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float, rows: int, error: bool):
+        self.calls += 1
+        self.errors += int(error)
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile"""
+        target = q * self.calls
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else round(self.max_ms, 3)
+        return 0.0
+
+
+class QueryStats:
+    """Per-(fingerprint, caller) latency histograms plus a slow query log"""
+
+    def __init__(self, slow_query_ms: float = None, explain_prefix: str = "EXPLAIN"):
+        self.slow_query_ms = float(slow_query_ms if slow_query_ms is not None else DB_SLOW_QUERY_MS)
+        self.explain_prefix = explain_prefix
+        self.reset()
+
+    def reset(self):
+        self._metrics: Dict[Tuple[str, str], _QueryMetric] = {}
+        self.slow_queries: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+        self.started_at = time.time()
+
+    def record(self, query: str, caller: str, elapsed_ms: float, rows: int = 0, error: bool = False) -> bool:
+        """Add one call; returns True when it crossed the slow query threshold"""
+        key = (fingerprint(query), caller)
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = _QueryMetric()
+        metric.add(elapsed_ms, rows, error)
+        return elapsed_ms >= self.slow_query_ms
+
+    def log_slow(self, query: str, params: Any, caller: str, elapsed_ms: float, rows: int,
+                 explain: Optional[Callable[[str, Any], Awaitable[List[Dict]]]] = None):
+        """Log a slow statement; its EXPLAIN plan is fetched in the background"""
+        entry = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "caller": caller,
+            "ms": round(elapsed_ms, 3),
+            "rows": rows,
+            "query": fingerprint(query),
+            "params": _preview(params),
+            "plan": None,
+        }
+        self.slow_queries.append(entry)
+        print(f"[DB SLOW] {entry['ms']}ms {caller} rows={rows} | {entry['query']} | params={entry['params']}")
+        if explain is not None and query.lstrip()[:6].upper() in ("SELECT", "UPDATE", "DELETE", "INSERT"):
+            asyncio.ensure_future(self._explain(entry, query, params, explain))
+
+    async def _explain(self, entry: Dict, query: str, params: Any, explain):
+        try:
+            entry["plan"] = await explain(f"{self.explain_prefix} {query}", params)
+            print(f"[DB SLOW] plan for {entry['caller']}: {entry['plan']}")
+        except Exception as e:
+            entry["plan"] = f"unavailable: {e}"
+
+    def snapshot(self, limit: int = 50) -> Dict[str, Any]:
+        """Aggregates sorted by total time, plus the recent slow queries"""
+        rows = []
+        for (fp, caller), m in self._metrics.items():
+            rows.append({
+                "fingerprint": fp,
+                "caller": caller,
+                "calls": m.calls,
+                "errors": m.errors,
+                "rows": m.rows,
+                "total_ms": round(m.total_ms, 3),
+                "avg_ms": round(m.total_ms / m.calls, 3) if m.calls else 0.0,
+                "max_ms": round(m.max_ms, 3),
+                "p50_ms": m.percentile(0.50),
+                "p95_ms": m.percentile(0.95),
+                "p99_ms": m.percentile(0.99),
+                "histogram": dict(zip([f"<={b}ms" for b in LATENCY_BUCKETS_MS] + ["inf"], m.buckets)),
+            })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return {
+            "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "slow_query_ms": self.slow_query_ms,
+            "statements": len(rows),
+            "calls": sum(r["calls"] for r in rows),
+            "queries": rows[:limit],
+            "slow_queries": list(self.slow_queries),
+        }
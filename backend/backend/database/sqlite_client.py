@@ -1,165 +1,1201 @@
 import aiosqlite
 import asyncio
-from typing import Optional, Dict, Any
+import json
+import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterable, Optional, Sequence
+from backend.database import log_codec
+from backend.database.query_cache import QueryCache
+from backend.database.query_stats import QueryStats, caller_name
+from backend.services import battle_history, battle_lifecycle, battle_partials, daily_summary, leases, pagination, post_counters, social_posts, team_timeline, xp_ledger
+from backend.services.daily_summary import USER_SUMMARY_COLUMNS, TEAM_SUMMARY_COLUMNS
+from backend.services.log_metrics import METRIC_COLUMNS
 
 DB_PATH = "./vital_quest.db"
 
+# Pool / PRAGMA tuning: SQLITE_READERS, SQLITE_MMAP_SIZE (bytes), SQLITE_CACHE_SIZE (KiB)
+SQLITE_READERS = int(os.getenv("SQLITE_READERS", 4))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE", 64 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+BULK_CHUNK_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        username TEXT,
+        team_id TEXT,
+        level INTEGER DEFAULT 1,
+        xp INTEGER DEFAULT 0,
+        strength REAL DEFAULT 0,
+        vitality REAL DEFAULT 0,
+        stamina REAL DEFAULT 0,
+        rpg_class TEXT DEFAULT 'Villager',
+        fcm_token TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_users_team_id ON users(team_id)",
+    "CREATE INDEX IF NOT EXISTS idx_users_xp ON users(xp)",
+    "CREATE INDEX IF NOT EXISTS idx_users_rank ON users(xp, level, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_users_team_rank ON users(team_id, xp, level, user_id)",
+    """
+    CREATE TABLE IF NOT EXISTS daily_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        data TEXT,
+        total_steps INTEGER DEFAULT 0,
+        deep_sleep_minutes INTEGER DEFAULT 0,
+        total_sleep_minutes INTEGER DEFAULT 0,
+        active_calories REAL DEFAULT 0,
+        workout_score REAL DEFAULT 0,
+        battle_score REAL DEFAULT 0,
+        workout_count INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, date),
+        FOREIGN KEY(user_id) REFERENCES users(user_id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_daily_logs_date ON daily_logs(date)",
+    """
+    CREATE TABLE IF NOT EXISTS teams (
+        team_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS battles (
+        battle_id TEXT PRIMARY KEY,
+        team_a_id TEXT NOT NULL,
+        team_b_id TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT NOT NULL,
+        status TEXT DEFAULT 'active',
+        scores TEXT,
+        winner TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_battles_status ON battles(status)",
+    """
+    CREATE TABLE IF NOT EXISTS social_feed (
+        post_id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        type TEXT,
+        timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+        content TEXT,
+        likes INTEGER DEFAULT 0,
+        comments_count INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(user_id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_social_feed_user_id ON social_feed(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_social_feed_timestamp ON social_feed(timestamp)",
+    """
+    CREATE TABLE IF NOT EXISTS team_timeline (
+        team_id TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        PRIMARY KEY (team_id, timestamp, post_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_team_timeline_user ON team_timeline(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_team_timeline_post ON team_timeline(post_id)",
+    """
+    CREATE TABLE IF NOT EXISTS post_comments (
+        comment_id TEXT PRIMARY KEY,
+        post_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        text TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(post_id) REFERENCES social_feed(post_id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_post_comments_post ON post_comments(post_id, comment_id)",
+    """
+    CREATE TABLE IF NOT EXISTS post_likes (
+        post_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (post_id, user_id),
+        FOREIGN KEY(post_id) REFERENCES social_feed(post_id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meta (
+        key_name TEXT PRIMARY KEY,
+        value_data TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS step_milestones (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        milestone_steps INTEGER NOT NULL,
+        notified_at TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_step_milestones_user ON step_milestones(user_id, milestone_steps)",
+    "CREATE INDEX IF NOT EXISTS idx_step_milestones_date ON step_milestones(user_id, notified_at)",
+    "CREATE INDEX IF NOT EXISTS idx_step_milestones_page ON step_milestones(user_id, milestone_steps, notified_at)",
+    """
+    CREATE TABLE IF NOT EXISTS user_daily_summary (
+        user_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        team_id TEXT,
+        total_steps INTEGER DEFAULT 0,
+        deep_sleep_minutes INTEGER DEFAULT 0,
+        total_sleep_minutes INTEGER DEFAULT 0,
+        active_calories REAL DEFAULT 0,
+        workout_score REAL DEFAULT 0,
+        battle_score REAL DEFAULT 0,
+        workout_count INTEGER DEFAULT 0,
+        recovery_score REAL,
+        activity_counts TEXT,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, date)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_user_daily_summary_team ON user_daily_summary(team_id, date)",
+    """
+    CREATE TABLE IF NOT EXISTS team_daily_summary (
+        team_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        log_count INTEGER DEFAULT 0,
+        total_steps INTEGER DEFAULT 0,
+        deep_sleep_minutes INTEGER DEFAULT 0,
+        total_sleep_minutes INTEGER DEFAULT 0,
+        active_calories REAL DEFAULT 0,
+        workout_score REAL DEFAULT 0,
+        battle_score REAL DEFAULT 0,
+        workout_count INTEGER DEFAULT 0,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (team_id, date)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS battle_partials (
+        battle_id TEXT NOT NULL,
+        team_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        log_count INTEGER DEFAULT 0,
+        battle_score REAL DEFAULT 0,
+        PRIMARY KEY (battle_id, team_id, date)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS battle_aggregates (
+        battle_id TEXT PRIMARY KEY,
+        last_log_id INTEGER DEFAULT 0,
+        rebuilt_at TEXT,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS battle_archive (
+        battle_id TEXT PRIMARY KEY,
+        team_a_id TEXT NOT NULL,
+        team_b_id TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT NOT NULL,
+        final_scores TEXT,
+        winner TEXT,
+        completed_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS battle_score_history (
+        battle_id TEXT NOT NULL,
+        resolution TEXT NOT NULL,
+        bucket_start TEXT NOT NULL,
+        team_a_score REAL DEFAULT 0,
+        team_b_score REAL DEFAULT 0,
+        samples INTEGER DEFAULT 1,
+        PRIMARY KEY (battle_id, resolution, bucket_start)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS xp_ledger (
+        entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        team_id TEXT,
+        xp INTEGER NOT NULL,
+        source TEXT,
+        earned_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_xp_ledger_user ON xp_ledger(user_id, earned_at)",
+    """
+    CREATE TABLE IF NOT EXISTS xp_buckets (
+        period TEXT NOT NULL,
+        period_start TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        team_id TEXT,
+        xp INTEGER DEFAULT 0,
+        PRIMARY KEY (period, period_start, user_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_xp_buckets_rank ON xp_buckets(period, period_start, xp)",
+    "CREATE INDEX IF NOT EXISTS idx_xp_buckets_team_rank ON xp_buckets(team_id, period, period_start, xp)",
+]
+
+UPSERT_USER_SQL = """
+INSERT INTO users (user_id, username, team_id, level, xp, strength, vitality, stamina)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(user_id) DO UPDATE SET
+    username = excluded.username,
+    team_id = excluded.team_id,
+    level = excluded.level,
+    xp = excluded.xp,
+    strength = excluded.strength,
+    vitality = excluded.vitality,
+    stamina = excluded.stamina,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+INSERT_DAILY_LOG_SQL = """
+INSERT INTO daily_logs (user_id, date, data, total_steps, deep_sleep_minutes, total_sleep_minutes,
+                        active_calories, workout_score, battle_score, workout_count)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_USER_SUMMARY_SQL = f"""
+INSERT INTO user_daily_summary ({", ".join(USER_SUMMARY_COLUMNS)})
+VALUES ({", ".join(["?"] * len(USER_SUMMARY_COLUMNS))})
+ON CONFLICT(user_id, date) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in USER_SUMMARY_COLUMNS[2:])}
+"""
+
+# Team rows are additive: each write adds the difference it made to the day's totals
+ADD_TEAM_SUMMARY_SQL = f"""
+INSERT INTO team_daily_summary ({", ".join(TEAM_SUMMARY_COLUMNS)})
+VALUES ({", ".join(["?"] * len(TEAM_SUMMARY_COLUMNS))})
+ON CONFLICT(team_id, date) DO UPDATE SET
+    {", ".join(f"{c} = team_daily_summary.{c} + excluded.{c}" for c in TEAM_SUMMARY_COLUMNS[2:])}
+"""
+
+ADD_BATTLE_PARTIAL_SQL = """
+INSERT INTO battle_partials (battle_id, team_id, date, log_count, battle_score)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(battle_id, team_id, date) DO UPDATE SET
+    log_count = battle_partials.log_count + excluded.log_count,
+    battle_score = battle_partials.battle_score + excluded.battle_score
+"""
+
+SET_BATTLE_WATERMARK_SQL = """
+INSERT INTO battle_aggregates (battle_id, last_log_id)
+VALUES (?, ?)
+ON CONFLICT(battle_id) DO UPDATE SET
+    last_log_id = excluded.last_log_id,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+UPSERT_BATTLE_HISTORY_SQL = """
+INSERT INTO battle_score_history (battle_id, resolution, bucket_start, team_a_score, team_b_score)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(battle_id, resolution, bucket_start) DO UPDATE SET
+    team_a_score = excluded.team_a_score,
+    team_b_score = excluded.team_b_score,
+    samples = battle_score_history.samples + 1
+"""
+
+# Bucket rows are additive: each grant adds its XP to the period's total
+ADD_XP_BUCKET_SQL = f"""
+INSERT INTO xp_buckets ({", ".join(xp_ledger.BUCKET_COLUMNS)})
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(period, period_start, user_id) DO UPDATE SET
+    team_id = excluded.team_id,
+    xp = xp_buckets.xp + excluded.xp
+"""
+
+INSERT_META_IF_ABSENT_SQL = """
+INSERT OR IGNORE INTO meta (key_name, value_data)
+VALUES (?, ?)
+"""
+
+INSERT_SOCIAL_POST_SQL = """
+INSERT INTO social_feed (post_id, user_id, type, timestamp, content)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(post_id) DO UPDATE SET
+    content = excluded.content
+"""
+# insert_social_post(upsert=True): re-posting an id also moves it to the new timestamp
+UPSERT_SOCIAL_POST_SQL = """
+INSERT INTO social_feed (post_id, user_id, type, timestamp, content)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(post_id) DO UPDATE SET
+    content = excluded.content,
+    timestamp = excluded.timestamp
+"""
+
+# Coalesced like/comment count deltas (services/post_counters.py); counts never go below zero
+ADD_POST_COUNTS_SQL = """
+UPDATE social_feed
+SET likes = MAX(likes + ?, 0), comments_count = MAX(comments_count + ?, 0)
+WHERE post_id = ?
+"""
+# params (user_id, post_id); a post that does not exist inserts nothing
+LIKE_POST_SQL = "INSERT OR IGNORE INTO post_likes (post_id, user_id) SELECT post_id, %s FROM social_feed WHERE post_id = %s"
+
+# Team timeline copies: one post (fan-out on insert) or all of one user's posts (rebuild)
+FAN_OUT_POST_SQL = team_timeline.copy_sql("INSERT OR IGNORE INTO", "sf.post_id = %s")
+REBUILD_USER_TIMELINE_SQL = team_timeline.copy_sql("INSERT OR IGNORE INTO", "sf.user_id = %s")
+
+
+def _user_params(user_data: Dict) -> tuple:
+    return (
+        user_data.get("user_id"),
+        user_data.get("username"),
+        user_data.get("team_id"),
+        user_data.get("level", 1),
+        user_data.get("xp", 0),
+        user_data.get("strength", 0),
+        user_data.get("vitality", 0),
+        user_data.get("stamina", 0),
+    )
+
+
+def _daily_log_row(user_id: str, date, log) -> tuple:
+    """(INSERT_DAILY_LOG_SQL params, rollup summary) for one log; log may be a dict or JSON string"""
+    if isinstance(log, str):
+        log_json = log
+        try:
+            log = json.loads(log)
+        except Exception:
+            log = {}
+    else:
+        log_json = json.dumps(log)
+    if log_codec.DAILY_LOG_ENCODING == "packed" and isinstance(log, dict):
+        log = log_codec.encode_log(log)
+        log_json = json.dumps(log)
+    summary = daily_summary.log_summary(user_id, date, log if isinstance(log, dict) else {})
+    return (user_id, date, log_json) + tuple(summary[c] for c in METRIC_COLUMNS), summary
+
+
+def _log_json(data) -> str:
+    """Stored log as a JSON string, packed fields left packed (readers decode them with log_codec)"""
+    return data if isinstance(data, str) else json.dumps(data)
+
+
+def _social_post_params(post_data: Dict) -> tuple:
+    return (
+        post_data.get("post_id"),
+        post_data.get("user_id"),
+        post_data.get("type"),
+        post_data.get("timestamp"),
+        social_posts.encode_content(post_data.get("content")),
+    )
+
+
+def _to_sqlite(query: str) -> str:
+    """Translate the MySQL paramstyle used across routers/services into SQLite's"""
+    return query.replace("%s", "?")
+
+
+def _sqlite_now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class _Cursor:
+    """Thin cursor wrapper that accepts %s placeholders, like an aiomysql cursor"""
+
+    def __init__(self, cursor: aiosqlite.Cursor):
+        self._cursor = cursor
+
+    async def execute(self, query: str, params: Sequence = ()):
+        await self._cursor.execute(_to_sqlite(query), params)
+
+    async def executemany(self, query: str, rows: Iterable[Sequence]):
+        await self._cursor.executemany(_to_sqlite(query), rows)
+
+    async def fetchone(self) -> Optional[Dict]:
+        row = await self._cursor.fetchone()
+        return dict(row) if row else None
+
+    async def fetchall(self) -> List[Dict]:
+        return [dict(r) for r in await self._cursor.fetchall()]
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> int:
+        return self._cursor.lastrowid
+
+
 class SQLiteClient:
-    def __init__(self, db_path: str = DB_PATH):
+    """Single-node backend with the same surface as MySQLClient.
+
+    Keeps one writer connection (writes are serialized by a lock) and a pool of
+    reader connections. The database runs in WAL mode so readers never block
+    the writer.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, readers: int = None, mmap_size: int = None, cache_size_kib: int = None, cache: QueryCache = None):
         self.db_path = db_path
+        self.readers = int(readers or SQLITE_READERS)
+        self.mmap_size = int(mmap_size or SQLITE_MMAP_SIZE)
+        self.cache_size_kib = int(cache_size_kib or SQLITE_CACHE_SIZE_KIB)
+        self.pool: Optional[asyncio.Queue] = None
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._reader_conns: List[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+        self.cache = cache or QueryCache()
+        # Called after daily log writes commit (see add_log_listener)
+        self.log_listeners: List[Callable[[List[Dict]], None]] = []
+        self.user_listeners: List[Callable[[List[Dict]], None]] = []
+        self.query_stats = QueryStats(explain_prefix="EXPLAIN QUERY PLAN")
+
+        # Pool telemetry (same keys as MySQLClient.pool_stats)
+        self._in_use = 0
+        self._waiters = 0
+        self._acquire_count = 0
+        self._acquire_total_ms = 0.0
+        self._acquire_max_ms = 0.0
+
+    async def _connect(self, readonly: bool = False) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        await conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        await conn.execute("PRAGMA foreign_keys = ON")
+        await conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        await conn.execute(f"PRAGMA cache_size = -{self.cache_size_kib}")
+        await conn.execute("PRAGMA temp_store = MEMORY")
+        if readonly:
+            await conn.execute("PRAGMA query_only = ON")
+        await conn.create_function("NOW", 0, _sqlite_now)
+        return conn
 
     async def init(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("PRAGMA foreign_keys = ON;")
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id TEXT PRIMARY KEY,
-                    username TEXT,
-                    team_id TEXT,
-                    level INTEGER DEFAULT 1,
-                    xp INTEGER DEFAULT 0,
-                    strength REAL DEFAULT 0,
-                    vitality REAL DEFAULT 0,
-                    stamina REAL DEFAULT 0
-                )
-                """
-            )
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS health_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    date TEXT,
-                    steps INTEGER,
-                    heart_rate_avg REAL,
-                    sleep_total_minutes INTEGER,
-                    calories_burned REAL,
-                    FOREIGN KEY(user_id) REFERENCES users(user_id)
-                )
-                """
-            )
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS daily_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    date TEXT,
-                    content TEXT,
-                    FOREIGN KEY(user_id) REFERENCES users(user_id)
-                )
-                """
-            )
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS meta (
-                    key TEXT PRIMARY KEY,
-                    value TEXT
-                )
-                """
-            )
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS battles (
-                    battle_id TEXT PRIMARY KEY,
-                    team_a_id TEXT,
-                    team_b_id TEXT,
-                    start_date TEXT,
-                    end_date TEXT,
-                    status TEXT,
-                    scores TEXT
-                )
-                """
-            )
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS social_feed (
-                    post_id TEXT PRIMARY KEY,
-                    user_id TEXT,
-                    type TEXT,
-                    timestamp TEXT,
-                    content TEXT
-                )
-                """
-            )
-            await db.commit()
+        """Open the writer and reader pool, switch to WAL and create the schema"""
+        self._writer = await self._connect()
+        await self._writer.execute("PRAGMA journal_mode = WAL")
+        await self._writer.execute("PRAGMA synchronous = NORMAL")
+        for statement in SCHEMA:
+            await self._writer.execute(statement)
+        await self._writer.commit()
+
+        self.pool = asyncio.Queue()
+        for _ in range(self.readers):
+            conn = await self._connect(readonly=True)
+            self._reader_conns.append(conn)
+            self.pool.put_nowait(conn)
+
+    async def close(self):
+        """Close writer and readers"""
+        for conn in self._reader_conns:
+            await conn.close()
+        self._reader_conns = []
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+        self.pool = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a reader connection"""
+        start = time.perf_counter()
+        self._waiters += 1
+        try:
+            conn = await self.pool.get()
+        finally:
+            self._waiters -= 1
 
-    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cur = await db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-            row = await cur.fetchone()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._acquire_count += 1
+        self._acquire_total_ms += elapsed_ms
+        self._acquire_max_ms = max(self._acquire_max_ms, elapsed_ms)
+
+        self._in_use += 1
+        try:
+            yield conn
+        finally:
+            self._in_use -= 1
+            self.pool.put_nowait(conn)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live pool counters for the admin endpoint"""
+        avg_ms = self._acquire_total_ms / self._acquire_count if self._acquire_count else 0.0
+        return {
+            "backend": "sqlite",
+            "readers": self.readers,
+            "in_use": self._in_use,
+            "idle": self.pool.qsize() if self.pool else 0,
+            "waiters": self._waiters,
+            "writer_locked": self._write_lock.locked(),
+            "acquires": self._acquire_count,
+            "avg_acquire_ms": round(avg_ms, 3),
+            "max_acquire_ms": round(self._acquire_max_ms, 3),
+        }
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Yield a cursor on the writer inside a single transaction"""
+        async with self._write_lock:
+            await self._writer.execute("BEGIN")
+            try:
+                cursor = await self._writer.cursor()
+                yield _Cursor(cursor)
+                await cursor.close()
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+    @asynccontextmanager
+    async def _timed(self, query: str, params):
+        """Record latency/rows for one statement; the body sets result["rows"]"""
+        result = {"rows": 0}
+        error = False
+        start = time.perf_counter()
+        try:
+            yield result
+        except BaseException:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            caller = caller_name()
+            if self.query_stats.record(query, caller, elapsed_ms, result["rows"], error) and not error:
+                self.query_stats.log_slow(query, params, caller, elapsed_ms, result["rows"], self._explain)
+
+    async def _explain(self, query: str, params) -> List[Dict]:
+        """Run an EXPLAIN QUERY PLAN for the slow query log (not itself recorded)"""
+        async with self.acquire() as conn:
+            cur = await conn.execute(_to_sqlite(query), params)
+            rows = [dict(r) for r in await cur.fetchall()]
+            await cur.close()
+            return rows
+
+    async def execute(self, query: str, params: tuple = ()):
+        """Execute query without returning results"""
+        async with self._write_lock:
+            async with self._timed(query, params) as result:
+                cur = await self._writer.execute(_to_sqlite(query), params)
+                await self._writer.commit()
+                result["rows"] = cur.rowcount
+
+    async def execute_many(self, query: str, rows: Iterable[Sequence], chunk_size: int = None,
+                           after_chunk: Callable = None) -> Dict[str, Any]:
+        """Write rows chunk_size at a time in one transaction (after_chunk(cursor, chunk) runs on it after each chunk)"""
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        rows = list(rows)
+        start = time.perf_counter()
+        chunks = 0
+        if rows:
+            async with self._timed(query, rows[:1]) as result:
+                async with self.transaction() as cursor:
+                    for i in range(0, len(rows), chunk_size):
+                        chunk = rows[i:i + chunk_size]
+                        await cursor.executemany(query, chunk)
+                        if after_chunk is not None:
+                            await after_chunk(cursor, chunk)
+                        chunks += 1
+                result["rows"] = len(rows)
+        seconds = time.perf_counter() - start
+        return {
+            "rows": len(rows),
+            "chunks": chunks,
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(len(rows) / seconds, 1) if seconds > 0 else 0.0,
+        }
+
+    async def fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict]:
+        """Fetch single row"""
+        async with self.acquire() as conn:
+            async with self._timed(query, params) as result:
+                cur = await conn.execute(_to_sqlite(query), params)
+                row = await cur.fetchone()
+                await cur.close()
+                result["rows"] = int(row is not None)
             return dict(row) if row else None
 
-    async def upsert_user(self, user: Dict[str, Any]):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "INSERT INTO users(user_id, username, team_id, level, xp, strength, vitality, stamina) VALUES(?,?,?,?,?,?,?,?)\n                ON CONFLICT(user_id) DO UPDATE SET username=excluded.username, team_id=excluded.team_id, level=excluded.level, xp=excluded.xp, strength=excluded.strength, vitality=excluded.vitality, stamina=excluded.stamina",
-                (
-                    user["user_id"],
-                    user.get("username"),
-                    user.get("team_id"),
-                    user.get("level", 1),
-                    user.get("xp", 0),
-                    user.get("strength", 0),
-                    user.get("vitality", 0),
-                    user.get("stamina", 0),
-                ),
-            )
-            await db.commit()
-
-    async def insert_health(self, health: Dict[str, Any]):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "INSERT INTO health_data(user_id, date, steps, heart_rate_avg, sleep_total_minutes, calories_burned) VALUES(?,?,?,?,?,?)",
-                (
-                    health["user_id"],
-                    health["date"],
-                    health.get("steps", 0),
-                    health.get("heart_rate_avg", 0),
-                    health.get("sleep_total_minutes", 0),
-                    health.get("calories_burned", 0),
-                ),
-            )
-            await db.commit()
+    async def fetch_all(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Fetch all rows"""
+        async with self.acquire() as conn:
+            async with self._timed(query, params) as result:
+                cur = await conn.execute(_to_sqlite(query), params)
+                rows = await cur.fetchall()
+                await cur.close()
+                result["rows"] = len(rows)
+            return [dict(r) for r in rows]
 
-    async def insert_daily_log(self, user_id: str, date: str, content: str):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "INSERT INTO daily_logs(user_id, date, content) VALUES(?,?,?)",
-                (user_id, date, content),
-            )
-            await db.commit()
-
-    async def get_daily_logs_for_team_range(self, team_id: str, start_date: str, end_date: str):
-        """Return list of daily_log content dicts for all users in a team within inclusive date range."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cur = await db.execute(
-                "SELECT dl.content FROM daily_logs dl JOIN users u ON dl.user_id = u.user_id WHERE u.team_id = ? AND dl.date >= ? AND dl.date <= ?",
-                (team_id, start_date, end_date),
-            )
-            rows = await cur.fetchall()
-            return [r["content"] for r in rows]
-
-    async def get_daily_logs_for_user_range(self, user_id: str, start_date: str, end_date: str):
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cur = await db.execute(
-                "SELECT content FROM daily_logs WHERE user_id = ? AND date >= ? AND date <= ?",
-                (user_id, start_date, end_date),
+    async def iter_rows(self, query: str, params: tuple = (), batch_size: int = None) -> AsyncIterator[List[Dict]]:
+        """Stream a result set in batches of dicts"""
+        batch_size = batch_size or STREAM_BATCH_SIZE
+        async with self.acquire() as conn:
+            cur = await conn.execute(_to_sqlite(query), params)
+            try:
+                while True:
+                    rows = await cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [dict(r) for r in rows]
+            finally:
+                await cur.close()
+
+    # User operations
+    async def upsert_user(self, user_data: Dict):
+        """Insert or update user"""
+        params = _user_params(user_data)
+        await self.execute(UPSERT_USER_SQL, params)
+        await self._invalidate_users(user_data.get("user_id"))
+        self._users_written([params])
+
+    async def upsert_users_bulk(self, users: Iterable[Dict], chunk_size: int = None) -> Dict[str, Any]:
+        """Insert or update many users in one transaction"""
+        params = [_user_params(u) for u in users]
+        result = await self.execute_many(UPSERT_USER_SQL, params, chunk_size)
+        await self._invalidate_users()
+        self._users_written(params)
+        return result
+
+    def add_user_listener(self, listener: Callable[[List[Dict]], None]):
+        """Call listener(users) after every committed upsert_user / upsert_users_bulk.
+
+        users are the rows as written (user_id, username, level, xp). Listeners
+        run on the event loop and must not block.
+        """
+        self.user_listeners.append(listener)
+
+    def _users_written(self, params: List[tuple]):
+        if not self.user_listeners:
+            return
+        users = [{"user_id": p[0], "username": p[1], "level": p[3], "xp": p[4]} for p in params]
+        for listener in self.user_listeners:
+            try:
+                listener(users)
+            except Exception as e:
+                print(f"[DB] User listener failed: {e}")
+
+    async def update_user_fcm_token(self, user_id: str, fcm_token: str):
+        """Set a user's FCM device token"""
+        await self.execute("UPDATE users SET fcm_token = %s WHERE user_id = %s", (fcm_token, user_id))
+        await self.cache.invalidate("user", user_id)
+
+    async def _invalidate_users(self, user_id: str = None):
+        """Drop cached users (one, or all) and the leaderboards derived from them"""
+        if user_id:
+            await self.cache.invalidate("user", user_id)
+        else:
+            await self.cache.invalidate_namespace("user")
+        await self.cache.invalidate_namespace("global_leaderboard")
+        await self.cache.invalidate_namespace("team_leaderboard")
+
+    async def get_user(self, user_id: str) -> Optional[Dict]:
+        """Get user by ID (read-through cached)"""
+        async def load():
+            return await self.fetch_one("SELECT * FROM users WHERE user_id = ?", (user_id,))
+        return await self.cache.get_or_load("user", (user_id,), load)
+
+    def add_log_listener(self, listener: Callable[[List[Dict]], None]):
+        """Call listener(rows) after every committed daily log write.
+
+        rows are the user_daily_summary rows written (user_id, date, team_id and
+        the metric columns). Listeners run on the event loop and must not block.
+        """
+        self.log_listeners.append(listener)
+
+    def _logs_written(self, rows: List[Dict]):
+        for listener in self.log_listeners:
+            try:
+                listener(rows)
+            except Exception as e:
+                print(f"[DB] Log listener failed: {e}")
+
+    async def insert_health(self, health_data: Dict):
+        """Insert health data (stored in daily_logs)"""
+        async with self.transaction() as cursor:
+            written = await self._write_daily_logs(cursor, [_daily_log_row(health_data.get("user_id"), health_data.get("date"), health_data)])
+        self._logs_written(written)
+
+    async def insert_daily_log(self, user_id: str, date: str, log_json: str):
+        """Insert daily log"""
+        async with self.transaction() as cursor:
+            written = await self._write_daily_logs(cursor, [_daily_log_row(user_id, date, log_json)])
+        self._logs_written(written)
+
+    async def insert_daily_logs_bulk(self, logs: Iterable[Sequence], chunk_size: int = None) -> Dict[str, Any]:
+        """Insert many daily logs in one transaction.
+
+        logs: iterable of (user_id, date, log_json) tuples, same as insert_daily_log.
+        Returns {"rows", "chunks", "seconds", "rows_per_sec"} like execute_many.
+        """
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        rows = [_daily_log_row(user_id, date, log_json) for user_id, date, log_json in logs]
+        start = time.perf_counter()
+        chunks = 0
+        if rows:
+            written = []
+            async with self.transaction() as cursor:
+                for i in range(0, len(rows), chunk_size):
+                    written += await self._write_daily_logs(cursor, rows[i:i + chunk_size])
+                    chunks += 1
+            self._logs_written(written)
+        seconds = time.perf_counter() - start
+        return {
+            "rows": len(rows),
+            "chunks": chunks,
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(len(rows) / seconds, 1) if seconds > 0 else 0.0,
+        }
+
+    async def _write_daily_logs(self, cursor, rows: List[tuple]) -> List[Dict]:
+        """Insert logs and update their daily rollups on the caller's transaction"""
+        await cursor.executemany(INSERT_DAILY_LOG_SQL, [params for params, _ in rows])
+        return await daily_summary.write_summaries(cursor, [summary for _, summary in rows], UPSERT_USER_SUMMARY_SQL, ADD_TEAM_SUMMARY_SQL)
+
+    async def get_daily_logs_for_user_range(self, user_id: str, start_date: str, end_date: str) -> List[str]:
+        """Get all daily logs for user in date range"""
+        rows = await self.fetch_all(
+            "SELECT data FROM daily_logs WHERE user_id = ? AND date BETWEEN ? AND ? ORDER BY date DESC",
+            (user_id, str(start_date), str(end_date)),
+        )
+        return [_log_json(row["data"]) for row in rows]
+
+    async def get_daily_logs_for_team_range(self, team_id: str, start_date: str, end_date: str) -> List[str]:
+        """Get all daily logs for team in date range"""
+        rows = await self.fetch_all(
+            """
+            SELECT dl.data
+            FROM daily_logs dl
+            JOIN users u ON dl.user_id = u.user_id
+            WHERE u.team_id = ? AND dl.date BETWEEN ? AND ?
+            ORDER BY dl.date DESC
+            """,
+            (team_id, str(start_date), str(end_date)),
+        )
+        return [_log_json(row["data"]) for row in rows]
+
+    async def iter_daily_logs_for_team_range(self, team_id: str, start_date: str, end_date: str, batch_size: int = None) -> AsyncIterator[List[str]]:
+        """Stream a team's daily logs in a date range as batches of JSON strings"""
+        query = """
+        SELECT dl.data
+        FROM daily_logs dl
+        JOIN users u ON dl.user_id = u.user_id
+        WHERE u.team_id = ? AND dl.date BETWEEN ? AND ?
+        """
+        async for rows in self.iter_rows(query, (team_id, str(start_date), str(end_date)), batch_size):
+            yield [_log_json(row["data"]) for row in rows]
+
+    async def get_daily_metrics_for_user_range(self, user_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """Materialized metric columns (no JSON) for a user's logs in a date range, newest first"""
+        query = f"""
+        SELECT date, {", ".join(METRIC_COLUMNS)}
+        FROM daily_logs
+        WHERE user_id = ? AND date BETWEEN ? AND ?
+        ORDER BY date DESC
+        """
+        return await self.fetch_all(query, (user_id, str(start_date), str(end_date)))
+
+    async def get_workouts_for_user_range(self, user_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """manual_workouts from a user's logs in a date range; only logs with workouts are decoded"""
+        query = """
+        SELECT data
+        FROM daily_logs
+        WHERE user_id = ? AND date BETWEEN ? AND ? AND workout_count > 0
+        """
+        workouts = []
+        for row in await self.fetch_all(query, (user_id, str(start_date), str(end_date))):
+            data = row["data"]
+            try:
+                data = json.loads(data) if isinstance(data, str) else (data or {})
+            except Exception:
+                data = {}
+            workouts.extend(data.get("manual_workouts", []) or [])
+        return workouts
+
+    async def upsert_user_daily_summaries(self, rows: Iterable[Sequence]) -> Dict[str, Any]:
+        """Upsert user_daily_summary rows (params in USER_SUMMARY_COLUMNS order)"""
+        return await self.execute_many(UPSERT_USER_SUMMARY_SQL, rows)
+
+    async def get_user_daily_summaries(self, user_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """One pre-summed row per day for a user, oldest first"""
+        query = """
+        SELECT *
+        FROM user_daily_summary
+        WHERE user_id = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+        """
+        rows = await self.fetch_all(query, (user_id, str(start_date), str(end_date)))
+        for row in rows:
+            if isinstance(row.get("activity_counts"), str):
+                row["activity_counts"] = json.loads(row["activity_counts"])
+        return rows
+
+    async def get_team_daily_summaries(self, team_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """One pre-summed row per day for a team, oldest first"""
+        query = """
+        SELECT *
+        FROM team_daily_summary
+        WHERE team_id = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+        """
+        return await self.fetch_all(query, (team_id, str(start_date), str(end_date)))
+
+    async def insert_social_post(self, post_data: Dict, upsert: bool = False):
+        """Insert social feed post and fan it out to the author's team timeline (one transaction).
+
+        With upsert, an existing post_id also takes the new timestamp and its timeline row moves with it.
+        """
+        async with self.transaction() as cursor:
+            await cursor.execute(UPSERT_SOCIAL_POST_SQL if upsert else INSERT_SOCIAL_POST_SQL, _social_post_params(post_data))
+            await team_timeline.fan_out(cursor, [post_data.get("post_id")], FAN_OUT_POST_SQL, replace=upsert)
+        await self._invalidate_feeds()
+
+    async def insert_social_posts_bulk(self, posts: Iterable[Dict], chunk_size: int = None) -> Dict[str, Any]:
+        """Insert many social feed posts and fan them out to team timelines, all in one transaction"""
+        params = [_social_post_params(p) for p in posts]
+
+        async def fan_out(cursor, chunk):
+            await team_timeline.fan_out(cursor, [p[0] for p in chunk], FAN_OUT_POST_SQL)
+        result = await self.execute_many(INSERT_SOCIAL_POST_SQL, params, chunk_size, after_chunk=fan_out)
+        await self._invalidate_feeds()
+        return result
+
+    async def rebuild_team_timelines(self, user_ids: Iterable[str] = None, fence: leases.Lease = None) -> int:
+        """Re-copy the posts of user_ids (default: users with stale timeline rows) under their current team.
+
+        With fence, the transaction is rejected (LeaseLost) unless that lease is still current.
+        """
+        if user_ids is None:
+            user_ids = [r["user_id"] for r in await self.fetch_all(team_timeline.STALE_USERS_QUERY)]
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        async with self.transaction() as cursor:
+            if fence is not None:
+                await leases.check_fence(cursor, fence)
+            rebuilt = await team_timeline.rebuild_users(cursor, user_ids, REBUILD_USER_TIMELINE_SQL)
+        await self.cache.invalidate_namespace("team_feed")
+        return rebuilt
+
+    async def add_post_counts(self, rows: Iterable[Sequence], likes: Dict = None) -> int:
+        """Apply count delta rows and like intents in one transaction (services/post_counters.write_batch)"""
+        async with self.transaction() as cursor:
+            written = await post_counters.write_batch(cursor, rows, likes or {}, LIKE_POST_SQL, ADD_POST_COUNTS_SQL)
+        await self._invalidate_feeds()
+        return written
+
+    async def post_exists(self, post_id: str) -> bool:
+        return await self.fetch_one("SELECT post_id FROM social_feed WHERE post_id = %s", (post_id,)) is not None
+
+    async def add_post_comment(self, comment: Dict):
+        """Insert a comment row (the post's comments_count is bumped through the counter buffer)"""
+        await self.execute(social_posts.INSERT_COMMENT_SQL, tuple(comment.get(c) for c in social_posts.COMMENT_COLUMNS))
+
+    async def get_post_comments(self, post_id: str, limit: int = 20, after: str = None) -> List[Dict]:
+        """A post's comments, newest first; after is the comment_id of the previous page's last comment"""
+        query = social_posts.comments_query(after=after is not None)
+        return await self.fetch_all(query, (post_id, *((after,) if after is not None else ()), limit))
+
+    async def _invalidate_feeds(self):
+        # feed keys include the limit and team feeds span users, so drop both namespaces
+        await self.cache.invalidate_namespace("user_feed")
+        await self.cache.invalidate_namespace("team_feed")
+
+    async def get_user_feed(self, user_id: str, limit: int = 20, fields: Sequence[str] = social_posts.POST_FIELDS) -> List[Dict]:
+        """Get user's social feed, selecting only fields (read-through cached)"""
+        fields = tuple(fields)
+
+        async def load():
+            query = f"""
+            SELECT {social_posts.select_list(fields)}
+            FROM social_feed
+            WHERE user_id = ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+            """
+            return social_posts.decode_rows(await self.fetch_all(query, (user_id, limit)))
+        return await self.cache.get_or_load("user_feed", (user_id, limit, fields), load)
+
+    async def get_team_feed(self, team_id: str, limit: int = 20, after: Sequence = None,
+                            fields: Sequence[str] = social_posts.POST_FIELDS) -> List[Dict]:
+        """Get team's social feed from its timeline (read-through cached).
+
+        after is the (timestamp, post_id) of the previous page's last post
+        (keyset pagination, see services/pagination.py). Rows hold fields
+        plus timestamp and post_id.
+        """
+        fields = tuple(fields)
+
+        async def load():
+            query = team_timeline.feed_query(after=after is not None, fields=fields)
+            return social_posts.decode_rows(await self.fetch_all(query, (team_id, *(after or ()), limit)))
+        return await self.cache.get_or_load("team_feed", (team_id, limit, tuple(after or ()), fields), load)
+
+    # Battle operations
+    async def create_battle(self, battle_id: str, team_a: str, team_b: str, start_date: str, end_date: str):
+        """Create new battle"""
+        scores = json.dumps({team_a: 0, team_b: 0})
+        await self.execute(
+            """
+            INSERT INTO battles (battle_id, team_a_id, team_b_id, start_date, end_date, status, scores)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (battle_id, team_a, team_b, start_date, end_date, battle_lifecycle.initial_status(start_date), scores),
+        )
+        await self.cache.invalidate("battle", battle_id)
+
+    async def get_battle(self, battle_id: str) -> Optional[Dict]:
+        """Get battle by ID (read-through cached)"""
+        async def load():
+            row = await self.fetch_one("SELECT * FROM battles WHERE battle_id = ?", (battle_id,))
+            if row and isinstance(row.get("scores"), str):
+                row["scores"] = json.loads(row["scores"])
+            return row
+        return await self.cache.get_or_load("battle", (battle_id,), load)
+
+    async def get_active_battles(self) -> List[Dict]:
+        """Get all active battles"""
+        rows = await self.fetch_all("SELECT * FROM battles WHERE status = ?", ("active",))
+        for row in rows:
+            if isinstance(row.get("scores"), str):
+                row["scores"] = json.loads(row["scores"])
+        return rows
+
+    async def update_battle_scores(self, battle_id: str, scores: Dict):
+        """Update battle scores"""
+        await self.execute(
+            "UPDATE battles SET scores = ?, updated_at = CURRENT_TIMESTAMP WHERE battle_id = ?",
+            (json.dumps(scores), battle_id),
+        )
+        await self.cache.invalidate("battle", battle_id)
+
+    async def get_live_battle_scores(self, battle: Dict) -> Dict[str, float]:
+        """team_id -> battle_score summed from team_daily_summary (includes logs the aggregator hasn't folded)"""
+        teams = (battle["team_a_id"], battle["team_b_id"])
+        rows = await self.fetch_all(
+            """
+            SELECT team_id, SUM(battle_score) AS score
+            FROM team_daily_summary
+            WHERE team_id IN (?, ?) AND date BETWEEN ? AND ?
+            GROUP BY team_id
+            """,
+            (*teams, str(battle["start_date"]), str(battle["end_date"])),
+        )
+        sums = {r["team_id"]: float(r["score"] or 0) for r in rows}
+        return {t: sums.get(t, 0.0) for t in teams}
+
+    # Lifecycle (see services/battle_lifecycle.py)
+    async def activate_battles(self, today: str) -> int:
+        """Move scheduled battles whose start_date has arrived to active; returns how many"""
+        async with self.transaction() as cursor:
+            await cursor.execute(
+                "UPDATE battles SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE status = %s AND start_date <= %s",
+                (battle_lifecycle.ACTIVE, battle_lifecycle.SCHEDULED, str(today)),
             )
-            rows = await cur.fetchall()
-            return [r["content"] for r in rows]
+            activated = cursor.rowcount
+        if activated:
+            await self.cache.invalidate_namespace("battle")
+        return activated
+
+    async def complete_battles(self, battle_ids: Sequence[str], completed_at: str, fence: leases.Lease = None) -> List[Dict]:
+        """Freeze final scores into battle_archive and mark the battles completed (one transaction)"""
+        async with self.transaction() as cursor:
+            if fence is not None:
+                await leases.check_fence(cursor, fence)
+            archived = await battle_lifecycle.complete_battles(cursor, battle_ids, completed_at)
+        for battle in archived:
+            await self.cache.invalidate("battle", battle["battle_id"])
+        return archived
+
+    async def get_battle_archive(self, battle_id: str) -> Optional[Dict]:
+        """Frozen result of a completed battle"""
+        row = await self.fetch_one("SELECT * FROM battle_archive WHERE battle_id = ?", (battle_id,))
+        if row and isinstance(row.get("final_scores"), str):
+            row["final_scores"] = json.loads(row["final_scores"])
+        return row
+
+    # Incremental battle aggregation (see services/battle_partials.py)
+    async def get_log_watermark_ceiling(self) -> int:
+        """Highest daily_logs.id the aggregator may fold (one writer, so ids commit in order)"""
+        row = await self.fetch_one("SELECT COALESCE(MAX(id), 0) AS id FROM daily_logs")
+        return int(row["id"]) if row else 0
+
+    async def get_battle_watermarks(self, battle_ids: Sequence[str]) -> Dict[str, int]:
+        """battle_id -> last folded daily_logs.id, for battles that have been built"""
+        if not battle_ids:
+            return {}
+        marks = ", ".join(["?"] * len(battle_ids))
+        rows = await self.fetch_all(f"SELECT battle_id, last_log_id FROM battle_aggregates WHERE battle_id IN ({marks})", tuple(battle_ids))
+        return {r["battle_id"]: int(r["last_log_id"]) for r in rows}
+
+    async def get_battle_log_scores(self, after_id: int, upto_id: int, team_ids: Sequence[str], limit: int) -> List[Dict]:
+        """daily_logs rows with after_id < id <= upto_id for members of team_ids, by id"""
+        marks = ", ".join(["?"] * len(team_ids))
+        query = f"""
+        SELECT dl.id, dl.date, dl.battle_score, u.team_id
+        FROM daily_logs dl
+        JOIN users u ON u.user_id = dl.user_id
+        WHERE dl.id > ? AND dl.id <= ? AND u.team_id IN ({marks})
+        ORDER BY dl.id
+        LIMIT ?
+        """
+        return await self.fetch_all(query, (after_id, upto_id, *team_ids, limit))
+
+    async def get_team_battle_partials(self, team_id: str, start_date: str, end_date: str, upto_id: int) -> List[Dict]:
+        """Per-day log count and battle_score sum of a team's logs with id <= upto_id (for rebuilds)"""
+        query = """
+        SELECT dl.date, COUNT(*) AS log_count, SUM(dl.battle_score) AS battle_score
+        FROM daily_logs dl
+        JOIN users u ON u.user_id = dl.user_id
+        WHERE u.team_id = ? AND dl.date BETWEEN ? AND ? AND dl.id <= ?
+        GROUP BY dl.date
+        """
+        return await self.fetch_all(query, (team_id, str(start_date), str(end_date), upto_id))
+
+    async def write_battle_updates(self, updates: Iterable[battle_partials.BattleUpdate], at: datetime = None,
+                                   fence: leases.Lease = None) -> Dict[str, Dict[str, float]]:
+        """Write a whole aggregation pass (partials, watermarks, scores, history snapshot) in one transaction.
+
+        With fence, the transaction is rejected (LeaseLost) unless that lease is still current.
+        """
+        updates = list(updates)
+        async with self.transaction() as cursor:
+            if fence is not None:
+                await leases.check_fence(cursor, fence)
+            scores = await battle_partials.write_updates(cursor, updates, ADD_BATTLE_PARTIAL_SQL, SET_BATTLE_WATERMARK_SQL)
+            await battle_history.append_snapshots(cursor, updates, scores, UPSERT_BATTLE_HISTORY_SQL, at)
+        for update in updates:
+            await self.cache.invalidate("battle", update.battle_id)
+        return scores
+
+    async def get_battle_score_history(self, battle_id: str, resolution: str, start: str, end: str) -> List[Dict]:
+        """Buckets of one resolution with start <= bucket_start <= end, oldest first (one primary key range read)"""
+        query = """
+        SELECT bucket_start, team_a_score, team_b_score, samples
+        FROM battle_score_history
+        WHERE battle_id = ? AND resolution = ? AND bucket_start BETWEEN ? AND ?
+        ORDER BY bucket_start
+        """
+        return await self.fetch_all(query, (battle_id, resolution, str(start), str(end)))
+
+    # Leaderboard operations
+    async def record_xp(self, user_id: str, team_id: Optional[str], xp: int, source: str = None,
+                        earned_at: datetime = None) -> int:
+        """Append an XP grant to xp_ledger and add it to the user's period buckets (one transaction)"""
+        entry = {"user_id": user_id, "team_id": team_id, "xp": xp, "source": source, "earned_at": earned_at or datetime.utcnow()}
+        async with self.transaction() as cursor:
+            written = await xp_ledger.append_entries(cursor, [entry], ADD_XP_BUCKET_SQL)
+        if written:
+            await self.cache.invalidate_namespace("global_leaderboard")
+            await self.cache.invalidate_namespace("team_leaderboard")
+        return written
+
+    async def grant_xp(self, user_data: Dict, xp: int, source: str = None, earned_at: datetime = None) -> int:
+        """upsert_user with the user's new XP totals plus record_xp for the grant, in one transaction.
+
+        The ledger is the source of truth for period leaderboards, so a grant is never
+        applied to the user row without its ledger entry (or the other way round).
+        """
+        params = _user_params(user_data)
+        entry = {"user_id": user_data.get("user_id"), "team_id": user_data.get("team_id"), "xp": xp, "source": source,
+                 "earned_at": earned_at or datetime.utcnow()}
+        async with self.transaction() as cursor:
+            await cursor.execute(UPSERT_USER_SQL, params)
+            written = await xp_ledger.append_entries(cursor, [entry], ADD_XP_BUCKET_SQL)
+        await self._invalidate_users(user_data.get("user_id"))
+        self._users_written([params])
+        return written
+
+    async def get_global_leaderboard(self, limit: int = 10, period: str = None, start: str = None,
+                                     after: Sequence = None) -> List[Dict]:
+        """Get global leaderboard (read-through cached).
+
+        period None ranks users by (xp, level, user_id); "daily", "weekly" or
+        "monthly" ranks the XP earned in the period starting at start (default:
+        current) by (xp, user_id). after is the key of the previous page's last
+        row (keyset pagination, see services/pagination.py).
+        """
+        if period is not None:
+            start = start or xp_ledger.current_start(period)
+
+            async def load_period():
+                query = xp_ledger.leaderboard_query(team=False, after=after is not None)
+                return await self.fetch_all(query, (period, start, *(after or ()), limit))
+            return await self.cache.get_or_load("global_leaderboard", (limit, period, start, after), load_period)
+
+        async def load():
+            query = f"""
+            SELECT user_id, username, level, xp
+            FROM users
+            {"WHERE " + pagination.after_clause(pagination.LEADERBOARD_KEY) if after is not None else ""}
+            ORDER BY xp DESC, level DESC, user_id DESC
+            LIMIT %s
+            """
+            return await self.fetch_all(query, (*(after or ()), limit))
+        return await self.cache.get_or_load("global_leaderboard", (limit, after), load)
+
+    async def get_team_leaderboard(self, team_id: str, limit: int = 50, period: str = None, start: str = None,
+                                   after: Sequence = None) -> List[Dict]:
+        """Get team leaderboard (read-through cached); period, start and after as in get_global_leaderboard"""
+        if period is not None:
+            start = start or xp_ledger.current_start(period)
+
+            async def load_period():
+                query = xp_ledger.leaderboard_query(team=True, after=after is not None)
+                return await self.fetch_all(query, (period, start, team_id, *(after or ()), limit))
+            return await self.cache.get_or_load("team_leaderboard", (team_id, limit, period, start, after), load_period)
+
+        async def load():
+            query = f"""
+            SELECT user_id, username, level, xp
+            FROM users
+            WHERE team_id = %s{" AND " + pagination.after_clause(pagination.LEADERBOARD_KEY) if after is not None else ""}
+            ORDER BY xp DESC, level DESC, user_id DESC
+            LIMIT %s
+            """
+            return await self.fetch_all(query, (team_id, *(after or ()), limit))
+        return await self.cache.get_or_load("team_leaderboard", (team_id, limit, after), load)
+
+    # Meta operations
+    async def get_meta(self, key: str) -> Optional[str]:
+        """Get meta value by key"""
+        row = await self.fetch_one("SELECT value_data FROM meta WHERE key_name = ?", (key,))
+        return row["value_data"] if row else None
 
     async def set_meta(self, key: str, value: str):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?,?)", (key, value))
-            await db.commit()
-
-    async def get_meta(self, key: str):
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cur = await db.execute("SELECT value FROM meta WHERE key = ?", (key,))
-            row = await cur.fetchone()
-            return row["value"] if row else None
+        """Set meta key-value"""
+        await self.execute(
+            """
+            INSERT INTO meta (key_name, value_data)
+            VALUES (?, ?)
+            ON CONFLICT(key_name) DO UPDATE SET
+                value_data = excluded.value_data,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (key, value),
+        )
+
+    async def insert_meta_if_absent(self, key: str, value: str) -> bool:
+        """Create a meta key; False if it already exists"""
+        async with self.transaction() as cursor:
+            await cursor.execute(INSERT_META_IF_ABSENT_SQL, (key, value))
+            return cursor.rowcount == 1
+
+    async def compare_and_set_meta(self, key: str, expected: str, value: str) -> bool:
+        """Replace a meta value only if it still equals expected (atomic compare-and-set)"""
+        async with self.transaction() as cursor:
+            await cursor.execute(
+                "UPDATE meta SET value_data = %s, updated_at = CURRENT_TIMESTAMP WHERE key_name = %s AND value_data = %s",
+                (value, key, expected),
+            )
+            return cursor.rowcount == 1
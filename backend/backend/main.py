@@ -1,14 +1,64 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from backend.routers import gamification, battles, leaderboard, social_feed, admin, ai_coach, chatbot, notifications, step_milestones
-from backend.database.mysql_client import MySQLClient
-from backend.services import aggregator
+from backend.database.provider import init_db, close_db
+from backend.services import aggregator, team_timeline
+from backend.services.analysis_pool import init_analysis_pool, close_analysis_pool
+from backend.services.battle_live import get_battle_broadcaster, close_battle_broadcaster
+from backend.services.fcm_service import get_fcm_service
+from backend.services.id_generator import get_id_generator, close_id_generator
+from backend.services.leases import LeaseManager
+from backend.services.notification_scheduler import NotificationScheduler
+from backend.services.post_counters import get_post_counters, close_post_counters
+from backend.services.rank_index import get_rank_index, close_rank_index
 import asyncio
 import logging
+import os
 from fastapi.responses import RedirectResponse, HTMLResponse
 
 logger = logging.getLogger("backend")
 
-app = FastAPI(title="Vital Quest Backend", version="2.0", description="Backend with AI Coach & Gamification")
+# "1" runs the aggregation, inactivity and team timeline jobs in this process; safe with any
+# number of workers, each job is leased to exactly one of them (services/leases.py)
+BACKGROUND_JOBS = os.getenv("BACKGROUND_JOBS", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared database pool, analysis worker processes, live broadcaster, rank index and post counters on startup, close them on shutdown"""
+    db = await init_db()
+    await get_id_generator().attach(db)
+    await init_analysis_pool()
+    get_battle_broadcaster().attach(db)
+    await get_rank_index().attach(db)
+    get_post_counters().attach(db)
+    await get_fcm_service().initialize_db(db)
+    jobs = []
+    if BACKGROUND_JOBS:
+        leases = LeaseManager(db)
+        jobs = aggregator.aggregation_jobs(db, leases) + [
+            NotificationScheduler(db, get_fcm_service()).inactivity_job(leases),
+            team_timeline.timeline_job(db, leases),
+        ]
+        jobs = [asyncio.create_task(job.run_forever()) for job in jobs]
+        logger.info(f"✓ {len(jobs)} leased background jobs started ({leases.owner})")
+    logger.info("✓ Backend startup complete")
+    try:
+        yield
+    finally:
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        # flush buffered like/comment counts while the pool is still open
+        await close_post_counters()
+        await close_battle_broadcaster()
+        await close_rank_index()
+        await close_id_generator()
+        await close_analysis_pool()
+        await close_db()
+
+
+app = FastAPI(title="Vital Quest Backend", version="2.0", description="Backend with AI Coach & Gamification", lifespan=lifespan)
 
 app.include_router(gamification.router, prefix="/gamification", tags=["Gamification"])
 app.include_router(battles.router, prefix="/battles", tags=["Battles"])
@@ -21,11 +71,6 @@ app.include_router(notifications.router, prefix="/notifications", tags=["Notific
 app.include_router(step_milestones.router, prefix="/step-milestones", tags=["Step Milestones"])
 
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("✓ Backend startup complete")
-
-
 @app.get("/health")
 async def health():
     return {"status": "ok", "message": "vital_quest backend running"}
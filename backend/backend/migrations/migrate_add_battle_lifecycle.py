@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add battle_archive and battle lifecycle states
+Creates the table (SQLite creates it on client init), marks active battles
+that haven't started yet as scheduled, and runs one lifecycle sweep so
+battles that already ended are archived with their final scores.
+"""
+
+import asyncio
+from datetime import datetime
+from backend.database.mysql_client import MySQLClient
+from backend.database.provider import create_client
+from backend.services import battle_lifecycle
+
+MYSQL_TABLE = """
+CREATE TABLE IF NOT EXISTS battle_archive (
+    battle_id VARCHAR(255) PRIMARY KEY,
+    team_a_id VARCHAR(255) NOT NULL,
+    team_b_id VARCHAR(255) NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    final_scores JSON,
+    winner VARCHAR(255),
+    completed_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+async def migrate():
+    """Create battle_archive, schedule future battles and archive ended ones"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        if isinstance(db, MySQLClient):
+            print("[MIGRATING] Creating battle_archive...")
+            await db.execute(MYSQL_TABLE)
+
+        print("[MIGRATING] Marking battles that haven't started as scheduled...")
+        async with db.transaction() as cursor:
+            await cursor.execute(
+                "UPDATE battles SET status = %s WHERE status = %s AND start_date > %s",
+                (battle_lifecycle.SCHEDULED, battle_lifecycle.ACTIVE, str(datetime.utcnow().date())),
+            )
+            print(f"[SUCCESS] {cursor.rowcount} battles scheduled")
+
+        print("[MIGRATING] Archiving battles that already ended...")
+        result = await battle_lifecycle.sweep_once(db)
+        print(f"[SUCCESS] {len(result['completed'])} battles completed and archived")
+        print("\n[MIGRATION COMPLETE] Battle lifecycle ready for use")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" BATTLE LIFECYCLE MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add battle_score_history
+Creates the table (SQLite creates it on client init). History starts with
+the next aggregation pass; past scores are not backfilled.
+"""
+
+import asyncio
+from backend.database.mysql_client import MySQLClient
+from backend.database.provider import create_client
+
+MYSQL_TABLE = """
+CREATE TABLE IF NOT EXISTS battle_score_history (
+    battle_id VARCHAR(255) NOT NULL,
+    resolution ENUM('minute', 'hour', 'day') NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    team_a_score DOUBLE DEFAULT 0,
+    team_b_score DOUBLE DEFAULT 0,
+    samples INT DEFAULT 1,
+    PRIMARY KEY (battle_id, resolution, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+async def migrate():
+    """Create the battle score history table"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        if isinstance(db, MySQLClient):
+            print("[MIGRATING] Creating battle_score_history...")
+            await db.execute(MYSQL_TABLE)
+
+        print("\n[MIGRATION COMPLETE] Battle score history is recorded from the next aggregation pass")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" BATTLE SCORE HISTORY MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add materialized metric columns to daily_logs
+Adds total_steps, deep_sleep_minutes, total_sleep_minutes, active_calories,
+workout_score, battle_score and workout_count, then backfills them from the
+JSON `data` of existing rows. New rows get them from the insert path.
+"""
+
+import asyncio
+import json
+from backend.database.provider import create_client
+from backend.services.log_metrics import METRIC_COLUMNS, metric_params
+
+COLUMN_TYPES = {
+    "total_steps": "INT DEFAULT 0",
+    "deep_sleep_minutes": "INT DEFAULT 0",
+    "total_sleep_minutes": "INT DEFAULT 0",
+    "active_calories": "FLOAT DEFAULT 0",
+    "workout_score": "FLOAT DEFAULT 0",
+    "battle_score": "FLOAT DEFAULT 0",
+    "workout_count": "INT DEFAULT 0",
+}
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+async def _has_column(db, column: str) -> bool:
+    try:
+        await db.fetch_one(f"SELECT {column} FROM daily_logs LIMIT 1")
+        return True
+    except Exception:
+        return False
+
+
+async def migrate():
+    """Add metric columns to daily_logs and backfill them"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        for column in METRIC_COLUMNS:
+            if await _has_column(db, column):
+                print(f"[INFO] daily_logs.{column} already exists")
+                continue
+            print(f"[MIGRATING] Adding daily_logs.{column}...")
+            await db.execute(f"ALTER TABLE daily_logs ADD COLUMN {column} {COLUMN_TYPES[column]}")
+
+        print("[MIGRATING] Backfilling metric columns from JSON data...")
+        update_query = f"""
+            UPDATE daily_logs
+            SET {", ".join(f"{c} = %s" for c in METRIC_COLUMNS)}
+            WHERE id = %s
+        """
+        total = 0
+        updates = []
+        async for batch in db.iter_rows("SELECT id, data FROM daily_logs", batch_size=BACKFILL_BATCH_SIZE):
+            for row in batch:
+                data = row["data"]
+                try:
+                    log = json.loads(data) if isinstance(data, str) else (data or {})
+                except Exception:
+                    log = {}
+                updates.append(metric_params(log) + (row["id"],))
+            if len(updates) >= BACKFILL_BATCH_SIZE:
+                total += len(updates)
+                pending, updates = updates, []
+                await db.execute_many(update_query, pending)
+                print(f"[MIGRATING] {total} rows backfilled")
+        if updates:
+            total += len(updates)
+            await db.execute_many(update_query, updates)
+
+        print(f"[SUCCESS] Backfilled {total} daily_logs rows")
+        print("\n[MIGRATION COMPLETE] daily_logs metric columns ready for use")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" DAILY LOG METRIC COLUMNS MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add user_daily_summary and team_daily_summary rollups
+Creates the tables (SQLite creates them on client init) and backfills them
+from daily_logs with the same reconcile job exposed at /admin/reconcile-summaries.
+"""
+
+import asyncio
+from backend.database.mysql_client import MySQLClient
+from backend.database.provider import create_client
+from backend.services.daily_summary import reconcile_daily_summaries
+
+MYSQL_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS user_daily_summary (
+        user_id VARCHAR(255) NOT NULL,
+        date DATE NOT NULL,
+        team_id VARCHAR(255),
+        total_steps INT DEFAULT 0,
+        deep_sleep_minutes INT DEFAULT 0,
+        total_sleep_minutes INT DEFAULT 0,
+        active_calories FLOAT DEFAULT 0,
+        workout_score FLOAT DEFAULT 0,
+        battle_score FLOAT DEFAULT 0,
+        workout_count INT DEFAULT 0,
+        recovery_score FLOAT NULL,
+        activity_counts JSON,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, date),
+        INDEX idx_team_date (team_id, date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS team_daily_summary (
+        team_id VARCHAR(255) NOT NULL,
+        date DATE NOT NULL,
+        log_count INT DEFAULT 0,
+        total_steps BIGINT DEFAULT 0,
+        deep_sleep_minutes BIGINT DEFAULT 0,
+        total_sleep_minutes BIGINT DEFAULT 0,
+        active_calories DOUBLE DEFAULT 0,
+        workout_score DOUBLE DEFAULT 0,
+        battle_score DOUBLE DEFAULT 0,
+        workout_count INT DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (team_id, date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+]
+
+
+async def migrate():
+    """Create the daily rollup tables and backfill them"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        if isinstance(db, MySQLClient):
+            print("[MIGRATING] Creating user_daily_summary and team_daily_summary...")
+            for ddl in MYSQL_TABLES:
+                await db.execute(ddl)
+
+        print("[MIGRATING] Backfilling rollups from daily_logs...")
+        result = await reconcile_daily_summaries(db)
+        print(f"[SUCCESS] {result['user_rows']} user rows, {result['team_rows']} team rows")
+        print("\n[MIGRATION COMPLETE] Daily rollups ready for use")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" DAILY ROLLUP TABLES MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
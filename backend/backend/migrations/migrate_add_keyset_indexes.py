@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add keyset pagination indexes
+Adds the indexes the cursor-paged listings seek on (SQLite creates them on
+client init):
+
+- users (xp, level, user_id) and (team_id, xp, level, user_id): leaderboards
+- step_milestones (user_id, milestone_steps, notified_at): milestone history
+"""
+
+import asyncio
+from backend.database.mysql_client import MySQLClient
+from backend.database.provider import create_client
+
+MYSQL_INDEXES = [
+    ("users", "idx_rank", "(xp, level, user_id)"),
+    ("users", "idx_team_rank", "(team_id, xp, level, user_id)"),
+    ("step_milestones", "idx_user_page", "(user_id, milestone_steps, notified_at)"),
+]
+
+
+async def migrate():
+    """Create the keyset pagination indexes that don't exist yet"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        if isinstance(db, MySQLClient):
+            for table, name, columns in MYSQL_INDEXES:
+                exists = await db.fetch_one(
+                    """
+                    SELECT COUNT(*) AS count FROM information_schema.statistics
+                    WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+                    """,
+                    (table, name),
+                )
+                if exists and exists.get("count", 0) > 0:
+                    print(f"[INFO] {table}.{name} already exists")
+                    continue
+                print(f"[MIGRATING] Creating {table}.{name} {columns}...")
+                await db.execute(f"CREATE INDEX {name} ON {table} {columns}")
+
+        print("\n[MIGRATION COMPLETE] Keyset pagination indexes ready")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" KEYSET PAGINATION INDEX MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add post like/comment counters, post_likes and post_comments
+Adds social_feed.likes and social_feed.comments_count (both backends) and
+creates post_likes and post_comments (SQLite creates them on client init).
+Posts had no stored likes or comments before, so every count starts at zero.
+"""
+
+import asyncio
+from backend.database.mysql_client import MySQLClient
+from backend.database.provider import create_client
+
+COLUMN_TYPES = {
+    "likes": "INT DEFAULT 0",
+    "comments_count": "INT DEFAULT 0",
+}
+
+MYSQL_TABLES = {"post_comments": """
+CREATE TABLE IF NOT EXISTS post_comments (
+    comment_id VARCHAR(64) PRIMARY KEY,
+    post_id VARCHAR(255) NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    text TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_post_comments_post (post_id, comment_id),
+    FOREIGN KEY (post_id) REFERENCES social_feed(post_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+""", "post_likes": """
+CREATE TABLE IF NOT EXISTS post_likes (
+    post_id VARCHAR(255) NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (post_id, user_id),
+    FOREIGN KEY (post_id) REFERENCES social_feed(post_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""}
+
+
+async def _has_column(db, column: str) -> bool:
+    try:
+        await db.fetch_one(f"SELECT {column} FROM social_feed LIMIT 1")
+        return True
+    except Exception:
+        return False
+
+
+async def migrate():
+    """Add the counter columns and the like/comment tables"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        for column, column_type in COLUMN_TYPES.items():
+            if await _has_column(db, column):
+                print(f"[INFO] social_feed.{column} already exists")
+                continue
+            print(f"[MIGRATING] Adding social_feed.{column}...")
+            await db.execute(f"ALTER TABLE social_feed ADD COLUMN {column} {column_type}")
+
+        if isinstance(db, MySQLClient):
+            for table, ddl in MYSQL_TABLES.items():
+                print(f"[MIGRATING] Creating {table}...")
+                await db.execute(ddl)
+
+        print("\n[MIGRATION COMPLETE] Likes and comments are counted from now on")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" POST COUNTERS MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
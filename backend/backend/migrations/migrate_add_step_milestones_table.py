@@ -48,7 +48,8 @@ async def migrate():
                 notified_at DATETIME NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 INDEX idx_user_milestone (user_id, milestone_steps),
-                INDEX idx_user_date (user_id, notified_at)
+                INDEX idx_user_date (user_id, notified_at),
+                INDEX idx_user_page (user_id, milestone_steps, notified_at)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
         """
         
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add team_timeline
+Creates the per-team social feed timeline (SQLite creates it on client
+init) and fans every existing post out to its author's current team.
+New posts are fanned out as they are inserted.
+"""
+
+import asyncio
+from backend.database.mysql_client import MySQLClient
+from backend.database.provider import create_client
+
+MYSQL_TABLE = """
+CREATE TABLE IF NOT EXISTS team_timeline (
+    team_id VARCHAR(255) NOT NULL,
+    timestamp DATETIME NOT NULL,
+    post_id VARCHAR(255) NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    PRIMARY KEY (team_id, timestamp, post_id),
+    INDEX idx_team_timeline_user (user_id),
+    INDEX idx_team_timeline_post (post_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+async def migrate():
+    """Create team_timeline and backfill it from social_feed"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        if isinstance(db, MySQLClient):
+            print("[MIGRATING] Creating team_timeline...")
+            await db.execute(MYSQL_TABLE)
+
+        print("[MIGRATING] Fanning out existing posts...")
+        rebuilt = await db.rebuild_team_timelines()
+        print(f"\n[MIGRATION COMPLETE] Team timelines built for {rebuilt} users")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" TEAM TIMELINE MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Add xp_ledger and xp_buckets
+Creates both tables (SQLite creates them on client init). Period
+leaderboards count XP granted from now on; past grants were never recorded
+individually, so there is nothing to backfill.
+"""
+
+import asyncio
+from backend.database.mysql_client import MySQLClient
+from backend.database.provider import create_client
+
+MYSQL_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS xp_ledger (
+        entry_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(255) NOT NULL,
+        team_id VARCHAR(255),
+        xp INT NOT NULL,
+        source VARCHAR(64),
+        earned_at DATETIME NOT NULL,
+        INDEX idx_xp_ledger_user (user_id, earned_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS xp_buckets (
+        period ENUM('daily', 'weekly', 'monthly') NOT NULL,
+        period_start DATE NOT NULL,
+        user_id VARCHAR(255) NOT NULL,
+        team_id VARCHAR(255),
+        xp BIGINT DEFAULT 0,
+        PRIMARY KEY (period, period_start, user_id),
+        INDEX idx_xp_buckets_rank (period, period_start, xp),
+        INDEX idx_xp_buckets_team_rank (team_id, period, period_start, xp)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+]
+
+
+async def migrate():
+    """Create the XP ledger and period bucket tables"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        if isinstance(db, MySQLClient):
+            print("[MIGRATING] Creating xp_ledger and xp_buckets...")
+            for sql in MYSQL_TABLES:
+                await db.execute(sql)
+
+        print("\n[MIGRATION COMPLETE] Period leaderboards count XP granted from now on")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" XP LEDGER MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Canonical social_feed content
+Rewrites post content that does not decode in a single JSON parse into the
+canonical form of services/social_posts.py: Python reprs stored by the old
+level-up post path (SQLite only; MySQL's JSON column rejected them) and
+double-encoded JSON strings. Rows that already decode are left alone.
+"""
+
+import asyncio
+from backend.database.provider import create_client
+from backend.services import social_posts
+
+
+async def migrate():
+    """Re-encode non-canonical post content"""
+    db = create_client()
+
+    try:
+        await db.init()
+        print(f"[DATABASE] Connected ({type(db).__name__})")
+
+        print("[MIGRATING] Scanning social_feed content...")
+        scanned, repairs = 0, []
+        async for batch in db.iter_rows("SELECT post_id, content FROM social_feed"):
+            for row in batch:
+                scanned += 1
+                canonical = social_posts.repair_content(row["content"])
+                if canonical is not None:
+                    repairs.append((canonical, row["post_id"]))
+        if repairs:
+            await db.execute_many("UPDATE social_feed SET content = %s WHERE post_id = %s", repairs)
+
+        print(f"\n[MIGRATION COMPLETE] {len(repairs)} of {scanned} posts re-encoded")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    finally:
+        await db.close()
+        print("[DATABASE] Connection closed")
+
+if __name__ == "__main__":
+    print("="*80)
+    print(" CANONICAL POST CONTENT MIGRATION")
+    print("="*80)
+    print()
+
+    asyncio.run(migrate())
@@ -1,30 +1,129 @@
-from fastapi import APIRouter, HTTPException
-from backend.services import aggregator
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from backend.services import aggregator, battle_lifecycle, daily_summary, leases
 from backend.database.mysql_client import MySQLClient
+from backend.database.provider import get_db
+from backend.services.analysis_pool import AnalysisPool, get_analysis_pool
+from backend.services.battle_live import BattleBroadcaster, get_battle_broadcaster
+from backend.services.post_counters import CounterBuffer, get_post_counters
+from backend.services.rank_index import RankIndex, get_rank_index
 
 router = APIRouter()
 
-# Global db instance
-_db_instance = None
-
-async def get_db():
-    """Get or create database client"""
-    global _db_instance
-    if _db_instance is None:
-        _db_instance = MySQLClient()
-        if _db_instance.pool is None:
-            await _db_instance.init()
-    return _db_instance
-
 @router.post("/aggregate-now")
-async def aggregate_now():
-    """Trigger a single aggregation run (admin/testing only)."""
+async def aggregate_now(full: bool = False, db: MySQLClient = Depends(get_db)):
+    """Trigger a single aggregation run (admin/testing only). full=true rebuilds every active battle."""
     try:
-        print(f"[ADMIN] Triggering aggregation...")
-        db = await get_db()
-        await aggregator.aggregate_once(db)
+        print(f"[ADMIN] Triggering {'full' if full else 'incremental'} aggregation...")
+        result = await aggregator.aggregate_once(db, full=full)
         print(f"[ADMIN] Aggregation completed successfully")
-        return {"status": "aggregated", "message": "Data aggregated and saved to MySQL"}
+        return {"status": "aggregated", "message": "Data aggregated and saved to MySQL", **result}
     except Exception as e:
         print(f"[ADMIN] Aggregation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/pool-stats")
+async def pool_stats(db: MySQLClient = Depends(get_db)):
+    """Live connection pool counters (in-use, idle, waiters, acquire latency)."""
+    return {"status": "ok", "pool": db.pool_stats()}
+
+
+@router.get("/db-stats")
+async def db_stats(limit: int = 50, db: MySQLClient = Depends(get_db)):
+    """Per-statement latency histograms (by query fingerprint and caller), slow query log, pool and cache counters."""
+    return {
+        "status": "ok",
+        "queries": db.query_stats.snapshot(limit),
+        "pool": db.pool_stats(),
+        "cache": db.cache.stats(),
+    }
+
+
+@router.post("/db-stats/reset")
+async def reset_db_stats(slow_query_ms: Optional[float] = None, db: MySQLClient = Depends(get_db)):
+    """Clear query aggregates and the slow query log; optionally change the slow query threshold."""
+    db.query_stats.reset()
+    if slow_query_ms is not None:
+        db.query_stats.slow_query_ms = slow_query_ms
+    print(f"[ADMIN] DB stats reset (slow query threshold {db.query_stats.slow_query_ms}ms)")
+    return {"status": "reset", "slow_query_ms": db.query_stats.slow_query_ms}
+
+
+@router.get("/cache-stats")
+async def cache_stats(db: MySQLClient = Depends(get_db)):
+    """Query cache hit/miss counters, overall and per namespace."""
+    return {"status": "ok", "cache": db.cache.stats()}
+
+
+@router.post("/cache-stats/reset")
+async def reset_cache_stats(db: MySQLClient = Depends(get_db)):
+    """Zero the query cache counters (entries are kept)."""
+    db.cache.reset_stats()
+    return {"status": "reset"}
+
+
+@router.post("/sweep-battles")
+async def sweep_battles(db: MySQLClient = Depends(get_db)):
+    """Run the battle lifecycle sweep now: activate started battles, archive ended ones."""
+    try:
+        print("[ADMIN] Sweeping battle lifecycle...")
+        result = await battle_lifecycle.sweep_once(db)
+        return {"status": "swept", **result}
+    except Exception as e:
+        print(f"[ADMIN] Battle sweep error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/leases")
+async def list_leases(db: MySQLClient = Depends(get_db)):
+    """Background job leases: which process holds each job, its fencing token and expiry."""
+    return {"status": "ok", "leases": await leases.list_leases(db)}
+
+
+@router.get("/analysis-pool-stats")
+async def analysis_pool_stats(pool: AnalysisPool = Depends(get_analysis_pool)):
+    """Analysis process pool: in-flight/queued tasks, inline vs offloaded counts, timeouts and latency."""
+    return {"status": "ok", "analysis_pool": pool.stats()}
+
+
+@router.get("/battle-live-stats")
+async def battle_live_stats(broadcaster: BattleBroadcaster = Depends(get_battle_broadcaster)):
+    """Live battle streams: watched battles, subscribers, score computations, events fanned out and dropped."""
+    return {"status": "ok", "battle_live": broadcaster.stats()}
+
+
+@router.get("/post-counter-stats")
+async def post_counter_stats(counters: CounterBuffer = Depends(get_post_counters)):
+    """Like/comment counter buffer: posts with unflushed deltas, increments taken, flushes and rows written."""
+    return {"status": "ok", "post_counters": counters.stats()}
+
+
+@router.post("/reconcile-rank-index")
+async def reconcile_rank_index(index: RankIndex = Depends(get_rank_index), db: MySQLClient = Depends(get_db)):
+    """Rebuild the in-process leaderboard rank index from users now; reports how many entries had drifted."""
+    return {"status": "reconciled", "rank_index": await index.reconcile(db)}
+
+
+@router.post("/rebuild-team-timelines")
+async def rebuild_team_timelines(user_id: Optional[str] = None, db: MySQLClient = Depends(get_db)):
+    """Re-fan-out posts to their authors' current teams: one user, or every user whose timeline rows are stale."""
+    try:
+        print(f"[ADMIN] Rebuilding team timelines ({user_id or 'stale users'})...")
+        rebuilt = await db.rebuild_team_timelines([user_id] if user_id else None)
+        return {"status": "rebuilt", "users": rebuilt}
+    except Exception as e:
+        print(f"[ADMIN] Timeline rebuild error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/reconcile-summaries")
+async def reconcile_summaries(start_date: Optional[str] = None, end_date: Optional[str] = None, db: MySQLClient = Depends(get_db)):
+    """Rebuild user/team daily rollups from daily_logs (whole table, or a date range)."""
+    try:
+        print(f"[ADMIN] Reconciling daily summaries ({start_date or 'start'} .. {end_date or 'end'})...")
+        result = await daily_summary.reconcile_daily_summaries(db, start_date, end_date)
+        return {"status": "reconciled", **result}
+    except Exception as e:
+        print(f"[ADMIN] Reconcile error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,51 +3,84 @@
 AI Coach Router - Endpoints for AI Feedback and Analysis
 """
 
-from fastapi import APIRouter, HTTPException, Body
-from datetime import date
+from fastapi import APIRouter, HTTPException, Body, Depends, Query, Request
+from fastapi.exceptions import RequestValidationError
+from datetime import date, timedelta
 from backend.models.schemas import DailyLog
-from backend.app.logic import calculate_recovery_score, calculate_battle_score, calculate_weekly_stats
+from backend.app.logic import calculate_recovery_score, calculate_battle_score, calculate_weekly_stats, calculate_weekly_stats_from_summaries
+from backend.database.mysql_client import MySQLClient
+from backend.database.provider import get_db
 from backend.services.ai_service import get_coach_feedback
+from backend.services.analysis_pool import AnalysisPool, AnalysisPoolBusy, AnalysisTimeout, get_analysis_pool, run_analysis
 import asyncio
 
 router = APIRouter()
 
-@router.post("/analyze/recovery")
-def analyze_recovery(log: DailyLog):
+
+# The /analyze/* bodies are read raw so that large payloads are validated in
+# the analysis worker, not on the event loop; the schemas stay in the docs.
+def _body_schema(schema: dict) -> dict:
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+DAILY_LOG_BODY = _body_schema({"$ref": "#/components/schemas/DailyLog"})
+DAILY_LOG_LIST_BODY = _body_schema({"type": "array", "items": {"$ref": "#/components/schemas/DailyLog"}})
+
+
+async def _analyze(request: Request, pool: AnalysisPool, kind: str) -> dict:
+    """Run an analysis on the thread pool or the process pool; invalid bodies are 422, pool errors 503/504"""
+    body = await request.body()
+    try:
+        outcome = await pool.run(run_analysis, kind, body, size=len(body))
+    except AnalysisPoolBusy as e:
+        raise HTTPException(status_code=503, detail=f"Analysis pool busy: {e}")
+    except AnalysisTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    if "errors" in outcome:
+        raise RequestValidationError(outcome["errors"])
+    return outcome
+
+
+@router.post("/analyze/recovery", openapi_extra=DAILY_LOG_BODY)
+async def analyze_recovery(request: Request, pool: AnalysisPool = Depends(get_analysis_pool)):
     """
     Analyze recovery score based on daily log data.
     
     Returns recovery metrics and status.
     """
     try:
-        result = calculate_recovery_score(log)
+        outcome = await _analyze(request, pool, "recovery")
+        result = outcome["result"]
         
         print(f"\n[RECOVERY ANALYSIS]")
-        print(f"  Date: {log.date}")
+        print(f"  Date: {outcome['date']}")
         print(f"  Recovery Score: {result['score']}/100")
         print(f"  Status: {result['status']}")
         print(f"  Deep Sleep: {result['deep_sleep_minutes']} minutes")
-        print(f"  RHR: {result['rhr']:.1f if result['rhr'] else 'N/A'} bpm")
+        rhr = f"{result['rhr']:.1f}" if result['rhr'] else "N/A"
+        print(f"  RHR: {rhr} bpm")
         print(f"  Physical Recovery Low: {result['physical_recovery_low']}")
         print()
         
         return result
+    except (HTTPException, RequestValidationError):
+        raise
     except Exception as e:
         print(f"[RECOVERY ANALYSIS] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/analyze/battle")
-def analyze_battle(log: DailyLog):
+@router.post("/analyze/battle", openapi_extra=DAILY_LOG_BODY)
+async def analyze_battle(request: Request, pool: AnalysisPool = Depends(get_analysis_pool)):
     """
     Analyze battle score based on daily activity.
     
     Formula: BattleScore = (Steps * 0.05) + (DeepSleep * 5) + WorkoutScore
     """
     try:
-        result = calculate_battle_score(log)
+        outcome = await _analyze(request, pool, "battle")
+        result = outcome["result"]
         
         print(f"\n[BATTLE ANALYSIS]")
-        print(f"  Date: {log.date}")
+        print(f"  Date: {outcome['date']}")
         print(f"  Total Battle Score: {result['total_score']:.2f}")
         print(f"  Breakdown:")
         print(f"    - Steps ({result['breakdown']['steps_points']:.2f}): {result['total_steps']} steps")
@@ -56,6 +89,8 @@ def analyze_battle(log: DailyLog):
         print()
         
         return result
+    except (HTTPException, RequestValidationError):
+        raise
     except Exception as e:
         print(f"[BATTLE ANALYSIS] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -145,13 +180,13 @@ async def ai_coach_postworkout(log: DailyLog):
         print(f"[AI COACH - POST-WORKOUT] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/analyze/weekly")
-def analyze_weekly(logs: list[DailyLog]):
+@router.post("/analyze/weekly", openapi_extra=DAILY_LOG_LIST_BODY)
+async def analyze_weekly(request: Request, pool: AnalysisPool = Depends(get_analysis_pool)):
     """
     Analyze weekly statistics from a list of daily logs.
     """
     try:
-        result = calculate_weekly_stats(logs)
+        result = (await _analyze(request, pool, "weekly"))["result"]
         
         print(f"\n[WEEKLY ANALYSIS]")
         print(f"  Period: {result['period_days']} days")
@@ -162,6 +197,27 @@ def analyze_weekly(logs: list[DailyLog]):
         print(f"  Avg Recovery: {result['avg_recovery_score']}/100")
         print()
         
+        return result
+    except (HTTPException, RequestValidationError):
+        raise
+    except Exception as e:
+        print(f"[WEEKLY ANALYSIS] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analyze/weekly/{user_id}")
+async def analyze_weekly_for_user(user_id: str, days: int = Query(7, ge=1, le=90), db: MySQLClient = Depends(get_db)):
+    """
+    Weekly statistics for a stored user, from their daily rollup rows
+    (user_daily_summary) instead of posting every DailyLog.
+    """
+    try:
+        end = date.today()
+        start = end - timedelta(days=days - 1)
+        summaries = await db.get_user_daily_summaries(user_id, str(start), str(end))
+        result = calculate_weekly_stats_from_summaries(summaries)
+        
+        print(f"\n[WEEKLY ANALYSIS] {user_id}: {len(summaries)} days from rollups")
+        
         return result
     except Exception as e:
         print(f"[WEEKLY ANALYSIS] Error: {str(e)}")
@@ -1,26 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from backend.models.schemas import BattleCreate
 from backend.database.mysql_client import MySQLClient
+from backend.database.provider import get_db
+from backend.services import battle_history, battle_lifecycle
+from backend.services.battle_live import BattleBroadcaster, get_battle_broadcaster
 
 router = APIRouter()
 
-# Global db instance
-_db_instance = None
-
-async def get_db():
-    """Get or create database client"""
-    global _db_instance
-    if _db_instance is None:
-        _db_instance = MySQLClient()
-        if _db_instance.pool is None:
-            await _db_instance.init()
-    return _db_instance
-
 
 @router.post("/create")
-async def create_battle(battle: BattleCreate):
+async def create_battle(battle: BattleCreate, db: MySQLClient = Depends(get_db)):
     try:
-        db = await get_db()
         battle_id = f"battle_{battle.team_a_id}_{battle.team_b_id}_{battle.start_date}"
         
         print(f"[BATTLES] Creating battle: {battle_id}")
@@ -32,18 +25,18 @@ async def create_battle(battle: BattleCreate):
             battle.start_date,
             battle.end_date,
         )
+        status = battle_lifecycle.initial_status(battle.start_date)
         
-        print(f"[BATTLES] Battle created successfully: {battle_id}")
-        return {"battle_id": battle_id, "status": "active", "message": "Battle saved to MySQL"}
+        print(f"[BATTLES] Battle created successfully: {battle_id} ({status})")
+        return {"battle_id": battle_id, "status": status, "message": "Battle saved to MySQL"}
     except Exception as e:
         print(f"[BATTLES] Error creating battle: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{battle_id}/leaderboard")
-async def get_battle_leaderboard(battle_id: str):
+async def get_battle_leaderboard(battle_id: str, db: MySQLClient = Depends(get_db)):
     try:
-        db = await get_db()
         print(f"[BATTLES] Fetching battle: {battle_id}")
         
         battle = await db.get_battle(battle_id)
@@ -59,7 +52,74 @@ async def get_battle_leaderboard(battle_id: str):
             teams.append({"team_id": team_id, "battle_score": score, "rank": rank})
             rank += 1
 
-        return {"battle_id": battle_id, "teams": teams, "message": "Data retrieved from MySQL"}
+        return {
+            "battle_id": battle_id,
+            "status": battle.get("status"),
+            "winner": battle.get("winner"),
+            "teams": teams,
+            "message": "Data retrieved from MySQL",
+        }
     except Exception as e:
         print(f"[BATTLES] Error fetching leaderboard: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{battle_id}/history")
+async def get_battle_history(
+    battle_id: str,
+    resolution: str = "auto",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    db: MySQLClient = Depends(get_db),
+):
+    """Score time series for a momentum chart: minute, hour or day buckets (auto picks from the range).
+
+    start/end are ISO dates or datetimes (UTC); they default to the battle start and now.
+    """
+    if resolution != "auto" and resolution not in battle_history.RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be auto or one of {', '.join(battle_history.RESOLUTIONS)}")
+    battle = await db.get_battle(battle_id)
+    if not battle:
+        raise HTTPException(status_code=404, detail="Battle not found")
+    try:
+        range_start = battle_history.parse_time(start or battle["start_date"])
+        range_end = battle_history.parse_time(end) if end else datetime.utcnow()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid start/end: {e}")
+
+    if resolution == "auto":
+        resolution = battle_history.choose_resolution(range_start, range_end)
+    rows = await db.get_battle_score_history(
+        battle_id,
+        resolution,
+        battle_history.bucket_start(range_start, resolution),
+        range_end.strftime(battle_history.BUCKET_FORMAT),
+    )
+    return battle_history.to_series(battle, resolution, rows)
+
+
+@router.get("/{battle_id}/live")
+async def stream_battle_live(
+    battle_id: str,
+    db: MySQLClient = Depends(get_db),
+    broadcaster: BattleBroadcaster = Depends(get_battle_broadcaster),
+):
+    """Server-Sent Events stream of live scores: a snapshot, then one `score` event per change"""
+    battle = await db.get_battle(battle_id)
+    if not battle:
+        raise HTTPException(status_code=404, detail="Battle not found")
+
+    sub = await broadcaster.subscribe(battle)
+
+    async def events():
+        try:
+            while True:
+                yield await sub.queue.get()
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
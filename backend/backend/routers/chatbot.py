@@ -3,26 +3,17 @@
 Chatbot Router - Personalized AI chatbot endpoints
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timedelta
 
 from backend.services.personalized_chatbot import PersonalizedChatbot
 from backend.database.mysql_client import MySQLClient
-import os
+from backend.database.provider import get_db
 
 router = APIRouter()
 
-# Database configuration
-db = MySQLClient(
-    host=os.getenv("MYSQL_HOST", "127.0.0.1"),
-    user=os.getenv("MYSQL_USER", "root"),
-    password=os.getenv("MYSQL_PASSWORD", "Abhijit@2005"),
-    database=os.getenv("MYSQL_DB", "vital_quest"),
-    port=int(os.getenv("MYSQL_PORT", 3306))
-)
-
 # Store active chatbot sessions (in production, use Redis or similar)
 chatbot_sessions = {}
 
@@ -40,20 +31,8 @@ class InitChatbotRequest(BaseModel):
     user_id: str
     days_history: Optional[int] = 365  # Load last N days of data
 
-@router.on_event("startup")
-async def startup():
-    """Initialize database connection"""
-    await db.init()
-    print("[CHATBOT ROUTER] Database connection initialized")
-
-@router.on_event("shutdown")
-async def shutdown():
-    """Close database connection"""
-    await db.close()
-    print("[CHATBOT ROUTER] Database connection closed")
-
 @router.post("/chatbot/init", tags=["AI Chatbot"])
-async def initialize_chatbot(request: InitChatbotRequest):
+async def initialize_chatbot(request: InitChatbotRequest, db: MySQLClient = Depends(get_db)):
     """
     Initialize personalized chatbot for a user by loading their health history
     """
@@ -71,12 +50,21 @@ async def initialize_chatbot(request: InitChatbotRequest):
         
         # Load user's daily logs
         print(f"[CHATBOT API] Loading {request.days_history} days of health data...")
-        daily_logs = await db.get_daily_logs_for_user_range(
+        daily_logs = await db.get_daily_metrics_for_user_range(
             request.user_id,
             start_date.isoformat(),
             end_date.isoformat()
         )
         
+        # Workouts are only decoded for the 30 most recent logs the context summarizes
+        workouts = []
+        if daily_logs:
+            workouts = await db.get_workouts_for_user_range(
+                request.user_id,
+                str(daily_logs[:30][-1]["date"]),
+                end_date.isoformat()
+            )
+        
         # Create chatbot instance
         chatbot = PersonalizedChatbot(
             user_id=request.user_id,
@@ -84,7 +72,7 @@ async def initialize_chatbot(request: InitChatbotRequest):
         )
         
         # Load user context
-        chatbot.load_user_context(daily_logs, user_profile=user)
+        chatbot.load_user_context(daily_logs, user_profile=user, workouts=workouts)
         
         # Store session
         chatbot_sessions[request.user_id] = chatbot
@@ -107,7 +95,7 @@ async def initialize_chatbot(request: InitChatbotRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/chatbot/chat", response_model=ChatResponse, tags=["AI Chatbot"])
-async def chat_with_bot(request: ChatRequest):
+async def chat_with_bot(request: ChatRequest, db: MySQLClient = Depends(get_db)):
     """
     Send a message to the personalized AI chatbot
     User's health history is used to provide context-aware responses
@@ -119,7 +107,7 @@ async def chat_with_bot(request: ChatRequest):
         if request.user_id not in chatbot_sessions:
             # Auto-initialize if not exists
             print(f"[CHATBOT API] No active session, initializing...")
-            await initialize_chatbot(InitChatbotRequest(user_id=request.user_id))
+            await initialize_chatbot(InitChatbotRequest(user_id=request.user_id), db)
         
         chatbot = chatbot_sessions[request.user_id]
         
@@ -1,29 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from backend.models.schemas import HealthData, XPResult
 from backend.database.mysql_client import MySQLClient
+from backend.database.provider import get_db
 from backend.services import gamification_engine, post_generator
 from fastapi import Query
 import json
 
 router = APIRouter()
 
-# Global db instance
-_db_instance = None
-
-async def get_db():
-    """Get or create database client"""
-    global _db_instance
-    if _db_instance is None:
-        _db_instance = MySQLClient()
-        if _db_instance.pool is None:
-            await _db_instance.init()
-    return _db_instance
-
 
 @router.post("/calculate-xp", response_model=XPResult)
-async def calculate_xp_endpoint(payload: HealthData):
+async def calculate_xp_endpoint(payload: HealthData, db: MySQLClient = Depends(get_db)):
     try:
-        db = await get_db()
         print(f"[GAMIFICATION] Calculating XP for user: {payload.user_id}")
         
         # store health
@@ -48,16 +36,8 @@ async def calculate_xp_endpoint(payload: HealthData):
         from datetime import date, timedelta
         end = date.today()
         start = end - timedelta(days=7)
-        logs_json = await db.get_daily_logs_for_user_range(payload.user_id, str(start), str(end))
-        
-        workouts = []
-        for j in logs_json:
-            try:
-                d = json.loads(j)
-            except Exception:
-                d = j if isinstance(j, dict) else {}
-            for w in d.get("manual_workouts", []) or []:
-                workouts.append(w)
+        # only days with workout_count > 0 are fetched and decoded
+        workouts = await db.get_workouts_for_user_range(payload.user_id, str(start), str(end))
         
         # Determine RPG class
         rpg_class = gamification_engine.determine_rpg_class_from_workouts(workouts)
@@ -75,15 +55,15 @@ async def calculate_xp_endpoint(payload: HealthData):
             "vitality": user.get("vitality", 0),
             "stamina": user.get("stamina", 0),
         }
-        await db.upsert_user(updated_user)
+        # user row and its append-only ledger entry (feeds the daily/weekly/monthly leaderboards) in one transaction
+        await db.grant_xp(updated_user, result["xp_gained"], source="calculate-xp")
         print(f"[GAMIFICATION] User record updated in MySQL with class: {rpg_class}")
 
         # generate post if leveled up
         if result["leveled_up"]:
             print(f"[GAMIFICATION] User leveled up! Generating post...")
             post = post_generator.generate_level_up_post(payload.user_id, updated_user.get("username") or payload.user_id, result["new_level"], {})
-            query = "INSERT INTO social_feed(post_id, user_id, type, timestamp, content) VALUES(%s, %s, %s, %s, %s)"
-            await db.execute(query, (post["post_id"], post["user_id"], post["type"], post["timestamp"], str(post["content"])))
+            await db.insert_social_post(post)
             print(f"[GAMIFICATION] Post created and saved to MySQL")
 
         return {
@@ -99,7 +79,7 @@ async def calculate_xp_endpoint(payload: HealthData):
 
 
 @router.get("/user/{user_id}/class")
-async def get_user_class(user_id: str, days: int = Query(7, ge=1, le=30)):
+async def get_user_class(user_id: str, days: int = Query(7, ge=1, le=30), db: MySQLClient = Depends(get_db)):
     """
     Get user's RPG class from recent daily_logs (last `days`).
     
@@ -110,7 +90,6 @@ async def get_user_class(user_id: str, days: int = Query(7, ge=1, le=30)):
     - Villager: No workouts or very low activity
     """
     try:
-        db = await get_db()
         print(f"[GAMIFICATION] Computing RPG class for {user_id}")
         
         # find date range
@@ -119,21 +98,15 @@ async def get_user_class(user_id: str, days: int = Query(7, ge=1, le=30)):
         end = date.today()
         start = end - timedelta(days=days)
 
-        # fetch daily logs from db
-        logs_json = await db.get_daily_logs_for_user_range(user_id, str(start), str(end))
+        # fetch workouts from days that have any
         workouts = []
-        for j in logs_json:
-            try:
-                d = json.loads(j)
-            except Exception:
-                d = j if isinstance(j, dict) else {}
-            for w in d.get("manual_workouts", []) or []:
-                workouts.append({
-                    "activity_type": w.get("activity_type"),
-                    "duration_minutes": w.get("duration_minutes"),
-                    "intensity_rpe": w.get("intensity_rpe"),
-                    "calories_burnt": w.get("calories_burnt"),
-                })
+        for w in await db.get_workouts_for_user_range(user_id, str(start), str(end)):
+            workouts.append({
+                "activity_type": w.get("activity_type"),
+                "duration_minutes": w.get("duration_minutes"),
+                "intensity_rpe": w.get("intensity_rpe"),
+                "calories_burnt": w.get("calories_burnt"),
+            })
 
         rpg_class = gamification_engine.determine_rpg_class_from_workouts(workouts)
         print(f"[GAMIFICATION] RPG Class determined: {rpg_class}")
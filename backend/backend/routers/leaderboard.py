@@ -1,46 +1,109 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
 from backend.database.mysql_client import MySQLClient
+from backend.database.provider import get_db
+from backend.services import pagination, xp_ledger
+from backend.services.rank_index import RankIndex, get_rank_index
 
 router = APIRouter()
 
-# Global db instance
-_db_instance = None
 
-async def get_db():
-    """Get or create database client"""
-    global _db_instance
-    if _db_instance is None:
-        _db_instance = MySQLClient()
-        if _db_instance.pool is None:
-            await _db_instance.init()
-    return _db_instance
+def _period(period: str, day: Optional[str]):
+    """(period or None for all-time, start of the requested period); 400 on bad input"""
+    try:
+        period_key = xp_ledger.normalize_period(period)
+        start = xp_ledger.period_start(period_key, date.fromisoformat(day)) if period_key and day else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if period_key and start is None:
+        start = xp_ledger.current_start(period_key)
+    return period_key, start
+
+
+def _page_start(kind: str, period_key: Optional[str], start: Optional[str], cursor: Optional[str]):
+    """(period start, keyset values) for a page; a period cursor keeps the period it was issued for"""
+    if not cursor:
+        return start, None
+    try:
+        if period_key is None:
+            return start, pagination.decode_cursor(cursor, kind, len(pagination.LEADERBOARD_KEY))
+        start, *after = pagination.decode_cursor(cursor, kind, 1 + len(pagination.PERIOD_LEADERBOARD_KEY))
+        return start, tuple(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _next_page(rankings, limit: int, kind: str, period_key: Optional[str], start: Optional[str]):
+    if period_key is None:
+        return pagination.page(rankings, limit, kind, lambda r: (r["xp"], r["level"], r["user_id"]))
+    return pagination.page(rankings, limit, kind, lambda r: (start, r["xp"], r["user_id"]))
 
 
 @router.get("/global")
-async def global_leaderboard(period: str = "weekly"):
+async def global_leaderboard(period: str = "weekly", day: Optional[str] = None,
+                             limit: int = Query(10, ge=1, le=pagination.PAGE_SIZE_MAX), cursor: Optional[str] = None,
+                             db: MySQLClient = Depends(get_db)):
+    """
+    Top users by XP earned in the period containing day (default today); period=all ranks by xp/level
+
+    Pass the response's next_cursor as cursor for the following page.
+    """
+    period_key, start = _period(period, day)
+    kind = f"global:{period_key or 'all'}"
+    start, after = _page_start(kind, period_key, start, cursor)
     try:
-        db = await get_db()
-        print(f"[LEADERBOARD] Fetching global leaderboard")
+        print(f"[LEADERBOARD] Fetching global leaderboard ({period_key or 'all-time'} {start or ''})")
         
-        rankings = await db.get_global_leaderboard(limit=10)
+        rankings = await db.get_global_leaderboard(limit=limit + 1, period=period_key, start=start, after=after)
+        rankings, next_cursor = _next_page(rankings, limit, kind, period_key, start)
         
         print(f"[LEADERBOARD] Found {len(rankings)} rankings")
-        return {"period": period, "rankings": rankings, "message": "Data retrieved from MySQL"}
+        return {"period": period, "period_start": start, "rankings": rankings, "next_cursor": next_cursor, "message": "Data retrieved from MySQL"}
     except Exception as e:
         print(f"[LEADERBOARD] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/team/{team_id}")
-async def team_leaderboard(team_id: str, period: str = "monthly"):
+async def team_leaderboard(team_id: str, period: str = "monthly", day: Optional[str] = None,
+                           limit: int = Query(50, ge=1, le=pagination.PAGE_SIZE_MAX), cursor: Optional[str] = None,
+                           db: MySQLClient = Depends(get_db)):
+    """Team members by XP earned in the period (see /global)"""
+    period_key, start = _period(period, day)
+    kind = f"team:{team_id}:{period_key or 'all'}"
+    start, after = _page_start(kind, period_key, start, cursor)
     try:
-        db = await get_db()
         print(f"[LEADERBOARD] Fetching team leaderboard for {team_id}")
         
-        rankings = await db.get_team_leaderboard(team_id=team_id, limit=50)
+        rankings = await db.get_team_leaderboard(team_id=team_id, limit=limit + 1, period=period_key, start=start, after=after)
+        rankings, next_cursor = _next_page(rankings, limit, kind, period_key, start)
         
         print(f"[LEADERBOARD] Found {len(rankings)} team rankings")
-        return {"period": period, "team_id": team_id, "rankings": rankings, "message": "Data retrieved from MySQL"}
+        return {"period": period, "period_start": start, "team_id": team_id, "rankings": rankings, "next_cursor": next_cursor,
+                "message": "Data retrieved from MySQL"}
     except Exception as e:
         print(f"[LEADERBOARD] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/rank/{user_id}")
+async def user_rank(user_id: str, index: RankIndex = Depends(get_rank_index), db: MySQLClient = Depends(get_db)):
+    """All-time position of one user (same order as period=all), from the in-process rank index"""
+    await index.ensure_loaded(db)
+    rank = index.rank(user_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+    total = len(index)
+    return {**index.entry(user_id, rank), "total": total, "percentile": round(100.0 * (total - rank + 1) / total, 2)}
+
+
+@router.get("/around/{user_id}")
+async def around_user(user_id: str, window: int = Query(5, ge=0, le=50), index: RankIndex = Depends(get_rank_index),
+                      db: MySQLClient = Depends(get_db)):
+    """The user with up to `window` neighbours above and below, in rank order"""
+    await index.ensure_loaded(db)
+    rankings = index.around(user_id, window)
+    if rankings is None:
+        raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+    return {"user_id": user_id, "window": window, "total": len(index), "rankings": rankings}
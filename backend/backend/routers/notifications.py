@@ -3,25 +3,17 @@
 FCM Token Management Router - API endpoints for device token registration
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-import os
 
 from backend.database.mysql_client import MySQLClient
+from backend.database.provider import get_db
 from backend.services.fcm_service import FCMService, get_fcm_service
 from backend.services.notification_personalizer import NotificationPersonalizer
 
 router = APIRouter()
 
-# Initialize services
-db = MySQLClient(
-    host=os.getenv("MYSQL_HOST", "127.0.0.1"),
-    user=os.getenv("MYSQL_USER", "root"),
-    password=os.getenv("MYSQL_PASSWORD", "Abhijit@2005"),
-    database=os.getenv("MYSQL_DB", "vital_quest"),
-    port=int(os.getenv("MYSQL_PORT", 3306))
-)
-
+# Initialize services (the FCM service receives the shared db client in the app lifespan)
 fcm_service = get_fcm_service()
 personalizer = NotificationPersonalizer()
 
@@ -47,21 +39,8 @@ class PersonalizedPlanRequest(BaseModel):
 class InactivityCheckRequest(BaseModel):
     inactivity_threshold_days: int = 2
 
-@router.on_event("startup")
-async def startup():
-    """Initialize database connection"""
-    await db.init()
-    await fcm_service.initialize_db(db)
-    print("[FCM ROUTER] Database connection initialized")
-
-@router.on_event("shutdown")
-async def shutdown():
-    """Close database connection"""
-    await db.close()
-    print("[FCM ROUTER] Database connection closed")
-
 @router.post("/fcm-token", tags=["Notifications"])
-async def update_fcm_token(request: FCMTokenUpdate):
+async def update_fcm_token(request: FCMTokenUpdate, db: MySQLClient = Depends(get_db)):
     """
     Update or register FCM device token for push notifications
     
@@ -105,7 +84,7 @@ async def update_fcm_token(request: FCMTokenUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/fcm/test-notification", tags=["Notifications"])
-async def test_notification(request: NotificationTestRequest):
+async def test_notification(request: NotificationTestRequest, db: MySQLClient = Depends(get_db)):
     """
     Send a test notification to verify FCM setup
     
@@ -144,7 +123,7 @@ async def test_notification(request: NotificationTestRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/fcm/personalized-plan", tags=["Notifications"])
-async def send_personalized_plan(request: PersonalizedPlanRequest):
+async def send_personalized_plan(request: PersonalizedPlanRequest, db: MySQLClient = Depends(get_db)):
     """
     Generate a Gemini-crafted personalized notification (title + body) and send via FCM.
     Also prints to terminal and returns the composed message.
@@ -201,7 +180,7 @@ async def send_personalized_plan(request: PersonalizedPlanRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/fcm/check-inactivity", tags=["Notifications"])
-async def check_inactivity_and_notify(request: InactivityCheckRequest):
+async def check_inactivity_and_notify(request: InactivityCheckRequest, db: MySQLClient = Depends(get_db)):
     """
     Manually trigger inactivity check and send notifications
     
@@ -229,7 +208,7 @@ async def check_inactivity_and_notify(request: InactivityCheckRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/fcm/user-tokens", tags=["Notifications"])
-async def get_user_fcm_status(user_id: str):
+async def get_user_fcm_status(user_id: str, db: MySQLClient = Depends(get_db)):
     """
     Get FCM token status for a user
     
@@ -262,7 +241,7 @@ async def get_user_fcm_status(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/fcm/send-test-batch", tags=["Notifications"])
-async def send_test_batch_notification():
+async def send_test_batch_notification(db: MySQLClient = Depends(get_db)):
     """
     Send test notification to all registered users
     
@@ -1,32 +1,36 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
 from backend.database.mysql_client import MySQLClient
-from backend.services import post_generator, gamification_engine
+from backend.database.provider import get_db
+from backend.services import pagination, post_generator, gamification_engine, social_posts
+from backend.services.id_generator import new_id
+from backend.services.post_counters import CounterBuffer, get_post_counters
+from backend.services.team_timeline import FEED_KEY
 from backend.models.schemas import DailyLog
 from fastapi import Body
+from datetime import datetime
+from typing import Optional
 import json
 
 router = APIRouter()
 
-# Global db instance
-_db_instance = None
 
-async def get_db():
-    """Get or create database client"""
-    global _db_instance
-    if _db_instance is None:
-        _db_instance = MySQLClient()
-        if _db_instance.pool is None:
-            await _db_instance.init()
-    return _db_instance
+def _fields(fields: Optional[str]):
+    try:
+        return social_posts.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/user/{user_id}")
-async def get_user_feed(user_id: str, limit: int = 20):
+async def get_user_feed(user_id: str, limit: int = 20, fields: Optional[str] = None, db: MySQLClient = Depends(get_db),
+                        counters: CounterBuffer = Depends(get_post_counters)):
+    """Newest posts of a user; fields=post_id,content,... returns only those (content decoded)"""
+    fields = _fields(fields)
     try:
-        db = await get_db()
         print(f"[SOCIAL] Fetching feed for user: {user_id}")
-        query = "SELECT * FROM social_feed WHERE user_id = %s ORDER BY timestamp DESC LIMIT %s"
-        posts = await db.fetch_all(query, (user_id, limit))
+        # post_id is needed to add unflushed like/comment counts
+        posts = await db.get_user_feed(user_id, limit, fields if "post_id" in fields else ("post_id",) + fields)
+        posts = social_posts.project(counters.overlay(posts), fields)
         print(f"[SOCIAL] Found {len(posts)} posts for user")
         return {"posts": posts, "message": "Data retrieved from MySQL"}
     except Exception as e:
@@ -35,28 +39,32 @@ async def get_user_feed(user_id: str, limit: int = 20):
 
 
 @router.get("/team/{team_id}")
-async def get_team_feed(team_id: str, limit: int = 20):
+async def get_team_feed(team_id: str, limit: int = Query(20, ge=1, le=pagination.PAGE_SIZE_MAX), cursor: Optional[str] = None,
+                        fields: Optional[str] = None, db: MySQLClient = Depends(get_db),
+                        counters: CounterBuffer = Depends(get_post_counters)):
+    """Newest posts by the team's members, from its timeline; pass next_cursor as cursor for older posts"""
+    kind = f"team_feed:{team_id}"
+    fields = _fields(fields)
+    try:
+        after = pagination.decode_cursor(cursor, kind, len(FEED_KEY)) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        db = await get_db()
         print(f"[SOCIAL] Fetching feed for team: {team_id}")
-        # simple: fetch posts where user in team by joining users
-        query = """SELECT sf.* FROM social_feed sf 
-                   JOIN users u ON sf.user_id = u.user_id 
-                   WHERE u.team_id = %s 
-                   ORDER BY sf.timestamp DESC LIMIT %s"""
-        posts = await db.fetch_all(query, (team_id, limit))
+        posts = await db.get_team_feed(team_id, limit + 1, after, fields)
+        posts, next_cursor = pagination.page(posts, limit, kind, lambda p: (p["timestamp"], p["post_id"]))
         print(f"[SOCIAL] Found {len(posts)} posts for team")
-        return {"posts": posts, "message": "Data retrieved from MySQL"}
+        return {"posts": social_posts.project(counters.overlay(posts), fields), "next_cursor": next_cursor,
+                "message": "Data retrieved from MySQL"}
     except Exception as e:
         print(f"[SOCIAL] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-daily-post")
-async def generate_daily_post(user_id: str, username: str, date: str, total_steps: int, total_calories_active: float, sleep_segments: list = Query(None), heart_rate_samples: list = Query(None), manual_workouts: list = Query(None)):
+async def generate_daily_post(user_id: str, username: str, date: str, total_steps: int, total_calories_active: float, sleep_segments: list = Query(None), heart_rate_samples: list = Query(None), manual_workouts: list = Query(None), db: MySQLClient = Depends(get_db)):
     """One-click: generate a daily summary post (random image) and store it."""
     try:
-        db = await get_db()
         print(f"[SOCIAL] Generating daily post for {user_id}")
         
         # build daily_log dict from params
@@ -70,8 +78,8 @@ async def generate_daily_post(user_id: str, username: str, date: str, total_step
         }
 
         post = post_generator.generate_daily_post(user_id, username, daily_log_dict)
-        query = "INSERT INTO social_feed(post_id, user_id, type, timestamp, content) VALUES(%s, %s, %s, %s, %s)"
-        await db.execute(query, (post["post_id"], post["user_id"], post["type"], post["timestamp"], json.dumps(post["content"])))
+        # also fans the post out to the author's team timeline
+        await db.insert_social_post(post)
         print(f"[SOCIAL] Post saved to MySQL: {post['post_id']}")
         
         # store full daily log for aggregation
@@ -88,10 +96,9 @@ async def generate_daily_post(user_id: str, username: str, date: str, total_step
 
 
 @router.post("/post")
-async def create_manual_post(payload: dict = Body(...)):
+async def create_manual_post(payload: dict = Body(...), db: MySQLClient = Depends(get_db)):
     """Manual post creation endpoint (stretch)"""
     try:
-        db = await get_db()
         print(f"[SOCIAL] Creating manual post")
         
         # payload should contain post_id,user_id,type,timestamp,content
@@ -100,11 +107,90 @@ async def create_manual_post(payload: dict = Body(...)):
             if k not in payload:
                 return {"error": "missing_field", "field": k}
         
-        query = "INSERT INTO social_feed(post_id, user_id, type, timestamp, content) VALUES(%s, %s, %s, %s, %s)"
-        await db.execute(query, (payload["post_id"], payload["user_id"], payload["type"], payload["timestamp"], json.dumps(payload["content"])))
+        await db.insert_social_post(payload)
         print(f"[SOCIAL] Manual post saved to MySQL: {payload['post_id']}")
         
         return {"status": "ok", "post_id": payload["post_id"], "message": "Post saved to MySQL"}
     except Exception as e:
         print(f"[SOCIAL] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _require_post(db: MySQLClient, counters: CounterBuffer, post_id: str):
+    # known posts are answered from memory, so a hot post costs no read per request
+    if not await counters.post_exists(db, post_id):
+        raise HTTPException(status_code=404, detail=f"post {post_id} not found")
+
+
+async def _set_like(post_id: str, payload: dict, liked: bool, db: MySQLClient, counters: CounterBuffer):
+    if not payload.get("user_id"):
+        raise HTTPException(status_code=400, detail="missing field: user_id")
+    try:
+        await _require_post(db, counters, post_id)
+        counters.ensure_attached(db)
+        counters.like(post_id, payload["user_id"], liked)
+        return {"status": "ok", "post_id": post_id, "liked": liked}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[SOCIAL] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/post/{post_id}/like")
+async def like_post(post_id: str, payload: dict = Body(...), db: MySQLClient = Depends(get_db),
+                    counters: CounterBuffer = Depends(get_post_counters)):
+    """Like a post as {"user_id"} (once per user); the like and social_feed.likes are written with the next counter flush"""
+    return await _set_like(post_id, payload, True, db, counters)
+
+
+@router.post("/post/{post_id}/unlike")
+async def unlike_post(post_id: str, payload: dict = Body(...), db: MySQLClient = Depends(get_db),
+                      counters: CounterBuffer = Depends(get_post_counters)):
+    """Take back {"user_id"}'s like (a no-op at flush if they had not liked the post)"""
+    return await _set_like(post_id, payload, False, db, counters)
+
+
+@router.post("/post/{post_id}/comments")
+async def comment_on_post(post_id: str, payload: dict = Body(...), db: MySQLClient = Depends(get_db),
+                          counters: CounterBuffer = Depends(get_post_counters)):
+    """Add a comment ({"user_id", "text"}); comments_count follows with the next counter flush"""
+    for k in ("user_id", "text"):
+        if not payload.get(k):
+            raise HTTPException(status_code=400, detail=f"missing field: {k}")
+    comment = {
+        "comment_id": new_id("cmt_"),
+        "post_id": post_id,
+        "user_id": payload["user_id"],
+        "text": str(payload["text"]),
+        "created_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    try:
+        await _require_post(db, counters, post_id)
+        await db.add_post_comment(comment)
+        counters.ensure_attached(db)
+        counters.add(post_id, comments=1)
+        return {"status": "ok", "comment": comment}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[SOCIAL] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/post/{post_id}/comments")
+async def get_post_comments(post_id: str, limit: int = Query(20, ge=1, le=pagination.PAGE_SIZE_MAX), cursor: Optional[str] = None,
+                            db: MySQLClient = Depends(get_db)):
+    """A post's comments, newest first; pass next_cursor as cursor for older ones"""
+    kind = f"comments:{post_id}"
+    try:
+        after = pagination.decode_cursor(cursor, kind, 1)[0] if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        comments = await db.get_post_comments(post_id, limit + 1, after)
+        comments, next_cursor = pagination.page(comments, limit, kind, lambda c: (c["comment_id"],))
+        return {"post_id": post_id, "comments": comments, "next_cursor": next_cursor}
+    except Exception as e:
+        print(f"[SOCIAL] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -4,24 +4,17 @@ Step Milestone Notifications Router
 Sends notifications when users reach step milestones (10, 20, 30, etc.)
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 from backend.database.mysql_client import MySQLClient
+from backend.database.provider import get_db
+from backend.services import pagination
 from backend.services.fcm_service import FCMService
 from backend.services.notification_scheduler import NotificationScheduler
 
 router = APIRouter()
 
-# Dependency to get database
-async def get_db():
-    db = MySQLClient()
-    await db.connect()
-    try:
-        yield db
-    finally:
-        await db.close()
-
 class StepUpdate(BaseModel):
     user_id: str
     current_steps: int
@@ -275,22 +268,33 @@ async def track_steps_with_milestones(
 @router.get("/milestones/{user_id}")
 async def get_user_milestones(
     user_id: str,
+    limit: int = Query(100, ge=1, le=pagination.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
     db: MySQLClient = Depends(get_db)
 ):
     """
-    Get all step milestones achieved by user
+    Get step milestones achieved by user, highest first
     
-    Returns list of milestones with notification timestamps
+    Returns one page of milestones with notification timestamps; pass
+    next_cursor as cursor for the following page
     """
+    kind = f"milestones:{user_id}"
     try:
-        query = """
-            SELECT milestone_steps, notified_at 
+        after = pagination.decode_cursor(cursor, kind, len(pagination.MILESTONE_KEY)) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        query = f"""
+            SELECT id, milestone_steps, notified_at 
             FROM step_milestones 
-            WHERE user_id = %s 
-            ORDER BY milestone_steps DESC
-            LIMIT 100
+            WHERE user_id = %s{" AND " + pagination.after_clause(pagination.MILESTONE_KEY) if after else ""}
+            ORDER BY milestone_steps DESC, notified_at DESC, id DESC
+            LIMIT %s
         """
-        milestones = await db.fetch_all(query, (user_id,))
+        rows = await db.fetch_all(query, (user_id, *(after or ()), limit + 1))
+        milestones, next_cursor = pagination.page(
+            rows, limit, kind, lambda m: (m["milestone_steps"], str(m["notified_at"]), m["id"])
+        )
         
         return {
             "status": "success",
@@ -302,7 +306,8 @@ async def get_user_milestones(
                     "achieved_at": str(m["notified_at"])
                 }
                 for m in milestones
-            ]
+            ],
+            "next_cursor": next_cursor
         }
         
     except Exception as e:
@@ -1,60 +1,187 @@
 import asyncio
 import json
-import aiosqlite
+import os
+import time
+import zlib
 from datetime import datetime, date
-from backend.database.sqlite_client import SQLiteClient
-from backend.services import battle_system
+from typing import Any, Dict, List, Optional, Tuple
+from backend.services import battle_lifecycle
+from backend.services.battle_partials import BattleUpdate
+from backend.services.leases import Lease, LeasedJob, LeaseManager
 
 DB_POLL_INTERVAL_SECONDS = 60
 
+# daily_logs rows fetched per query while folding new logs into battles
+AGGREGATION_BATCH_SIZE = int(os.getenv("AGGREGATION_BATCH_SIZE", 5000))
 
-async def aggregate_active_battles_loop(db: SQLiteClient):
-    """Background loop: periodically scan active battles and update their scores from daily_logs."""
-    while True:
-        try:
-            await aggregate_once(db)
-        except Exception:
-            # swallow errors to keep loop running
-            pass
-        await asyncio.sleep(DB_POLL_INTERVAL_SECONDS)
-
-
-async def aggregate_once(db: SQLiteClient):
-    async with aiosqlite.connect(db.db_path) as conn:
-        conn.row_factory = aiosqlite.Row
-        cur = await conn.execute("SELECT * FROM battles WHERE status = 'active'")
-        rows = await cur.fetchall()
-        for row in rows:
-            battle_id = row["battle_id"]
-            team_a = row["team_a_id"]
-            team_b = row["team_b_id"]
-            start_date = row["start_date"]
-            end_date = row["end_date"]
-
-            # fetch daily_logs for teams in range
-            team_a_logs_json = await db.get_daily_logs_for_team_range(team_a, start_date, end_date)
-            team_b_logs_json = await db.get_daily_logs_for_team_range(team_b, start_date, end_date)
-
-            # parse logs
-            def parse_logs(js_list):
-                out = []
-                for j in js_list:
-                    try:
-                        out.append(json.loads(j))
-                    except Exception:
-                        # if already dict
-                        out.append(j if isinstance(j, dict) else {})
-                return out
-
-            a_logs = parse_logs(team_a_logs_json)
-            b_logs = parse_logs(team_b_logs_json)
-
-            team_stats = {team_a: {"user_logs": a_logs}, team_b: {"user_logs": b_logs}}
-            scores = battle_system.compute_battle_scores(team_stats)
-
-            # update battles table
-            await conn.execute("UPDATE battles SET scores = ? WHERE battle_id = ?", (json.dumps(scores), battle_id))
-        await conn.commit()
+# Concurrent reads per aggregation pass (keep below the DB pool size)
+AGGREGATION_CONCURRENCY = int(os.getenv("AGGREGATION_CONCURRENCY", 4))
+
+# Battles are split by battle_id hash into this many shards, each with its own lease
+AGGREGATOR_SHARDS = int(os.getenv("AGGREGATOR_SHARDS", 1))
+# Shard leases one process may hold at once (0 = no limit); spreads shards across workers
+AGGREGATOR_MAX_SHARDS_PER_WORKER = int(os.getenv("AGGREGATOR_MAX_SHARDS_PER_WORKER", 0))
+
+
+def battle_shard(battle_id: str, shards: int) -> int:
+    """Stable shard index of a battle (same in every process)"""
+    return zlib.crc32(battle_id.encode()) % shards
+
+
+def in_shard(battle: Dict, shard: Optional[Tuple[int, int]]) -> bool:
+    return shard is None or battle_shard(battle["battle_id"], shard[1]) == shard[0]
+
+
+class _ShardPass:
+    """One aggregation job: a pass over the shard's battles, plus the lifecycle sweep when due"""
+
+    def __init__(self, db, shard: Optional[Tuple[int, int]]):
+        self.db = db
+        self.shard = shard
+        self.next_sweep = 0.0
+
+    async def __call__(self, lease: Lease):
+        if time.monotonic() >= self.next_sweep:
+            self.next_sweep = time.monotonic() + battle_lifecycle.BATTLE_SWEEP_INTERVAL_SECONDS
+            swept = await battle_lifecycle.sweep_once(self.db, shard=self.shard, fence=lease)
+            if swept["aggregated"]:
+                return  # the sweep's final pass already covered this tick
+        await aggregate_once(self.db, shard=self.shard, fence=lease)
+
+
+def aggregation_jobs(db, leases: LeaseManager, shards: int = None, max_per_worker: int = None) -> List[LeasedJob]:
+    """One leased job per shard; every process starts them all and each shard runs in exactly one.
+
+    A shard's lease covers both its aggregation passes and its lifecycle
+    sweep, so a battle is only ever written by one process at a time.
+    """
+    shards = int(shards or AGGREGATOR_SHARDS)
+    limit = int(max_per_worker or AGGREGATOR_MAX_SHARDS_PER_WORKER or shards)
+
+    def may_acquire() -> bool:
+        return sum(1 for name in leases.held if name.startswith("aggregator")) < limit
+
+    jobs = []
+    for index in range(shards):
+        shard = (index, shards) if shards > 1 else None
+        name = "aggregator" if shard is None else f"aggregator:{index}/{shards}"
+        jobs.append(LeasedJob(leases, name, _ShardPass(db, shard), DB_POLL_INTERVAL_SECONDS, may_acquire))
+    return jobs
+
+
+async def aggregate_active_battles_loop(db, leases: LeaseManager = None):
+    """Background loop: periodically scan active battles and update their scores from daily_logs.
+
+    Runs the shard jobs of aggregation_jobs, so any number of processes can
+    run this loop and each shard is aggregated (and swept every
+    BATTLE_SWEEP_INTERVAL_SECONDS) by the one holding its lease.
+    """
+    jobs = aggregation_jobs(db, leases or LeaseManager(db))
+    await asyncio.gather(*(job.run_forever() for job in jobs))
+
+
+class _TeamFetches:
+    """Per-pass fetch sharing: each (team, date range) is read once, however many battles need it"""
+
+    def __init__(self, db, ceiling: int, semaphore: asyncio.Semaphore):
+        self.db = db
+        self.ceiling = ceiling
+        self.semaphore = semaphore
+        self._tasks: Dict[tuple, asyncio.Future] = {}
+
+    def get(self, team_id: str, start_date, end_date) -> asyncio.Future:
+        key = (team_id, str(start_date), str(end_date))
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.ensure_future(self._fetch(*key))
+        return self._tasks[key]
+
+    async def _fetch(self, team_id: str, start_date: str, end_date: str) -> List[Dict]:
+        async with self.semaphore:
+            return await self.db.get_team_battle_partials(team_id, start_date, end_date, self.ceiling)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+async def _rebuild_update(battle: Dict, fetches: _TeamFetches) -> BattleUpdate:
+    """Partials recomputed from daily_logs up to the pass watermark"""
+    partials = []
+    for team_id in (battle["team_a_id"], battle["team_b_id"]):
+        for row in await fetches.get(team_id, battle["start_date"], battle["end_date"]):
+            partials.append((team_id, str(row["date"]), int(row["log_count"]), float(row["battle_score"] or 0)))
+    return BattleUpdate(battle, partials, fetches.ceiling, rebuild=True)
+
+
+def _fold(battles: List[Dict], watermarks: Dict[str, int], rows: List[Dict], pending: Dict[str, Dict]):
+    """Route new log rows to the battles they count for, summing per (team, day)"""
+    for row in rows:
+        day = str(row["date"])
+        for battle in battles:
+            battle_id = battle["battle_id"]
+            if row["id"] <= watermarks[battle_id] or row["team_id"] not in (battle["team_a_id"], battle["team_b_id"]):
+                continue
+            if not str(battle["start_date"]) <= day <= str(battle["end_date"]):
+                continue
+            partial = pending[battle_id].setdefault((row["team_id"], day), [0, 0.0])
+            partial[0] += 1
+            partial[1] += float(row["battle_score"] or 0)
+
+
+async def _incremental_updates(db, battles: List[Dict], watermarks: Dict[str, int], ceiling: int,
+                               semaphore: asyncio.Semaphore) -> Tuple[List[BattleUpdate], int]:
+    """One id-ordered scan of the logs above the lowest watermark, shared by all incremental battles"""
+    team_ids = sorted({t for b in battles for t in (b["team_a_id"], b["team_b_id"])})
+    pending = {b["battle_id"]: {} for b in battles}
+    after = min(watermarks[b["battle_id"]] for b in battles)
+    folded = 0
+    while after < ceiling:
+        async with semaphore:
+            rows = await db.get_battle_log_scores(after, ceiling, team_ids, AGGREGATION_BATCH_SIZE)
+        _fold(battles, watermarks, rows, pending)
+        folded += len(rows)
+        if len(rows) < AGGREGATION_BATCH_SIZE:
+            break
+        after = rows[-1]["id"]
+    updates = [
+        BattleUpdate(b, [(team_id, day, n, score) for (team_id, day), (n, score) in pending[b["battle_id"]].items()], ceiling)
+        for b in battles
+    ]
+    return updates, folded
+
+
+async def aggregate_once(db, full: bool = False, concurrency: int = None, shard: Tuple[int, int] = None,
+                         fence: Lease = None) -> Dict[str, Any]:
+    """One aggregation pass over the database client interface (MySQLClient or SQLiteClient).
+
+    Battles with a watermark only fold in daily_logs rows written since the
+    previous pass; new battles (and every battle when full=True) are rebuilt.
+    Reads run concurrently under a semaphore of AGGREGATION_CONCURRENCY, each
+    (team, date range) is fetched once per pass, and all score updates are
+    written in a single transaction.
+
+    shard=(index, count) limits the pass to that shard's battles; with fence
+    the write is rejected (LeaseLost) if the lease was taken over meanwhile.
+    """
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(int(concurrency or AGGREGATION_CONCURRENCY))
+    battles = [b for b in await db.get_active_battles() if in_shard(b, shard)]
+    ceiling = await db.get_log_watermark_ceiling()
+    watermarks = await db.get_battle_watermarks([b["battle_id"] for b in battles])
+
+    to_rebuild = [b for b in battles if full or b["battle_id"] not in watermarks]
+    incremental = [b for b in battles if not (full or b["battle_id"] not in watermarks) and watermarks[b["battle_id"]] < ceiling]
+
+    fetches = _TeamFetches(db, ceiling, semaphore)
+    rebuilds = [_rebuild_update(b, fetches) for b in to_rebuild]
+    folded = 0
+    if incremental:
+        (updates, folded), *rebuilt = await asyncio.gather(_incremental_updates(db, incremental, watermarks, ceiling, semaphore), *rebuilds)
+        updates += rebuilt
+    else:
+        updates = list(await asyncio.gather(*rebuilds))
+
+    if updates:
+        await db.write_battle_updates(updates, fence=fence)
 
     # record last aggregation time in meta table
     try:
@@ -62,16 +189,32 @@ async def aggregate_once(db: SQLiteClient):
     except Exception:
         pass
 
+    seconds = time.perf_counter() - start
+    if updates:
+        print(f"[AGGREGATOR] {len(battles)} active battles: {len(to_rebuild)} rebuilt ({len(fetches)} team fetches), "
+              f"{folded} new logs folded into {len(incremental)} (watermark {ceiling}) in {seconds:.3f}s")
+    return {
+        "battles": len(battles),
+        "rebuilt": len(to_rebuild),
+        "team_fetches": len(fetches),
+        "incremental": len(incremental),
+        "logs_folded": folded,
+        "watermark": ceiling,
+        "seconds": round(seconds, 3),
+    }
+
+
 if __name__ == "__main__":
     import sys
+    from backend.database.provider import create_client
     from backend.database.sqlite_client import SQLiteClient
 
-    db_path = sys.argv[1] if len(sys.argv) > 1 else "path_to_your_db.sqlite"
-
-    db = SQLiteClient(db_path)
+    # optional SQLite path; otherwise the DB_BACKEND-selected client
+    db = SQLiteClient(sys.argv[1]) if len(sys.argv) > 1 else create_client()
 
     loop = asyncio.get_event_loop()
     try:
+        loop.run_until_complete(db.init())
         loop.run_until_complete(aggregate_active_battles_loop(db))
     except KeyboardInterrupt:
         pass
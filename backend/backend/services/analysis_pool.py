@@ -0,0 +1,191 @@
+"""
+Process-pool tier for CPU-heavy analysis (recovery / battle / weekly stats)
+
+Analysis handlers share the event loop (and the GIL) with every other
+router, so a payload with thousands of heart-rate samples stalls cheap
+endpoints while it is validated and scored. AnalysisPool runs work whose
+size reaches ANALYSIS_OFFLOAD_THRESHOLD in a ProcessPoolExecutor created at
+startup. Smaller work (and everything when the pool is disabled) runs on the
+loop's default thread pool instead of a worker process, where the pickling
+hand-off would cost more than the computation; it still holds the GIL, but
+never blocks the event loop itself.
+
+The /ai/analyze/* handlers pass the raw request body (size = bytes) to
+run_analysis, so both DailyLog validation and scoring happen in the worker
+and only bytes and the result dict cross the process boundary.
+
+Config:
+    ANALYSIS_POOL_WORKERS       worker processes (default: CPU count, max 4; 0 disables the pool)
+    ANALYSIS_OFFLOAD_THRESHOLD  size (request body bytes) that is sent to the pool (32768, ~2 ms of scoring)
+    ANALYSIS_TIMEOUT_SECONDS    per-task timeout (30)
+    ANALYSIS_MAX_PENDING        tasks in flight before new ones are refused (workers × 8)
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import TypeAdapter, ValidationError
+from backend.app.logic import calculate_battle_score, calculate_recovery_score, calculate_weekly_stats
+from backend.models.schemas import DailyLog
+
+ANALYSIS_POOL_WORKERS = int(os.getenv("ANALYSIS_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+ANALYSIS_OFFLOAD_THRESHOLD = int(os.getenv("ANALYSIS_OFFLOAD_THRESHOLD", 32 * 1024))
+ANALYSIS_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", 30))
+ANALYSIS_MAX_PENDING = int(os.getenv("ANALYSIS_MAX_PENDING", 0))
+
+
+_DAILY_LOG_LIST = TypeAdapter(List[DailyLog])
+
+
+class AnalysisTimeout(Exception):
+    """The pooled task did not finish within the timeout (the worker keeps running it)"""
+
+
+class AnalysisPoolBusy(Exception):
+    """Too many pooled tasks in flight"""
+
+
+def run_analysis(kind: str, body: bytes) -> Dict[str, Any]:
+    """Validate a JSON body and run one analysis; runs in a worker process or a thread.
+
+    Returns {"result": ..., "date": ...} or {"errors": [...]} for invalid
+    payloads (pydantic errors don't pickle, their JSON form does).
+    """
+    try:
+        if kind == "weekly":
+            logs = _DAILY_LOG_LIST.validate_json(body)
+            return {"result": calculate_weekly_stats(logs)}
+        log = DailyLog.model_validate_json(body)
+    except ValidationError as e:
+        return {"errors": json.loads(e.json(include_url=False))}
+    fn = calculate_recovery_score if kind == "recovery" else calculate_battle_score
+    return {"result": fn(log), "date": str(log.date)}
+
+
+def _warm_up() -> int:
+    # unpickling this reference imports the module (and the analysis code) once per worker
+    return os.getpid()
+
+
+class AnalysisPool:
+    """ProcessPoolExecutor with a size threshold, timeout, backpressure and queue-depth counters"""
+
+    def __init__(self, workers: int = None, threshold: int = None, timeout: float = None, max_pending: int = None):
+        self.workers = ANALYSIS_POOL_WORKERS if workers is None else int(workers)
+        self.threshold = ANALYSIS_OFFLOAD_THRESHOLD if threshold is None else int(threshold)
+        self.timeout = ANALYSIS_TIMEOUT_SECONDS if timeout is None else float(timeout)
+        self.max_pending = int(max_pending or ANALYSIS_MAX_PENDING or self.workers * 8)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.inline = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    async def start(self):
+        """Spawn the workers (not forked: the parent has a running loop and pool threads)"""
+        if self.executor is not None or self.workers <= 0:
+            return
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_up) for _ in range(self.workers)))
+        print(f"[ANALYSIS POOL] {self.workers} workers ready, offload threshold {self.threshold} bytes")
+
+    async def close(self):
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.get_running_loop().run_in_executor(None, lambda: executor.shutdown(wait=True, cancel_futures=True))
+            print("[ANALYSIS POOL] Workers stopped")
+
+    async def run(self, fn: Callable, *args, size: int = 0) -> Any:
+        """fn(*args) on the default thread pool when small (or without a pool), otherwise in a worker process.
+
+        fn and args must be picklable (module-level functions, bytes, plain data).
+        """
+        if self.executor is None or size < self.threshold:
+            self.inline += 1
+            return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise AnalysisPoolBusy(f"{self.in_flight} analyses in flight")
+
+        self.submitted += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        try:
+            result = await asyncio.wait_for(future, self.timeout)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise AnalysisTimeout(f"analysis exceeded {self.timeout}s")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed + self.timed_out
+        return {
+            "enabled": self.executor is not None,
+            "workers": self.workers,
+            "threshold": self.threshold,
+            "timeout_s": self.timeout,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "max_in_flight": self.max_in_flight,
+            "inline": self.inline,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / finished, 3) if finished else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+_pool: Optional[AnalysisPool] = None
+
+
+async def init_analysis_pool() -> AnalysisPool:
+    """Create and start the app-wide pool (FastAPI lifespan)"""
+    global _pool
+    if _pool is None:
+        _pool = AnalysisPool()
+    await _pool.start()
+    return _pool
+
+
+async def close_analysis_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
+
+
+def get_analysis_pool() -> AnalysisPool:
+    """FastAPI dependency; without the lifespan this is an unstarted pool that runs everything on the thread pool"""
+    global _pool
+    if _pool is None:
+        _pool = AnalysisPool()
+    return _pool
@@ -0,0 +1,113 @@
+"""
+Vectorized battle and XP scoring over columnar log batches
+
+LogBatch holds one entry per daily log as NumPy arrays; workouts of all logs
+are flattened into three arrays with an offsets array marking where each
+log's workouts start (log i owns workouts[offsets[i]:offsets[i + 1]]).
+
+Every function here returns exactly what the scalar functions in
+battle_system and gamification_engine return for the same input: sums are
+accumulated in log/workout order (np.bincount adds sequentially), and the
+arithmetic is evaluated in the same order as the scalar expressions.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.services.battle_system import deep_sleep_minutes_from_dailylog
+
+
+class LogBatch:
+    """Columnar batch of daily logs (optionally tagged with a team per log)"""
+
+    __slots__ = ("steps", "deep_sleep_minutes", "workout_offsets", "workout_duration",
+                 "workout_intensity", "workout_calories", "team_codes", "teams")
+
+    def __init__(self, steps, deep_sleep_minutes, workout_offsets, workout_duration, workout_intensity,
+                 workout_calories, team_ids: Optional[Sequence[str]] = None):
+        self.steps = np.asarray(steps, dtype=np.float64)
+        self.deep_sleep_minutes = np.asarray(deep_sleep_minutes, dtype=np.int64)
+        self.workout_offsets = np.asarray(workout_offsets, dtype=np.int64)
+        self.workout_duration = np.asarray(workout_duration, dtype=np.float64)
+        self.workout_intensity = np.asarray(workout_intensity, dtype=np.float64)
+        self.workout_calories = np.asarray(workout_calories, dtype=np.float64)
+        # team_ids factorized once into int codes so per-team sums are a single bincount
+        self.team_codes, self.teams = None, None
+        if team_ids is not None:
+            index: Dict[str, int] = {}
+            self.team_codes = np.fromiter((index.setdefault(t, len(index)) for t in team_ids), dtype=np.int64, count=len(team_ids))
+            self.teams = list(index)
+            if len(self.team_codes) != len(self.steps):
+                raise ValueError("team_ids must have one entry per log")
+        if len(self.workout_offsets) != len(self.steps) + 1 or self.workout_offsets[-1] != len(self.workout_duration):
+            raise ValueError("workout_offsets must have len(logs) + 1 entries ending at the workout count")
+
+    @classmethod
+    def from_logs(cls, logs: Sequence[Dict[str, Any]], team_ids: Optional[Sequence[str]] = None) -> "LogBatch":
+        """Build a batch from daily log dicts, reading fields the way the scalar functions do"""
+        steps, deep = [], []
+        offsets = [0]
+        duration, intensity, calories = [], [], []
+        for log in logs:
+            steps.append(float(log.get("total_steps", log.get("steps", 0))))
+            deep.append(deep_sleep_minutes_from_dailylog(log))
+            for w in log.get("manual_workouts", []):
+                duration.append(float(w.get("duration_minutes", 0)))
+                intensity.append(float(w.get("intensity_rpe", 0)))
+                calories.append(float(w.get("calories_burnt", 0)))
+            offsets.append(len(duration))
+        return cls(steps, deep, offsets, duration, intensity, calories, team_ids)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def workout_log_index(self) -> np.ndarray:
+        """Index of the owning log for every workout"""
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.workout_offsets))
+
+
+def workout_scores(batch: LogBatch) -> np.ndarray:
+    """Per-log workout_score_from_workouts: sum(duration×intensity) + sum(calories×0.2)"""
+    owner = batch.workout_log_index()
+    dur_int_sum = np.bincount(owner, weights=batch.workout_duration * batch.workout_intensity, minlength=len(batch))
+    cal_sum = np.bincount(owner, weights=batch.workout_calories * 0.2, minlength=len(batch))
+    return dur_int_sum + cal_sum
+
+
+def battle_scores(batch: LogBatch) -> np.ndarray:
+    """Per-log user_battle_score_from_dailylog: (steps×0.05) + (deep×5) + workout score"""
+    return (batch.steps * 0.05) + (batch.deep_sleep_minutes * 5.0) + workout_scores(batch)
+
+
+def team_scores(batch: LogBatch, scores: np.ndarray = None) -> Dict[str, float]:
+    """Per-team compute_team_score_from_user_logs over the batch's team_ids"""
+    if batch.team_codes is None:
+        raise ValueError("team_scores needs a batch built with team_ids")
+    if scores is None:
+        scores = battle_scores(batch)
+    totals = np.bincount(batch.team_codes, weights=scores, minlength=len(batch.teams))
+    return {team_id: float(total) for team_id, total in zip(batch.teams, totals)}
+
+
+def score_batch(batch: LogBatch) -> Tuple[np.ndarray, Dict[str, float]]:
+    """Per-log battle scores and, when the batch has team_ids, per-team totals"""
+    scores = battle_scores(batch)
+    return scores, (team_scores(batch, scores) if batch.team_codes is not None else {})
+
+
+def xp_from_activity_batch(steps, calories_burned, sleep_total_minutes, recovery_score) -> np.ndarray:
+    """Per-row gamification_engine.calculate_xp_from_activity (without its per-call log line)"""
+    steps = np.asarray(steps, dtype=np.float64)
+    calories_burned = np.asarray(calories_burned, dtype=np.float64)
+    sleep_bonus = np.where(np.asarray(sleep_total_minutes) >= 420, 1.2, 1.0)
+    recovery_bonus = np.where(np.asarray(recovery_score) >= 70, 1.15, 1.0)
+    return (steps / 100.0 + calories_burned / 50.0) * sleep_bonus * recovery_bonus
+
+
+def xp_from_activities(activities: List[Dict]) -> np.ndarray:
+    """xp_from_activity_batch over activity dicts with the scalar function's defaults"""
+    return xp_from_activity_batch(
+        [a.get("steps", 0) for a in activities],
+        [a.get("calories_burned", 0) for a in activities],
+        [a.get("sleep_total_minutes", 0) for a in activities],
+        [a.get("recovery_score", 0) for a in activities],
+    )
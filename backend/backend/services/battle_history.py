@@ -0,0 +1,123 @@
+"""
+Battle score history - battle_score_history time series
+
+Every aggregation pass that writes a battle's scores also records them in
+battle_score_history, one row per (battle, resolution, bucket) holding the
+two team scores as plain columns. Each snapshot is written to its minute,
+hour and day bucket at once (last value in the bucket wins, samples counts
+the passes folded into it), so the coarser series need no compaction job.
+
+Storage stays bounded: minute rows older than BATTLE_HISTORY_MINUTE_HOURS
+and hour rows older than BATTLE_HISTORY_HOUR_DAYS are pruned in the same
+write; day rows are kept (one per day the battle was updated).
+
+Buckets exist only for passes that changed a battle, so a series is a step
+function: a missing bucket means the score held at the previous value.
+
+append_snapshots runs on the caller's transaction cursor; queries use %s
+placeholders on both backends.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+BATTLE_HISTORY_MINUTE_HOURS = int(os.getenv("BATTLE_HISTORY_MINUTE_HOURS", 48))
+BATTLE_HISTORY_HOUR_DAYS = int(os.getenv("BATTLE_HISTORY_HOUR_DAYS", 90))
+
+RESOLUTIONS = ("minute", "hour", "day")
+RETENTION = {
+    "minute": timedelta(hours=BATTLE_HISTORY_MINUTE_HOURS),
+    "hour": timedelta(days=BATTLE_HISTORY_HOUR_DAYS),
+    "day": None,
+}
+# widest span served at each resolution by resolution="auto"
+AUTO_MAX_SPAN = {"minute": timedelta(hours=6), "hour": timedelta(days=14), "day": None}
+
+BUCKET_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def bucket_start(at: datetime, resolution: str) -> str:
+    """Start of the bucket containing at, as 'YYYY-MM-DD HH:MM:SS' (UTC)"""
+    if resolution == "minute":
+        at = at.replace(second=0, microsecond=0)
+    elif resolution == "hour":
+        at = at.replace(minute=0, second=0, microsecond=0)
+    elif resolution == "day":
+        at = at.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        raise ValueError(f"unknown resolution {resolution!r}")
+    return at.strftime(BUCKET_FORMAT)
+
+
+def parse_time(value: str) -> datetime:
+    """ISO date or datetime as naive UTC (the form buckets are stored in)"""
+    at = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def choose_resolution(start: datetime, end: datetime, now: datetime = None) -> str:
+    """Finest resolution that is still retained back to start and keeps the series short"""
+    now = now or datetime.utcnow()
+    for resolution in RESOLUTIONS:
+        retention, max_span = RETENTION[resolution], AUTO_MAX_SPAN[resolution]
+        if retention is not None and start < now - retention:
+            continue
+        if max_span is not None and end - start > max_span:
+            continue
+        return resolution
+    return "day"
+
+
+def snapshot_rows(updates: Iterable, scores: Dict[str, Dict[str, float]], at: datetime) -> List[tuple]:
+    """Upsert params (battle_id, resolution, bucket_start, team_a_score, team_b_score) for each update"""
+    buckets = [(r, bucket_start(at, r)) for r in RESOLUTIONS]
+    rows = []
+    for u in updates:
+        battle_scores = scores.get(u.battle_id, {})
+        team_a, team_b = u.team_ids
+        for resolution, bucket in buckets:
+            rows.append((u.battle_id, resolution, bucket, battle_scores.get(team_a, 0.0), battle_scores.get(team_b, 0.0)))
+    return rows
+
+
+async def append_snapshots(cursor, updates: Iterable, scores: Dict[str, Dict[str, float]], upsert_sql: str,
+                           at: Optional[datetime] = None) -> int:
+    """Record the scores just written for these battles and prune expired buckets; returns rows upserted"""
+    updates = list(updates)
+    if not updates:
+        return 0
+    at = at or datetime.utcnow()
+    rows = snapshot_rows(updates, scores, at)
+    await cursor.executemany(upsert_sql, rows)
+
+    battle_ids = [u.battle_id for u in updates]
+    marks = ", ".join(["%s"] * len(battle_ids))
+    for resolution, retention in RETENTION.items():
+        if retention is None:
+            continue
+        await cursor.execute(
+            f"""
+            DELETE FROM battle_score_history
+            WHERE battle_id IN ({marks}) AND resolution = %s AND bucket_start < %s
+            """,
+            (*battle_ids, resolution, (at - retention).strftime(BUCKET_FORMAT)),
+        )
+    return len(rows)
+
+
+def to_series(battle: Dict, resolution: str, rows: List[Dict]) -> Dict:
+    """Columnar response body: one timestamp list and one score list per team"""
+    team_a, team_b = battle["team_a_id"], battle["team_b_id"]
+    return {
+        "battle_id": battle["battle_id"],
+        "resolution": resolution,
+        "teams": [team_a, team_b],
+        "timestamps": [str(r["bucket_start"]) for r in rows],
+        "scores": {
+            team_a: [float(r["team_a_score"]) for r in rows],
+            team_b: [float(r["team_b_score"]) for r in rows],
+        },
+    }
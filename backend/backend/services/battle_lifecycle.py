@@ -0,0 +1,140 @@
+"""
+Battle lifecycle - scheduled -> active -> completed
+
+A battle is created "scheduled" when its start_date is in the future and
+"active" otherwise. sweep_once, run on a timer by each aggregator shard job
+(every BATTLE_SWEEP_INTERVAL_SECONDS) or via POST /admin/sweep-battles:
+
+- activates scheduled battles whose start_date has arrived
+- completes active battles whose end_date ended more than
+  BATTLE_CLOSE_GRACE_HOURS ago (late syncs for the last day still count):
+  a final aggregation pass folds the remaining logs, then the final scores
+  and winner are frozen into battle_archive, the battle is marked
+  completed, and its aggregation state (partials, watermark, minute
+  history) is dropped
+
+Only active battles are aggregated, so each pass costs as much as the
+battles currently running.
+
+complete_battles runs on the caller's transaction cursor; queries use %s
+placeholders on both backends.
+"""
+
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+BATTLE_SWEEP_INTERVAL_SECONDS = int(os.getenv("BATTLE_SWEEP_INTERVAL_SECONDS", 300))
+BATTLE_CLOSE_GRACE_HOURS = float(os.getenv("BATTLE_CLOSE_GRACE_HOURS", 2))
+
+SCHEDULED, ACTIVE, COMPLETED = "scheduled", "active", "completed"
+
+ARCHIVE_COLUMNS = ("battle_id", "team_a_id", "team_b_id", "start_date", "end_date", "final_scores", "winner", "completed_at")
+
+
+def _day(value) -> date:
+    return value if isinstance(value, date) and not isinstance(value, datetime) else date.fromisoformat(str(value)[:10])
+
+
+def initial_status(start_date, today: date = None) -> str:
+    """Status for a new battle: scheduled until its start_date"""
+    today = today or datetime.utcnow().date()
+    return SCHEDULED if _day(start_date) > today else ACTIVE
+
+
+def is_due(battle: Dict, now: datetime = None) -> bool:
+    """True once the battle's last day plus the grace period is over"""
+    now = now or datetime.utcnow()
+    closes_at = datetime.combine(_day(battle["end_date"]) + timedelta(days=1), datetime.min.time())
+    return now >= closes_at + timedelta(hours=BATTLE_CLOSE_GRACE_HOURS)
+
+
+def winner(scores: Dict[str, float], team_ids: Sequence[str]) -> Optional[str]:
+    """Team with the higher final score; None for a draw"""
+    a, b = (float(scores.get(t) or 0) for t in team_ids)
+    if a == b:
+        return None
+    return team_ids[0] if a > b else team_ids[1]
+
+
+async def complete_battles(cursor, battle_ids: Sequence[str], completed_at: str) -> List[Dict[str, Any]]:
+    """Archive the current scores of these active battles and mark them completed"""
+    if not battle_ids:
+        return []
+    marks = ", ".join(["%s"] * len(battle_ids))
+    await cursor.execute(
+        f"""
+        SELECT battle_id, team_a_id, team_b_id, start_date, end_date, scores
+        FROM battles
+        WHERE battle_id IN ({marks}) AND status = %s
+        """,
+        (*battle_ids, ACTIVE),
+    )
+    archived = []
+    for row in await cursor.fetchall():
+        scores = row["scores"]
+        scores = json.loads(scores) if isinstance(scores, str) else (scores or {})
+        teams = (row["team_a_id"], row["team_b_id"])
+        archived.append({
+            "battle_id": row["battle_id"],
+            "team_a_id": teams[0],
+            "team_b_id": teams[1],
+            "start_date": str(row["start_date"]),
+            "end_date": str(row["end_date"]),
+            "final_scores": {t: float(scores.get(t) or 0) for t in teams},
+            "winner": winner(scores, teams),
+            "completed_at": completed_at,
+        })
+    if not archived:
+        return []
+
+    await cursor.executemany(
+        f"INSERT INTO battle_archive ({', '.join(ARCHIVE_COLUMNS)}) VALUES ({', '.join(['%s'] * len(ARCHIVE_COLUMNS))})",
+        [tuple(json.dumps(a[c]) if c == "final_scores" else a[c] for c in ARCHIVE_COLUMNS) for a in archived],
+    )
+    await cursor.executemany(
+        "UPDATE battles SET status = %s, winner = %s, updated_at = CURRENT_TIMESTAMP WHERE battle_id = %s",
+        [(COMPLETED, a["winner"], a["battle_id"]) for a in archived],
+    )
+    done = [a["battle_id"] for a in archived]
+    done_marks = ", ".join(["%s"] * len(done))
+    # aggregation state is only needed while a battle is scored; hour/day history stays for the chart
+    await cursor.execute(f"DELETE FROM battle_partials WHERE battle_id IN ({done_marks})", tuple(done))
+    await cursor.execute(f"DELETE FROM battle_aggregates WHERE battle_id IN ({done_marks})", tuple(done))
+    await cursor.execute(
+        f"DELETE FROM battle_score_history WHERE battle_id IN ({done_marks}) AND resolution = %s",
+        (*done, "minute"),
+    )
+    return archived
+
+
+async def sweep_once(db, now: datetime = None, shard: Tuple[int, int] = None, fence=None) -> Dict[str, Any]:
+    """Activate battles that started and complete (final pass + archive) battles that ended.
+
+    With shard=(index, count) only that aggregator shard's battles are
+    completed, under the shard's lease (fence); activation is idempotent.
+    "aggregated" says whether the sweep ran an aggregation pass first.
+    """
+    from backend.services.aggregator import aggregate_once, in_shard  # the aggregator imports this module
+
+    start = time.perf_counter()
+    now = now or datetime.utcnow()
+    activated = await db.activate_battles(str(now.date()))
+    due = [b["battle_id"] for b in await db.get_active_battles() if in_shard(b, shard) and is_due(b, now)]
+    archived = []
+    if due:
+        # fold the last logs so the frozen scores are final
+        await aggregate_once(db, shard=shard, fence=fence)
+        archived = await db.complete_battles(due, now.strftime("%Y-%m-%d %H:%M:%S"), fence=fence)
+
+    seconds = time.perf_counter() - start
+    if activated or archived:
+        print(f"[LIFECYCLE] {activated} battles activated, {len(archived)} completed and archived in {seconds:.3f}s")
+    return {
+        "activated": activated,
+        "completed": [a["battle_id"] for a in archived],
+        "aggregated": bool(due),
+        "seconds": round(seconds, 3),
+    }
@@ -0,0 +1,234 @@
+"""
+Live battle scores over Server-Sent Events - in-process broadcaster
+
+GET /battles/{battle_id}/live subscribes a bounded queue to the battle.
+BattleBroadcaster registers itself as a log listener on the database client
+(add_log_listener): when a daily log for a team in a watched battle
+commits, the battle is marked dirty and, after LIVE_DEBOUNCE_SECONDS,
+its scores are recomputed once from team_daily_summary and the encoded event
+is put on every subscriber's queue. One query and one serialization per
+battle, however many clients are watching; a burst of writes for the same
+battle inside the debounce window collapses into one event.
+
+Slow clients don't hold anyone up: when a queue is full its oldest event
+is dropped (each event carries the full scores, so the next one supersedes
+it). A keep-alive comment is queued every LIVE_HEARTBEAT_SECONDS so proxies
+don't close idle streams.
+
+Events are per worker process; with several workers each one broadcasts the
+writes it handled itself.
+
+Config:
+    LIVE_DEBOUNCE_SECONDS   delay that coalesces writes before recomputing (0.25)
+    LIVE_HEARTBEAT_SECONDS  keep-alive interval (15)
+    LIVE_QUEUE_SIZE         events buffered per subscriber (16)
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+LIVE_DEBOUNCE_SECONDS = float(os.getenv("LIVE_DEBOUNCE_SECONDS", 0.25))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", 15))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", 16))
+
+KEEPALIVE = b": keep-alive\n\n"
+
+
+def encode_event(event: str, data: Dict[str, Any], event_id: int = None) -> bytes:
+    """One SSE message"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscription:
+    """One client's queue of encoded events for one battle"""
+
+    __slots__ = ("battle_id", "queue", "dropped")
+
+    def __init__(self, battle_id: str, size: int):
+        self.battle_id = battle_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.dropped = 0
+
+    def push(self, message: bytes):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class BattleBroadcaster:
+    """Per-battle fan-out of live score events to SSE subscribers"""
+
+    def __init__(self, db=None, debounce: float = None, heartbeat: float = None, queue_size: int = None):
+        self.db = db
+        self.debounce = LIVE_DEBOUNCE_SECONDS if debounce is None else float(debounce)
+        self.heartbeat = LIVE_HEARTBEAT_SECONDS if heartbeat is None else float(heartbeat)
+        self.queue_size = int(queue_size or LIVE_QUEUE_SIZE)
+        self.subscribers: Dict[str, Set[Subscription]] = {}
+        self.battles: Dict[str, Dict] = {}
+        self.last_scores: Dict[str, Dict[str, float]] = {}
+        self.last_event: Dict[str, bytes] = {}
+        self.seq: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.computations = 0
+        self.events = 0
+        self.messages = 0
+        self.dropped = 0
+        self.logs_seen = 0
+        self.last_fanout_ms = 0.0
+
+    def attach(self, db):
+        """Start receiving daily log writes from db"""
+        self.db = db
+        db.add_log_listener(self.on_logs_written)
+
+    async def close(self):
+        for task in (self._flush_task, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+        self._flush_task = self._heartbeat_task = None
+
+    # Subscribers
+    async def subscribe(self, battle: Dict) -> Subscription:
+        """Register a client; its queue starts with the current scores"""
+        battle_id = battle["battle_id"]
+        sub = Subscription(battle_id, self.queue_size)
+        self.battles[battle_id] = battle
+        if battle_id not in self.last_event:
+            # first subscriber computes the snapshot, everyone arriving meanwhile waits for it
+            async with self._locks.setdefault(battle_id, asyncio.Lock()):
+                if battle_id not in self.last_event:
+                    await self._refresh(battle_id)
+        # no await between the snapshot and joining, so no event falls in between
+        if battle_id in self.last_event:
+            sub.push(self.last_event[battle_id])
+            self.messages += 1
+        self.battles[battle_id] = battle
+        self.subscribers.setdefault(battle_id, set()).add(sub)
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self.dropped += sub.dropped
+        subs = self.subscribers.get(sub.battle_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            # nobody watching: stop tracking it so writes for its teams are ignored
+            for state in (self.subscribers, self.battles, self.last_scores, self.last_event, self._locks):
+                state.pop(sub.battle_id, None)
+
+    # Writes
+    def on_logs_written(self, rows: List[Dict]):
+        """Log listener: mark watched battles covering the written team/day rows dirty"""
+        if not self.battles:
+            return
+        self.logs_seen += len(rows)
+        touched = {(r.get("team_id"), str(r.get("date"))) for r in rows if r.get("team_id")}
+        for battle_id, battle in self.battles.items():
+            teams = (battle["team_a_id"], battle["team_b_id"])
+            start, end = str(battle["start_date"]), str(battle["end_date"])
+            if any(team in teams and start <= day <= end for team, day in touched):
+                self._dirty.add(battle_id)
+        if self._dirty and self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.debounce)
+        finally:
+            self._flush_task = None
+        dirty, self._dirty = self._dirty, set()
+        await asyncio.gather(*(self._refresh(battle_id) for battle_id in dirty if battle_id in self.battles), return_exceptions=True)
+
+    async def _refresh(self, battle_id: str):
+        """Recompute one battle's scores and publish them if they changed"""
+        battle = self.battles.get(battle_id)
+        if battle is None:
+            return
+        try:
+            scores = await self.db.get_live_battle_scores(battle)
+        except Exception as e:
+            print(f"[BATTLE LIVE] Failed to compute scores for {battle_id}: {e}")
+            return
+        self.computations += 1
+        if battle_id not in self.battles:
+            return  # last subscriber left while computing
+        previous = self.last_scores.get(battle_id)
+        if previous == scores and battle_id in self.last_event:
+            return
+        self.publish(battle_id, scores, previous)
+
+    def publish(self, battle_id: str, scores: Dict[str, float], previous: Optional[Dict[str, float]] = None):
+        """Encode one score event and queue it for every subscriber of the battle"""
+        start = time.perf_counter()
+        seq = self.seq.get(battle_id, 0) + 1
+        self.seq[battle_id] = seq
+        previous = previous or {}
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        message = encode_event("score", {
+            "battle_id": battle_id,
+            "seq": seq,
+            "scores": scores,
+            "delta": {t: round(s - previous.get(t, 0.0), 4) for t, s in scores.items()},
+            "leader": ranked[0][0] if ranked and (len(ranked) == 1 or ranked[0][1] > ranked[1][1]) else None,
+            "at": time.time(),
+        }, seq)
+        self.last_scores[battle_id] = scores
+        self.last_event[battle_id] = message
+        subs = self.subscribers.get(battle_id, ())
+        for sub in subs:
+            sub.push(message)
+        self.events += 1
+        self.messages += len(subs)
+        self.last_fanout_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for subs in self.subscribers.values():
+                for sub in subs:
+                    if sub.queue.empty():
+                        sub.push(KEEPALIVE)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "battles": len(self.subscribers),
+            "subscribers": sum(len(s) for s in self.subscribers.values()),
+            "logs_seen": self.logs_seen,
+            "computations": self.computations,
+            "events": self.events,
+            "messages": self.messages,
+            "dropped": self.dropped + sum(sub.dropped for s in self.subscribers.values() for sub in s),
+            "last_fanout_ms": self.last_fanout_ms,
+        }
+
+
+_broadcaster: Optional[BattleBroadcaster] = None
+
+
+def get_battle_broadcaster() -> BattleBroadcaster:
+    """App-wide broadcaster (attached to the database in the FastAPI lifespan)"""
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = BattleBroadcaster()
+    return _broadcaster
+
+
+async def close_battle_broadcaster():
+    global _broadcaster
+    if _broadcaster is not None:
+        await _broadcaster.close()
+    _broadcaster = None
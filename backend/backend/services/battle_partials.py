@@ -0,0 +1,85 @@
+"""
+Per-battle partial sums - battle_partials and battle_aggregates
+
+battle_partials holds one row per (battle, team, day): the number of member
+logs folded in and the sum of their battle_score. battle_aggregates records,
+per battle, the highest daily_logs.id already folded (the watermark).
+
+The aggregator folds only logs above a battle's watermark into its partials,
+so a cycle costs as much as the logs that arrived since the previous one.
+Rebuilds replace a battle's partials with per-team day sums recomputed from
+daily_logs, for corrections (team changes, backfilled metrics) and for new
+battles.
+
+write_updates applies one aggregation pass on the caller's transaction
+cursor; rows are dicts and queries use %s placeholders on both backends.
+"""
+
+import json
+from typing import Dict, Iterable, List, Sequence
+
+PARTIAL_COLUMNS = ("battle_id", "team_id", "date", "log_count", "battle_score")
+
+
+class BattleUpdate:
+    """Pending change for one battle: partials to add (or to replace them with) and the new watermark"""
+
+    __slots__ = ("battle", "partials", "watermark", "rebuild")
+
+    def __init__(self, battle: Dict, partials: List[Sequence], watermark: int, rebuild: bool = False):
+        self.battle = battle
+        self.partials = partials
+        self.watermark = watermark
+        self.rebuild = rebuild
+
+    @property
+    def battle_id(self) -> str:
+        return self.battle["battle_id"]
+
+    @property
+    def team_ids(self) -> tuple:
+        return (self.battle["team_a_id"], self.battle["team_b_id"])
+
+
+async def _refresh_scores(cursor, battle_ids: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    """battle_id -> {team_id: score} from the partials; cost is bounded by battle days, not logs"""
+    marks = ", ".join(["%s"] * len(battle_ids))
+    await cursor.execute(
+        f"""
+        SELECT battle_id, team_id, SUM(battle_score) AS score
+        FROM battle_partials
+        WHERE battle_id IN ({marks})
+        GROUP BY battle_id, team_id
+        """,
+        tuple(battle_ids),
+    )
+    sums: Dict[str, Dict[str, float]] = {}
+    for r in await cursor.fetchall():
+        sums.setdefault(r["battle_id"], {})[r["team_id"]] = float(r["score"] or 0)
+    return sums
+
+
+async def write_updates(cursor, updates: Iterable[BattleUpdate], add_partial_sql: str, set_watermark_sql: str) -> Dict[str, Dict[str, float]]:
+    """Apply a whole aggregation pass: partials, watermarks and battles.scores for every battle"""
+    updates = list(updates)
+    if not updates:
+        return {}
+
+    rebuilt = [u.battle_id for u in updates if u.rebuild]
+    if rebuilt:
+        marks = ", ".join(["%s"] * len(rebuilt))
+        await cursor.execute(f"DELETE FROM battle_partials WHERE battle_id IN ({marks})", tuple(rebuilt))
+    rows = [(u.battle_id, *p) for u in updates for p in u.partials]
+    if rows:
+        await cursor.executemany(add_partial_sql, rows)
+    await cursor.executemany(set_watermark_sql, [(u.battle_id, u.watermark) for u in updates])
+    if rebuilt:
+        await cursor.execute(f"UPDATE battle_aggregates SET rebuilt_at = CURRENT_TIMESTAMP WHERE battle_id IN ({marks})", tuple(rebuilt))
+
+    sums = await _refresh_scores(cursor, [u.battle_id for u in updates])
+    scores = {u.battle_id: {t: sums.get(u.battle_id, {}).get(t, 0.0) for t in u.team_ids} for u in updates}
+    await cursor.executemany(
+        "UPDATE battles SET scores = %s, updated_at = CURRENT_TIMESTAMP WHERE battle_id = %s",
+        [(json.dumps(s), battle_id) for battle_id, s in scores.items()],
+    )
+    return scores
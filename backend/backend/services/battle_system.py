@@ -1,4 +1,5 @@
 from typing import Dict, List, Any
+from backend.database import log_codec
 import json
 
 
@@ -15,13 +16,12 @@ def workout_score_from_workouts(manual_workouts: List[Dict[str, Any]]) -> float:
     return dur_int_sum + cal_sum
 
 
-def user_battle_score_from_dailylog(daily_log: Dict[str, Any]) -> float:
-    """Compute BattleScore = (Steps×0.05) + (DeepSleepMins×5) + WorkoutScore"""
-    steps = float(daily_log.get("total_steps", daily_log.get("steps", 0)))
-    # deep sleep minutes: check sleep_segments or sleep_deep_minutes
+def deep_sleep_minutes_from_dailylog(daily_log: Dict[str, Any]) -> int:
+    """Deep sleep minutes from sleep_segments, or sleep_deep_minutes when there are no segments"""
     deep_minutes = 0
-    if "sleep_segments" in daily_log and isinstance(daily_log["sleep_segments"], list):
-        for seg in daily_log["sleep_segments"]:
+    segments = log_codec.sleep_segments(daily_log)  # plain list or packed storage form
+    if isinstance(segments, list):
+        for seg in segments:
             # seg either dict or object with 'stage' and 'duration_minutes'
             stage = seg.get("stage") if isinstance(seg, dict) else getattr(seg, "stage", None)
             dur = seg.get("duration_minutes") if isinstance(seg, dict) else getattr(seg, "duration_minutes", 0)
@@ -29,6 +29,13 @@ def user_battle_score_from_dailylog(daily_log: Dict[str, Any]) -> float:
                 deep_minutes += int(dur or 0)
     else:
         deep_minutes = int(daily_log.get("sleep_deep_minutes", 0) or 0)
+    return deep_minutes
+
+
+def user_battle_score_from_dailylog(daily_log: Dict[str, Any]) -> float:
+    """Compute BattleScore = (Steps×0.05) + (DeepSleepMins×5) + WorkoutScore"""
+    steps = float(daily_log.get("total_steps", daily_log.get("steps", 0)))
+    deep_minutes = deep_sleep_minutes_from_dailylog(daily_log)
 
     workout_score = workout_score_from_workouts(daily_log.get("manual_workouts", []))
 
@@ -45,9 +52,16 @@ def compute_team_score_from_user_logs(user_logs: List[Dict[str, Any]]) -> float:
 
 
 def compute_battle_scores(team_stats: Dict[str, Dict]) -> Dict[str, float]:
-    """team_stats: {team_id: {"user_logs": [...]}} -> returns team scores"""
+    """team_stats: {team_id: {"user_logs": [...]}} or {team_id: {"daily_summaries": [...]}} -> returns team scores
+
+    daily_summaries are team_daily_summary rows, whose battle_score is already
+    the sum of the members' scores for that day.
+    """
     scores = {}
     for team_id, s in team_stats.items():
+        if "daily_summaries" in s:
+            scores[team_id] = float(sum(row.get("battle_score") or 0 for row in s["daily_summaries"]))
+            continue
         user_logs = s.get("user_logs", [])
         scores[team_id] = compute_team_score_from_user_logs(user_logs)
     return scores
@@ -0,0 +1,186 @@
+"""
+Daily rollups - user_daily_summary and team_daily_summary
+
+Every daily log write also upserts its user's row for that day and adds the
+difference to the team's row, inside the same transaction (see
+write_summaries). Battle scoring and weekly stats then read one pre-summed
+row per team or user per day instead of every raw log.
+
+reconcile_daily_summaries rebuilds both tables from daily_logs, repairing
+drift such as users who changed team after their logs were written.
+"""
+
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from backend.app.logic import calculate_recovery_score, calculate_rhr_from_series
+from backend.database import log_codec
+from backend.models.schemas import DailyLog
+from backend.services.log_metrics import METRIC_COLUMNS, extract_log_metrics
+
+USER_SUMMARY_COLUMNS = ("user_id", "date", "team_id") + METRIC_COLUMNS + ("recovery_score", "activity_counts")
+TEAM_SUMMARY_COLUMNS = ("team_id", "date", "log_count") + METRIC_COLUMNS
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _recovery_score(log: Dict[str, Any], log_date) -> Optional[float]:
+    """Recovery score for DailyLog-shaped logs; None for shapes it can't be computed from"""
+    try:
+        if log_codec.is_packed(log.get("heart_rate_samples")):
+            # RHR straight from the packed arrays instead of one model per sample
+            daily_log = DailyLog(**{"date": log_date, **log, "heart_rate_samples": [], "sleep_segments": log_codec.sleep_segments(log) or []})
+            rhr = calculate_rhr_from_series(daily_log, log_codec.HeartRateSeries.from_log(log))
+            return calculate_recovery_score(daily_log, rhr_data=rhr)["score"]
+        return calculate_recovery_score(DailyLog(**{"date": log_date, **log, "sleep_segments": log_codec.sleep_segments(log) or []}))["score"]
+    except Exception:
+        return None
+
+
+def log_summary(user_id: str, log_date, log: Dict[str, Any]) -> Dict[str, Any]:
+    """One user_daily_summary row (without team_id) for a daily log dict"""
+    counts: Dict[str, int] = {}
+    for w in log.get("manual_workouts", []) or []:
+        activity = w.get("activity_type", "Unknown") if isinstance(w, dict) else "Unknown"
+        counts[activity] = counts.get(activity, 0) + 1
+    summary = {"user_id": user_id, "date": str(log_date)}
+    summary.update(extract_log_metrics(log))
+    summary["recovery_score"] = _recovery_score(log, log_date)
+    summary["activity_counts"] = counts
+    return summary
+
+
+def user_summary_params(summary: Dict[str, Any], team_id: Optional[str]) -> tuple:
+    """Params in USER_SUMMARY_COLUMNS order"""
+    row = dict(summary, team_id=team_id, activity_counts=json.dumps(summary.get("activity_counts") or {}))
+    return tuple(row.get(c) for c in USER_SUMMARY_COLUMNS)
+
+
+def team_deltas(new_rows: Iterable[Dict], old_rows: Iterable[Dict]) -> List[tuple]:
+    """Additive team_daily_summary params: new user rows minus the rows they replace"""
+    deltas: Dict[Tuple[str, str], List[float]] = {}
+
+    def add(row: Dict, sign: int):
+        if not row.get("team_id"):
+            return
+        d = deltas.setdefault((row["team_id"], str(row["date"])), [0] * (1 + len(METRIC_COLUMNS)))
+        d[0] += sign
+        for i, c in enumerate(METRIC_COLUMNS, 1):
+            d[i] += sign * (row.get(c) or 0)
+
+    for row in new_rows:
+        add(row, 1)
+    for row in old_rows:
+        add(row, -1)
+    return [(team_id, day, *values) for (team_id, day), values in deltas.items()]
+
+
+async def write_summaries(cursor, summaries: List[Dict[str, Any]], upsert_user_sql: str, add_team_sql: str) -> List[Dict[str, Any]]:
+    """Apply rollups for freshly written logs on the caller's transaction cursor.
+
+    Cursor rows are dicts and queries use %s placeholders on both backends.
+    Returns the user rows written, with the team_id each log was rolled into.
+    """
+    if not summaries:
+        return []
+    user_ids = sorted({s["user_id"] for s in summaries})
+    days = sorted({s["date"] for s in summaries})
+    user_marks = ", ".join(["%s"] * len(user_ids))
+    day_marks = ", ".join(["%s"] * len(days))
+
+    await cursor.execute(f"SELECT user_id, team_id FROM users WHERE user_id IN ({user_marks})", tuple(user_ids))
+    teams = {r["user_id"]: r["team_id"] for r in await cursor.fetchall()}
+
+    await cursor.execute(
+        f"""
+        SELECT user_id, date, team_id, {", ".join(METRIC_COLUMNS)}
+        FROM user_daily_summary
+        WHERE user_id IN ({user_marks}) AND date IN ({day_marks})
+        """,
+        tuple(user_ids) + tuple(days),
+    )
+    written = {(s["user_id"], s["date"]) for s in summaries}
+    old_rows = [r for r in await cursor.fetchall() if (r["user_id"], str(r["date"])) in written]
+
+    new_rows = [dict(s, team_id=teams.get(s["user_id"])) for s in summaries]
+    await cursor.executemany(upsert_user_sql, [user_summary_params(r, r["team_id"]) for r in new_rows])
+
+    team_rows = team_deltas(new_rows, old_rows)
+    if team_rows:
+        await cursor.executemany(add_team_sql, team_rows)
+    return new_rows
+
+
+def _date_range(column: str, start_date=None, end_date=None) -> Tuple[str, tuple]:
+    clauses, params = [], []
+    if start_date:
+        clauses.append(f"{column} >= %s")
+        params.append(str(start_date))
+    if end_date:
+        clauses.append(f"{column} <= %s")
+        params.append(str(end_date))
+    return " AND ".join(clauses), tuple(params)
+
+
+async def reconcile_daily_summaries(db, start_date=None, end_date=None) -> Dict[str, Any]:
+    """Rebuild user_daily_summary and team_daily_summary from daily_logs (optionally for a date range)"""
+    start = time.perf_counter()
+    log_range, params = _date_range("dl.date", start_date, end_date)
+
+    user_rows = 0
+    pending = []
+    query = f"""
+        SELECT dl.user_id, dl.date, dl.data, u.team_id
+        FROM daily_logs dl
+        LEFT JOIN users u ON u.user_id = dl.user_id
+        {"WHERE " + log_range if log_range else ""}
+    """
+    async for batch in db.iter_rows(query, params):
+        for row in batch:
+            data = row["data"]
+            try:
+                log = json.loads(data) if isinstance(data, str) else (data or {})
+            except Exception:
+                log = {}
+            pending.append(user_summary_params(log_summary(row["user_id"], row["date"], log), row["team_id"]))
+        if len(pending) >= RECONCILE_BATCH_SIZE:
+            user_rows += len(pending)
+            await db.upsert_user_daily_summaries(pending)
+            pending = []
+    if pending:
+        user_rows += len(pending)
+        await db.upsert_user_daily_summaries(pending)
+
+    summary_range, summary_params = _date_range("date", start_date, end_date)
+    and_range = f" AND {summary_range}" if summary_range else ""
+    async with db.transaction() as cursor:
+        # rollups whose log no longer exists
+        await cursor.execute(
+            f"""
+            DELETE FROM user_daily_summary
+            WHERE NOT EXISTS (
+                SELECT 1 FROM daily_logs dl
+                WHERE dl.user_id = user_daily_summary.user_id AND dl.date = user_daily_summary.date
+            ){and_range}
+            """,
+            summary_params,
+        )
+        await cursor.execute(
+            f"DELETE FROM team_daily_summary{' WHERE ' + summary_range if summary_range else ''}",
+            summary_params,
+        )
+        await cursor.execute(
+            f"""
+            INSERT INTO team_daily_summary ({", ".join(TEAM_SUMMARY_COLUMNS)})
+            SELECT team_id, date, COUNT(*), {", ".join(f"SUM({c})" for c in METRIC_COLUMNS)}
+            FROM user_daily_summary
+            WHERE team_id IS NOT NULL{and_range}
+            GROUP BY team_id, date
+            """,
+            summary_params,
+        )
+        team_rows = cursor.rowcount
+
+    seconds = time.perf_counter() - start
+    print(f"[ROLLUP] Reconciled {user_rows} user rows, {team_rows} team rows in {seconds:.2f}s")
+    return {"user_rows": user_rows, "team_rows": team_rows, "seconds": round(seconds, 3)}
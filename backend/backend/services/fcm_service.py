@@ -70,8 +70,7 @@ class FCMService:
             print(f"[FCM] Updating FCM token for user: {user_id}")
             
             # Update user with FCM token
-            query = "UPDATE users SET fcm_token = %s WHERE user_id = %s"
-            await self.db.execute(query, (fcm_token, user_id))
+            await self.db.update_user_fcm_token(user_id, fcm_token)
             
             print(f"[FCM] FCM token updated successfully for {user_id}")
             
@@ -0,0 +1,162 @@
+"""
+ID generator - time-ordered 64-bit IDs (snowflake layout)
+
+    | 41 bits: ms since ID_EPOCH_MS | 10 bits: worker id | 12 bits: sequence |
+
+IDs from one generator strictly increase; IDs from different workers never
+collide and sort by creation time to the millisecond. Up to 4096 IDs per
+ms per worker: past that the generator borrows the next millisecond
+instead of blocking, and a clock stepping backwards keeps the last
+millisecond, so neither breaks monotonicity.
+
+new_id(prefix) renders an ID as prefix + 19 zero-padded digits, so string
+keys (social_feed.post_id) sort like the numbers and new rows append at the
+right edge of the primary key instead of landing all over it.
+
+Worker ids must be unique among live processes. attach(db) claims one as
+the lease "id-worker:<n>" in the meta table (services/leases.py) and
+renews it every LEASE_HEARTBEAT_SECONDS; an expired claim stops the
+generator (LeaseLost) until a fresh worker id is claimed, because another
+process may already be issuing IDs under the old one. Without attach
+(scripts, tests) the worker id is ID_WORKER_ID, or the process id mod 1024.
+
+Config:
+    ID_WORKER_ID  fixed worker id (0..1023) instead of claiming one
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+from backend.services.leases import Lease, LeaseLost, LeaseManager
+
+ID_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKERS = 1 << WORKER_BITS
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+ID_DIGITS = 19
+
+WORKER_LEASE_PREFIX = "id-worker:"
+
+ID_WORKER_ID = os.getenv("ID_WORKER_ID")
+
+
+class IdGenerator:
+    """Issues increasing IDs for one worker id"""
+
+    def __init__(self, worker_id: int = None, clock=time.time):
+        if worker_id is None:
+            worker_id = int(ID_WORKER_ID) if ID_WORKER_ID else os.getpid() % MAX_WORKERS
+        self._check_worker(worker_id)
+        self.worker_id = worker_id
+        self.clock = clock
+        self.lease: Optional[Lease] = None
+        self._last_ms = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._renew_task: Optional[asyncio.Task] = None
+        self._leases: Optional[LeaseManager] = None
+
+    @staticmethod
+    def _check_worker(worker_id: int):
+        if not 0 <= worker_id < MAX_WORKERS:
+            raise ValueError(f"worker id must be in 0..{MAX_WORKERS - 1}")
+
+    def next_id(self) -> int:
+        with self._lock:
+            now = self.clock()
+            if self.lease is not None and self.lease.expired(now):
+                raise LeaseLost(f"worker id {self.worker_id} claim expired")
+            ms = max(int(now * 1000) - ID_EPOCH_MS, self._last_ms)
+            if ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & SEQUENCE_MASK
+                if self._sequence == 0:
+                    ms += 1
+            else:
+                self._sequence = 0
+            self._last_ms = ms
+            return (ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def new_id(self, prefix: str = "") -> str:
+        return f"{prefix}{self.next_id():0{ID_DIGITS}d}"
+
+    # Worker id claims
+    async def attach(self, db, leases: LeaseManager = None):
+        """Claim a worker id no other live process holds and keep renewing it"""
+        if ID_WORKER_ID:
+            print(f"[IDS] Using configured worker id {self.worker_id}")
+            return
+        self._leases = leases or LeaseManager(db)
+        await self._claim()
+        self._renew_task = asyncio.ensure_future(self._renew_loop())
+        print(f"[IDS] Claimed worker id {self.worker_id} ({self._leases.owner})")
+
+    async def _claim(self):
+        first = os.getpid() % MAX_WORKERS
+        for i in range(MAX_WORKERS):
+            worker_id = (first + i) % MAX_WORKERS
+            lease = await self._leases.acquire(f"{WORKER_LEASE_PREFIX}{worker_id}")
+            if lease is not None:
+                with self._lock:
+                    self.worker_id, self.lease = worker_id, lease
+                return
+        raise RuntimeError(f"all {MAX_WORKERS} worker ids are claimed")
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self._leases.heartbeat)
+            try:
+                await self._leases.renew(self.lease)
+            except Exception as e:
+                if isinstance(e, LeaseLost) or self.lease.expired():
+                    print(f"[IDS] Lost worker id {self.worker_id}: {e}; claiming another")
+                    try:
+                        await self._claim()
+                    except Exception as e:
+                        print(f"[IDS] Worker id claim failed: {e}")
+
+    async def close(self):
+        if self._renew_task is not None:
+            self._renew_task.cancel()
+            await asyncio.gather(self._renew_task, return_exceptions=True)
+            self._renew_task = None
+        if self.lease is not None:
+            try:
+                await self._leases.release(self.lease)
+            except Exception:
+                pass
+            self.lease = None
+
+
+def parse_id(value) -> Dict[str, int]:
+    """(unix ms, worker id, sequence) of an ID, with or without its string prefix"""
+    n = int(str(value)[-ID_DIGITS:]) if isinstance(value, str) else int(value)
+    return {
+        "unix_ms": (n >> (WORKER_BITS + SEQUENCE_BITS)) + ID_EPOCH_MS,
+        "worker_id": (n >> SEQUENCE_BITS) & (MAX_WORKERS - 1),
+        "sequence": n & SEQUENCE_MASK,
+    }
+
+
+_generator: Optional[IdGenerator] = None
+
+
+def get_id_generator() -> IdGenerator:
+    """App-wide generator (its worker id is claimed in the FastAPI lifespan)"""
+    global _generator
+    if _generator is None:
+        _generator = IdGenerator()
+    return _generator
+
+
+def new_id(prefix: str = "") -> str:
+    return get_id_generator().new_id(prefix)
+
+
+async def close_id_generator():
+    global _generator
+    if _generator is not None:
+        await _generator.close()
+    _generator = None
@@ -0,0 +1,238 @@
+"""
+Leases in the meta table - one owner per background job across processes
+
+A lease is the meta row "lease:<name>" with value "token|expires_at|owner":
+
+- acquire takes a missing or expired lease (INSERT if absent, otherwise a
+  compare-and-set UPDATE on the exact value read) and bumps the fencing
+  token; the current owner re-acquiring just extends expires_at
+- the owner renews every LEASE_HEARTBEAT_SECONDS; a killed or stalled
+  process stops renewing and anyone may take the lease LEASE_TTL_SECONDS
+  after its last heartbeat
+- writes made on behalf of a lease call check_fence first in their
+  transaction: it locks the lease row and rejects a token that is no longer
+  current (LeaseLost), so a holder that lost its lease while paused can't
+  overwrite its successor's work
+
+expires_at is the acquiring process's clock (epoch seconds); processes
+sharing a lease need roughly synchronized clocks (well within the TTL).
+
+LeasedJob runs a periodic job in whichever process holds its lease; every
+process starts the same jobs and the others stand by.
+
+Config:
+    LEASE_TTL_SECONDS        lease lifetime without a heartbeat (30)
+    LEASE_HEARTBEAT_SECONDS  renewal and standby polling interval (10)
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", 30))
+LEASE_HEARTBEAT_SECONDS = float(os.getenv("LEASE_HEARTBEAT_SECONDS", 10))
+
+LEASE_PREFIX = "lease:"
+
+
+class LeaseLost(Exception):
+    """The lease expired or was taken over; work done under it must stop"""
+
+
+class Lease:
+    """One held lease: name, owner, fencing token and local expiry"""
+
+    __slots__ = ("name", "owner", "token", "expires_at")
+
+    def __init__(self, name: str, owner: str, token: int, expires_at: float):
+        self.name = name
+        self.owner = owner
+        self.token = token
+        self.expires_at = expires_at
+
+    @property
+    def key(self) -> str:
+        return LEASE_PREFIX + self.name
+
+    @property
+    def value(self) -> str:
+        return f"{self.token}|{self.expires_at:.3f}|{self.owner}"
+
+    @classmethod
+    def parse(cls, name: str, value: str) -> Optional["Lease"]:
+        try:
+            token, expires_at, owner = str(value).split("|", 2)
+            return cls(name, owner, int(token), float(expires_at))
+        except ValueError:
+            return None
+
+    def expired(self, now: float = None) -> bool:
+        return (now or time.time()) >= self.expires_at
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "owner": self.owner, "token": self.token, "expires_at": self.expires_at}
+
+
+async def check_fence(cursor, lease: Lease):
+    """Verify lease is still current on the caller's write transaction (call before other writes).
+
+    The UPDATE takes the lease row's write lock until commit, so a takeover
+    waits for this transaction instead of interleaving with it.
+    """
+    await cursor.execute("UPDATE meta SET updated_at = CURRENT_TIMESTAMP WHERE key_name = %s", (lease.key,))
+    await cursor.execute("SELECT value_data FROM meta WHERE key_name = %s", (lease.key,))
+    row = await cursor.fetchone()
+    current = Lease.parse(lease.name, row["value_data"]) if row else None
+    if current is None or (current.token, current.owner) != (lease.token, lease.owner):
+        raise LeaseLost(f"lease {lease.name} token {lease.token} is no longer current")
+
+
+class LeaseManager:
+    """Acquires, renews and releases leases for one process (owner)"""
+
+    def __init__(self, db, owner: str = None, ttl: float = None, heartbeat: float = None):
+        self.db = db
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.ttl = LEASE_TTL_SECONDS if ttl is None else float(ttl)
+        self.heartbeat = LEASE_HEARTBEAT_SECONDS if heartbeat is None else float(heartbeat)
+        self.held: Dict[str, Lease] = {}
+
+    async def acquire(self, name: str) -> Optional[Lease]:
+        """The lease if it was free, expired or already ours (extended); None while someone else holds it"""
+        key = LEASE_PREFIX + name
+        now = time.time()
+        value = await self.db.get_meta(key)
+        if value is None:
+            lease = Lease(name, self.owner, 1, now + self.ttl)
+            won = await self.db.insert_meta_if_absent(key, lease.value)
+        else:
+            current = Lease.parse(name, value)
+            if current is not None and current.owner == self.owner and not current.expired(now):
+                lease = Lease(name, self.owner, current.token, now + self.ttl)
+            elif current is None or current.expired(now):
+                lease = Lease(name, self.owner, (current.token if current else 0) + 1, now + self.ttl)
+            else:
+                return None
+            won = await self.db.compare_and_set_meta(key, value, lease.value)
+        if not won:
+            return None
+        held = self.held.get(name)
+        if held is not None and held.token == lease.token:
+            held.expires_at = lease.expires_at
+            return held
+        self.held[name] = lease
+        return lease
+
+    async def renew(self, lease: Lease):
+        """Extend lease in place; LeaseLost if it was taken over"""
+        renewed = Lease(lease.name, lease.owner, lease.token, time.time() + self.ttl)
+        if not await self.db.compare_and_set_meta(lease.key, lease.value, renewed.value):
+            self.held.pop(lease.name, None)
+            raise LeaseLost(f"lease {lease.name} token {lease.token} was taken over")
+        lease.expires_at = renewed.expires_at
+
+    async def release(self, lease: Lease):
+        """Expire lease now so a standby can take it without waiting for the TTL"""
+        self.held.pop(lease.name, None)
+        released = Lease(lease.name, lease.owner, lease.token, 0.0)
+        await self.db.compare_and_set_meta(lease.key, lease.value, released.value)
+        lease.expires_at = 0.0
+
+    async def holder(self, name: str) -> Optional[Dict]:
+        value = await self.db.get_meta(LEASE_PREFIX + name)
+        lease = Lease.parse(name, value) if value is not None else None
+        return dict(lease.to_dict(), expired=lease.expired()) if lease else None
+
+
+async def list_leases(db) -> List[Dict]:
+    """Every lease in the meta table with its holder, token and expiry"""
+    rows = await db.fetch_all("SELECT key_name, value_data FROM meta WHERE key_name LIKE %s ORDER BY key_name", (LEASE_PREFIX + "%",))
+    leases = [Lease.parse(r["key_name"][len(LEASE_PREFIX):], r["value_data"]) for r in rows]
+    now = time.time()
+    return [dict(lease.to_dict(), expired=lease.expired(now)) for lease in leases if lease is not None]
+
+
+class LeasedJob:
+    """Run job(lease) every interval seconds while this process holds the lease `name`"""
+
+    def __init__(self, leases: LeaseManager, name: str, job: Callable[[Lease], Awaitable], interval: float,
+                 may_acquire: Callable[[], bool] = None):
+        self.leases = leases
+        self.name = name
+        self.job = job
+        self.interval = float(interval)
+        # e.g. a per-process shard limit; checked before each acquisition attempt
+        self.may_acquire = may_acquire or (lambda: True)
+        self.runs = 0
+        self.failovers = 0
+
+    async def run_forever(self):
+        while True:
+            lease = await self._try_acquire()
+            if lease is None:
+                await asyncio.sleep(self.leases.heartbeat)
+                continue
+            print(f"[LEASE] {self.leases.owner} holds {self.name} (token {lease.token})")
+            if lease.token > 1:
+                self.failovers += 1
+            try:
+                await self._run_while_held(lease)
+            except LeaseLost as e:
+                self.leases.held.pop(self.name, None)
+                print(f"[LEASE] {self.leases.owner} lost {self.name}: {e}")
+            except asyncio.CancelledError:
+                await asyncio.shield(self._release_quietly(lease))
+                raise
+
+    async def _try_acquire(self) -> Optional[Lease]:
+        if not self.may_acquire():
+            return None
+        try:
+            return await self.leases.acquire(self.name)
+        except Exception as e:
+            print(f"[LEASE] Acquire of {self.name} failed: {e}")
+            return None
+
+    async def _run_while_held(self, lease: Lease):
+        heartbeat = asyncio.ensure_future(self._heartbeat(lease))
+        work = asyncio.ensure_future(self._work(lease))
+        try:
+            done, _ = await asyncio.wait({heartbeat, work}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in (heartbeat, work):
+                task.cancel()
+            await asyncio.gather(heartbeat, work, return_exceptions=True)
+
+    async def _heartbeat(self, lease: Lease):
+        while True:
+            await asyncio.sleep(self.leases.heartbeat)
+            try:
+                await self.leases.renew(lease)
+            except LeaseLost:
+                raise
+            except Exception as e:
+                # transient DB error: keep trying until the lease would have expired anyway
+                if lease.expired():
+                    raise LeaseLost(f"lease {lease.name} expired while renewals failed: {e}")
+
+    async def _work(self, lease: Lease):
+        while True:
+            try:
+                await self.job(lease)
+                self.runs += 1
+            except LeaseLost:
+                raise
+            except Exception as e:
+                print(f"[LEASE] Job {self.name} failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _release_quietly(self, lease: Lease):
+        try:
+            await self.leases.release(lease)
+        except Exception:
+            pass
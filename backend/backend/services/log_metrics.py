@@ -0,0 +1,66 @@
+"""
+Daily log metrics - normalize a stored log into typed columns at write time
+
+Two log shapes reach daily_logs:
+- DailyLog (total_steps, total_calories_active, sleep_segments, manual_workouts)
+- HealthData via insert_health (steps, calories_burned, sleep_total_minutes, sleep_deep_minutes)
+
+Both are reduced once, on write, to the columns below so readers can use SQL
+SUM/AVG instead of decoding JSON.
+"""
+
+from typing import Dict, Any
+from backend.database import log_codec
+from backend.services import battle_system
+
+METRIC_COLUMNS = (
+    "total_steps",
+    "deep_sleep_minutes",
+    "total_sleep_minutes",
+    "active_calories",
+    "workout_score",
+    "battle_score",
+    "workout_count",
+)
+
+
+def _stage(seg) -> str:
+    stage = seg.get("stage") if isinstance(seg, dict) else getattr(seg, "stage", None)
+    return getattr(stage, "value", stage)
+
+
+def _duration(seg) -> int:
+    dur = seg.get("duration_minutes") if isinstance(seg, dict) else getattr(seg, "duration_minutes", 0)
+    return int(dur or 0)
+
+
+def extract_log_metrics(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the materialized metric columns for a daily log dict."""
+    steps = int(log.get("total_steps", log.get("steps", 0)) or 0)
+    calories = float(log.get("total_calories_active", log.get("calories_burned", 0)) or 0)
+
+    segments = log_codec.sleep_segments(log)
+    if isinstance(segments, list):
+        total_sleep = sum(_duration(s) for s in segments)
+        deep_sleep = sum(_duration(s) for s in segments if _stage(s) in ("deep", "SleepStage.deep"))
+    else:
+        total_sleep = int(log.get("sleep_total_minutes", 0) or 0)
+        deep_sleep = int(log.get("sleep_deep_minutes", 0) or 0)
+
+    workouts = log.get("manual_workouts", []) or []
+
+    return {
+        "total_steps": steps,
+        "deep_sleep_minutes": deep_sleep,
+        "total_sleep_minutes": total_sleep,
+        "active_calories": calories,
+        "workout_score": battle_system.workout_score_from_workouts(workouts),
+        "battle_score": battle_system.user_battle_score_from_dailylog(log),
+        "workout_count": len(workouts),
+    }
+
+
+def metric_params(log: Dict[str, Any]) -> tuple:
+    """Metric column values in METRIC_COLUMNS order, for INSERT/UPDATE params."""
+    metrics = extract_log_metrics(log)
+    return tuple(metrics[c] for c in METRIC_COLUMNS)
@@ -4,10 +4,20 @@ Notification Scheduler - Checks for inactivity and sends reminders
 """
 
 import asyncio
+import os
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict
 from backend.database.mysql_client import MySQLClient
 from backend.services.fcm_service import FCMService
+from backend.services.leases import Lease, LeasedJob, LeaseLost, LeaseManager
+
+# Users fetched per server-side cursor batch during inactivity scans
+USER_SCAN_BATCH_SIZE = 500
+
+# How often the leased inactivity job runs (across all processes)
+INACTIVITY_CHECK_INTERVAL_SECONDS = int(os.getenv("INACTIVITY_CHECK_INTERVAL_SECONDS", 6 * 3600))
+INACTIVITY_JOB = "notifications:inactivity"
 
 class NotificationScheduler:
     """Handles scheduled notification tasks"""
@@ -23,12 +33,34 @@ class NotificationScheduler:
         self.db = db
         self.fcm_service = fcm_service
     
-    async def check_inactivity_and_notify(self, inactivity_threshold_days: int = 2) -> dict:
+    def inactivity_job(self, leases: LeaseManager, inactivity_threshold_days: int = 2, interval: int = None) -> LeasedJob:
+        """
+        Leased periodic inactivity check: exactly one process runs it
+        
+        The last run time is kept in meta, so a process taking the lease over
+        after a failover waits out the rest of the interval instead of
+        notifying everyone again.
+        """
+        interval = int(interval or INACTIVITY_CHECK_INTERVAL_SECONDS)
+        last_run_key = f"{INACTIVITY_JOB}:last_run"
+
+        async def run(lease: Lease):
+            last_run = await self.db.get_meta(last_run_key)
+            if last_run and time.time() - float(last_run) < interval:
+                return
+            await self.db.set_meta(last_run_key, f"{time.time():.0f}")
+            await self.check_inactivity_and_notify(inactivity_threshold_days, lease=lease)
+
+        # poll at the heartbeat rate; run() itself enforces the interval
+        return LeasedJob(leases, INACTIVITY_JOB, run, min(interval, leases.heartbeat))
+
+    async def check_inactivity_and_notify(self, inactivity_threshold_days: int = 2, lease: Lease = None) -> dict:
         """
         Check for inactive users and send reminder notifications
         
         Args:
             inactivity_threshold_days: Days without activity to trigger notification
+            lease: when run as a leased job, sending stops (LeaseLost) once it expires
             
         Returns:
             dict with notification results
@@ -40,58 +72,63 @@ class NotificationScheduler:
         print()
         
         try:
-            # Get all users
-            users = await self.db.fetch_all("SELECT user_id, username, fcm_token FROM users")
-            print(f"[SCHEDULER] Checking {len(users)} users")
-            print()
-            
             inactive_users = []
             notification_results = []
+            total_users = 0
             
-            # Check each user for inactivity
-            for user in users:
-                user_id = user["user_id"]
-                username = user["username"]
-                fcm_token = user.get("fcm_token")
+            # Stream users in bounded batches instead of loading the whole table
+            users_query = "SELECT user_id, username, fcm_token FROM users"
+            async for users in self.db.iter_rows(users_query, batch_size=USER_SCAN_BATCH_SIZE):
+                total_users += len(users)
                 
-                # Get most recent daily log
-                query = """
-                SELECT MAX(date) as last_log_date FROM daily_logs 
-                WHERE user_id = %s
+                # Most recent daily log for every user in this batch, in one query
+                placeholders = ", ".join(["%s"] * len(users))
+                query = f"""
+                SELECT user_id, MAX(date) as last_log_date FROM daily_logs 
+                WHERE user_id IN ({placeholders})
+                GROUP BY user_id
                 """
-                result = await self.db.fetch_one(query, (user_id,))
-                
-                if not result or not result.get("last_log_date"):
-                    print(f"[SCHEDULER] {username} ({user_id}): No activity history")
-                    # User has never logged - mark as inactive
-                    inactive_users.append({
-                        "user_id": user_id,
-                        "username": username,
-                        "last_log": None,
-                        "days_inactive": "Never logged",
-                        "reason": "No activity history"
-                    })
-                    continue
-                
-                last_log_date = result["last_log_date"]
-                # Convert string date to datetime.date if needed
-                if isinstance(last_log_date, str):
-                    from datetime import datetime as dt
-                    last_log_date = dt.strptime(last_log_date, "%Y-%m-%d").date()
-                days_inactive = (datetime.now().date() - last_log_date).days
-                
-                print(f"[SCHEDULER] {username} ({user_id}): Last log {days_inactive} days ago ({last_log_date})")
+                last_logs = {
+                    row["user_id"]: row["last_log_date"]
+                    for row in await self.db.fetch_all(query, tuple(u["user_id"] for u in users))
+                }
                 
-                # Check if inactive
-                if days_inactive >= inactivity_threshold_days:
-                    inactive_users.append({
-                        "user_id": user_id,
-                        "username": username,
-                        "last_log": str(last_log_date),
-                        "days_inactive": days_inactive,
-                        "reason": "Inactive"
-                    })
+                # Check each user for inactivity
+                for user in users:
+                    user_id = user["user_id"]
+                    username = user["username"]
+                    last_log_date = last_logs.get(user_id)
+                    
+                    if not last_log_date:
+                        print(f"[SCHEDULER] {username} ({user_id}): No activity history")
+                        # User has never logged - mark as inactive
+                        inactive_users.append({
+                            "user_id": user_id,
+                            "username": username,
+                            "last_log": None,
+                            "days_inactive": "Never logged",
+                            "reason": "No activity history"
+                        })
+                        continue
+                    
+                    # Convert string date to datetime.date if needed
+                    if isinstance(last_log_date, str):
+                        last_log_date = datetime.strptime(last_log_date, "%Y-%m-%d").date()
+                    days_inactive = (datetime.now().date() - last_log_date).days
+                    
+                    print(f"[SCHEDULER] {username} ({user_id}): Last log {days_inactive} days ago ({last_log_date})")
+                    
+                    # Check if inactive
+                    if days_inactive >= inactivity_threshold_days:
+                        inactive_users.append({
+                            "user_id": user_id,
+                            "username": username,
+                            "last_log": str(last_log_date),
+                            "days_inactive": days_inactive,
+                            "reason": "Inactive"
+                        })
             
+            print(f"[SCHEDULER] Checked {total_users} users")
             print()
             print(f"[SCHEDULER] Found {len(inactive_users)} inactive users")
             print()
@@ -104,6 +141,8 @@ class NotificationScheduler:
                 print()
                 
                 for user_info in inactive_users:
+                    if lease is not None and lease.expired():
+                        raise LeaseLost(f"lease {lease.name} expired while sending reminders")
                     user_id = user_info["user_id"]
                     username = user_info["username"]
                     days = user_info["days_inactive"]
@@ -143,7 +182,7 @@ class NotificationScheduler:
             print("\n" + "="*80)
             print(" SCHEDULER SUMMARY")
             print("="*80)
-            print(f"Total users checked: {len(users)}")
+            print(f"Total users checked: {total_users}")
             print(f"Inactive users found: {len(inactive_users)}")
             print(f"Notifications sent: {len(notification_results)}")
             
@@ -159,13 +198,15 @@ class NotificationScheduler:
             
             return {
                 "status": "complete",
-                "total_users": len(users),
+                "total_users": total_users,
                 "inactive_users": len(inactive_users),
                 "notifications_sent": len(notification_results),
                 "inactive_users_list": inactive_users,
                 "notification_results": notification_results
             }
             
+        except LeaseLost:
+            raise
         except Exception as e:
             print(f"[SCHEDULER] Error during inactivity check: {str(e)}")
             import traceback
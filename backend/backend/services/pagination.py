@@ -0,0 +1,64 @@
+"""
+Keyset pagination - opaque cursors over (sort key) tuples
+
+A page query orders by a unique key tuple, all columns descending, and the
+next page starts strictly after the last row: WHERE (a, b, c) < (%s, %s, %s).
+With an index on the same columns that is one seek plus `limit` index rows
+whatever the page depth, where OFFSET walks and discards every earlier row.
+
+Cursors are base64url JSON [kind, *values]: opaque to clients, tied to the
+listing they came from (decode_cursor rejects another kind), and carrying
+their own scope where one applies (e.g. the period start of a period
+leaderboard, so paging across a week boundary stays in the same week).
+
+Config:
+    PAGE_SIZE_DEFAULT  rows per page when the request doesn't say (20)
+    PAGE_SIZE_MAX      largest page a request may ask for (200)
+"""
+
+import base64
+import binascii
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 20))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 200))
+
+# Sort keys (all descending) of the paged listings, and the indexes serving them:
+# users(xp, level, user_id) / users(team_id, xp, level, user_id)
+LEADERBOARD_KEY = ("xp", "level", "user_id")
+# xp_buckets(period, period_start, xp) + primary key user_id
+PERIOD_LEADERBOARD_KEY = ("b.xp", "b.user_id")
+# step_milestones(user_id, milestone_steps, notified_at) + row id
+MILESTONE_KEY = ("milestone_steps", "notified_at", "id")
+
+
+def encode_cursor(kind: str, values: Sequence[Any]) -> str:
+    raw = json.dumps([kind, *values], separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, kind: str, size: int) -> Tuple:
+    """The key values of a cursor made by encode_cursor(kind, ...); ValueError if it isn't one"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+    if not isinstance(data, list) or len(data) != size + 1 or data[0] != kind:
+        raise ValueError("cursor does not belong to this listing")
+    return tuple(data[1:])
+
+
+def after_clause(columns: Sequence[str]) -> str:
+    """Row-value condition for the rows following a key in descending order"""
+    return f"({', '.join(columns)}) < ({', '.join(['%s'] * len(columns))})"
+
+
+def page(rows: List[Dict], limit: int, kind: str, key: Callable[[Dict], Sequence[Any]]) -> Tuple[List[Dict], Optional[str]]:
+    """Split a limit+1 fetch into the page and the cursor for the next one (None on the last page)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(kind, key(rows[-1]))
@@ -0,0 +1,218 @@
+"""
+Post counters - write-coalesced likes and comment counts
+
+A like is one increment of one row; running UPDATE social_feed per like
+would serialize every liker of a popular post on that row's lock. The
+like/unlike endpoints instead record the user's intent in memory
+(like, no I/O) and the comment endpoint adds to a per-post delta (add).
+A flush loop writes everything pending every POST_COUNTER_FLUSH_SECONDS
+in a single transaction (db.add_post_counts -> write_batch):
+
+- like intents become post_likes rows (one per post and user; insert-
+  ignore for a like, delete for an unlike), grouped per post, and each
+  post's likes delta is the number of rows that actually changed, so
+  liking twice or unliking without a like counts nothing;
+- then one UPDATE per post, however many likes it got. Stored counts
+  never go below zero.
+
+The request path does no database write. Whether the post exists is
+checked against known_posts (posts are never deleted, so a post seen once
+stays known); only the first like of a post in this process, or a like
+of an id that does not exist, reads social_feed.
+
+Pending work is flushed at shutdown (close). A failed flush puts it back
+(newer like intents win), so it goes out with the next one; a killed
+process loses at most one interval. Counts read back from the database
+lag by up to one interval; overlay() adds this process's pending comment
+deltas to rows being returned (a pending like's effect is not known until
+its flush).
+
+Comments themselves are rows of post_comments, written directly (each is
+its own row, so nothing contends); only social_feed.comments_count goes
+through the buffer.
+
+Config:
+    POST_COUNTER_FLUSH_SECONDS  flush interval (1.0)
+    POST_COUNTER_KNOWN_POSTS    post ids remembered as existing (100000, LRU)
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.services.social_posts import UNLIKE_POST_SQL
+
+POST_COUNTER_FLUSH_SECONDS = float(os.getenv("POST_COUNTER_FLUSH_SECONDS", 1.0))
+POST_COUNTER_KNOWN_POSTS = int(os.getenv("POST_COUNTER_KNOWN_POSTS", 100000))
+
+
+async def write_batch(cursor, rows: Iterable[Sequence], likes: Dict[Tuple[str, str], bool], like_sql: str,
+                      add_counts_sql: str) -> int:
+    """Apply like intents and (likes delta, comments delta, post_id) rows on the caller's transaction.
+
+    likes maps (post_id, user_id) to liked. Returns posts whose counts were updated.
+    """
+    deltas: Dict[str, List[int]] = {}
+    for likes_delta, comments_delta, post_id in rows:
+        deltas[post_id] = [likes_delta, comments_delta]
+    groups: Dict[Tuple[str, bool], List[Tuple[str, str]]] = {}
+    for (post_id, user_id), liked in likes.items():
+        groups.setdefault((post_id, liked), []).append((user_id, post_id))
+    for (post_id, liked), params in groups.items():
+        await cursor.executemany(like_sql if liked else UNLIKE_POST_SQL, params)
+        # rowcount sums over the batch: rows actually inserted / deleted
+        if cursor.rowcount > 0:
+            deltas.setdefault(post_id, [0, 0])[0] += cursor.rowcount if liked else -cursor.rowcount
+    counts = [(likes_delta, comments_delta, post_id) for post_id, (likes_delta, comments_delta) in deltas.items()
+              if likes_delta or comments_delta]
+    if counts:
+        await cursor.executemany(add_counts_sql, counts)
+    return len(counts)
+
+
+class CounterBuffer:
+    """Pending like intents and (likes, comments) deltas per post, flushed to the database in batches"""
+
+    def __init__(self):
+        self.db = None
+        self.pending: Dict[str, List[int]] = {}
+        self.likes: Dict[Tuple[str, str], bool] = {}
+        self.known_posts: "OrderedDict[str, None]" = OrderedDict()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.increments = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.likes_written = 0
+        self.last_flush_ms = 0.0
+
+    def add(self, post_id: str, likes: int = 0, comments: int = 0):
+        self._merge(post_id, likes, comments)
+        self.increments += 1
+
+    def like(self, post_id: str, user_id: str, liked: bool = True):
+        """Record that user_id likes (or no longer likes) post_id; the latest intent per user wins"""
+        self.likes[(post_id, user_id)] = liked
+        self.increments += 1
+
+    async def post_exists(self, db, post_id: str) -> bool:
+        if post_id in self.known_posts:
+            self.known_posts.move_to_end(post_id)
+            return True
+        if not await db.post_exists(post_id):
+            return False
+        self.known_posts[post_id] = None
+        if len(self.known_posts) > POST_COUNTER_KNOWN_POSTS:
+            self.known_posts.popitem(last=False)
+        return True
+
+    def _merge(self, post_id: str, likes: int, comments: int):
+        deltas = self.pending.get(post_id)
+        if deltas is None:
+            self.pending[post_id] = [likes, comments]
+        else:
+            deltas[0] += likes
+            deltas[1] += comments
+
+    def overlay(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rows with this process's unflushed deltas added to their likes / comments_count"""
+        rows = list(rows)
+        for row in rows:
+            deltas = self.pending.get(row.get("post_id"))
+            if deltas is None:
+                continue
+            if "likes" in row:
+                row["likes"] = max((row["likes"] or 0) + deltas[0], 0)
+            if "comments_count" in row:
+                row["comments_count"] = max((row["comments_count"] or 0) + deltas[1], 0)
+        return rows
+
+    async def flush(self, db=None) -> int:
+        """Write every pending like intent and delta; returns posts whose counts were updated"""
+        db = db or self.db
+        async with self._flush_lock:
+            if not self.pending and not self.likes:
+                return 0
+            batch, self.pending = self.pending, {}
+            likes, self.likes = self.likes, {}
+            rows: List[Tuple[int, int, str]] = [(l, c, post_id) for post_id, (l, c) in batch.items() if l or c]
+            start = time.perf_counter()
+            try:
+                written = await db.add_post_counts(rows, likes) if rows or likes else 0
+            except BaseException:
+                for likes_delta, comments, post_id in rows:
+                    self._merge(post_id, likes_delta, comments)
+                for key, liked in likes.items():
+                    self.likes.setdefault(key, liked)
+                raise
+            self.flushes += 1
+            self.rows_written += written
+            self.likes_written += len(likes)
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            return written
+
+    def attach(self, db, interval: float = None):
+        """Flush to db every interval seconds"""
+        self.db = db
+        interval = POST_COUNTER_FLUSH_SECONDS if interval is None else interval
+        self._flush_task = asyncio.ensure_future(self._flush_loop(interval))
+
+    def ensure_attached(self, db):
+        """Start flushing on first use when the app runs without its lifespan"""
+        if self.db is None:
+            self.attach(db)
+
+    async def _flush_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # shielded: close() cancels the loop, then waits for a write in progress and flushes the rest
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                print(f"[COUNTERS] Flush failed, keeping deltas: {e}")
+
+    async def close(self):
+        """Stop the loop and flush what is left"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        if self.db is not None:
+            try:
+                flushed = await self.flush()
+                if flushed:
+                    print(f"[COUNTERS] Flushed counts of {flushed} posts at shutdown")
+            except Exception as e:
+                print(f"[COUNTERS] Final flush failed, {len(self.pending)} posts' counts and {len(self.likes)} likes lost: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_posts": len(self.pending),
+            "pending_likes": len(self.likes),
+            "known_posts": len(self.known_posts),
+            "increments": self.increments,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "likes_written": self.likes_written,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+_buffer: Optional[CounterBuffer] = None
+
+
+def get_post_counters() -> CounterBuffer:
+    """App-wide counter buffer (flushing is started in the FastAPI lifespan)"""
+    global _buffer
+    if _buffer is None:
+        _buffer = CounterBuffer()
+    return _buffer
+
+
+async def close_post_counters():
+    global _buffer
+    if _buffer is not None:
+        await _buffer.close()
+    _buffer = None
@@ -2,6 +2,7 @@ import json
 from typing import Dict
 from datetime import datetime
 import random
+from backend.services.id_generator import new_id
 
 SAMPLE_IMAGES = [
     "https://picsum.photos/seed/1/800/400",
@@ -12,7 +13,7 @@ SAMPLE_IMAGES = [
 
 def generate_level_up_post(user_id: str, username: str, new_level: int, stats_gained: Dict) -> Dict:
     post = {
-        "post_id": f"post_{user_id}_{int(datetime.utcnow().timestamp())}",
+        "post_id": new_id("post_"),
         "user_id": user_id,
         "type": "level_up",
         "timestamp": datetime.utcnow().isoformat() + "Z",
@@ -54,7 +55,7 @@ def generate_daily_post(user_id: str, username: str, daily_log: Dict) -> Dict:
     }
 
     post = {
-        "post_id": f"post_{user_id}_{int(datetime.utcnow().timestamp())}",
+        "post_id": new_id("post_"),
         "user_id": user_id,
         "type": "daily_log",
         "timestamp": datetime.utcnow().isoformat() + "Z",
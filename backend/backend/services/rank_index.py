@@ -0,0 +1,258 @@
+"""
+Rank index - in-process order statistics over the all-time leaderboard
+
+Ranks users in /leaderboard/global?period=all order (xp, level, user_id,
+all descending) without touching the database:
+
+- a Fenwick tree counts users per XP value, so "how many users have more
+  XP than v" and "which XP value holds the k-th place" are O(log max_xp)
+- users sharing an XP value sit in a small ascending list of (level,
+  user_id), read from the end to order the ties
+
+rank(user_id) and around(user_id, window) back /leaderboard/rank/{user_id}
+and /leaderboard/around/{user_id}. The index is loaded from users at
+startup (attach) and registers itself as a user listener on the database
+client (add_user_listener), so every upsert_user / upsert_users_bulk in
+this process is applied immediately. Writes made by other worker processes
+or by hand are picked up by reconcile(), which rebuilds the index from the
+users table every RANK_RECONCILE_SECONDS and reports how many entries had
+drifted.
+
+Config:
+    RANK_RECONCILE_SECONDS  full rebuild interval (300; 0 disables)
+"""
+
+import asyncio
+import bisect
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+RANK_RECONCILE_SECONDS = float(os.getenv("RANK_RECONCILE_SECONDS", 300))
+
+LOAD_QUERY = "SELECT user_id, username, level, xp FROM users"
+
+
+class FenwickTree:
+    """Counts per non-negative integer key with O(log n) prefix sums and k-th search"""
+
+    def __init__(self, size: int = 1024):
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+
+    def _grow(self, key: int):
+        # doubling a power-of-two tree: the new nodes cover only empty keys,
+        # except the new root, which covers everything
+        while self.size <= key:
+            self.tree.extend([0] * (self.size - 1) + [self.total])
+            self.size *= 2
+
+    def add(self, key: int, delta: int):
+        if key >= self.size:
+            self._grow(key)
+        self.total += delta
+        i = key + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, key: int) -> int:
+        """Count of keys <= key"""
+        i = min(key + 1, self.size)
+        n = 0
+        while i > 0:
+            n += self.tree[i]
+            i -= i & -i
+        return n
+
+    def count_at(self, key: int) -> int:
+        return self.prefix(key) - (self.prefix(key - 1) if key > 0 else 0)
+
+    def find(self, k: int) -> int:
+        """Smallest key whose prefix count reaches k (1-based)"""
+        pos, step = 0, self.size
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step //= 2
+        return pos
+
+
+class RankIndex:
+    """Leaderboard positions of every user, kept in step with users writes"""
+
+    def __init__(self):
+        self.db = None
+        self.tree = FenwickTree()
+        self.users: Dict[str, Tuple[int, int, Optional[str]]] = {}   # user_id -> (xp, level, username)
+        self.ties: Dict[int, List[Tuple[int, str]]] = {}             # xp -> sorted [(level, user_id)]
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self._pending: Optional[Dict[str, Optional[Dict]]] = None
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self.reconciles = 0
+        self.last_drift = 0
+        self.last_reconcile_ms = 0.0
+
+    # Maintenance
+    def _insert(self, user_id: str, xp: int, level: int, username: Optional[str]):
+        self.users[user_id] = (xp, level, username)
+        self.tree.add(xp, 1)
+        bisect.insort(self.ties.setdefault(xp, []), (level, user_id))
+
+    def _remove(self, user_id: str):
+        xp, level, _ = self.users.pop(user_id)
+        self.tree.add(xp, -1)
+        bucket = self.ties[xp]
+        del bucket[bisect.bisect_left(bucket, (level, user_id))]
+        if not bucket:
+            del self.ties[xp]
+
+    def update(self, user: Dict[str, Any]):
+        """Apply one written users row (user_id, xp, level, username)"""
+        user_id = user["user_id"]
+        xp, level = max(int(user.get("xp") or 0), 0), int(user.get("level") or 1)
+        if self._pending is not None:
+            self._pending[user_id] = user
+        current = self.users.get(user_id)
+        if current is not None:
+            if current[:2] == (xp, level):
+                self.users[user_id] = (xp, level, user.get("username"))
+                return
+            self._remove(user_id)
+        self._insert(user_id, xp, level, user.get("username"))
+
+    def on_users_written(self, users: Iterable[Dict]):
+        for user in users:
+            self.update(user)
+
+    # Queries
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based position of user_id; None if unknown"""
+        entry = self.users.get(user_id)
+        if entry is None:
+            return None
+        xp, level, _ = entry
+        above = self.tree.total - self.tree.prefix(xp)
+        bucket = self.ties[xp]
+        return above + len(bucket) - bisect.bisect_left(bucket, (level, user_id))
+
+    def at(self, rank: int) -> Dict[str, Any]:
+        """The user at a 1-based position"""
+        # rank r from the top is the (total - r + 1)-th smallest xp
+        xp = self.tree.find(self.tree.total - rank + 1)
+        above = self.tree.total - self.tree.prefix(xp)
+        bucket = self.ties[xp]
+        _, user_id = bucket[len(bucket) - (rank - above)]
+        return self.entry(user_id, rank)
+
+    def entry(self, user_id: str, rank: int) -> Dict[str, Any]:
+        xp, level, username = self.users[user_id]
+        return {"rank": rank, "user_id": user_id, "username": username, "level": level, "xp": xp}
+
+    def around(self, user_id: str, window: int) -> Optional[List[Dict[str, Any]]]:
+        """Up to window users on each side of user_id, in rank order; None if unknown"""
+        rank = self.rank(user_id)
+        if rank is None:
+            return None
+        first, last = max(1, rank - window), min(len(self.users), rank + window)
+        return [self.at(r) for r in range(first, last + 1)]
+
+    # Loading
+    async def _read_users(self, db) -> "RankIndex":
+        fresh = RankIndex()
+        async for batch in db.iter_rows(LOAD_QUERY):
+            for row in batch:
+                fresh.update(row)
+        return fresh
+
+    async def reconcile(self, db=None) -> Dict[str, Any]:
+        """Rebuild from the users table, keeping writes that land meanwhile; returns drift stats"""
+        db = db or self.db
+        async with self._load_lock:
+            start = time.perf_counter()
+            self._pending = {}
+            try:
+                fresh = await self._read_users(db)
+            finally:
+                pending, self._pending = self._pending, None
+            for user in pending.values():
+                fresh.update(user)
+            drift = sum(1 for u, v in fresh.users.items() if self.users.get(u, (None, None))[:2] != v[:2])
+            drift += sum(1 for u in self.users if u not in fresh.users)
+            self.tree, self.users, self.ties = fresh.tree, fresh.users, fresh.ties
+            self.loaded = True
+            self.reconciles += 1
+            self.last_drift = drift
+            self.last_reconcile_ms = (time.perf_counter() - start) * 1000
+        if drift and self.reconciles > 1:
+            print(f"[RANK] Reconciled {len(self.users)} users, {drift} had drifted ({self.last_reconcile_ms:.0f}ms)")
+        return self.stats()
+
+    async def ensure_loaded(self, db):
+        """Load (and follow writes) on first use when the app runs without its lifespan"""
+        if self.loaded:
+            return
+        if self.db is None:
+            self.db = db
+            db.add_user_listener(self.on_users_written)
+        await self.reconcile(db)
+
+    async def attach(self, db, interval: float = None):
+        """Load all users, follow this process's user writes and reconcile on a timer"""
+        self.db = db
+        db.add_user_listener(self.on_users_written)
+        await self.reconcile(db)
+        interval = RANK_RECONCILE_SECONDS if interval is None else interval
+        if interval > 0:
+            self._reconcile_task = asyncio.ensure_future(self._reconcile_loop(interval))
+        print(f"[RANK] Rank index loaded: {len(self.users)} users in {self.last_reconcile_ms:.0f}ms")
+
+    async def _reconcile_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"[RANK] Reconcile failed: {e}")
+
+    async def close(self):
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            await asyncio.gather(self._reconcile_task, return_exceptions=True)
+        self._reconcile_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self.users),
+            "xp_slots": self.tree.size,
+            "reconciles": self.reconciles,
+            "last_drift": self.last_drift,
+            "last_reconcile_ms": round(self.last_reconcile_ms, 2),
+        }
+
+
+_index: Optional[RankIndex] = None
+
+
+def get_rank_index() -> RankIndex:
+    """App-wide rank index (attached to the database in the FastAPI lifespan)"""
+    global _index
+    if _index is None:
+        _index = RankIndex()
+    return _index
+
+
+async def close_rank_index():
+    global _index
+    if _index is not None:
+        await _index.close()
+    _index = None
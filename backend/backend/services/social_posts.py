@@ -0,0 +1,117 @@
+"""
+Social posts - canonical content encoding and feed field projection
+
+Post content is stored in exactly one form: compact JSON (no whitespace,
+UTF-8 kept as is) written by encode_content, whatever the caller handed
+in (a dict, or a string that already holds JSON). Reading it back is a
+single json.loads in decode_content. Rows written before this, such as
+the Python repr the level-up post used to store, are rewritten by
+backend/migrations/migrate_canonical_post_content.py.
+
+Feed endpoints take ?fields=post_id,content,... (parse_fields). Only the
+requested columns are selected (select_list), plus the feed's sort key
+columns when a cursor has to be built from them; project() then drops
+whatever the caller did not ask for.
+
+Comments live in post_comments, newest first by their time-ordered
+comment_id (services/id_generator.py). Likes are one post_likes row per
+(post, user), written in batches by services/post_counters.py.
+"""
+
+import ast
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+POST_FIELDS = ("post_id", "user_id", "type", "timestamp", "content", "likes", "comments_count")
+
+COMMENT_COLUMNS = ("comment_id", "post_id", "user_id", "text", "created_at")
+INSERT_COMMENT_SQL = f"""
+INSERT INTO post_comments ({", ".join(COMMENT_COLUMNS)})
+VALUES ({", ".join(["%s"] * len(COMMENT_COLUMNS))})
+"""
+# params (user_id, post_id), like each client's LIKE_POST_SQL
+UNLIKE_POST_SQL = "DELETE FROM post_likes WHERE user_id = %s AND post_id = %s"
+
+
+def encode_content(content: Any) -> str:
+    """Canonical stored form of a post's content"""
+    if isinstance(content, (bytes, bytearray)):
+        content = content.decode()
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except ValueError:
+            pass  # plain text content: stored as a JSON string
+    return json.dumps({} if content is None else content, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode_content(value: Any) -> Any:
+    if isinstance(value, (str, bytes, bytearray)):
+        return json.loads(value)
+    return value
+
+
+def repair_content(value: Any) -> Optional[str]:
+    """Canonical form of a stored value that doesn't decode to its content in one parse; None if it does"""
+    if value is None:
+        return encode_content(None)
+    try:
+        content = json.loads(value)
+    except ValueError:
+        try:
+            # legacy str(dict) rows
+            content = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            content = value
+        return encode_content(content)
+    if isinstance(content, str):
+        # double-encoded: a JSON string holding JSON
+        try:
+            return encode_content(json.loads(content))
+        except ValueError:
+            pass
+    return None
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Requested post fields in POST_FIELDS order (all when fields is empty); ValueError for unknown names"""
+    if not fields:
+        return POST_FIELDS
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted.difference(POST_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))} (allowed: {', '.join(POST_FIELDS)})")
+    if not wanted:
+        return POST_FIELDS
+    return tuple(f for f in POST_FIELDS if f in wanted)
+
+
+def select_list(fields: Sequence[str], key: Sequence[str] = (), columns: Dict[str, str] = None) -> str:
+    """SELECT list of fields plus the key columns, each as columns.get(name, name) AS name"""
+    columns = columns or {}
+    names = list(fields) + [k for k in key if k not in fields]
+    return ", ".join(f"{columns[n]} AS {n}" if n in columns else n for n in names)
+
+
+def decode_rows(rows: Iterable[Dict]) -> List[Dict]:
+    rows = list(rows)
+    for row in rows:
+        if "content" in row:
+            row["content"] = decode_content(row["content"])
+    return rows
+
+
+def project(rows: Iterable[Dict], fields: Sequence[str]) -> List[Dict]:
+    """Rows reduced to fields (after the cursor was taken from the full rows)"""
+    return [{f: row[f] for f in fields} for row in rows]
+
+
+def comments_query(after: bool = False) -> str:
+    """One page of a post's comments, newest first (params: post_id[, comment_id of the previous page], limit)"""
+    return f"""
+        SELECT comment_id, user_id, text, created_at
+        FROM post_comments
+        WHERE post_id = %s{" AND comment_id < %s" if after else ""}
+        ORDER BY comment_id DESC
+        LIMIT %s
+    """
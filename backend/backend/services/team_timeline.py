@@ -0,0 +1,112 @@
+"""
+Team timelines - social feed posts fanned out per team on write
+
+/social/team/{team_id} used to join social_feed to users and sort every
+post of the team on each read. Instead every post is copied, in the
+transaction that inserts it, into team_timeline as (team_id, timestamp,
+post_id, user_id) under its author's current team. A team feed page is
+then one range read of the primary key (team_id, timestamp, post_id) plus
+a primary key lookup per post, paged with a keyset cursor on (timestamp,
+post_id) (services/pagination.py).
+
+A timeline row keeps the team its author had when it was written. When a
+user changes teams (or a post was written before this table existed) the
+rows are repaired by rebuild_users: the user's rows are deleted and
+re-copied from social_feed under the current team. The leased timeline
+job finds such users (STALE_USERS_QUERY) every TIMELINE_REBUILD_SECONDS;
+/admin/rebuild-team-timelines runs it on demand.
+
+Queries use %s placeholders on both backends; the INSERT ... SELECT
+statements take the dialect's insert-ignore prefix from the client.
+
+Config:
+    TIMELINE_REBUILD_SECONDS  stale timeline scan interval (300)
+"""
+
+import os
+from typing import Iterable, Sequence
+from backend.services import pagination, social_posts
+from backend.services.leases import Lease, LeaseManager, LeasedJob
+
+TIMELINE_REBUILD_SECONDS = float(os.getenv("TIMELINE_REBUILD_SECONDS", 300))
+TIMELINE_JOB = "team-timeline"
+
+TIMELINE_COLUMNS = ("team_id", "timestamp", "post_id", "user_id")
+# sort key (descending) of a team feed page; the cursor holds its values
+FEED_KEY = ("t.timestamp", "t.post_id")
+# post fields served by the timeline row itself, and those read from social_feed
+FEED_COLUMNS = {"timestamp": "t.timestamp", "post_id": "t.post_id", "user_id": "t.user_id"}
+POST_COLUMNS = {"type": "sf.type", "content": "sf.content", "likes": "sf.likes", "comments_count": "sf.comments_count"}
+
+# Users whose timeline rows are under another team than theirs, or who have
+# posts missing from their team's timeline
+STALE_USERS_QUERY = """
+    SELECT DISTINCT t.user_id
+    FROM team_timeline t
+    JOIN users u ON u.user_id = t.user_id
+    WHERE u.team_id IS NULL OR u.team_id <> t.team_id
+    UNION
+    SELECT DISTINCT sf.user_id
+    FROM social_feed sf
+    JOIN users u ON u.user_id = sf.user_id
+    LEFT JOIN team_timeline t ON t.post_id = sf.post_id
+    WHERE u.team_id IS NOT NULL AND t.post_id IS NULL
+"""
+
+
+def copy_sql(insert_ignore: str, where: str) -> str:
+    """INSERT ... SELECT of the social_feed posts matching where into their authors' team timelines"""
+    return f"""
+        {insert_ignore} team_timeline ({", ".join(TIMELINE_COLUMNS)})
+        SELECT u.team_id, COALESCE(sf.timestamp, sf.created_at), sf.post_id, sf.user_id
+        FROM social_feed sf
+        JOIN users u ON u.user_id = sf.user_id
+        WHERE {where} AND u.team_id IS NOT NULL
+    """
+
+
+async def fan_out(cursor, post_ids: Iterable[str], fan_out_sql: str, replace: bool = False):
+    """Copy just-inserted posts into their authors' team timelines (on the insert's transaction).
+
+    replace drops the posts' existing timeline rows first (their timestamp may have changed).
+    """
+    rows = [(post_id,) for post_id in post_ids]
+    if replace:
+        await cursor.executemany("DELETE FROM team_timeline WHERE post_id = %s", rows)
+    await cursor.executemany(fan_out_sql, rows)
+
+
+async def rebuild_users(cursor, user_ids: Iterable[str], rebuild_sql: str) -> int:
+    """Re-copy every post of user_ids under their current team; returns users rebuilt"""
+    rows = [(user_id,) for user_id in user_ids]
+    if rows:
+        await cursor.executemany("DELETE FROM team_timeline WHERE user_id = %s", rows)
+        await cursor.executemany(rebuild_sql, rows)
+    return len(rows)
+
+
+def feed_query(after: bool = False, fields: Sequence[str] = social_posts.POST_FIELDS) -> str:
+    """One team feed page (params: team_id[, timestamp, post_id of the previous page], limit).
+
+    Selects fields plus the (timestamp, post_id) cursor key; social_feed is
+    only joined when a field lives there.
+    """
+    join = any(f in POST_COLUMNS for f in fields)
+    return f"""
+        SELECT {social_posts.select_list(fields, ("timestamp", "post_id"), {**FEED_COLUMNS, **POST_COLUMNS})}
+        FROM team_timeline t{" JOIN social_feed sf ON sf.post_id = t.post_id" if join else ""}
+        WHERE t.team_id = %s{" AND " + pagination.after_clause(FEED_KEY) if after else ""}
+        ORDER BY t.timestamp DESC, t.post_id DESC
+        LIMIT %s
+    """
+
+
+def timeline_job(db, leases: LeaseManager, interval: float = None) -> LeasedJob:
+    """Leased periodic repair of stale timelines: exactly one process runs it"""
+
+    async def run(lease: Lease):
+        rebuilt = await db.rebuild_team_timelines(fence=lease)
+        if rebuilt:
+            print(f"[TIMELINE] Rebuilt team timelines of {rebuilt} users")
+
+    return LeasedJob(leases, TIMELINE_JOB, run, TIMELINE_REBUILD_SECONDS if interval is None else interval)
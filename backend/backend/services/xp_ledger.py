@@ -0,0 +1,99 @@
+"""
+XP ledger - append-only xp_ledger and per-period xp_buckets
+
+users.xp is the progress inside the current level (apply_xp_and_level
+subtracts the XP a level-up costs), so it can't rank anyone over a period.
+Every XP grant is instead appended to xp_ledger, and in the same
+transaction added to the user's daily, weekly and monthly row in
+xp_buckets (one row per period, period start and user). A period
+leaderboard is then one index range read of the top rows of a bucket.
+
+Weeks start on Monday; all periods are UTC calendar periods. A bucket's
+team_id is the user's team at their latest grant in that period.
+
+append_entries runs on the caller's transaction cursor; queries use %s
+placeholders on both backends.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.services import pagination
+
+PERIODS = ("daily", "weekly", "monthly")
+# period values served from users (level, xp) instead of the buckets
+ALL_TIME = ("all", "all_time")
+
+LEDGER_COLUMNS = ("user_id", "team_id", "xp", "source", "earned_at")
+BUCKET_COLUMNS = ("period", "period_start", "user_id", "team_id", "xp")
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def normalize_period(period: Optional[str]) -> Optional[str]:
+    """One of PERIODS, or None for all-time; ValueError for anything else"""
+    value = (period or "all").strip().lower()
+    if value in ALL_TIME:
+        return None
+    if value not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS + ALL_TIME)}")
+    return value
+
+
+def period_start(period: str, day: date) -> str:
+    """First day of the period containing day, as 'YYYY-MM-DD'"""
+    if period == "daily":
+        start = day
+    elif period == "weekly":
+        start = day - timedelta(days=day.weekday())
+    elif period == "monthly":
+        start = day.replace(day=1)
+    else:
+        raise ValueError(f"unknown period {period!r}")
+    return start.isoformat()
+
+
+def bucket_rows(entries: Iterable[Dict]) -> List[Tuple]:
+    """Additive xp_buckets params (BUCKET_COLUMNS order), one per period, start and user"""
+    buckets: Dict[Tuple[str, str, str], List] = {}
+    for e in entries:
+        day = e["earned_at"].date()
+        for period in PERIODS:
+            key = (period, period_start(period, day), e["user_id"])
+            row = buckets.setdefault(key, [e.get("team_id"), 0])
+            # entries are in time order, so the last team wins
+            row[0] = e.get("team_id")
+            row[1] += int(e["xp"])
+    return [(*key, team_id, xp) for key, (team_id, xp) in buckets.items()]
+
+
+async def append_entries(cursor, entries: Iterable[Dict], add_bucket_sql: str) -> int:
+    """Append XP grants to the ledger and add them to their buckets; returns entries written.
+
+    entries: dicts with user_id, team_id, xp, source and earned_at (datetime, UTC).
+    """
+    entries = [e for e in entries if int(e["xp"]) != 0]
+    if not entries:
+        return 0
+    await cursor.executemany(
+        f"INSERT INTO xp_ledger ({', '.join(LEDGER_COLUMNS)}) VALUES ({', '.join(['%s'] * len(LEDGER_COLUMNS))})",
+        [(e["user_id"], e.get("team_id"), int(e["xp"]), e.get("source"), e["earned_at"].strftime(TIME_FORMAT)) for e in entries],
+    )
+    await cursor.executemany(add_bucket_sql, bucket_rows(entries))
+    return len(entries)
+
+
+def leaderboard_query(team: bool, after: bool = False) -> str:
+    """Top users of one bucket (params: period, period_start[, team_id][, xp, user_id of the previous page], limit)"""
+    return f"""
+        SELECT b.user_id, u.username, u.level, b.xp
+        FROM xp_buckets b
+        JOIN users u ON u.user_id = b.user_id
+        WHERE b.period = %s AND b.period_start = %s{" AND b.team_id = %s" if team else ""}{
+            " AND " + pagination.after_clause(pagination.PERIOD_LEADERBOARD_KEY) if after else ""}
+        ORDER BY b.xp DESC, b.user_id DESC
+        LIMIT %s
+    """
+
+
+def current_start(period: str, now: datetime = None) -> str:
+    return period_start(period, (now or datetime.utcnow()).date())
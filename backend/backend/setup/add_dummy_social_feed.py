@@ -5,7 +5,6 @@ Adds realistic social feed entries to the database
 """
 
 import asyncio
-import json
 import os
 from datetime import datetime, timedelta
 from backend.database.mysql_client import MySQLClient
@@ -212,24 +211,8 @@ async def add_dummy_social_feed():
         
         for post in social_posts:
             try:
-                query = """
-                INSERT INTO social_feed (post_id, user_id, type, timestamp, content)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    content = VALUES(content),
-                    timestamp = VALUES(timestamp)
-                """
-                
-                timestamp = datetime.now().isoformat()
-                content_json = json.dumps(post["content"])
-                
-                await db.execute(query, (
-                    post["post_id"],
-                    post["user_id"],
-                    post["type"],
-                    timestamp,
-                    content_json
-                ))
+                # canonical content encoding and team timeline fan-out; upsert keeps re-runs safe
+                await db.insert_social_post(dict(post, timestamp=datetime.now().isoformat()), upsert=True)
                 
                 print(f"✓ Added: {post['type']:20} | User: {post['user_id']:15} | ID: {post['post_id']}")
                 
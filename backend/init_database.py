@@ -67,7 +67,9 @@ def create_tables(connection, db_name):
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             INDEX idx_team_id (team_id),
             INDEX idx_level (level),
-            INDEX idx_xp (xp)
+            INDEX idx_xp (xp),
+            INDEX idx_rank (xp, level, user_id),
+            INDEX idx_team_rank (team_id, xp, level, user_id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """,
         
@@ -78,6 +80,13 @@ def create_tables(connection, db_name):
             user_id VARCHAR(255) NOT NULL,
             date DATE NOT NULL,
             data JSON,
+            total_steps INT DEFAULT 0,
+            deep_sleep_minutes INT DEFAULT 0,
+            total_sleep_minutes INT DEFAULT 0,
+            active_calories FLOAT DEFAULT 0,
+            workout_score FLOAT DEFAULT 0,
+            battle_score FLOAT DEFAULT 0,
+            workout_count INT DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE KEY unique_user_date (user_id, date),
             INDEX idx_user_id (user_id),
@@ -125,6 +134,8 @@ def create_tables(connection, db_name):
             type VARCHAR(100),
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
             content JSON,
+            likes INT DEFAULT 0,
+            comments_count INT DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             INDEX idx_user_id (user_id),
             INDEX idx_timestamp (timestamp),
@@ -140,13 +151,164 @@ def create_tables(connection, db_name):
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Per-user daily rollup (one row per daily log, maintained on write)
+        """
+        CREATE TABLE IF NOT EXISTS user_daily_summary (
+            user_id VARCHAR(255) NOT NULL,
+            date DATE NOT NULL,
+            team_id VARCHAR(255),
+            total_steps INT DEFAULT 0,
+            deep_sleep_minutes INT DEFAULT 0,
+            total_sleep_minutes INT DEFAULT 0,
+            active_calories FLOAT DEFAULT 0,
+            workout_score FLOAT DEFAULT 0,
+            battle_score FLOAT DEFAULT 0,
+            workout_count INT DEFAULT 0,
+            recovery_score FLOAT NULL,
+            activity_counts JSON,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, date),
+            INDEX idx_team_date (team_id, date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Per-team daily rollup (sums of user_daily_summary)
+        """
+        CREATE TABLE IF NOT EXISTS team_daily_summary (
+            team_id VARCHAR(255) NOT NULL,
+            date DATE NOT NULL,
+            log_count INT DEFAULT 0,
+            total_steps BIGINT DEFAULT 0,
+            deep_sleep_minutes BIGINT DEFAULT 0,
+            total_sleep_minutes BIGINT DEFAULT 0,
+            active_calories DOUBLE DEFAULT 0,
+            workout_score DOUBLE DEFAULT 0,
+            battle_score DOUBLE DEFAULT 0,
+            workout_count INT DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (team_id, date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Per-battle partial sums per team per day (folded incrementally by the aggregator)
+        """
+        CREATE TABLE IF NOT EXISTS battle_partials (
+            battle_id VARCHAR(255) NOT NULL,
+            team_id VARCHAR(255) NOT NULL,
+            date DATE NOT NULL,
+            log_count INT DEFAULT 0,
+            battle_score DOUBLE DEFAULT 0,
+            PRIMARY KEY (battle_id, team_id, date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Aggregation watermark per battle (last folded daily_logs.id)
+        """
+        CREATE TABLE IF NOT EXISTS battle_aggregates (
+            battle_id VARCHAR(255) PRIMARY KEY,
+            last_log_id INT DEFAULT 0,
+            rebuilt_at TIMESTAMP NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Battle score snapshots per minute/hour/day bucket (written by the aggregator)
+        """
+        CREATE TABLE IF NOT EXISTS battle_score_history (
+            battle_id VARCHAR(255) NOT NULL,
+            resolution ENUM('minute', 'hour', 'day') NOT NULL,
+            bucket_start DATETIME NOT NULL,
+            team_a_score DOUBLE DEFAULT 0,
+            team_b_score DOUBLE DEFAULT 0,
+            samples INT DEFAULT 1,
+            PRIMARY KEY (battle_id, resolution, bucket_start)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Frozen final result of completed battles (written by the lifecycle sweep)
+        """
+        CREATE TABLE IF NOT EXISTS battle_archive (
+            battle_id VARCHAR(255) PRIMARY KEY,
+            team_a_id VARCHAR(255) NOT NULL,
+            team_b_id VARCHAR(255) NOT NULL,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            final_scores JSON,
+            winner VARCHAR(255),
+            completed_at DATETIME NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Append-only XP grants (written by /gamification/calculate-xp)
+        """
+        CREATE TABLE IF NOT EXISTS xp_ledger (
+            entry_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            user_id VARCHAR(255) NOT NULL,
+            team_id VARCHAR(255),
+            xp INT NOT NULL,
+            source VARCHAR(64),
+            earned_at DATETIME NOT NULL,
+            INDEX idx_xp_ledger_user (user_id, earned_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # XP per user per daily/weekly/monthly period (maintained with each ledger entry)
+        """
+        CREATE TABLE IF NOT EXISTS xp_buckets (
+            period ENUM('daily', 'weekly', 'monthly') NOT NULL,
+            period_start DATE NOT NULL,
+            user_id VARCHAR(255) NOT NULL,
+            team_id VARCHAR(255),
+            xp BIGINT DEFAULT 0,
+            PRIMARY KEY (period, period_start, user_id),
+            INDEX idx_xp_buckets_rank (period, period_start, xp),
+            INDEX idx_xp_buckets_team_rank (team_id, period, period_start, xp)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Social feed posts per team, written with each post (fan-out on write)
+        """
+        CREATE TABLE IF NOT EXISTS team_timeline (
+            team_id VARCHAR(255) NOT NULL,
+            timestamp DATETIME NOT NULL,
+            post_id VARCHAR(255) NOT NULL,
+            user_id VARCHAR(255) NOT NULL,
+            PRIMARY KEY (team_id, timestamp, post_id),
+            INDEX idx_team_timeline_user (user_id),
+            INDEX idx_team_timeline_post (post_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        
+        # Comments on social feed posts (counts kept in social_feed.comments_count)
+        """
+        CREATE TABLE IF NOT EXISTS post_comments (
+            comment_id VARCHAR(64) PRIMARY KEY,
+            post_id VARCHAR(255) NOT NULL,
+            user_id VARCHAR(255) NOT NULL,
+            text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_post_comments_post (post_id, comment_id),
+            FOREIGN KEY (post_id) REFERENCES social_feed(post_id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        # One row per (post, user) like; social_feed.likes is the count
+        """
+        CREATE TABLE IF NOT EXISTS post_likes (
+            post_id VARCHAR(255) NOT NULL,
+            user_id VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (post_id, user_id),
+            FOREIGN KEY (post_id) REFERENCES social_feed(post_id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """
     ]
     
     try:
         for i, sql in enumerate(sql_statements, 1):
             cursor.execute(sql)
-            table_names = ["users", "daily_logs", "teams", "battles", "social_feed", "meta"]
+            table_names = ["users", "daily_logs", "teams", "battles", "social_feed", "meta", "user_daily_summary", "team_daily_summary", "battle_partials", "battle_aggregates", "battle_score_history", "battle_archive", "xp_ledger", "xp_buckets", "team_timeline", "post_comments", "post_likes"]
             print(f"✓ Table '{table_names[i-1]}' created or already exists")
         connection.commit()
         print(f"\n✓ All {len(sql_statements)} tables created successfully!")
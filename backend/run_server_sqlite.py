@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
-Standalone server for testing without MySQL - Analysis endpoints only
+Single-node server backed by SQLite - no MySQL required
+
+Runs the full Vital Quest app on the pooled, WAL-mode SQLiteClient and keeps
+the legacy /analyze/* endpoints used by the Streamlit UI.
 """
 
 import os
@@ -8,17 +11,14 @@ import logging
 
 logging.basicConfig(level=logging.INFO)
 
-from fastapi import FastAPI, HTTPException
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", "./vital_quest.db")
+
+from fastapi import HTTPException
 from backend.models.schemas import DailyLog
+from backend.main import app
 import uvicorn
 
-# Create a minimal FastAPI app with only analysis endpoints
-app = FastAPI(
-    title="Vital Quest Backend (Standalone Mode)",
-    version="2.0-standalone",
-    description="Analysis-only backend for testing without MySQL"
-)
-
 # Analysis endpoints that work without DB
 @app.post("/analyze/recovery")
 async def analyze_recovery(log: DailyLog):
@@ -82,9 +82,9 @@ async def analyze_coach(request: dict):
 
 @app.get("/recap/{timeframe}")
 async def get_recap(timeframe: str):
-    """Placeholder for recap endpoint - requires database"""
+    """Placeholder for recap endpoint"""
     return {
-        "title": f"{timeframe.capitalize()} Recap (Database Required)",
+        "title": f"{timeframe.capitalize()} Recap (Not Available)",
         "period_days": 0,
         "total_steps": 0,
         "avg_steps": 0,
@@ -96,35 +96,19 @@ async def get_recap(timeframe: str):
         "total_workouts": 0,
         "favorite_activity": "N/A",
         "avg_recovery_score": 0,
-        "error": "This feature requires MySQL database. Please use full server mode.",
+        "error": "Recaps are not implemented yet.",
         "timeframe": timeframe
     }
 
-@app.get("/health")
-async def health():
-    return {"status": "ok", "message": "vital_quest backend running (Standalone mode)", "db": "None (stateless)"}
-
-@app.get("/")
-async def root():
-    return {
-        "message": "Vital Quest Backend - Standalone Mode",
-        "status": "running",
-        "mode": "stateless",
-        "note": "Analysis endpoints only. No database persistence.",
-        "api_docs": "/docs"
-    }
-
 if __name__ == "__main__":
     print("\n" + "="*80)
-    print("VITAL QUEST SERVER - STANDALONE MODE (NO DATABASE REQUIRED)")
+    print("VITAL QUEST SERVER - SQLITE MODE (NO MYSQL REQUIRED)")
     print("="*80)
-    print("\nAvailable endpoints:")
+    print(f"\nDatabase: {os.environ['SQLITE_PATH']} (WAL mode)")
+    print("\nAll API routers are available (see /docs), plus:")
     print("  - POST /analyze/recovery  - Calculate recovery score")
     print("  - POST /analyze/battle    - Calculate battle score")
     print("  - POST /analyze/coach     - Get AI coach feedback")
-    print("  - GET  /recap/{timeframe} - Placeholder (requires DB)")
-    print("  - GET  /health            - Health check")
-    print("  - GET  /docs              - API documentation")
     print("\nStarting server on http://127.0.0.1:8000")
     print("="*80 + "\n")
     
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark: aggregate_once under synthetic load
+Seeds teams × users × days of daily logs and B battles between random team
+pairs, then times the aggregation cycles the background job runs:
+
+- cold: full rebuild of every battle (first pass after deploy / full=True)
+- per battle: isolated rebuild (team fetches + scoring) of a battle sample
+- incremental: one more day of logs for every user, folded into the scores
+
+and reports logs/s, per-battle latency and memory (RSS and Python heap
+peak). Runs on a scratch SQLite file by default; DB_BACKEND=mysql uses the
+configured MySQL database with bench_agg_* users and battles, removed
+afterwards.
+
+With a baseline path the results are compared against it (exit status 1
+when a rate drops by more than BENCH_TOLERANCE) or, if the file does not
+exist yet, written there.
+
+Usage:
+    python scripts/bench_aggregation.py [teams] [users_per_team] [days] [battles] [baseline.json] [--dummy]
+
+--dummy generates logs with app/dummy_data.generate_dummy_dailylogs
+(realistic, with sleep and heart rate samples, but much slower to seed).
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from backend.database.mysql_client import MySQLClient
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import aggregator
+
+PREFIX = "bench_agg_"
+# allowed relative drop of a rate against the baseline before failing
+BENCH_TOLERANCE = float(os.getenv("BENCH_TOLERANCE", 0.2))
+PER_BATTLE_SAMPLE = 50
+ACTIVITIES = ["Gym", "Run", "Yoga", "Walk", "Cycle"]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def fast_log(log_date: str, rng: random.Random) -> dict:
+    return {
+        "date": log_date,
+        "total_steps": rng.randint(2000, 20000),
+        "total_calories_active": rng.randint(150, 900),
+        "sleep_segments": [
+            {"stage": "deep", "duration_minutes": rng.randint(30, 150)},
+            {"stage": "light", "duration_minutes": rng.randint(200, 300)},
+        ],
+        "manual_workouts": [
+            {"activity_type": rng.choice(ACTIVITIES), "duration_minutes": rng.randint(15, 90),
+             "intensity_rpe": rng.randint(3, 9), "calories_burnt": rng.randint(100, 800)}
+            for _ in range(rng.choice([0, 1, 1, 2]))
+        ],
+    }
+
+
+def dummy_logs(days: int) -> list:
+    from backend.app.dummy_data import generate_dummy_dailylogs
+    return [log.model_dump(mode="json") for log in generate_dummy_dailylogs(days)]
+
+
+def make_users(teams: int, users_per_team: int) -> list:
+    return [
+        {"user_id": f"{PREFIX}u{t:04d}_{u:04d}", "username": f"Bench{t}_{u}", "team_id": f"{PREFIX}t{t:04d}"}
+        for t in range(teams)
+        for u in range(users_per_team)
+    ]
+
+
+def make_logs(users: list, days: list, use_dummy: bool, rng: random.Random) -> list:
+    """(user_id, date, log_json) rows for every user and day"""
+    rows = []
+    for user in users:
+        # dummy_data has no user dimension: a fresh random history per user
+        pool = dummy_logs(len(days)) if use_dummy else None
+        for i, log_date in enumerate(days):
+            log = dict(pool[i], date=log_date) if pool else fast_log(log_date, rng)
+            rows.append((user["user_id"], log_date, json.dumps(log)))
+    return rows
+
+
+def make_battles(teams: int, battles: int, start: date, end: date, rng: random.Random) -> list:
+    pairs = []
+    for b in range(battles):
+        team_a, team_b = rng.sample(range(teams), 2)
+        pairs.append((f"{PREFIX}b{b:05d}", f"{PREFIX}t{team_a:04d}", f"{PREFIX}t{team_b:04d}", str(start), str(end)))
+    return pairs
+
+
+async def cleanup(db):
+    for table in ("battle_partials", "battle_aggregates", "battle_score_history", "battle_archive", "battles"):
+        await db.execute(f"DELETE FROM {table} WHERE battle_id LIKE %s", (PREFIX + "%",))
+    # daily_logs and rollups cascade from users
+    await db.execute("DELETE FROM users WHERE user_id LIKE %s", (PREFIX + "%",))
+
+
+async def timed_pass(db, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await aggregator.aggregate_once(db, **kwargs)
+    seconds = time.perf_counter() - start
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, heap_peak / 1024 / 1024
+
+
+async def per_battle_latencies(db, sample: list) -> list:
+    """Seconds to rebuild each battle on its own (reads + scoring, no write)"""
+    ceiling = await db.get_log_watermark_ceiling()
+    latencies = []
+    for battle in sample:
+        fetches = aggregator._TeamFetches(db, ceiling, asyncio.Semaphore(aggregator.AGGREGATION_CONCURRENCY))
+        start = time.perf_counter()
+        await aggregator._rebuild_update(battle, fetches)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def compare(results: dict, path: str) -> bool:
+    if not os.path.exists(path):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"  baseline written to {path}")
+        return True
+    with open(path) as f:
+        baseline = json.load(f)
+    ok = True
+    for key in ("seed_logs_per_s", "cold_logs_per_s", "incremental_logs_per_s"):
+        before, now = baseline.get(key), results[key]
+        if not before:
+            continue
+        change = now / before - 1
+        flag = "REGRESSION" if change < -BENCH_TOLERANCE else "ok"
+        ok = ok and flag == "ok"
+        print(f"  {key:<28} {before:>12.0f} -> {now:>12.0f}  {change:>+7.1%}  {flag}")
+    for key in ("per_battle_p95_ms", "cold_heap_peak_mb"):
+        if baseline.get(key):
+            print(f"  {key:<28} {baseline[key]:>12.1f} -> {results[key]:>12.1f}")
+    return ok
+
+
+async def run(teams: int, users_per_team: int, days_n: int, battles_n: int, use_dummy: bool) -> dict:
+    scratch = None
+    if os.getenv("DB_BACKEND", "sqlite").lower() == "mysql":
+        db = MySQLClient()
+    else:
+        scratch = tempfile.mkdtemp(prefix="vq_bench_agg_")
+        db = SQLiteClient(os.path.join(scratch, "bench.db"))
+    await db.init()
+    rng = random.Random(7)
+    today = date.today()
+    days = [str(today - timedelta(days=d)) for d in range(days_n, 0, -1)]
+    try:
+        await cleanup(db)
+        users = make_users(teams, users_per_team)
+        logs = make_logs(users, days, use_dummy, rng)
+        battles = make_battles(teams, battles_n, today - timedelta(days=days_n), today + timedelta(days=7), rng)
+
+        print("=" * 80)
+        print(f" AGGREGATION BENCHMARK ({type(db).__name__}: {teams} teams x {users_per_team} users x {days_n} days "
+              f"= {len(logs)} logs, {battles_n} battles)")
+        print("=" * 80)
+
+        await db.upsert_users_bulk(users)
+        seeded = await db.insert_daily_logs_bulk(logs)
+        for battle in battles:
+            await db.create_battle(*battle)
+        seed_rate = seeded["rows"] / seeded["seconds"]
+        print(f"  seed                 {seeded['rows']:>9} logs  {seeded['seconds']:>8.3f}s  {seed_rate:>10.0f} logs/s  RSS {rss_mb():.0f} MB")
+
+        # every battle covers all seeded days, so each reads both teams' logs
+        battle_logs = 2 * users_per_team * days_n * battles_n
+        cold, cold_s, cold_heap = await timed_pass(db, full=True)
+        cold_rate = battle_logs / cold_s
+        print(f"  cold pass            {cold['battles']:>9} battles {cold_s:>7.3f}s  {cold_rate:>10.0f} logs/s  "
+              f"{cold_s / max(cold['battles'], 1) * 1000:.2f} ms/battle ({cold['team_fetches']} team fetches)")
+        print(f"                       heap peak {cold_heap:.1f} MB, RSS {rss_mb():.0f} MB")
+
+        active = await db.get_active_battles()
+        sample = rng.sample(active, min(PER_BATTLE_SAMPLE, len(active)))
+        latencies = await per_battle_latencies(db, sample)
+        p50 = statistics.median(latencies) * 1000
+        p95 = latencies[math.ceil(0.95 * len(latencies)) - 1] * 1000  # nearest rank, never below p50
+        print(f"  per battle rebuild   p50={p50:.2f}ms  p95={p95:.2f}ms  max={latencies[-1] * 1000:.2f}ms  ({len(sample)} sampled)")
+
+        new_day = str(today)
+        await db.insert_daily_logs_bulk([(u["user_id"], new_day, json.dumps(fast_log(new_day, rng))) for u in users])
+        incremental, inc_s, inc_heap = await timed_pass(db)
+        inc_rate = incremental["logs_folded"] / inc_s if incremental["logs_folded"] else 0.0
+        print(f"  incremental pass     {incremental['logs_folded']:>9} logs  {inc_s:>8.3f}s  {inc_rate:>10.0f} logs/s  "
+              f"{inc_s / max(incremental['battles'], 1) * 1000:.2f} ms/battle, heap peak {inc_heap:.1f} MB")
+        print(f"  peak RSS {peak_rss_mb():.0f} MB")
+        print("=" * 80)
+        return {
+            "backend": type(db).__name__,
+            "teams": teams,
+            "users_per_team": users_per_team,
+            "days": days_n,
+            "battles": battles_n,
+            "seed_logs_per_s": round(seed_rate),
+            "cold_seconds": round(cold_s, 3),
+            "cold_logs_per_s": round(cold_rate),
+            "cold_ms_per_battle": round(cold_s / max(cold["battles"], 1) * 1000, 3),
+            "cold_heap_peak_mb": round(cold_heap, 1),
+            "per_battle_p50_ms": round(p50, 3),
+            "per_battle_p95_ms": round(p95, 3),
+            "incremental_seconds": round(inc_s, 3),
+            "incremental_logs_per_s": round(inc_rate),
+            "peak_rss_mb": round(peak_rss_mb()),
+        }
+    finally:
+        if scratch is None:
+            await cleanup(db)
+        await db.close()
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    use_dummy = "--dummy" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--dummy"]
+    teams = int(args[0]) if len(args) > 0 else 50
+    users_per_team = int(args[1]) if len(args) > 1 else 20
+    days_n = int(args[2]) if len(args) > 2 else 30
+    battles_n = int(args[3]) if len(args) > 3 else 100
+    results = asyncio.run(run(teams, users_per_team, days_n, battles_n, use_dummy))
+    if len(args) > 4 and not compare(results, args[4]):
+        sys.exit(1)
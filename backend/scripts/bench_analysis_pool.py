@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cheap-request latency while heavy analyses run
+Runs concurrent /analyze/weekly requests (JSON bodies with thousands of
+heart-rate samples per day) two ways and measures how late a 1 ms ticker
+wakes up, which is what every cheap endpoint on the same event loop sees:
+
+  thread   - the previous handlers: body validated on the loop, sync `def`
+             handler in the threadpool (shares the GIL)
+  pool     - body bytes handed to AnalysisPool worker processes
+
+Usage:
+    python scripts/bench_analysis_pool.py [analyses] [hr_samples_per_log] [workers]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pydantic import TypeAdapter
+from backend.app.logic import calculate_weekly_stats
+from backend.models.schemas import DailyLog
+from backend.services.analysis_pool import AnalysisPool, run_analysis
+
+
+def make_week(samples: int) -> list:
+    week = []
+    for d in range(7):
+        day = date.today() - timedelta(days=d)
+        bed = datetime.combine(day, datetime.min.time())
+        week.append(DailyLog(
+            date=day,
+            total_steps=8000,
+            total_calories_active=400,
+            sleep_segments=[{"start_time": bed, "end_time": bed + timedelta(hours=7), "stage": "deep", "duration_minutes": 420}],
+            heart_rate_samples=[{"timestamp": bed + timedelta(seconds=5 * i), "bpm": 50 + i % 20} for i in range(samples)],
+            manual_workouts=[],
+        ))
+    return week
+
+
+async def probe(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+
+async def scenario(name: str, analyses: int, run_one):
+    lags, stop = [], asyncio.Event()
+    ticker = asyncio.ensure_future(probe(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one() for _ in range(analyses)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    lags.sort()
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(f"  {name:<8} {elapsed:>8.2f}s  ticks={len(lags):>6}  lag p50={statistics.median(lags):>7.2f}ms  p99={p99:>8.2f}ms  max={lags[-1]:>8.2f}ms")
+
+
+async def run(analyses: int, samples: int, workers: int):
+    body = TypeAdapter(list[DailyLog]).dump_json(make_week(samples))
+    pool = AnalysisPool(workers=workers, threshold=1)
+    await pool.start()
+
+    print("=" * 80)
+    print(f" ANALYSIS POOL BENCHMARK ({analyses} weekly analyses, {samples} HR samples/day, {len(body) // 1024} KiB body, {workers} workers)")
+    print("=" * 80)
+
+    async def thread_handler():
+        week = TypeAdapter(list[DailyLog]).validate_json(body)
+        await asyncio.to_thread(calculate_weekly_stats, week)
+
+    await scenario("thread", analyses, thread_handler)
+    await scenario("pool", analyses, lambda: pool.run(run_analysis, "weekly", body, size=len(body)))
+    print("-" * 80)
+    print(f"  pool: {pool.stats()}")
+    print("=" * 80)
+    await pool.close()
+
+
+if __name__ == "__main__":
+    analyses = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    asyncio.run(run(analyses, samples, workers))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scalar vs vectorized battle / XP scoring
+Scores users × days synthetic daily logs with battle_system's per-log
+functions and with batch_scoring over a columnar LogBatch, checks the
+results are identical and reports logs/s.
+
+Usage:
+    python scripts/bench_batch_scoring.py [users] [days] [teams]
+"""
+
+import random
+import sys
+import time
+from backend.services import batch_scoring, battle_system, gamification_engine
+
+ACTIVITIES = ["Gym", "Run", "Yoga", "Walk", "Cycle"]
+
+
+def make_logs(users: int, days: int, teams: int, rng: random.Random):
+    logs, team_ids = [], []
+    for u in range(users):
+        team_id = f"team_{u % teams}"
+        for _ in range(days):
+            logs.append({
+                "total_steps": rng.randint(2000, 20000),
+                "sleep_segments": [
+                    {"stage": "deep", "duration_minutes": rng.randint(30, 150)},
+                    {"stage": "light", "duration_minutes": rng.randint(200, 300)},
+                ],
+                "manual_workouts": [
+                    {"activity_type": rng.choice(ACTIVITIES), "duration_minutes": rng.randint(15, 90),
+                     "intensity_rpe": rng.randint(3, 9), "calories_burnt": rng.randint(100, 800)}
+                    for _ in range(rng.choice([0, 1, 1, 2]))
+                ],
+            })
+            team_ids.append(team_id)
+    return logs, team_ids
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(users: int, days: int, teams: int):
+    rng = random.Random(7)
+    logs, team_ids = make_logs(users, days, teams, rng)
+    n = len(logs)
+
+    def scalar():
+        totals = {}
+        for log, team_id in zip(logs, team_ids):
+            totals[team_id] = totals.get(team_id, 0.0) + battle_system.user_battle_score_from_dailylog(log)
+        return totals
+
+    build_s, batch = timed(lambda: batch_scoring.LogBatch.from_logs(logs, team_ids))
+    scalar_s, scalar_teams = timed(scalar)
+    vector_s, (_, vector_teams) = timed(lambda: batch_scoring.score_batch(batch))
+    assert scalar_teams == vector_teams, "team scores differ"
+
+    activities = [{"steps": l["total_steps"], "calories_burned": l["total_steps"] * 0.04, "sleep_total_minutes": 400 + i % 60,
+                   "recovery_score": i % 100} for i, l in enumerate(logs)]
+    columns = [[a[k] for a in activities] for k in ("steps", "calories_burned", "sleep_total_minutes", "recovery_score")]
+    gamification_engine.logger.disabled = True
+    xp_scalar_s, xp_scalar = timed(lambda: [gamification_engine.calculate_xp_from_activity(a) for a in activities])
+    xp_vector_s, xp_vector = timed(lambda: batch_scoring.xp_from_activity_batch(*columns))
+    assert xp_scalar == xp_vector.tolist(), "xp differs"
+
+    print("=" * 80)
+    print(f" BATCH SCORING BENCHMARK ({users} users x {days} days = {n} logs, {teams} teams)")
+    print("=" * 80)
+    print(f"  battle scalar      {scalar_s:>8.3f}s  {n / scalar_s:>12.0f} logs/s")
+    print(f"  battle vectorized  {vector_s:>8.3f}s  {n / vector_s:>12.0f} logs/s  (x{scalar_s / vector_s:.0f}; columnar build {build_s:.3f}s)")
+    print(f"  xp scalar          {xp_scalar_s:>8.3f}s  {n / xp_scalar_s:>12.0f} rows/s")
+    print(f"  xp vectorized      {xp_vector_s:>8.3f}s  {n / xp_vector_s:>12.0f} rows/s  (x{xp_scalar_s / xp_vector_s:.0f})")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    teams = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    run(users, days, teams)
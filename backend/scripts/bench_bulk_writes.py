@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-row writes vs MySQLClient bulk writes
+Compares insert_daily_log / upsert_user / insert_social_post against their
+*_bulk variants on a scratch set of bench_* users, then cleans up.
+
+Usage:
+    python scripts/bench_bulk_writes.py [users] [days] [chunk_size]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from datetime import date, datetime, timedelta
+from backend.database.mysql_client import MySQLClient
+
+USER_PREFIX = "bench_bulk_"
+
+
+def make_users(n: int) -> list:
+    return [
+        {"user_id": f"{USER_PREFIX}{i:05d}", "username": f"Bench{i}", "team_id": None, "level": 1, "xp": i}
+        for i in range(n)
+    ]
+
+
+def make_logs(users: list, days: int) -> list:
+    today = date.today()
+    rows = []
+    for u in users:
+        for d in range(days):
+            log_date = (today - timedelta(days=d)).isoformat()
+            log = {"date": log_date, "total_steps": 5000 + d, "total_calories_active": 300.0, "manual_workouts": []}
+            rows.append((u["user_id"], log_date, json.dumps(log)))
+    return rows
+
+
+def make_posts(users: list, per_user: int) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "post_id": f"{u['user_id']}_post_{i}",
+            "user_id": u["user_id"],
+            "type": "daily_log",
+            "timestamp": (now - timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+            "content": {"title": "Daily Log", "message": "bench"},
+        }
+        for u in users
+        for i in range(per_user)
+    ]
+
+
+async def cleanup(db: MySQLClient):
+    # daily_logs / social_feed rows cascade from users
+    await db.execute("DELETE FROM users WHERE user_id LIKE %s", (USER_PREFIX + "%",))
+
+
+def report(label: str, rows: int, seconds: float):
+    rate = rows / seconds if seconds > 0 else 0.0
+    print(f"  {label:<28} {rows:>8} rows  {seconds:>8.3f}s  {rate:>10.1f} rows/s")
+    return rate
+
+
+async def run(users_n: int, days: int, chunk_size: int):
+    db = MySQLClient()
+    await db.init()
+    try:
+        await cleanup(db)
+        users = make_users(users_n)
+        logs = make_logs(users, days)
+        posts = make_posts(users, days)
+
+        print("=" * 80)
+        print(f" BULK WRITE BENCHMARK ({users_n} users x {days} days, chunk_size={chunk_size})")
+        print("=" * 80)
+
+        # Per-row path
+        start = time.perf_counter()
+        for u in users:
+            await db.upsert_user(u)
+        row_users = report("upsert_user", len(users), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for user_id, log_date, log_json in logs:
+            await db.insert_daily_log(user_id, log_date, log_json)
+        row_logs = report("insert_daily_log", len(logs), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for p in posts:
+            await db.insert_social_post(p)
+        row_posts = report("insert_social_post", len(posts), time.perf_counter() - start)
+
+        await cleanup(db)
+
+        # Bulk path
+        stats = await db.upsert_users_bulk(users, chunk_size)
+        bulk_users = report("upsert_users_bulk", stats["rows"], stats["seconds"])
+        stats = await db.insert_daily_logs_bulk(logs, chunk_size)
+        bulk_logs = report("insert_daily_logs_bulk", stats["rows"], stats["seconds"])
+        stats = await db.insert_social_posts_bulk(posts, chunk_size)
+        bulk_posts = report("insert_social_posts_bulk", stats["rows"], stats["seconds"])
+
+        print("-" * 80)
+        for label, row_rate, bulk_rate in (
+            ("users", row_users, bulk_users),
+            ("daily_logs", row_logs, bulk_logs),
+            ("social_feed", row_posts, bulk_posts),
+        ):
+            speedup = bulk_rate / row_rate if row_rate else 0.0
+            print(f"  {label:<28} speedup x{speedup:.1f}")
+        print("=" * 80)
+    finally:
+        await cleanup(db)
+        await db.close()
+
+
+if __name__ == "__main__":
+    users_n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+    chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    asyncio.run(run(users_n, days, chunk_size))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: keyset (cursor) vs OFFSET pagination
+Seeds N users and one user's M step milestones, then fetches page 1, 100,
+1,000 and 10,000 of the all-time leaderboard and of the milestone history
+both ways: LIMIT/OFFSET, and the keyset query the endpoints run
+(get_global_leaderboard(after=...) / the milestone cursor query). Reports
+the median per-page latency; keyset pages should cost the same at any
+depth. Runs on a scratch SQLite file by default; DB_BACKEND=mysql uses the
+configured MySQL database with bench_page_* rows, removed afterwards.
+
+Usage:
+    python scripts/bench_keyset_pagination.py [users] [milestones] [page_size] [repeats]
+"""
+
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from backend.database.mysql_client import MySQLClient
+from backend.database.query_cache import QueryCache
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import pagination
+
+PREFIX = "bench_page_"
+PAGES = (1, 100, 1000, 10000)
+
+MILESTONE_PAGE_SQL = f"""
+    SELECT id, milestone_steps, notified_at FROM step_milestones
+    WHERE user_id = %s AND {pagination.after_clause(pagination.MILESTONE_KEY)}
+    ORDER BY milestone_steps DESC, notified_at DESC, id DESC LIMIT %s
+"""
+MILESTONE_FIRST_SQL = """
+    SELECT id, milestone_steps, notified_at FROM step_milestones
+    WHERE user_id = %s
+    ORDER BY milestone_steps DESC, notified_at DESC, id DESC LIMIT %s OFFSET %s
+"""
+LEADERBOARD_OFFSET_SQL = """
+    SELECT user_id, username, level, xp FROM users
+    ORDER BY xp DESC, level DESC, user_id DESC LIMIT %s OFFSET %s
+"""
+
+
+async def seed(db, users: int, milestones: int, rng: random.Random):
+    rows = [{"user_id": f"{PREFIX}{i:07d}", "username": f"Bench{i}", "xp": rng.randrange(100000), "level": rng.randrange(1, 50)}
+            for i in range(users)]
+    await db.upsert_users_bulk(rows)
+    owner = rows[0]["user_id"]
+    await db.execute_many(
+        "INSERT INTO step_milestones (user_id, milestone_steps, notified_at) VALUES (%s, %s, %s)",
+        [(owner, rng.randrange(1, 500) * 10, f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} 10:00:00")
+         for _ in range(milestones)],
+    )
+    return owner
+
+
+async def cleanup(db):
+    await db.execute("DELETE FROM step_milestones WHERE user_id LIKE %s", (PREFIX + "%",))
+    await db.execute("DELETE FROM users WHERE user_id LIKE %s", (PREFIX + "%",))
+
+
+async def median_ms(fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+async def run(users: int, milestones: int, page_size: int, repeats: int):
+    scratch = None
+    if os.getenv("DB_BACKEND", "sqlite").lower() == "mysql":
+        db = MySQLClient(cache=QueryCache(enabled=False))
+    else:
+        scratch = tempfile.mkdtemp(prefix="vq_bench_page_")
+        db = SQLiteClient(os.path.join(scratch, "bench.db"), cache=QueryCache(enabled=False))
+    await db.init()
+    try:
+        await cleanup(db)
+        owner = await seed(db, users, milestones, random.Random(7))
+
+        print("=" * 80)
+        print(f" KEYSET PAGINATION BENCHMARK ({type(db).__name__}: {users} users, {milestones} milestones, page size {page_size})")
+        print("=" * 80)
+        print(f"  {'listing':<14} {'page':>7} {'offset ms':>11} {'keyset ms':>11}")
+        for page in PAGES:
+            offset = (page - 1) * page_size
+            if offset >= users:
+                break
+            # the cursor a client holds for this page: the key of the previous page's last row
+            after = None
+            if page > 1:
+                last = (await db.fetch_all(LEADERBOARD_OFFSET_SQL, (1, offset - 1)))[0]
+                after = (last["xp"], last["level"], last["user_id"])
+            offset_ms = await median_ms(lambda: db.fetch_all(LEADERBOARD_OFFSET_SQL, (page_size, offset)), repeats)
+            keyset_ms = await median_ms(lambda: db.get_global_leaderboard(limit=page_size, after=after), repeats)
+            print(f"  {'leaderboard':<14} {page:>7} {offset_ms:>11.3f} {keyset_ms:>11.3f}")
+
+        for page in PAGES:
+            offset = (page - 1) * page_size
+            if offset >= milestones:
+                break
+            if page == 1:
+                keyset = lambda: db.fetch_all(MILESTONE_FIRST_SQL, (owner, page_size, 0))
+            else:
+                last = (await db.fetch_all(MILESTONE_FIRST_SQL, (owner, 1, offset - 1)))[0]
+                after = (last["milestone_steps"], str(last["notified_at"]), last["id"])
+                keyset = lambda: db.fetch_all(MILESTONE_PAGE_SQL, (owner, *after, page_size))
+            offset_ms = await median_ms(lambda: db.fetch_all(MILESTONE_FIRST_SQL, (owner, page_size, offset)), repeats)
+            keyset_ms = await median_ms(keyset, repeats)
+            print(f"  {'milestones':<14} {page:>7} {offset_ms:>11.3f} {keyset_ms:>11.3f}")
+        print("=" * 80)
+    finally:
+        if scratch is None:
+            await cleanup(db)
+        await db.close()
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 250000
+    milestones = int(sys.argv[2]) if len(sys.argv) > 2 else 250000
+    page_size = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    repeats = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    asyncio.run(run(users, milestones, page_size, repeats))
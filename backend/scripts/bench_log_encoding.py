@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: plain JSON vs packed daily log storage, through the client read path
+Writes nights of per-minute heart-rate samples into two temporary SQLite
+databases (DAILY_LOG_ENCODING json / packed), then times what a consumer
+does: get_daily_logs_for_user_range alone, plus sleep totals
+(log_codec.sleep_segments, as the battle scorer and chatbot do), plus RHR
+(DailyLog models for plain rows, HeartRateSeries for packed ones).
+
+Usage:
+    python scripts/bench_log_encoding.py [logs] [samples_per_night]
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from backend.app.logic import calculate_rhr_from_series, calculate_rhr_from_sleep
+from backend.database import log_codec
+from backend.database.sqlite_client import SQLiteClient
+from backend.models.schemas import DailyLog
+
+ROUNDS = 5
+
+
+def make_log(day: date, samples: int) -> dict:
+    bed = datetime.combine(day, datetime.min.time()) - timedelta(hours=1)
+    segments, t = [], bed
+    while t < bed + timedelta(minutes=samples):
+        minutes = random.randint(20, 90)
+        segments.append({
+            "start_time": t.isoformat(),
+            "end_time": (t + timedelta(minutes=minutes)).isoformat(),
+            "stage": random.choice(["deep", "light", "rem"]),
+            "duration_minutes": minutes,
+        })
+        t += timedelta(minutes=minutes)
+    return {
+        "date": day.isoformat(),
+        "total_steps": random.randint(3000, 15000),
+        "total_calories_active": 400.0,
+        "sleep_segments": segments,
+        "heart_rate_samples": [
+            {"timestamp": (bed + timedelta(minutes=i)).isoformat(), "bpm": random.randint(48, 72)}
+            for i in range(samples)
+        ],
+        "manual_workouts": [],
+    }
+
+
+def sleep_minutes(data: str) -> int:
+    return sum(seg["duration_minutes"] for seg in log_codec.sleep_segments(json.loads(data)) or [])
+
+
+def rhr(data: str):
+    log = json.loads(data)
+    if log_codec.is_packed(log.get("heart_rate_samples")):
+        daily_log = DailyLog(**{**log, "heart_rate_samples": [], "sleep_segments": log_codec.sleep_segments(log)})
+        return calculate_rhr_from_series(daily_log, log_codec.HeartRateSeries.from_log(log))["rhr"]
+    return calculate_rhr_from_sleep(DailyLog(**log))["rhr"]
+
+
+async def write_db(path: str, logs, encoding: str) -> SQLiteClient:
+    log_codec.DAILY_LOG_ENCODING = encoding
+    db = SQLiteClient(path, readers=1)
+    await db.init()
+    await db.upsert_user({"user_id": "u1", "username": "bench", "team_id": "t1"})
+    await db.insert_daily_logs_bulk([("u1", log["date"], json.dumps(log)) for log in logs])
+    return db
+
+
+async def measure(db: SQLiteClient, n: int):
+    """Best-of-ROUNDS seconds for read, read+sleep and read+RHR; bytes per log; RHR values"""
+    read = lambda: db.get_daily_logs_for_user_range("u1", "2000-01-01", "2100-01-01")
+    best = {"read": float("inf"), "sleep": float("inf"), "rhr": float("inf")}
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        rows = await read()
+        best["read"] = min(best["read"], time.perf_counter() - start)
+
+        start = time.perf_counter()
+        [sleep_minutes(r) for r in await read()]
+        best["sleep"] = min(best["sleep"], time.perf_counter() - start)
+
+        start = time.perf_counter()
+        values = [rhr(r) for r in await read()]
+        best["rhr"] = min(best["rhr"], time.perf_counter() - start)
+    return best, sum(len(r) for r in rows) // n, values
+
+
+async def run(n: int, samples: int):
+    today = date.today()
+    logs = [make_log(today - timedelta(days=i), samples) for i in range(n)]
+    tmp = tempfile.mkdtemp(prefix="vq_logenc_")
+    results = {}
+    for encoding in ("json", "packed"):
+        db = await write_db(os.path.join(tmp, f"{encoding}.db"), logs, encoding)
+        try:
+            results[encoding] = await measure(db, n)
+        finally:
+            await db.close()
+    assert results["json"][2] == results["packed"][2], "RHR mismatch between encodings"
+
+    print("=" * 80)
+    print(f" DAILY LOG ENCODING BENCHMARK ({n} logs, {samples} HR samples each, best of {ROUNDS})")
+    print("=" * 80)
+    print(f"  {'':<10} {'bytes/log':>10} {'read':>10} {'read+sleep':>12} {'read+RHR':>10}")
+    for encoding, (best, size, _) in results.items():
+        print(f"  {encoding:<10} {size:>10} {best['read']:>9.3f}s {best['sleep']:>11.3f}s {best['rhr']:>9.3f}s")
+    plain, packed = results["json"], results["packed"]
+    print("-" * 80)
+    print(f"  size x{plain[1] / packed[1]:.1f} smaller, read x{plain[0]['read'] / packed[0]['read']:.1f}, "
+          f"read+sleep x{plain[0]['sleep'] / packed[0]['sleep']:.1f}, read+RHR x{plain[0]['rhr'] / packed[0]['rhr']:.1f} (json / packed time)")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 480
+    asyncio.run(run(n, samples))
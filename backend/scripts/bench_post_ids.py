@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: social_feed inserts with old vs time-ordered post ids
+Replays a stream of N posts from U users arriving at R posts/s and writes
+it into social_feed (insert_social_posts_bulk, chunk_size rows at a time)
+twice, into an empty table each time:
+
+- old:  post_{user_id}_{unix_seconds}, as post_generator used to build them;
+        scattered across the key space, and a user's second post within a
+        second overwrites the first (counted as lost)
+- new:  id_generator.new_id("post_"), increasing, never colliding
+
+Reports overall rows/s and the rate over the last fifth of the stream,
+where the primary key is largest (random keys cost most once the index no
+longer fits in the buffer pool/page cache). Runs on a scratch SQLite file
+by default; DB_BACKEND=mysql uses the configured MySQL database (InnoDB
+clusters social_feed on post_id) with bench_ids_* users, removed
+afterwards.
+
+Usage:
+    python scripts/bench_post_ids.py [users] [posts] [chunk_size] [posts_per_second]
+"""
+
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from backend.database.mysql_client import MySQLClient
+from backend.database.sqlite_client import SQLiteClient
+from backend.services.id_generator import IdGenerator
+
+PREFIX = "bench_ids_"
+WINDOWS = 5
+
+
+def make_stream(users: int, posts: int, rate: float, rng: random.Random) -> list:
+    """(user_id, arrival time) per post"""
+    start = datetime(2025, 6, 1)
+    return [(f"{PREFIX}{rng.randrange(users):06d}", start + timedelta(seconds=i / rate)) for i in range(posts)]
+
+
+def old_key(user_id: str, at: datetime) -> str:
+    return f"post_{user_id}_{int(at.timestamp())}"
+
+
+def make_posts(stream: list, key) -> list:
+    return [
+        {
+            "post_id": key(user_id, at),
+            "user_id": user_id,
+            "type": "daily_log",
+            "timestamp": at.strftime("%Y-%m-%d %H:%M:%S"),
+            "content": {"title": "Daily Log", "message": "bench"},
+        }
+        for user_id, at in stream
+    ]
+
+
+async def open_db(scratch: str, name: str):
+    if scratch is None:
+        db = MySQLClient()
+    else:
+        db = SQLiteClient(os.path.join(scratch, f"{name}.db"))
+    await db.init()
+    return db
+
+
+async def cleanup(db):
+    # social_feed and team_timeline rows go with their users
+    await db.execute("DELETE FROM team_timeline WHERE user_id LIKE %s", (PREFIX + "%",))
+    await db.execute("DELETE FROM users WHERE user_id LIKE %s", (PREFIX + "%",))
+
+
+async def insert_run(db, users: int, posts: list, chunk_size: int) -> dict:
+    await cleanup(db)
+    await db.upsert_users_bulk([{"user_id": f"{PREFIX}{i:06d}", "username": f"Bench{i}"} for i in range(users)])
+    window = max(len(posts) // WINDOWS, chunk_size)
+    rates = []
+    start = time.perf_counter()
+    for i in range(0, len(posts), window):
+        t = time.perf_counter()
+        await db.insert_social_posts_bulk(posts[i:i + window], chunk_size)
+        rates.append(len(posts[i:i + window]) / (time.perf_counter() - t))
+    seconds = time.perf_counter() - start
+    stored = (await db.fetch_one("SELECT COUNT(*) AS n FROM social_feed WHERE user_id LIKE %s", (PREFIX + "%",)))["n"]
+    return {"rate": len(posts) / seconds, "last_rate": rates[-1], "seconds": seconds, "stored": stored}
+
+
+async def run(users: int, posts_n: int, chunk_size: int, rate: float):
+    scratch = None if os.getenv("DB_BACKEND", "sqlite").lower() == "mysql" else tempfile.mkdtemp(prefix="vq_bench_ids_")
+    stream = make_stream(users, posts_n, rate, random.Random(7))
+    generator = IdGenerator(worker_id=1)
+    formats = (
+        ("old", make_posts(stream, old_key)),
+        ("new", make_posts(stream, lambda user_id, at: generator.new_id("post_"))),
+    )
+    try:
+        print("=" * 80)
+        print(f" POST ID BENCHMARK ({'MySQLClient' if scratch is None else 'SQLiteClient'}: {posts_n} posts from {users} users "
+              f"at {rate:g}/s, chunk_size={chunk_size})")
+        print("=" * 80)
+        print(f"  {'keys':<6} {'rows/s':>10} {'last 1/5 rows/s':>16} {'seconds':>9} {'stored':>9} {'lost':>7}")
+        for name, posts in formats:
+            db = await open_db(scratch, name)
+            try:
+                result = await insert_run(db, users, posts, chunk_size)
+            finally:
+                if scratch is None:
+                    await cleanup(db)
+                await db.close()
+            print(f"  {name:<6} {result['rate']:>10.0f} {result['last_rate']:>16.0f} {result['seconds']:>9.3f} "
+                  f"{result['stored']:>9} {posts_n - result['stored']:>7}")
+        print("=" * 80)
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    posts_n = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    rate = float(sys.argv[4]) if len(sys.argv) > 4 else 200
+    asyncio.run(run(users, posts_n, chunk_size, rate))
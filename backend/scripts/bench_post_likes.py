@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: likes on one hot post, buffered vs one transaction per like
+Calls the like endpoint's handler in-process (no HTTP client in the way)
+from C concurrent tasks, N likes from N different users on a single post
+of a temporary SQLite database:
+
+    buffered   POST /social/post/{id}/like as shipped: existence from the
+               known-posts set, intent recorded in memory, post_likes rows
+               and social_feed.likes written by the counter flush
+    per-like   what the request path did before the buffer: SELECT the
+               post, then INSERT IGNORE into post_likes + UPDATE likes in
+               one transaction, per like
+
+Reports likes/s and per-like latency for each, plus the buffer's flushes
+and the stored counts (both must equal N).
+
+Usage:
+    python scripts/bench_post_likes.py [likes] [concurrency] [flush_seconds]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from backend.database import sqlite_client
+from backend.database.sqlite_client import SQLiteClient
+from backend.routers import social_feed
+from backend.services.post_counters import CounterBuffer
+
+POST_ID = "post_hot"
+
+
+async def open_db(path: str) -> SQLiteClient:
+    db = SQLiteClient(path)
+    await db.init()
+    await db.upsert_user({"user_id": "u1", "username": "runner", "team_id": "t1"})
+    await db.insert_social_post({"post_id": POST_ID, "user_id": "u1", "type": "daily_log",
+                                 "timestamp": "2025-05-01 10:00:00", "content": {}})
+    return db
+
+
+async def burst(like, likes: int, concurrency: int):
+    """(seconds, sorted per-like latencies) for likes calls of like(i), concurrency at a time"""
+    latencies = []
+    remaining = iter(range(likes))
+
+    async def worker():
+        for i in remaining:
+            sent = time.perf_counter()
+            await like(i)
+            latencies.append(time.perf_counter() - sent)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+async def stored(db: SQLiteClient):
+    row = await db.fetch_one("SELECT likes FROM social_feed WHERE post_id = %s", (POST_ID,))
+    rows = await db.fetch_one("SELECT COUNT(*) AS n FROM post_likes WHERE post_id = %s", (POST_ID,))
+    return row["likes"], rows["n"]
+
+
+def report(name: str, likes: int, seconds: float, latencies: list):
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"  {name:<10} {likes / seconds:>10,.0f} likes/s  p50={pct(0.5):.3f}ms  p99={pct(0.99):.3f}ms  max={latencies[-1] * 1000:.2f}ms")
+
+
+async def run(likes: int, concurrency: int, flush_seconds: float):
+    tmp = tempfile.mkdtemp(prefix="vq_likes_")
+    print("=" * 80)
+    print(f" POST LIKE BENCHMARK ({likes} likes on one post, {concurrency} concurrent, flush every {flush_seconds}s)")
+    print("=" * 80)
+
+    db = await open_db(os.path.join(tmp, "buffered.db"))
+    counters = CounterBuffer()
+    counters.attach(db, interval=flush_seconds)
+    try:
+        seconds, latencies = await burst(
+            lambda i: social_feed.like_post(POST_ID, {"user_id": f"liker{i}"}, db, counters), likes, concurrency)
+        await counters.close()
+        report("buffered", likes, seconds, latencies)
+        stats = counters.stats()
+        print(f"  {'':<10} {stats['flushes']} flushes, {stats['rows_written']} count updates, last flush {stats['last_flush_ms']}ms; "
+              f"stored likes/rows {await stored(db)}")
+    finally:
+        await db.close()
+
+    db = await open_db(os.path.join(tmp, "per_like.db"))
+    try:
+        async def like_now(i):
+            if await db.fetch_one("SELECT post_id FROM social_feed WHERE post_id = %s", (POST_ID,)) is None:
+                raise RuntimeError("post missing")
+            async with db.transaction() as cursor:
+                await cursor.execute(sqlite_client.LIKE_POST_SQL, (f"liker{i}", POST_ID))
+                if cursor.rowcount == 1:
+                    await cursor.execute(sqlite_client.ADD_POST_COUNTS_SQL, (1, 0, POST_ID))
+        seconds, latencies = await burst(like_now, likes, concurrency)
+        report("per-like", likes, seconds, latencies)
+        print(f"  {'':<10} stored likes/rows {await stored(db)}")
+    finally:
+        await db.close()
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    c = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    interval = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    asyncio.run(run(n, c, interval))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call aiosqlite.connect vs pooled WAL-mode SQLiteClient
+Runs the same mixed read/write workload (get_user, leaderboard, daily log
+insert) against a scratch database both ways and reports ops/s.
+
+Usage:
+    python scripts/bench_sqlite_pool.py [operations] [concurrency]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import aiosqlite
+from backend.database.sqlite_client import SQLiteClient
+
+USERS = 200
+
+
+class PerCallClient:
+    """The previous SQLiteClient behaviour: a fresh connection for every call"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    async def get_user(self, user_id: str):
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            cur = await db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
+            row = await cur.fetchone()
+            return dict(row) if row else None
+
+    async def get_global_leaderboard(self, limit: int = 10):
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            cur = await db.execute("SELECT user_id, username, level, xp FROM users ORDER BY xp DESC, level DESC LIMIT ?", (limit,))
+            return [dict(r) for r in await cur.fetchall()]
+
+    async def insert_daily_log(self, user_id: str, date: str, log_json: str):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("INSERT INTO daily_logs (user_id, date, data) VALUES (?, ?, ?)", (user_id, date, log_json))
+            await db.commit()
+
+
+async def workload(client, operations: int, concurrency: int, tag: str) -> float:
+    sem = asyncio.Semaphore(concurrency)
+    log_json = json.dumps({"total_steps": 8000, "manual_workouts": []})
+
+    async def op(i: int):
+        async with sem:
+            kind = i % 10
+            if kind < 6:
+                await client.get_user(f"user_{i % USERS:04d}")
+            elif kind < 9:
+                await client.get_global_leaderboard(10)
+            else:
+                # unique (user_id, date) per write and per run
+                await client.insert_daily_log(f"user_{i % USERS:04d}", f"{tag}-{i}", log_json)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(op(i) for i in range(operations)))
+    return time.perf_counter() - start
+
+
+async def run(operations: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        pooled = SQLiteClient(db_path)
+        await pooled.init()
+        await pooled.upsert_users_bulk(
+            {"user_id": f"user_{i:04d}", "username": f"User{i}", "team_id": f"team_{i % 10}", "xp": i * 7 % 1000}
+            for i in range(USERS)
+        )
+
+        print("=" * 80)
+        print(f" SQLITE CLIENT BENCHMARK ({operations} ops, concurrency={concurrency})")
+        print("=" * 80)
+
+        per_call_s = await workload(PerCallClient(db_path), operations, concurrency, "per-call")
+        print(f"  per-call connect   {per_call_s:>8.3f}s  {operations / per_call_s:>10.1f} ops/s")
+
+        pooled_s = await workload(pooled, operations, concurrency, "pooled")
+        print(f"  pooled (WAL)       {pooled_s:>8.3f}s  {operations / pooled_s:>10.1f} ops/s")
+
+        print("-" * 80)
+        print(f"  speedup x{per_call_s / pooled_s:.1f}")
+        print(f"  pool: {pooled.pool_stats()}")
+        print("=" * 80)
+        await pooled.close()
+
+
+if __name__ == "__main__":
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    asyncio.run(run(operations, concurrency))
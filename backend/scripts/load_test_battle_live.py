@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Load test: live battle scores to thousands of SSE subscribers on one worker
+Starts one uvicorn worker on a temporary SQLite database, opens N
+concurrent GET /battles/{id}/live streams, then posts health data for a
+battle team through /gamification/calculate-xp and measures how long each
+subscriber waits for the resulting score event (write -> debounce ->
+one recompute -> fan-out). Reports the server's score computations, its
+RSS and /health latency while every stream is open.
+
+Usage:
+    python scripts/load_test_battle_live.py [subscribers] [rounds] [debounce_seconds]
+"""
+
+import asyncio
+import json
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+import httpx
+from backend.database.sqlite_client import SQLiteClient
+
+BATTLE_ID = "battle_live_load"
+CONNECT_CONCURRENCY = 500
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def seed(path: str, today: date):
+    db = SQLiteClient(path, readers=1)
+    await db.init()
+    try:
+        await db.upsert_users_bulk([{"user_id": f"u{i}", "username": f"runner{i}", "team_id": f"t{i % 2 + 1}"} for i in range(20)])
+        await db.create_battle(BATTLE_ID, "t1", "t2", str(today - timedelta(days=30)), str(today + timedelta(days=30)))
+    finally:
+        await db.close()
+
+
+class Subscriber:
+    """Raw HTTP/1.0 SSE reader (no per-connection client object, so 5k fit in one process)"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.events: asyncio.Queue = asyncio.Queue()
+
+    async def connect(self, gate: asyncio.Semaphore):
+        async with gate:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+            self.writer.write(f"GET /battles/{BATTLE_ID}/live HTTP/1.0\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n".encode())
+            await self.writer.drain()
+            status = await self.reader.readline()
+            if b" 200 " not in status:
+                raise RuntimeError(f"subscribe failed: {status!r}")
+            self.task = asyncio.ensure_future(self.read())
+            return await self.events.get()  # snapshot
+
+    async def read(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            if line.startswith(b"data: "):
+                self.events.put_nowait((time.perf_counter(), json.loads(line[6:])))
+
+    def close(self):
+        self.task.cancel()
+        self.writer.close()
+
+
+async def health_latency(client: httpx.AsyncClient, samples: int = 50) -> float:
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await client.get("/health")
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+async def main(subscribers: int, rounds: int, debounce: float):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, subscribers * 2 + 1000)), hard))
+
+    tmp = tempfile.mkdtemp(prefix="vq_live_")
+    path = os.path.join(tmp, "vq.db")
+    today = date.today()
+    await seed(path, today)
+
+    port = free_port()
+    env = dict(os.environ, DB_BACKEND="sqlite", SQLITE_PATH=path, ANALYSIS_POOL_WORKERS="0", LIVE_DEBOUNCE_SECONDS=str(debounce))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--workers", "1",
+         "--log-level", "warning", "--backlog", str(subscribers + 1000)],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    subs = []
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            for _ in range(100):
+                try:
+                    await client.get("/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            idle_health = await health_latency(client)
+            base_rss = rss_mb(server.pid)
+
+            print(f"Live battle load test: {subscribers} subscribers, {rounds} rounds, debounce {debounce}s")
+            start = time.perf_counter()
+            gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+            subs = [Subscriber(port) for _ in range(subscribers)]
+            await asyncio.gather(*(s.connect(gate) for s in subs))
+            print(f"  connected in {time.perf_counter() - start:.2f}s, server RSS {base_rss:.0f} -> {rss_mb(server.pid):.0f} MB")
+            print(f"  /health p50 idle {idle_health:.2f}ms, with {subscribers} open streams {await health_latency(client):.2f}ms")
+
+            latencies, round_ms = [], []
+            for r in range(rounds):
+                user = f"u{(r * 2) % 20}"  # team t1
+                payload = {"user_id": user, "date": str(today - timedelta(days=r)), "steps": 5000 + r * 100, "calories_burned": 300}
+                sent = time.perf_counter()
+                resp = await client.post("/gamification/calculate-xp", json=payload)
+                resp.raise_for_status()
+                events = await asyncio.wait_for(asyncio.gather(*(s.events.get() for s in subs)), 30)
+                arrivals = [t - sent for t, _ in events]
+                assert len({e["seq"] for _, e in events}) == 1, "subscribers saw different events"
+                latencies += arrivals
+                round_ms.append(max(arrivals) * 1000)
+
+            latencies.sort()
+            pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+            print(f"  write -> event  p50={pct(0.5):.1f}ms  p99={pct(0.99):.1f}ms  max={latencies[-1] * 1000:.1f}ms (includes {debounce * 1000:.0f}ms debounce)")
+            print(f"  slowest subscriber per round: {', '.join(f'{ms:.0f}' for ms in round_ms)} ms")
+            stats = (await client.get("/admin/battle-live-stats")).json()["battle_live"]
+            print(f"  server: {stats['subscribers']} subscribers, {stats['computations']} score computations "
+                  f"for {rounds} writes + 1 snapshot, {stats['messages']} messages, {stats['dropped']} dropped, "
+                  f"last fan-out {stats['last_fanout_ms']}ms, RSS {rss_mb(server.pid):.0f} MB")
+    finally:
+        for s in subs:
+            if hasattr(s, "writer"):
+                s.close()
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    debounce = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    asyncio.run(main(n, rounds, debounce))
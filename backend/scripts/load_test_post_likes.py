@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Load test: a burst of likes on one post
+Starts one uvicorn worker on a temporary SQLite database and sends N likes,
+each from a different user, to a single post from C concurrent clients
+through POST /social/post/{id}/like. Reports likes/s and request latency,
+the counter buffer's flushes (/admin/post-counter-stats), and the stored
+count after the server shuts down (which flushes what is pending). For comparison it
+then runs the same number of one-UPDATE-per-like writes directly against
+the database, the write pattern the buffer replaces.
+
+Usage:
+    python scripts/load_test_post_likes.py [likes] [concurrency]
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from backend.database.sqlite_client import SQLiteClient
+
+POST_ID = "post_hot"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def seed(path: str):
+    db = SQLiteClient(path, readers=1)
+    await db.init()
+    try:
+        await db.upsert_user({"user_id": "u1", "username": "runner", "team_id": "t1"})
+        await db.insert_social_post({"post_id": POST_ID, "user_id": "u1", "type": "daily_log",
+                                     "timestamp": "2025-05-01 10:00:00", "content": {}})
+    finally:
+        await db.close()
+
+
+async def stored_likes(path: str) -> int:
+    db = SQLiteClient(path, readers=1)
+    await db.init()
+    try:
+        row = await db.fetch_one("SELECT likes FROM social_feed WHERE post_id = %s", (POST_ID,))
+        return row["likes"]
+    finally:
+        await db.close()
+
+
+async def direct_updates(path: str, likes: int, concurrency: int) -> float:
+    """likes/s for one UPDATE per like, C at a time"""
+    await seed(path)
+    db = SQLiteClient(path, readers=1)
+    await db.init()
+    try:
+        remaining = iter(range(likes))
+
+        async def worker():
+            for _ in remaining:
+                await db.execute("UPDATE social_feed SET likes = likes + 1 WHERE post_id = %s", (POST_ID,))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return likes / (time.perf_counter() - start)
+    finally:
+        await db.close()
+
+
+async def main(likes: int, concurrency: int):
+    tmp = tempfile.mkdtemp(prefix="vq_likes_")
+    path = os.path.join(tmp, "vq.db")
+    await seed(path)
+
+    port = free_port()
+    env = dict(os.environ, DB_BACKEND="sqlite", SQLITE_PATH=path, ANALYSIS_POOL_WORKERS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30, limits=limits) as client:
+            for _ in range(100):
+                try:
+                    await client.get("/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+
+            print(f"Post like load test: {likes} likes on one post, {concurrency} concurrent clients")
+            latencies = []
+            remaining = iter(range(likes))
+
+            async def worker():
+                for i in remaining:
+                    sent = time.perf_counter()
+                    resp = await client.post(f"/social/post/{POST_ID}/like", json={"user_id": f"liker{i}"})
+                    resp.raise_for_status()
+                    latencies.append(time.perf_counter() - sent)
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+            latencies.sort()
+            pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+            print(f"  {likes / elapsed:,.0f} likes/s  p50={pct(0.5):.1f}ms  p99={pct(0.99):.1f}ms  max={latencies[-1] * 1000:.1f}ms")
+            stats = (await client.get("/admin/post-counter-stats")).json()["post_counters"]
+            print(f"  server: {stats['increments']} increments, {stats['flushes']} flushes, {stats['rows_written']} rows written, "
+                  f"{stats['pending_posts']} posts pending, last flush {stats['last_flush_ms']}ms")
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    final = await stored_likes(path)
+    print(f"  stored likes after shutdown: {final} of {likes}{'' if final == likes else '  (LOST COUNTS)'}")
+    rate = await direct_updates(os.path.join(tmp, "baseline.db"), likes, concurrency)
+    print(f"  baseline, one UPDATE per like: {rate:,.0f} likes/s (database only, no HTTP)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    c = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.run(main(n, c))
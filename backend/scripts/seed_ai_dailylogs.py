@@ -65,29 +65,22 @@ async def seed_daily_logs():
             
             print(f"  Username: {user['username']}, Level: {user['level']}, XP: {user['xp']}")
             
-            # Insert all 365 logs for this user
+            # Insert all 365 logs for this user in one bulk transaction
+            rows = []
+            for log in logs:
+                # Serialize log to JSON
+                log_json = log.model_dump_json() if hasattr(log, 'model_dump_json') else json.dumps(log)
+                log_date = log.date.isoformat() if hasattr(log.date, 'isoformat') else str(log.date)
+                rows.append((user_id, log_date, log_json))
+
             inserted_count = 0
-            for i, log in enumerate(logs):
-                try:
-                    # Serialize log to JSON
-                    log_json = log.model_dump_json() if hasattr(log, 'model_dump_json') else json.dumps(log)
-                    
-                    # Insert into database
-                    await db.insert_daily_log(
-                        user_id=user_id,
-                        date=log.date.isoformat() if hasattr(log.date, 'isoformat') else str(log.date),
-                        log_json=log_json
-                    )
-                    inserted_count += 1
-                    
-                    # Progress indicator
-                    if (i + 1) % 50 == 0:
-                        print(f"  [OK] Inserted {i + 1}/365 logs")
-                
-                except Exception as e:
-                    print(f"  [ERROR] Failed to insert log for {log.date}: {str(e)}")
-                    continue
-            
+            try:
+                stats = await db.insert_daily_logs_bulk(rows)
+                inserted_count = stats["rows"]
+                print(f"  [OK] {stats['rows']} logs in {stats['chunks']} chunk(s), {stats['rows_per_sec']} rows/s")
+            except Exception as e:
+                print(f"  [ERROR] Bulk insert failed for {user_id}: {str(e)}")
+
             print(f"  [COMPLETE] Inserted {inserted_count}/365 logs for {user_id}")
             total_inserted += inserted_count
             print()
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.dummy_data import generate_dummy_dailylogs
+from backend.app.logic import calculate_recovery_score, calculate_weekly_stats
+from backend.routers import ai_coach
+from backend.services.analysis_pool import AnalysisPool, AnalysisPoolBusy, AnalysisTimeout, get_analysis_pool, run_analysis
+
+
+def _body(value) -> bytes:
+    if isinstance(value, list):
+        return ("[" + ",".join(v.model_dump_json() for v in value) + "]").encode()
+    return value.model_dump_json().encode()
+
+
+def test_pool_matches_inline_and_counts_work():
+    logs = generate_dummy_dailylogs(7)
+
+    async def main():
+        pool = AnalysisPool(workers=1, threshold=1, timeout=30)
+        await pool.start()
+        try:
+            weekly = await pool.run(run_analysis, "weekly", _body(logs), size=len(_body(logs)))
+            recovery = await pool.run(run_analysis, "recovery", _body(logs[0]), size=len(_body(logs[0])))
+            small = await pool.run(run_analysis, "recovery", _body(logs[0]), size=0)
+            invalid = await pool.run(run_analysis, "battle", b'{"date": "nope"}', size=1)
+            return weekly, recovery, small, invalid, pool.stats()
+        finally:
+            await pool.close()
+
+    weekly, recovery, small, invalid, stats = asyncio.run(main())
+    assert weekly["result"] == calculate_weekly_stats(logs)
+    assert recovery == small == {"result": calculate_recovery_score(logs[0]), "date": str(logs[0].date)}
+    assert {e["loc"][0] for e in invalid["errors"]} >= {"date", "total_steps"}
+    assert (stats["submitted"], stats["completed"], stats["inline"], stats["in_flight"]) == (3, 3, 1, 0)
+
+
+def test_analyze_routes_validate_and_score():
+    app = FastAPI()
+    app.include_router(ai_coach.router, prefix="/ai")
+    client = TestClient(app)
+    log = generate_dummy_dailylogs(1)[0]
+    response = client.post("/ai/analyze/recovery", content=_body(log), headers={"content-type": "application/json"})
+    assert response.status_code == 200 and response.json()["score"] == calculate_recovery_score(log)["score"]
+    assert client.post("/ai/analyze/battle", json={"date": "2025-01-01"}).status_code == 422
+    weekly = client.post("/ai/analyze/weekly", content=_body([log]), headers={"content-type": "application/json"})
+    assert weekly.status_code == 200 and weekly.json()["total_steps"] == log.total_steps
+    assert get_analysis_pool().stats()["inline"] >= 3
+    assert "requestBody" in app.openapi()["paths"]["/ai/analyze/weekly"]["post"]
+
+
+def test_timeout_and_backpressure():
+    async def main():
+        pool = AnalysisPool(workers=1, threshold=1, timeout=0.3, max_pending=1)
+        await pool.start()
+        try:
+            slow = asyncio.ensure_future(pool.run(time.sleep, 1.0, size=1))
+            await asyncio.sleep(0.05)
+            with pytest.raises(AnalysisPoolBusy):
+                await pool.run(time.sleep, 0, size=1)
+            with pytest.raises(AnalysisTimeout):
+                await slow
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    stats = asyncio.run(main())
+    assert (stats["timed_out"], stats["rejected"], stats["max_in_flight"], stats["in_flight"]) == (1, 1, 1, 0)
+
+
+def test_unstarted_pool_runs_inline():
+    log = generate_dummy_dailylogs(1)[0]
+    pool = AnalysisPool(workers=0, threshold=1)
+    assert asyncio.run(pool.run(calculate_recovery_score, log, size=10**6)) == calculate_recovery_score(log)
+    assert pool.stats()["inline"] == 1 and not pool.stats()["enabled"]
+
+
+def test_small_work_does_not_block_the_loop():
+    async def main():
+        pool = AnalysisPool(workers=0)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        probe = asyncio.ensure_future(ticker())
+        await pool.run(time.sleep, 0.2, size=1)
+        probe.cancel()
+        return ticks
+    assert asyncio.run(main()) >= 5
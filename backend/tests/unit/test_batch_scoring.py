@@ -0,0 +1,86 @@
+import random
+
+import numpy as np
+
+from backend.database import log_codec
+from backend.models.schemas import SleepStage
+from backend.services import batch_scoring, battle_system, gamification_engine
+
+CASES = 300
+
+
+def _workout(rng):
+    return {
+        "activity_type": rng.choice(["Gym", "Run", "Yoga"]),
+        "duration_minutes": rng.choice([rng.randint(0, 180), rng.uniform(0, 180)]),
+        "intensity_rpe": rng.randint(0, 10),
+        "calories_burnt": rng.choice([rng.randint(0, 1200), rng.uniform(0, 1200)]),
+    }
+
+
+def _log(rng):
+    """Random daily log in any of the shapes the scalar scorer accepts"""
+    shape = rng.randrange(4)
+    log = {"manual_workouts": [_workout(rng) for _ in range(rng.choice([0, 0, 1, 2, 5]))]}
+    log["steps" if shape == 3 else "total_steps"] = rng.choice([0, rng.randint(0, 40000), rng.uniform(0, 40000)])
+    if shape == 3:
+        log["sleep_deep_minutes"] = rng.randint(0, 200)
+        return log
+    segments = []
+    for i in range(rng.randint(0, 6)):
+        # enum / repr spellings only in the plain-JSON shapes; packed storage keeps stage names
+        stage = rng.choice(["deep", "light", "rem"] + ([] if shape == 2 else [SleepStage.deep, "SleepStage.deep"]))
+        segments.append({
+            "start_time": f"2025-01-01T0{i}:00:00",
+            "end_time": f"2025-01-01T0{i}:59:00",
+            "stage": stage,
+            "duration_minutes": rng.randint(0, 120),
+        })
+    log["sleep_segments"] = segments
+    return log_codec.encode_log(log) if shape == 2 else log
+
+
+def test_battle_and_workout_scores_match_scalar_exactly():
+    rng = random.Random(12)
+    for _ in range(CASES):
+        logs = [_log(rng) for _ in range(rng.randint(0, 12))]
+        batch = batch_scoring.LogBatch.from_logs(logs)
+        assert batch_scoring.workout_scores(batch).tolist() == [battle_system.workout_score_from_workouts(l["manual_workouts"]) for l in logs]
+        assert batch_scoring.battle_scores(batch).tolist() == [battle_system.user_battle_score_from_dailylog(l) for l in logs]
+
+
+def test_team_scores_match_scalar_exactly():
+    rng = random.Random(34)
+    for _ in range(CASES):
+        logs = [_log(rng) for _ in range(rng.randint(1, 30))]
+        teams = [rng.choice(["t1", "t2", "t3"]) for _ in logs]
+        per_log, per_team = batch_scoring.score_batch(batch_scoring.LogBatch.from_logs(logs, teams))
+        expected = {t: battle_system.compute_team_score_from_user_logs([l for l, lt in zip(logs, teams) if lt == t]) for t in set(teams)}
+        assert per_team == expected
+        assert len(per_log) == len(logs)
+
+
+def test_xp_matches_scalar_exactly():
+    rng = random.Random(56)
+    activities = [
+        {
+            "steps": rng.choice([rng.randint(0, 50000), rng.uniform(0, 50000)]),
+            "calories_burned": rng.choice([rng.randint(0, 3000), rng.uniform(0, 3000)]),
+            "sleep_total_minutes": rng.choice([419, 420, rng.randint(0, 700)]),
+            "recovery_score": rng.choice([69.99, 70, rng.uniform(0, 100)]),
+        }
+        for _ in range(CASES * 10)
+    ]
+    assert batch_scoring.xp_from_activities(activities).tolist() == [gamification_engine.calculate_xp_from_activity(a) for a in activities]
+
+
+def test_columnar_batch_validates_offsets():
+    batch = batch_scoring.LogBatch([100, 200], [10, 0], [0, 1, 1], [30], [5], [100])
+    assert batch_scoring.battle_scores(batch).tolist() == [100 * 0.05 + 10 * 5.0 + (30 * 5 + 100 * 0.2), 200 * 0.05]
+    try:
+        batch_scoring.LogBatch([100], [0], [0, 2], [30], [5], [100])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("mismatched offsets accepted")
+    assert isinstance(batch_scoring.battle_scores(batch_scoring.LogBatch.from_logs([])), np.ndarray)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import aggregator, battle_system
+
+
+def _log(steps, deep):
+    return {
+        "total_steps": steps,
+        "total_calories_active": steps / 20,
+        "sleep_segments": [{"stage": "deep", "duration_minutes": deep, "start_time": "2025-01-01T01:00:00", "end_time": "2025-01-01T02:00:00"}],
+        "manual_workouts": [],
+    }
+
+
+def _expected(logs, users):
+    return battle_system.compute_team_score_from_user_logs([l for u, d, l in logs if u in users and d <= "2025-01-07"])
+
+
+def _run(tmp_path, scenario):
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=2)
+        await db.init()
+        try:
+            await db.upsert_users_bulk([
+                {"user_id": "u1", "username": "A", "team_id": "t1"},
+                {"user_id": "u2", "username": "B", "team_id": "t1"},
+                {"user_id": "u3", "username": "C", "team_id": "t2"},
+                {"user_id": "u4", "username": "D", "team_id": "t3"},
+            ])
+            await db.create_battle("b1", "t1", "t2", "2025-01-01", "2025-01-07")
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_cycles_fold_only_new_logs(tmp_path):
+    first = [("u1", "2025-01-01", _log(9000, 60)), ("u3", "2025-01-01", _log(5000, 40))]
+    second = [("u2", "2025-01-02", _log(4000, 30)), ("u1", "2025-01-03", _log(12000, 90)),
+              ("u4", "2025-01-03", _log(20000, 90)), ("u3", "2025-01-09", _log(8000, 50))]
+
+    async def scenario(db):
+        await db.insert_daily_logs_bulk((u, d, json.dumps(l)) for u, d, l in first)
+        built = await aggregator.aggregate_once(db)
+        await db.insert_daily_logs_bulk((u, d, json.dumps(l)) for u, d, l in second)
+        folded = await aggregator.aggregate_once(db)
+        idle = await aggregator.aggregate_once(db)
+        incremental = (await db.get_battle("b1"))["scores"]
+        await aggregator.aggregate_once(db, full=True)
+        return built, folded, idle, incremental, (await db.get_battle("b1"))["scores"]
+
+    built, folded, idle, incremental, rebuilt = _run(tmp_path, scenario)
+    assert (built["rebuilt"], built["logs_folded"]) == (1, 0)
+    # u4 is not in the battle; the 2025-01-09 log is outside its dates
+    assert (folded["rebuilt"], folded["logs_folded"], folded["watermark"]) == (0, 3, 6)
+    assert (idle["incremental"], idle["logs_folded"]) == (0, 0)
+    logs = first + second
+    assert abs(incremental["t1"] - _expected(logs, ("u1", "u2"))) < 1e-6
+    assert abs(incremental["t2"] - _expected(logs, ("u3",))) < 1e-6
+    assert incremental == rebuilt
+
+
+def test_full_rebuild_applies_team_change(tmp_path):
+    logs = [("u1", "2025-01-01", _log(9000, 60)), ("u2", "2025-01-02", _log(4000, 30))]
+
+    async def scenario(db):
+        await db.insert_daily_logs_bulk((u, d, json.dumps(l)) for u, d, l in logs)
+        await aggregator.aggregate_once(db)
+        await db.upsert_user({"user_id": "u2", "username": "B", "team_id": "t2"})
+        await aggregator.aggregate_once(db)
+        stale = (await db.get_battle("b1"))["scores"]
+        await aggregator.aggregate_once(db, full=True)
+        return stale, (await db.get_battle("b1"))["scores"]
+
+    stale, fixed = _run(tmp_path, scenario)
+    assert abs(stale["t1"] - _expected(logs, ("u1", "u2"))) < 1e-6 and stale["t2"] == 0
+    assert abs(fixed["t1"] - _expected(logs, ("u1",))) < 1e-6
+    assert abs(fixed["t2"] - _expected(logs, ("u2",))) < 1e-6
+
+
+def test_shared_team_fetched_once_per_pass(tmp_path):
+    logs = [("u1", "2025-01-01", _log(9000, 60)), ("u3", "2025-01-02", _log(5000, 40)), ("u4", "2025-01-02", _log(7000, 80))]
+
+    async def scenario(db):
+        await db.insert_daily_logs_bulk((u, d, json.dumps(l)) for u, d, l in logs)
+        await db.create_battle("b2", "t1", "t3", "2025-01-01", "2025-01-07")
+        await db.create_battle("b3", "t2", "t3", "2025-01-01", "2025-01-07")
+        result = await aggregator.aggregate_once(db, concurrency=2)
+        return result, {b: (await db.get_battle(b))["scores"] for b in ("b1", "b2", "b3")}
+
+    result, scores = _run(tmp_path, scenario)
+    # t1, t2 and t3 each appear in two battles
+    assert (result["rebuilt"], result["team_fetches"]) == (3, 3)
+    assert scores["b1"]["t1"] == scores["b2"]["t1"] and scores["b2"]["t3"] == scores["b3"]["t3"]
+    assert abs(scores["b3"]["t3"] - _expected(logs, ("u4",))) < 1e-6
@@ -0,0 +1,75 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import aggregator, battle_history
+from backend.services.battle_partials import BattleUpdate
+
+
+def _run(tmp_path, scenario):
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=2)
+        await db.init()
+        try:
+            await db.upsert_users_bulk([
+                {"user_id": "u1", "username": "A", "team_id": "t1"},
+                {"user_id": "u2", "username": "B", "team_id": "t2"},
+            ])
+            await db.create_battle("b1", "t1", "t2", "2025-01-01", "2025-01-07")
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_snapshots_downsample_and_expire(tmp_path):
+    t0 = datetime(2025, 1, 1, 10, 0, 5)
+
+    async def scenario(db):
+        battle = await db.get_battle("b1")
+        # one pass every 2 minutes for 3 days, each adding 1 point to t1
+        passes = 3 * 24 * 30
+        for i in range(passes):
+            update = BattleUpdate(battle, [("t1", "2025-01-01", 1, 1.0)], i + 1)
+            await db.write_battle_updates([update], at=t0 + timedelta(minutes=2 * i))
+        rows = await db.fetch_all("SELECT resolution, COUNT(*) AS n, SUM(samples) AS samples FROM battle_score_history GROUP BY resolution")
+        last = t0 + timedelta(minutes=2 * (passes - 1))
+        hours = await db.get_battle_score_history("b1", "hour", "2025-01-01 00:00:00", last.strftime(battle_history.BUCKET_FORMAT))
+        return passes, last, {r["resolution"]: (r["n"], r["samples"]) for r in rows}, hours
+
+    passes, last, counts, hours = _run(tmp_path, scenario)
+    # only minute buckets that start inside the retention window are kept
+    assert counts["minute"][0] == battle_history.BATTLE_HISTORY_MINUTE_HOURS * 30
+    assert counts["hour"] == (72, passes)
+    assert counts["day"] == (4, passes)
+    # each bucket holds the last score written into it
+    assert hours[0]["bucket_start"] == "2025-01-01 10:00:00" and hours[0]["team_a_score"] == 30.0
+    assert hours[-1]["team_a_score"] == float(passes) and hours[-1]["team_b_score"] == 0.0
+
+
+def test_aggregation_appends_and_endpoint_series(tmp_path):
+    async def scenario(db):
+        await db.insert_daily_log("u1", "2025-01-02", json.dumps({"total_steps": 10000, "manual_workouts": []}))
+        await aggregator.aggregate_once(db)
+        await db.insert_daily_log("u2", "2025-01-03", json.dumps({"total_steps": 4000, "manual_workouts": []}))
+        await aggregator.aggregate_once(db)
+        battle = await db.get_battle("b1")
+        rows = await db.get_battle_score_history("b1", "day", "2025-01-01 00:00:00", "2100-01-01 00:00:00")
+        return battle, rows
+
+    battle, rows = _run(tmp_path, scenario)
+    series = battle_history.to_series(battle, "day", rows)
+    assert series["teams"] == ["t1", "t2"]
+    assert len(series["timestamps"]) == 1 and rows[0]["samples"] == 2
+    assert series["scores"] == {"t1": [500.0], "t2": [200.0]}
+
+
+def test_choose_resolution():
+    now = datetime(2025, 3, 1, 12)
+    assert battle_history.choose_resolution(now - timedelta(hours=2), now, now) == "minute"
+    assert battle_history.choose_resolution(now - timedelta(days=3), now, now) == "hour"
+    assert battle_history.choose_resolution(now - timedelta(days=30), now, now) == "day"
+    # minute buckets for last week are gone even for a short window
+    assert battle_history.choose_resolution(now - timedelta(days=7), now - timedelta(days=7, hours=-1), now) == "hour"
+    assert battle_history.parse_time("2025-03-01T12:00:00+02:00") == datetime(2025, 3, 1, 10)
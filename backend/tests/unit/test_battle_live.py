@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import battle_system
+from backend.services.battle_live import BattleBroadcaster
+
+
+def _log(steps, deep):
+    return {
+        "total_steps": steps,
+        "total_calories_active": steps / 20,
+        "sleep_segments": [{"stage": "deep", "duration_minutes": deep, "start_time": "2025-01-01T01:00:00", "end_time": "2025-01-01T02:00:00"}],
+        "manual_workouts": [],
+    }
+
+
+def _event(message: bytes) -> dict:
+    lines = message.decode().strip().split("\n")
+    assert lines[1] == "event: score"
+    return json.loads(lines[2][len("data: "):])
+
+
+def _run(tmp_path, scenario):
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=2)
+        await db.init()
+        try:
+            await db.upsert_users_bulk([
+                {"user_id": "u1", "username": "A", "team_id": "t1"},
+                {"user_id": "u2", "username": "B", "team_id": "t2"},
+                {"user_id": "u3", "username": "C", "team_id": "t3"},
+            ])
+            await db.create_battle("b1", "t1", "t2", "2025-01-01", "2025-01-07")
+            broadcaster = BattleBroadcaster(debounce=0.2, heartbeat=60)
+            broadcaster.attach(db)
+            try:
+                return await scenario(db, broadcaster)
+            finally:
+                await broadcaster.close()
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_one_computation_fans_out_to_every_subscriber(tmp_path):
+    async def scenario(db, broadcaster):
+        await db.insert_daily_log("u1", "2025-01-01", json.dumps(_log(9000, 60)))
+        battle = await db.get_battle("b1")
+        subs = await asyncio.gather(*(broadcaster.subscribe(battle) for _ in range(200)))
+        snapshots = [_event(s.queue.get_nowait()) for s in subs]
+        snapshot_computations = broadcaster.computations
+
+        # a burst of writes inside the debounce window, plus ones no battle covers
+        await db.insert_daily_log("u2", "2025-01-02", json.dumps(_log(4000, 30)))
+        await db.insert_daily_log("u1", "2025-01-03", json.dumps(_log(2000, 10)))
+        await db.insert_daily_log("u3", "2025-01-03", json.dumps(_log(20000, 90)))
+        await db.insert_daily_log("u2", "2025-01-09", json.dumps(_log(8000, 50)))
+        updates = [_event(await asyncio.wait_for(s.queue.get(), 1)) for s in subs]
+        return snapshots, snapshot_computations, updates, broadcaster.stats()
+
+    snapshots, snapshot_computations, updates, stats = _run(tmp_path, scenario)
+    first = battle_system.user_battle_score_from_dailylog(_log(9000, 60))
+    assert snapshot_computations == 1
+    assert all(s == snapshots[0] for s in snapshots)
+    assert snapshots[0]["scores"] == {"t1": first, "t2": 0.0}
+
+    assert all(u == updates[0] for u in updates)
+    t1 = first + battle_system.user_battle_score_from_dailylog(_log(2000, 10))
+    t2 = battle_system.user_battle_score_from_dailylog(_log(4000, 30))
+    assert abs(updates[0]["scores"]["t1"] - t1) < 1e-6 and abs(updates[0]["scores"]["t2"] - t2) < 1e-6
+    assert abs(updates[0]["delta"]["t1"] - (t1 - first)) < 1e-3
+    assert updates[0]["seq"] == 2 and updates[0]["leader"] == "t1"
+    assert (stats["subscribers"], stats["computations"], stats["events"], stats["messages"]) == (200, 2, 2, 400)
+
+
+def test_slow_subscriber_keeps_latest_and_unwatched_battles_are_ignored(tmp_path):
+    async def scenario(db, broadcaster):
+        battle = await db.get_battle("b1")
+        sub = await broadcaster.subscribe(battle)
+        for day in range(1, 6):
+            for _ in range(broadcaster.queue_size):
+                broadcaster.publish("b1", {"t1": float(day), "t2": 0.0})
+        queued = [_event(sub.queue.get_nowait()) for _ in range(sub.queue.qsize())]
+        broadcaster.unsubscribe(sub)
+
+        await db.insert_daily_log("u1", "2025-01-02", json.dumps(_log(9000, 60)))
+        await asyncio.sleep(0.3)
+        return queued, broadcaster.queue_size, broadcaster.stats()
+
+    queued, size, stats = _run(tmp_path, scenario)
+    assert len(queued) == size and queued[-1]["scores"]["t1"] == 5.0
+    # the snapshot plus 5 × size published events, only the last size kept
+    assert stats["dropped"] == 5 * size + 1 - size
+    assert (stats["battles"], stats["subscribers"]) == (0, 0)
+    assert stats["computations"] == 1  # only the snapshot, the write had no watchers
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from backend.app.logic import calculate_weekly_stats, calculate_weekly_stats_from_summaries
+from backend.database.sqlite_client import SQLiteClient
+from backend.models.schemas import DailyLog
+from backend.services import aggregator, battle_system, daily_summary
+
+
+def _log(steps, deep, workouts=()):
+    return {
+        "total_steps": steps,
+        "total_calories_active": steps / 20,
+        "sleep_segments": [
+            {"stage": "deep", "duration_minutes": deep, "start_time": "2025-01-01T01:00:00", "end_time": "2025-01-01T02:00:00"},
+            {"stage": "light", "duration_minutes": 360, "start_time": "2025-01-01T02:00:00", "end_time": "2025-01-01T08:00:00"},
+        ],
+        "manual_workouts": [
+            {"activity_type": a, "duration_minutes": 30, "intensity_rpe": 7, "calories_burnt": 200, "timestamp": "2025-01-01T18:00:00"}
+            for a in workouts
+        ],
+    }
+
+
+LOGS = [
+    ("u1", "2025-01-01", _log(9000, 60, ["Gym"])),
+    ("u2", "2025-01-01", _log(4000, 30)),
+    ("u1", "2025-01-02", _log(12000, 90, ["Gym", "Walk"])),
+    ("u3", "2025-01-02", _log(7000, 50, ["Yoga"])),
+]
+
+
+def _run(tmp_path, scenario):
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=2)
+        await db.init()
+        try:
+            await db.upsert_users_bulk([
+                {"user_id": "u1", "username": "A", "team_id": "t1"},
+                {"user_id": "u2", "username": "B", "team_id": "t1"},
+                {"user_id": "u3", "username": "C", "team_id": "t2"},
+            ])
+            await db.insert_daily_log(*LOGS[0][:2], json.dumps(LOGS[0][2]))
+            await db.insert_daily_logs_bulk((u, d, json.dumps(l)) for u, d, l in LOGS[1:])
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_rollups_updated_on_write_match_raw_logs(tmp_path):
+    async def scenario(db):
+        await db.create_battle("b1", "t1", "t2", "2025-01-01", "2025-01-07")
+        await aggregator.aggregate_once(db)
+        return await db.get_team_daily_summaries("t1", "2025-01-01", "2025-01-07"), await db.get_battle("b1")
+
+    team_rows, battle = _run(tmp_path, scenario)
+    assert [(r["date"], r["log_count"], r["total_steps"]) for r in team_rows] == [("2025-01-01", 2, 13000), ("2025-01-02", 1, 12000)]
+    expected = battle_system.compute_team_score_from_user_logs([l for u, _, l in LOGS if u in ("u1", "u2")])
+    assert abs(battle["scores"]["t1"] - expected) < 1e-6
+
+
+def test_reconcile_repairs_team_change(tmp_path):
+    async def scenario(db):
+        await db.upsert_user({"user_id": "u2", "username": "B", "team_id": "t2"})
+        stale = await db.get_team_daily_summaries("t2", "2025-01-01", "2025-01-07")
+        await daily_summary.reconcile_daily_summaries(db)
+        return stale, await db.get_team_daily_summaries("t2", "2025-01-01", "2025-01-07")
+
+    stale, fixed = _run(tmp_path, scenario)
+    assert [r["date"] for r in stale] == ["2025-01-02"]
+    assert [(r["date"], r["log_count"], r["total_steps"]) for r in fixed] == [("2025-01-01", 1, 4000), ("2025-01-02", 1, 7000)]
+
+
+def test_weekly_stats_from_summaries_match_daily_logs(tmp_path):
+    async def scenario(db):
+        return await db.get_user_daily_summaries("u1", "2025-01-01", "2025-01-07")
+
+    summaries = _run(tmp_path, scenario)
+    logs = [DailyLog(date=d, **l) for u, d, l in LOGS if u == "u1"]
+    assert calculate_weekly_stats_from_summaries(summaries) == calculate_weekly_stats(logs)
@@ -0,0 +1,73 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import provider
+from backend.database.mysql_client import MySQLClient
+from backend.database.sqlite_client import SQLiteClient
+from backend.routers import admin
+
+
+def test_concurrent_first_requests_open_one_pool(tmp_path, monkeypatch):
+    inits = []
+
+    class SlowInitClient(SQLiteClient):
+        async def init(self):
+            inits.append(self)
+            await asyncio.sleep(0.05)  # yield while the pool is still unset
+            await super().init()
+
+    monkeypatch.setattr(provider, "create_client", lambda: SlowInitClient(str(tmp_path / "vq.db"), readers=1))
+
+    async def run():
+        try:
+            return await asyncio.gather(*(provider.get_db() for _ in range(10)))
+        finally:
+            await provider.close_db()
+    clients = asyncio.run(run())
+    assert len(inits) == 1 and all(c is clients[0] for c in clients)
+
+
+def test_pool_stats_endpoint(tmp_path):
+    db = SQLiteClient(str(tmp_path / "vq.db"), readers=2)
+    asyncio.run(db.init())
+
+    async def get_db():
+        return db
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    app.dependency_overrides[provider.get_db] = get_db
+    client = TestClient(app)
+    try:
+        asyncio.run(db.fetch_one("SELECT 1"))
+        body = client.get("/admin/pool-stats").json()
+        assert body["status"] == "ok"
+        assert body["pool"]["readers"] == 2 and body["pool"]["in_use"] == 0 and body["pool"]["acquires"] >= 1
+    finally:
+        client.close()
+        asyncio.run(db.close())
+
+
+class ExhaustedPool:
+    """Every connection is checked out: acquire never completes"""
+    size = 1
+    freesize = 0
+
+    async def acquire(self):
+        await asyncio.Event().wait()
+
+
+def test_acquire_times_out_when_pool_is_exhausted():
+    db = MySQLClient(acquire_timeout=0.05)
+    db.pool = ExhaustedPool()
+
+    async def run():
+        try:
+            await db.fetch_one("SELECT 1")
+            raise AssertionError("acquire did not time out")
+        except asyncio.TimeoutError:
+            pass
+    asyncio.run(run())
+    stats = db.pool_stats()
+    assert stats["acquire_timeouts"] == 1 and stats["waiters"] == 0 and stats["in_use"] == 0
@@ -0,0 +1,58 @@
+import asyncio
+
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import post_generator
+from backend.services.id_generator import IdGenerator, parse_id
+from backend.services.leases import LeaseLost, LeaseManager
+
+
+def test_ids_increase_through_sequence_overflow_and_clock_steps():
+    now = [1750000000.0]
+    gen = IdGenerator(worker_id=5, clock=lambda: now[0])
+    ids = [gen.next_id() for _ in range(10000)]  # > 4096 in one frozen millisecond
+    now[0] -= 2  # clock steps back
+    ids += [gen.next_id() for _ in range(10)]
+    now[0] += 60
+    ids.append(gen.next_id())
+    assert ids == sorted(set(ids))
+    assert parse_id(ids[0]) == {"unix_ms": 1750000000000, "worker_id": 5, "sequence": 0}
+    assert parse_id(ids[-1])["unix_ms"] == 1750000058000
+
+    keys = [gen.new_id("post_") for _ in range(3)]
+    assert keys == sorted(keys) and all(len(k) == len("post_") + 19 for k in keys)
+
+
+def test_same_second_posts_do_not_collide():
+    a = post_generator.generate_level_up_post("u1", "A", 2, {})
+    b = post_generator.generate_daily_post("u1", "A", {"total_steps": 100})
+    assert a["post_id"] != b["post_id"] and a["post_id"] < b["post_id"]
+
+
+def test_workers_claim_distinct_ids_and_stop_when_the_claim_expires(tmp_path):
+    async def run():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await db.init()
+        gens = [IdGenerator() for _ in range(3)]
+        try:
+            for i, gen in enumerate(gens):
+                await gen.attach(db, LeaseManager(db, owner=f"w{i}", ttl=0.3, heartbeat=10))
+            assert len({gen.worker_id for gen in gens}) == 3
+            ids = [gen.next_id() for gen in gens for _ in range(1000)]
+            assert len(set(ids)) == len(ids)
+
+            # no renewal within the ttl: another process may now hold the worker id
+            await asyncio.sleep(0.4)
+            try:
+                gens[0].next_id()
+                raise AssertionError("expired worker id kept issuing")
+            except LeaseLost:
+                pass
+            taken = IdGenerator()
+            await taken.attach(db, LeaseManager(db, owner="late"))
+            assert taken.worker_id == gens[0].worker_id
+            await taken.close()
+        finally:
+            for gen in gens:
+                await gen.close()
+            await db.close()
+    asyncio.run(run())
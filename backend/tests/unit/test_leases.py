@@ -0,0 +1,149 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import aggregator
+from backend.services.battle_partials import BattleUpdate
+from backend.services.leases import Lease, LeasedJob, LeaseLost, LeaseManager
+
+HOLDER = textwrap.dedent("""
+    import asyncio, sys
+    from backend.database.sqlite_client import SQLiteClient
+    from backend.services.leases import LeaseManager
+
+    async def main():
+        db = SQLiteClient(sys.argv[1], readers=1)
+        await db.init()
+        leases = LeaseManager(db, owner="holder", ttl=1.0)
+        lease = await leases.acquire("aggregator")
+        print(lease.token, flush=True)
+        while True:
+            await asyncio.sleep(0.2)
+            await leases.renew(lease)
+
+    asyncio.run(main())
+""")
+
+
+def _db(tmp_path):
+    return SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+
+
+def test_failover_after_holder_is_killed(tmp_path):
+    async def setup():
+        db = _db(tmp_path)
+        await db.init()
+        await db.upsert_users_bulk([
+            {"user_id": "u1", "username": "A", "team_id": "t1"},
+            {"user_id": "u2", "username": "B", "team_id": "t2"},
+        ])
+        await db.create_battle("b1", "t1", "t2", "2025-01-01", "2025-01-07")
+        await db.close()
+
+    asyncio.run(setup())
+    backend_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=backend_root)
+    holder = subprocess.Popen([sys.executable, "-c", HOLDER, str(tmp_path / "vq.db")], stdout=subprocess.PIPE, env=env, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "1"
+
+        async def standby():
+            db = _db(tmp_path)
+            await db.init()
+            try:
+                leases = LeaseManager(db, owner="standby", ttl=1.0)
+                # renewed every 0.2s: still held well past the TTL
+                await asyncio.sleep(1.5)
+                while_alive = await leases.acquire("aggregator")
+
+                holder.send_signal(signal.SIGKILL)
+                holder.wait()
+                killed_at = time.time()
+                taken = None
+                while taken is None and time.time() - killed_at < 5:
+                    taken = await leases.acquire("aggregator")
+                    await asyncio.sleep(0.1)
+
+                # the dead holder's lease (token 1) can no longer fence a write
+                stale = Lease("aggregator", "holder", 1, time.time() + 60)
+                battle = await db.get_battle("b1")
+                update = BattleUpdate(battle, [("t1", "2025-01-01", 1, 1.0)], 1)
+                with pytest.raises(LeaseLost):
+                    await db.write_battle_updates([update], fence=stale)
+                await db.write_battle_updates([update], fence=taken)
+                return while_alive, taken, time.time() - killed_at, await db.get_battle("b1")
+            finally:
+                await db.close()
+
+        while_alive, taken, waited, battle = asyncio.run(standby())
+    finally:
+        if holder.poll() is None:
+            holder.kill()
+            holder.wait()
+    assert while_alive is None
+    assert (taken.owner, taken.token) == ("standby", 2)
+    assert waited < 2.5
+    assert battle["scores"]["t1"] == 1.0
+
+
+def test_leased_job_runs_in_one_process_and_fails_over(tmp_path):
+    async def scenario():
+        db = _db(tmp_path)
+        await db.init()
+        try:
+            runs = {"a": 0, "b": 0}
+
+            def job(owner):
+                async def run(lease):
+                    runs[owner] += 1
+                return run
+
+            a = LeasedJob(LeaseManager(db, owner="a", ttl=0.6, heartbeat=0.1), "job", job("a"), 0.05)
+            b = LeasedJob(LeaseManager(db, owner="b", ttl=0.6, heartbeat=0.1), "job", job("b"), 0.05)
+            task_a = asyncio.ensure_future(a.run_forever())
+            await asyncio.sleep(0.05)
+            task_b = asyncio.ensure_future(b.run_forever())
+            await asyncio.sleep(0.5)
+            before = dict(runs)
+
+            # a clean shutdown releases the lease, so b takes over within one poll
+            task_a.cancel()
+            await asyncio.gather(task_a, return_exceptions=True)
+            await asyncio.sleep(0.4)
+            task_b.cancel()
+            await asyncio.gather(task_b, return_exceptions=True)
+            return before, runs, b.failovers
+        finally:
+            await db.close()
+
+    before, runs, failovers = asyncio.run(scenario())
+    assert before["a"] > 0 and before["b"] == 0
+    assert runs["b"] > 0 and failovers == 1
+
+
+def test_shard_jobs_respect_per_worker_limit(tmp_path):
+    async def scenario():
+        db = _db(tmp_path)
+        await db.init()
+        try:
+            worker_a = LeaseManager(db, owner="a")
+            worker_b = LeaseManager(db, owner="b")
+            jobs_a = aggregator.aggregation_jobs(db, worker_a, shards=4, max_per_worker=2)
+            jobs_b = aggregator.aggregation_jobs(db, worker_b, shards=4, max_per_worker=2)
+            for job in jobs_a + jobs_b:
+                await job._try_acquire()
+            return [j.name for j in jobs_a], sorted(worker_a.held), sorted(worker_b.held)
+        finally:
+            await db.close()
+
+    names, held_a, held_b = asyncio.run(scenario())
+    assert names == [f"aggregator:{i}/4" for i in range(4)]
+    assert held_a == names[:2] and held_b == names[2:]
+    assert aggregator.battle_shard("b1", 4) == aggregator.battle_shard("b1", 4) < 4
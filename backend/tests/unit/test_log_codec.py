@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+from backend.app.dummy_data import generate_dummy_dailylogs
+from backend.app.logic import calculate_rhr_from_series, calculate_rhr_from_sleep
+from backend.database import log_codec
+from backend.database.sqlite_client import SQLiteClient
+from backend.models.schemas import DailyLog
+from backend.services import daily_summary
+
+
+def _logs(n=5):
+    return [log.model_dump(mode="json") for log in generate_dummy_dailylogs(n)]
+
+
+def test_packed_round_trip_is_lossless():
+    for raw in _logs():
+        packed = log_codec.encode_log(raw)
+        assert log_codec.is_packed(packed["heart_rate_samples"])
+        assert log_codec.is_packed(packed["sleep_segments"])
+        assert len(json.dumps(packed)) < len(json.dumps(raw)) / 2
+        assert DailyLog(**log_codec.decode_log(packed)) == DailyLog(**raw)
+
+
+def test_unpackable_lists_stay_json():
+    samples = [{"timestamp": "2025-01-01T01:00:00.500000", "bpm": 60}]
+    assert log_codec.pack_heart_rate_samples(samples) is samples
+    out_of_order = [{"timestamp": "2025-01-01T02:00:00", "bpm": 60}, {"timestamp": "2025-01-01T01:00:00", "bpm": 61}]
+    assert log_codec.pack_heart_rate_samples(out_of_order) is out_of_order
+
+
+def test_rhr_and_recovery_from_packed_arrays_match_models():
+    for raw in _logs():
+        packed = log_codec.encode_log(raw)
+        model = DailyLog(**raw)
+        series = log_codec.HeartRateSeries.from_log(packed)
+        assert calculate_rhr_from_series(model, series)["rhr"] == calculate_rhr_from_sleep(model)["rhr"]
+        assert daily_summary._recovery_score(packed, raw["date"]) == daily_summary._recovery_score(raw, raw["date"])
+
+
+def test_client_returns_packed_and_legacy_rows_as_stored(tmp_path, monkeypatch):
+    packed_log, legacy_log = _logs(2)
+
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await db.init()
+        try:
+            await db.upsert_user({"user_id": "u1", "username": "A", "team_id": "t1"})
+            await db.insert_daily_log("u1", legacy_log["date"], json.dumps(legacy_log))
+            monkeypatch.setattr(log_codec, "DAILY_LOG_ENCODING", "packed")
+            await db.insert_daily_log("u1", packed_log["date"], json.dumps(packed_log))
+            stored = await db.fetch_all("SELECT date, data FROM daily_logs ORDER BY date DESC")
+            return stored, await db.get_daily_logs_for_user_range("u1", "2000-01-01", "2100-01-01")
+        finally:
+            await db.close()
+
+    stored, logs = asyncio.run(main())
+    assert log_codec.PACKED_MARKER in stored[0]["data"] and log_codec.PACKED_MARKER not in stored[1]["data"]
+    assert logs == [row["data"] for row in stored]  # no re-serialization on read
+    assert [DailyLog(**log_codec.decode_log(json.loads(j))) for j in logs] == [DailyLog(**packed_log), DailyLog(**legacy_log)]
+    assert log_codec.sleep_segments(json.loads(logs[0])) == packed_log["sleep_segments"]
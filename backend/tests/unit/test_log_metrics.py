@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import battle_system
+from backend.services.log_metrics import extract_log_metrics
+
+DAILY_LOG = {
+    "total_steps": 8000,
+    "total_calories_active": 420.5,
+    "sleep_segments": [
+        {"stage": "deep", "duration_minutes": 90},
+        {"stage": "light", "duration_minutes": 300},
+    ],
+    "manual_workouts": [{"activity_type": "Gym", "duration_minutes": 45, "intensity_rpe": 8}],
+}
+
+HEALTH_DATA = {"user_id": "u1", "date": "2025-01-03", "steps": 5000, "calories_burned": 300, "sleep_total_minutes": 420, "sleep_deep_minutes": 60}
+
+
+def test_both_log_shapes_normalize_to_same_columns():
+    log = extract_log_metrics(DAILY_LOG)
+    assert (log["total_steps"], log["deep_sleep_minutes"], log["total_sleep_minutes"], log["workout_count"]) == (8000, 90, 390, 1)
+    assert log["battle_score"] == battle_system.user_battle_score_from_dailylog(DAILY_LOG)
+
+    health = extract_log_metrics(HEALTH_DATA)
+    assert (health["total_steps"], health["deep_sleep_minutes"], health["total_sleep_minutes"]) == (5000, 60, 420)
+    assert health["battle_score"] == battle_system.user_battle_score_from_dailylog(HEALTH_DATA)
+
+
+def test_metric_reads_skip_json(tmp_path):
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await db.init()
+        try:
+            await db.upsert_users_bulk([
+                {"user_id": "u1", "username": "A", "team_id": "t1"},
+                {"user_id": "u2", "username": "B", "team_id": "t1"},
+            ])
+            await db.insert_daily_log("u1", "2025-01-02", json.dumps(DAILY_LOG))
+            await db.insert_health(HEALTH_DATA)
+            await db.insert_daily_logs_bulk([("u2", "2025-01-02", json.dumps(DAILY_LOG))])
+            return (
+                await db.get_workouts_for_user_range("u1", "2025-01-01", "2025-01-31"),
+                await db.get_daily_metrics_for_user_range("u1", "2025-01-01", "2025-01-31"),
+            )
+        finally:
+            await db.close()
+
+    workouts, metrics = asyncio.run(main())
+    assert [w["activity_type"] for w in workouts] == ["Gym"]
+    assert [m["date"] for m in metrics] == ["2025-01-03", "2025-01-02"]
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import provider
+from backend.database.sqlite_client import SQLiteClient
+from backend.routers import leaderboard, step_milestones
+from backend.services import pagination
+
+
+def _client(tmp_path, seed):
+    db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+
+    async def setup():
+        await db.init()
+        await seed(db)
+    asyncio.run(setup())
+
+    async def get_db():
+        return db
+    app = FastAPI()
+    app.include_router(leaderboard.router, prefix="/leaderboard")
+    app.include_router(step_milestones.router, prefix="/step-milestones")
+    app.dependency_overrides[provider.get_db] = get_db
+    return db, TestClient(app)
+
+
+def _walk(client, url, limit, key="rankings", **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        body = client.get(url, params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})}).json()
+        items += body[key]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+def test_leaderboard_pages_cover_every_user_once(tmp_path):
+    # many ties on xp and on (xp, level)
+    users = [{"user_id": f"u{i:03d}", "username": f"U{i}", "team_id": f"t{i % 2}", "xp": i % 7, "level": i % 3 + 1} for i in range(103)]
+
+    async def seed(db):
+        await db.upsert_users_bulk(users)
+        for i, u in enumerate(users):
+            await db.record_xp(u["user_id"], u["team_id"], 10 + i % 5, "test", datetime(2025, 3, 4, 12))
+
+    db, client = _client(tmp_path, seed)
+    try:
+        expected = sorted(users, key=lambda u: (u["xp"], u["level"], u["user_id"]), reverse=True)
+        everyone, pages = _walk(client, "/leaderboard/global", 10, period="all")
+        assert [u["user_id"] for u in everyone] == [u["user_id"] for u in expected] and pages == 11
+
+        team, _ = _walk(client, "/leaderboard/team/t1", 7, period="all")
+        assert [u["user_id"] for u in team] == [u["user_id"] for u in expected if u["team_id"] == "t1"]
+
+        weekly, _ = _walk(client, "/leaderboard/global", 9, period="weekly", day="2025-03-06")
+        xp = {u["user_id"]: 10 + i % 5 for i, u in enumerate(users)}
+        assert [u["user_id"] for u in weekly] == sorted(xp, key=lambda u: (xp[u], u), reverse=True)
+
+        # cursors are bound to their listing
+        cursor = client.get("/leaderboard/global", params={"period": "all", "limit": 5}).json()["next_cursor"]
+        assert client.get("/leaderboard/team/t1", params={"period": "all", "cursor": cursor}).status_code == 400
+        assert client.get("/leaderboard/global", params={"period": "all", "cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/leaderboard/global", params={"limit": pagination.PAGE_SIZE_MAX + 1}).status_code == 422
+    finally:
+        client.close()
+        asyncio.run(db.close())
+
+
+def test_milestone_pages_with_duplicate_keys(tmp_path):
+    async def seed(db):
+        await db.upsert_user({"user_id": "u1", "username": "A"})
+        for steps in range(10, 260, 10):
+            # the same milestone twice at the same instant: only the row id tells them apart
+            for _ in range(2):
+                await db.execute(
+                    "INSERT INTO step_milestones (user_id, milestone_steps, notified_at) VALUES (%s, %s, %s)",
+                    ("u1", steps, "2025-01-01 10:00:00"),
+                )
+
+    db, client = _client(tmp_path, seed)
+    try:
+        milestones, pages = _walk(client, "/step-milestones/milestones/u1", 3, key="milestones")
+        assert [m["steps"] for m in milestones] == [s for s in range(250, 0, -10) for _ in range(2)]
+        assert pages == 17
+    finally:
+        client.close()
+        asyncio.run(db.close())
+
+
+def test_cursor_round_trip():
+    token = pagination.encode_cursor("global:all", (12, 3, "u7"))
+    assert pagination.decode_cursor(token, "global:all", 3) == (12, 3, "u7")
+    assert "=" not in token
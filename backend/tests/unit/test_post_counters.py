@@ -0,0 +1,133 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import provider
+from backend.database.sqlite_client import SQLiteClient
+from backend.routers import social_feed
+from backend.services import post_counters
+from backend.services.post_counters import CounterBuffer
+
+
+async def _seed(db):
+    await db.init()
+    await db.upsert_user({"user_id": "u1", "username": "A", "team_id": "t1"})
+    for i in range(2):
+        await db.insert_social_post({"post_id": f"p{i}", "user_id": "u1", "type": "daily_log",
+                                     "timestamp": f"2025-05-01 10:00:0{i}", "content": {}})
+
+
+def _counts(db):
+    return {r["post_id"]: (r["likes"], r["comments_count"])
+            for r in asyncio.run(db.fetch_all("SELECT post_id, likes, comments_count FROM social_feed"))}
+
+
+def test_likes_and_comments_are_buffered_then_flushed(tmp_path):
+    db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+    asyncio.run(_seed(db))
+    counters = CounterBuffer()
+
+    async def get_db():
+        return db
+    app = FastAPI()
+    app.include_router(social_feed.router, prefix="/social")
+    app.dependency_overrides[provider.get_db] = get_db
+    app.dependency_overrides[post_counters.get_post_counters] = lambda: counters
+    client = TestClient(app)
+    # attached by the first like; the test flushes by hand
+    counters.attach = lambda db, interval=None: setattr(counters, "db", db)
+    try:
+        for i in range(50):
+            assert client.post("/social/post/p0/like", json={"user_id": f"u{i}"}).status_code == 200
+        client.post("/social/post/p0/like", json={"user_id": "u1"})  # one like per user
+        client.post("/social/post/p0/unlike", json={"user_id": "u0"})
+        client.post("/social/post/p1/unlike", json={"user_id": "u0"})  # never liked
+        assert client.post("/social/post/nope/like", json={"user_id": "u0"}).status_code == 404
+        assert client.post("/social/post/p0/like", json={}).status_code == 400
+        for i in range(5):
+            assert client.post("/social/post/p0/comments", json={"user_id": "u1", "text": f"c{i}"}).status_code == 200
+        assert client.post("/social/post/nope/comments", json={"user_id": "u1", "text": "x"}).status_code == 404
+        assert client.post("/social/post/p0/comments", json={"user_id": "u1"}).status_code == 400
+
+        # nothing written yet; the feed shows this process's pending comments (likes count once flushed)
+        assert _counts(db) == {"p0": (0, 0), "p1": (0, 0)}
+        assert asyncio.run(db.fetch_one("SELECT COUNT(*) AS n FROM post_likes"))["n"] == 0
+        feed = client.get("/social/user/u1", params={"fields": "likes,comments_count"}).json()["posts"]
+        assert feed == [{"likes": 0, "comments_count": 0}, {"likes": 0, "comments_count": 5}]
+
+        assert asyncio.run(counters.flush()) == 1  # p1's unlike matched no row
+        assert _counts(db) == {"p0": (49, 5), "p1": (0, 0)}
+        stats = counters.stats()
+        assert stats["pending_posts"] == stats["pending_likes"] == 0 and stats["increments"] == 58 and stats["likes_written"] == 51
+
+        # a repeat like changes nothing; an unlike of a stored like counts down
+        client.post("/social/post/p0/like", json={"user_id": "u2"})
+        client.post("/social/post/p0/unlike", json={"user_id": "u3"})
+        asyncio.run(counters.flush())
+        assert _counts(db)["p0"] == (48, 5)
+
+        texts, cursor = [], None
+        while True:
+            body = client.get("/social/post/p0/comments", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+            texts += [c["text"] for c in body["comments"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        assert texts == ["c4", "c3", "c2", "c1", "c0"]
+        likes = asyncio.run(db.fetch_all("SELECT user_id FROM post_likes WHERE post_id = %s", ("p0",)))
+        assert sorted(r["user_id"] for r in likes) == sorted(f"u{i}" for i in range(1, 50) if i != 3)
+    finally:
+        client.close()
+        asyncio.run(db.close())
+
+
+def test_failed_flush_keeps_deltas_and_close_flushes(tmp_path):
+    async def run():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await _seed(db)
+        counters = CounterBuffer()
+        counters.attach(db, interval=3600)
+        try:
+            counters.add("p0", likes=3)
+            counters.like("p0", "u1")
+            real = db.add_post_counts
+
+            async def broken(rows, likes=None):
+                raise RuntimeError("database down")
+            db.add_post_counts = broken
+            try:
+                await counters.flush()
+                raise AssertionError("flush should have failed")
+            except RuntimeError:
+                pass
+            db.add_post_counts = real
+            counters.add("p0", likes=1)
+            await counters.close()
+            return (await db.fetch_one("SELECT likes FROM social_feed WHERE post_id = %s", ("p0",)),
+                    await db.fetch_one("SELECT COUNT(*) AS n FROM post_likes"))
+        finally:
+            await db.close()
+    row, likes = asyncio.run(run())
+    assert row["likes"] == 5 and likes["n"] == 1
+
+
+def test_concurrent_likes_and_flushes_lose_nothing(tmp_path):
+    async def run():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await _seed(db)
+        counters = CounterBuffer()
+        counters.attach(db, interval=0.001)
+        try:
+            async def liker(n):
+                for _ in range(n):
+                    counters.add("p1", likes=1)
+                    await asyncio.sleep(0)
+            await asyncio.gather(*(liker(500) for _ in range(20)))
+            await counters.close()
+            return await db.fetch_one("SELECT likes FROM social_feed WHERE post_id = %s", ("p1",)), counters.stats()
+        finally:
+            await db.close()
+    row, stats = asyncio.run(run())
+    assert row["likes"] == 10000
+    assert stats["flushes"] > 1 and stats["rows_written"] < 10000
@@ -0,0 +1,61 @@
+import asyncio
+
+from backend.database.query_cache import LRUCacheBackend, QueryCache
+from backend.database.sqlite_client import SQLiteClient
+
+
+def test_lru_backend_evicts_and_expires():
+    async def run():
+        backend = LRUCacheBackend(maxsize=2)
+        await backend.set("a", 1, ttl=60)
+        await backend.set("b", 2, ttl=60)
+        await backend.get("a")
+        await backend.set("c", 3, ttl=60)  # evicts b, the least recently used
+        results = [await backend.get(k) for k in "abc"]
+        await backend.set("d", 4, ttl=-1)  # already expired
+        results.append(await backend.get("d"))
+        return results, backend.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [(True, 1), (False, None), (True, 3), (False, None)]
+    assert stats["evictions"] == 2 and stats["expirations"] == 1
+
+
+def test_reads_are_cached_and_writes_invalidate(tmp_path):
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1, cache=QueryCache(ttl=60, enabled=True))
+        await db.init()
+        try:
+            await db.upsert_user({"user_id": "u1", "username": "A", "team_id": "t1", "xp": 10})
+            await db.create_battle("b1", "t1", "t2", "2025-01-01", "2025-01-07")
+
+            first = await db.get_user("u1")
+            first["username"] = "mutated by caller"
+            cached = await db.get_user("u1")
+            await db.get_global_leaderboard()
+            await db.get_global_leaderboard()
+            await db.get_battle("b1")
+
+            await db.upsert_user({"user_id": "u1", "username": "A2", "team_id": "t1", "xp": 99})
+            await db.update_battle_scores("b1", {"t1": 3.0, "t2": 1.0})
+            await db.get_user_feed("u1")
+            await db.insert_social_post({"post_id": "p1", "user_id": "u1", "type": "x", "timestamp": "2025-01-02 10:00:00", "content": {}})
+            return (
+                cached,
+                await db.get_user("u1"),
+                await db.get_global_leaderboard(),
+                await db.get_battle("b1"),
+                await db.get_user_feed("u1"),
+                db.cache.stats(),
+            )
+        finally:
+            await db.close()
+
+    cached, user, leaders, battle, feed, stats = asyncio.run(main())
+    assert cached["username"] == "A"
+    assert user["username"] == "A2"
+    assert leaders[0]["xp"] == 99
+    assert battle["scores"] == {"t1": 3.0, "t2": 1.0}
+    assert [p["post_id"] for p in feed] == ["p1"]
+    assert stats["namespaces"]["user"] == {"hits": 1, "misses": 2}
+    assert stats["namespaces"]["global_leaderboard"] == {"hits": 1, "misses": 2}
@@ -0,0 +1,38 @@
+import asyncio
+
+from backend.database.query_cache import QueryCache
+from backend.database.query_stats import fingerprint
+from backend.database.sqlite_client import SQLiteClient
+
+
+def test_fingerprint_normalizes_literals_and_in_lists():
+    a = fingerprint("SELECT * FROM users WHERE user_id IN (%s, %s, %s) AND xp > 10")
+    b = fingerprint("SELECT *\n  FROM users WHERE user_id IN (?, ?) AND xp > 250")
+    assert a == b == "SELECT * FROM users WHERE user_id IN (?+) AND xp > ?"
+    assert fingerprint("SELECT * FROM meta WHERE key_name = 'last'") == "SELECT * FROM meta WHERE key_name = ?"
+
+
+def test_statements_recorded_per_caller_and_slow_queries_explained(tmp_path):
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1, cache=QueryCache(enabled=False))
+        await db.init()
+        try:
+            await db.upsert_user({"user_id": "u1", "username": "A", "team_id": "t1"})
+            await db.get_user("u1")
+            await db.get_user("missing")
+            db.query_stats.slow_query_ms = 0
+            await db.get_global_leaderboard()
+            await asyncio.sleep(0.05)  # plan is fetched in the background
+            return db.query_stats.snapshot()
+        finally:
+            await db.close()
+
+    snap = asyncio.run(main())
+    by_caller = {q["caller"]: q for q in snap["queries"]}
+    assert by_caller["SQLiteClient.get_user"]["calls"] == 2
+    assert by_caller["SQLiteClient.get_user"]["rows"] == 1
+    assert by_caller["SQLiteClient.upsert_user"]["calls"] == 1
+    slow = snap["slow_queries"][-1]
+    assert slow["caller"] == "SQLiteClient.get_global_leaderboard"
+    assert "(10,)" in slow["params"]
+    assert slow["plan"] and "detail" in slow["plan"][0]
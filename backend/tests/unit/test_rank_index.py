@@ -0,0 +1,97 @@
+import asyncio
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import provider
+from backend.database.sqlite_client import SQLiteClient
+from backend.routers import leaderboard
+from backend.services.rank_index import FenwickTree, RankIndex, get_rank_index
+
+
+def _sorted_ids(users):
+    return [u["user_id"] for u in sorted(users.values(), key=lambda u: (u["xp"], u["level"], u["user_id"]), reverse=True)]
+
+
+def test_rank_and_around_match_sorted_order():
+    rng = random.Random(3)
+    index = RankIndex()
+    users = {}
+    for step in range(3000):
+        user_id = f"u{rng.randrange(400)}"
+        # ties on xp and level are common; occasionally an xp far past the initial tree size
+        user = {"user_id": user_id, "username": user_id, "xp": rng.choice([rng.randrange(50), rng.randrange(5000)]), "level": rng.randrange(1, 4)}
+        users[user_id] = user
+        index.update(user)
+    order = _sorted_ids(users)
+    assert [index.rank(u) for u in order] == list(range(1, len(order) + 1))
+    assert [index.at(r)["user_id"] for r in range(1, len(order) + 1)] == order
+
+    me = order[10]
+    around = index.around(me, 3)
+    assert [r["user_id"] for r in around] == order[7:14] and [r["rank"] for r in around] == list(range(8, 15))
+    assert [r["user_id"] for r in index.around(order[0], 2)] == order[:3]
+    assert index.rank("nobody") is None and index.around("nobody", 2) is None
+
+
+def test_fenwick_find_and_grow():
+    tree = FenwickTree(4)
+    for key in (0, 3, 3, 9):
+        tree.add(key, 1)
+    assert tree.size == 16 and tree.total == 4
+    assert [tree.find(k) for k in (1, 2, 3, 4)] == [0, 3, 3, 9]
+    assert tree.prefix(2) == 1 and tree.count_at(3) == 2
+
+
+def test_follows_writes_and_reconciles_drift(tmp_path):
+    async def scenario():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await db.init()
+        try:
+            await db.upsert_users_bulk([{"user_id": f"u{i}", "username": f"U{i}", "xp": i * 10, "level": 1} for i in range(5)])
+            index = RankIndex()
+            await index.attach(db, interval=0)
+            before = index.rank("u0")
+            await db.upsert_user({"user_id": "u0", "username": "U0", "xp": 1000, "level": 3})
+            followed = index.rank("u0")
+            # a write this process didn't see (another worker, manual SQL)
+            await db.execute("UPDATE users SET xp = %s WHERE user_id = %s", (5, "u4"))
+            stale = index.rank("u4")
+            stats = await index.reconcile()
+            return before, followed, stale, index.rank("u4"), stats
+        finally:
+            await db.close()
+
+    before, followed, stale, fixed, stats = asyncio.run(scenario())
+    assert (before, followed) == (5, 1)
+    assert (stale, fixed) == (2, 5)
+    assert stats["last_drift"] == 1 and stats["users"] == 5
+
+
+def test_rank_endpoints(tmp_path, monkeypatch):
+    db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+
+    async def seed():
+        await db.init()
+        await db.upsert_users_bulk([{"user_id": f"u{i}", "username": f"U{i}", "xp": i, "level": 1} for i in range(20)])
+    asyncio.run(seed())
+
+    async def get_db():
+        return db
+    app = FastAPI()
+    app.include_router(leaderboard.router, prefix="/leaderboard")
+    app.dependency_overrides[provider.get_db] = get_db
+    app.dependency_overrides[get_rank_index] = lambda: index
+    index = RankIndex()
+    client = TestClient(app)
+    try:
+        rank = client.get("/leaderboard/rank/u15").json()
+        assert (rank["rank"], rank["total"], rank["xp"], rank["percentile"]) == (5, 20, 15, 80.0)
+        around = client.get("/leaderboard/around/u15?window=2").json()
+        assert [r["user_id"] for r in around["rankings"]] == ["u17", "u16", "u15", "u14", "u13"]
+        assert client.get("/leaderboard/rank/nobody").status_code == 404
+        assert client.get("/leaderboard/around/u1?window=99").status_code == 422
+    finally:
+        client.close()
+        asyncio.run(db.close())
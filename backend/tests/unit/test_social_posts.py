@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import provider
+from backend.database.sqlite_client import SQLiteClient
+from backend.routers import social_feed
+from backend.services import post_generator, social_posts, team_timeline
+
+
+def test_feed_fields_are_projected_and_content_decoded(tmp_path):
+    db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+
+    async def setup():
+        await db.init()
+        await db.upsert_users_bulk([{"user_id": f"u{i}", "username": f"U{i}", "team_id": "t1"} for i in range(2)])
+        for i in range(7):
+            await db.insert_social_post({"post_id": f"p{i}", "user_id": f"u{i % 2}", "type": "daily_log",
+                                         "timestamp": f"2025-05-01 10:00:0{i}", "content": {"n": i, "msg": "héllo"}})
+    asyncio.run(setup())
+
+    async def get_db():
+        return db
+    app = FastAPI()
+    app.include_router(social_feed.router, prefix="/social")
+    app.dependency_overrides[provider.get_db] = get_db
+    client = TestClient(app)
+    try:
+        posts = client.get("/social/user/u0", params={"fields": "content,post_id"}).json()["posts"]
+        assert posts == [{"post_id": f"p{i}", "content": {"n": i, "msg": "héllo"}} for i in (6, 4, 2, 0)]
+
+        # the cursor key is fetched but not returned
+        seen, cursor = [], None
+        while True:
+            body = client.get("/social/team/t1", params={"fields": "post_id", "limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+            assert all(list(p) == ["post_id"] for p in body["posts"])
+            seen += [p["post_id"] for p in body["posts"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [f"p{i}" for i in range(6, -1, -1)]
+
+        full = client.get("/social/team/t1", params={"limit": 1}).json()["posts"][0]
+        assert list(full) == list(social_posts.POST_FIELDS) and full["content"]["n"] == 6
+        assert client.get("/social/user/u0", params={"fields": "post_id,created_at"}).status_code == 400
+    finally:
+        client.close()
+        asyncio.run(db.close())
+
+
+def test_feed_query_joins_posts_only_when_needed():
+    assert "JOIN social_feed" not in team_timeline.feed_query(fields=("post_id", "user_id"))
+    assert "JOIN social_feed" in team_timeline.feed_query(fields=("content",))
+
+
+def test_content_has_one_canonical_form():
+    post = post_generator.generate_level_up_post("u1", "Ann", 3, {"strength": 1})
+    stored = social_posts.encode_content(post["content"])
+    assert stored == json.dumps(post["content"], separators=(",", ":"), ensure_ascii=False)
+    assert social_posts.encode_content(stored) == stored  # already-serialized content isn't double-encoded
+    assert social_posts.decode_content(stored) == post["content"]
+
+    assert social_posts.repair_content(stored) is None
+    assert social_posts.repair_content(str(post["content"])) == stored  # old level-up rows
+    assert social_posts.repair_content(json.dumps(json.dumps(post["content"]))) == stored
+    assert social_posts.repair_content(json.dumps(post["content"], indent=2)) is None
+
+
+def test_upsert_moves_a_reposted_post_to_its_new_timestamp(tmp_path):
+    async def run():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await db.init()
+        try:
+            await db.upsert_user({"user_id": "u1", "username": "A", "team_id": "t1"})
+            post = {"post_id": "p1", "user_id": "u1", "type": "x", "timestamp": "2025-05-01 10:00:00", "content": {"v": 1}}
+            await db.insert_social_post(post)
+            await db.insert_social_post(dict(post, timestamp="2025-05-02 10:00:00", content={"v": 2}))
+            kept = await db.get_team_feed("t1", fields=("timestamp", "content"))
+            await db.insert_social_post(dict(post, timestamp="2025-05-03 10:00:00", content={"v": 3}), upsert=True)
+            moved = await db.get_team_feed("t1", fields=("timestamp", "content"))
+            timeline = await db.fetch_all("SELECT timestamp FROM team_timeline")
+            return kept, moved, timeline
+        finally:
+            await db.close()
+    kept, moved, timeline = asyncio.run(run())
+    assert [(p["timestamp"], p["content"]) for p in kept] == [("2025-05-01 10:00:00", {"v": 2})]
+    assert [(p["timestamp"], p["content"]) for p in moved] == [("2025-05-03 10:00:00", {"v": 3})]
+    assert timeline == [{"timestamp": "2025-05-03 10:00:00"}]
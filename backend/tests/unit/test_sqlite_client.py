@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+from backend.database.sqlite_client import SQLiteClient
+
+
+def _run(db_path, scenario):
+    async def main():
+        db = SQLiteClient(str(db_path), readers=2)
+        await db.init()
+        try:
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_wal_mode_and_pool(tmp_path):
+    async def scenario(db):
+        mode = await db.fetch_one("PRAGMA journal_mode")
+        return mode, db.pool_stats()
+
+    mode, stats = _run(tmp_path / "vq.db", scenario)
+    assert list(mode.values())[0] == "wal"
+    assert stats["readers"] == 2 and stats["idle"] == 2
+
+
+def test_mysql_client_surface_round_trip(tmp_path):
+    async def scenario(db):
+        await db.upsert_users_bulk([
+            {"user_id": "u1", "username": "A", "team_id": "t1", "xp": 50, "level": 2},
+            {"user_id": "u2", "username": "B", "team_id": "t1", "xp": 80, "level": 1},
+        ])
+        await db.insert_daily_log("u1", "2025-01-02", json.dumps({"total_steps": 100}))
+        await db.insert_social_post({"post_id": "p1", "user_id": "u2", "type": "x", "timestamp": "2025-01-02 10:00:00", "content": {"m": 1}})
+        await db.create_battle("b1", "t1", "t2", "2025-01-01", "2025-01-07")
+        await db.update_battle_scores("b1", {"t1": 5.0, "t2": 1.0})
+        await db.set_meta("k", "v")
+        # routers issue MySQL-style SQL directly
+        await db.execute("INSERT INTO step_milestones (user_id, milestone_steps, notified_at) VALUES (%s, %s, NOW())", ("u1", 10))
+        return {
+            "user": await db.get_user("u1"),
+            "logs": await db.get_daily_logs_for_team_range("t1", "2025-01-01", "2025-01-31"),
+            "feed": await db.get_team_feed("t1"),
+            "battle": await db.get_battle("b1"),
+            "active": await db.get_active_battles(),
+            "leaders": await db.get_global_leaderboard(),
+            "meta": await db.get_meta("k"),
+            "milestones": await db.fetch_all("SELECT * FROM step_milestones WHERE user_id = %s", ("u1",)),
+        }
+
+    out = _run(tmp_path / "vq.db", scenario)
+    assert out["user"]["username"] == "A"
+    assert json.loads(out["logs"][0])["total_steps"] == 100
+    assert out["feed"][0]["content"] == {"m": 1}
+    assert out["battle"]["scores"] == {"t1": 5.0, "t2": 1.0}
+    assert [b["battle_id"] for b in out["active"]] == ["b1"]
+    assert [u["user_id"] for u in out["leaders"]] == ["u2", "u1"]
+    assert out["meta"] == "v"
+    assert out["milestones"][0]["milestone_steps"] == 10
+
+
+def test_clients_expose_the_same_methods():
+    from backend.database.mysql_client import MySQLClient
+
+    def public(cls):
+        return {name for name in dir(cls) if not name.startswith("_") and callable(getattr(cls, name))}
+    assert public(MySQLClient) == public(SQLiteClient)
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import tracemalloc
+
+from backend.database.mysql_client import MySQLClient
+from backend.services import battle_system
+
+
+class FakeSSCursor:
+    """Unbuffered cursor stand-in: rows are generated on demand, never held as a full list."""
+
+    def __init__(self, total_rows):
+        self.total_rows = total_rows
+        self.produced = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=()):
+        self.produced = 0
+
+    async def fetchmany(self, size):
+        n = min(size, self.total_rows - self.produced)
+        rows = []
+        for i in range(n):
+            log = {"total_steps": 1000 + self.produced + i, "sleep_segments": [{"stage": "deep", "duration_minutes": 60}], "manual_workouts": []}
+            rows.append({"data": json.dumps(log)})
+        self.produced += n
+        return rows
+
+
+class FakeConn:
+    def __init__(self, total_rows):
+        self.total_rows = total_rows
+
+    def cursor(self, cursor_cls=None):
+        return FakeSSCursor(self.total_rows)
+
+
+class FakePool:
+    size = 1
+    freesize = 0
+
+    def __init__(self, total_rows):
+        self.conn = FakeConn(total_rows)
+
+    def acquire(self):
+        async def _acquire():
+            return self.conn
+        return _acquire()
+
+    def release(self, conn):
+        fut = asyncio.get_event_loop().create_future()
+        fut.set_result(None)
+        return fut
+
+
+def _peak_bytes_for(total_rows):
+    db = MySQLClient()
+    db.pool = FakePool(total_rows)
+
+    async def run():
+        total = 0.0
+        async for batch in db.iter_daily_logs_for_team_range("team_alpha", "2025-01-01", "2025-12-31"):
+            total += battle_system.compute_team_score_from_user_logs([json.loads(j) for j in batch])
+        return total
+
+    tracemalloc.start()
+    score = asyncio.run(run())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return score, peak
+
+
+def test_iter_rows_yields_bounded_batches():
+    db = MySQLClient()
+    db.pool = FakePool(1050)
+
+    async def run():
+        return [len(batch) async for batch in db.iter_rows("SELECT data FROM daily_logs", batch_size=500)]
+
+    assert asyncio.run(run()) == [500, 500, 50]
+    assert db.pool_stats()["in_use"] == 0
+
+
+def test_team_score_scan_peak_memory_stays_flat():
+    small_score, small_peak = _peak_bytes_for(2_000)
+    large_score, large_peak = _peak_bytes_for(20_000)
+    assert large_score > small_score * 9
+    # 10x the rows must not mean 10x the memory: only one batch is alive at a time
+    assert large_peak < small_peak * 2
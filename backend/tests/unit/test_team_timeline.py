@@ -0,0 +1,116 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import provider
+from backend.database import sqlite_client
+from backend.database.sqlite_client import SQLiteClient
+from backend.routers import social_feed
+from backend.services.leases import LeaseLost, LeaseManager
+
+
+def _post(i: int, user_id: str, second: int = None) -> dict:
+    # several posts share a timestamp: the cursor has to break ties on post_id
+    return {"post_id": f"p{i:03d}", "user_id": user_id, "type": "daily_summary",
+            "timestamp": f"2025-05-01T10:00:{(i // 3 if second is None else second):02d}Z", "content": {"n": i}}
+
+
+def _client(db):
+    async def get_db():
+        return db
+    app = FastAPI()
+    app.include_router(social_feed.router, prefix="/social")
+    app.dependency_overrides[provider.get_db] = get_db
+    return TestClient(app)
+
+
+def _walk(client, team_id, limit):
+    posts, cursor = [], None
+    while True:
+        body = client.get(f"/social/team/{team_id}", params={"limit": limit, **({"cursor": cursor} if cursor else {})}).json()
+        posts += body["posts"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return [p["post_id"] for p in posts]
+
+
+def test_posts_fan_out_and_page_by_team(tmp_path):
+    db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+    users = [{"user_id": f"u{i}", "username": f"U{i}", "team_id": f"t{i % 2}"} for i in range(4)] + [{"user_id": "solo", "username": "S"}]
+    posts = [_post(i, users[i % 5]["user_id"]) for i in range(40)]
+
+    async def setup():
+        await db.init()
+        await db.upsert_users_bulk(users)
+        for post in posts[:20]:
+            await db.insert_social_post(post)
+        await db.insert_social_posts_bulk(posts[20:])
+    asyncio.run(setup())
+    client = _client(db)
+    try:
+        def expected(team_id):
+            team = {u["user_id"] for u in users if u.get("team_id") == team_id}
+            rows = [p for p in posts if p["user_id"] in team]
+            return [p["post_id"] for p in sorted(rows, key=lambda p: (p["timestamp"], p["post_id"]), reverse=True)]
+
+        assert _walk(client, "t0", 3) == expected("t0")
+        assert _walk(client, "t1", 50) == expected("t1")
+        assert client.get("/social/team/t0", params={"limit": 1}).json()["posts"][0]["content"] == {"n": 37}
+
+        cursor = client.get("/social/team/t0", params={"limit": 2}).json()["next_cursor"]
+        assert client.get("/social/team/t1", params={"cursor": cursor}).status_code == 400
+
+        # u0 moves to t1 and solo joins t0: nothing changes until the rebuild
+        asyncio.run(db.upsert_user({"user_id": "u0", "username": "U0", "team_id": "t1"}))
+        asyncio.run(db.upsert_user({"user_id": "solo", "username": "S", "team_id": "t0"}))
+        assert _walk(client, "t0", 50) == expected("t0")
+        users[0]["team_id"], users[4]["team_id"] = "t1", "t0"
+        assert asyncio.run(db.rebuild_team_timelines()) == 2
+        assert _walk(client, "t0", 4) == expected("t0")
+        assert _walk(client, "t1", 4) == expected("t1")
+        assert asyncio.run(db.rebuild_team_timelines()) == 0
+    finally:
+        client.close()
+        asyncio.run(db.close())
+
+
+def test_rebuild_is_fenced(tmp_path):
+    async def run():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await db.init()
+        try:
+            await db.upsert_user({"user_id": "u1", "username": "A", "team_id": "t1"})
+            await db.insert_social_post(_post(1, "u1"))
+            stale = await LeaseManager(db, owner="old", ttl=0.05).acquire("team-timeline")
+            await asyncio.sleep(0.1)
+            current = await LeaseManager(db, owner="new").acquire("team-timeline")
+            await db.upsert_user({"user_id": "u1", "username": "A", "team_id": "t2"})
+            try:
+                await db.rebuild_team_timelines(fence=stale)
+                raise AssertionError("stale lease was accepted")
+            except LeaseLost:
+                pass
+            assert await db.rebuild_team_timelines(fence=current) == 1
+            assert [p["post_id"] for p in await db.get_team_feed("t2")] == ["p001"]
+        finally:
+            await db.close()
+    asyncio.run(run())
+
+
+def test_bulk_insert_and_fan_out_share_a_transaction(tmp_path, monkeypatch):
+    async def run():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=1)
+        await db.init()
+        try:
+            await db.upsert_user({"user_id": "u1", "username": "A", "team_id": "t1"})
+            monkeypatch.setattr(sqlite_client, "FAN_OUT_POST_SQL", "INSERT INTO no_such_table VALUES (%s)")
+            try:
+                await db.insert_social_posts_bulk([_post(i, "u1") for i in range(5)])
+                raise AssertionError("fan-out failure was swallowed")
+            except Exception as e:
+                assert "no_such_table" in str(e)
+            return await db.fetch_one("SELECT COUNT(*) AS n FROM social_feed")
+        finally:
+            await db.close()
+    assert asyncio.run(run())["n"] == 0
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from backend.database.sqlite_client import SQLiteClient
+from backend.services import xp_ledger
+
+
+def _run(tmp_path, scenario):
+    async def main():
+        db = SQLiteClient(str(tmp_path / "vq.db"), readers=2)
+        await db.init()
+        try:
+            await db.upsert_users_bulk([
+                {"user_id": "u1", "username": "A", "team_id": "t1", "level": 9, "xp": 10},
+                {"user_id": "u2", "username": "B", "team_id": "t1", "level": 2, "xp": 90},
+                {"user_id": "u3", "username": "C", "team_id": "t2", "level": 1, "xp": 50},
+            ])
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_period_leaderboards_from_ledger(tmp_path):
+    async def scenario(db):
+        # Wed 2025-01-29 .. Mon 2025-02-03: two weeks, two months
+        await db.record_xp("u1", "t1", 100, "calculate-xp", datetime(2025, 1, 29, 9))
+        await db.record_xp("u2", "t1", 40, "calculate-xp", datetime(2025, 1, 31, 22))
+        await db.record_xp("u2", "t1", 30, "calculate-xp", datetime(2025, 2, 1, 8))
+        await db.record_xp("u3", "t2", 60, "calculate-xp", datetime(2025, 2, 3, 7))
+        await db.record_xp("u3", "t2", 0, "calculate-xp", datetime(2025, 2, 3, 8))
+        before = await db.get_global_leaderboard(period="weekly", start="2025-01-27")
+        # u2 moves team: their later grants rank for the new team
+        await db.record_xp("u2", "t2", 5, "calculate-xp", datetime(2025, 2, 2, 12))
+
+        def names(rows):
+            return [(r["user_id"], r["xp"]) for r in rows]
+        return {
+            "before": names(before),
+            "week1": names(await db.get_global_leaderboard(period="weekly", start="2025-01-27")),
+            "week2": names(await db.get_global_leaderboard(period="weekly", start="2025-02-03")),
+            "feb": names(await db.get_global_leaderboard(period="monthly", start="2025-02-01")),
+            "day": names(await db.get_global_leaderboard(period="daily", start="2025-01-31")),
+            "team_t2_feb": names(await db.get_team_leaderboard("t2", period="monthly", start="2025-02-01")),
+            "all_time": names(await db.get_global_leaderboard()),
+            "ledger": (await db.fetch_one("SELECT COUNT(*) AS n, SUM(xp) AS xp FROM xp_ledger")),
+        }
+
+    out = _run(tmp_path, scenario)
+    assert out["before"] == [("u1", 100), ("u2", 70)]
+    # the cached week is invalidated by the next grant
+    assert out["week1"] == [("u1", 100), ("u2", 75)]
+    assert out["week2"] == [("u3", 60)]
+    assert out["feb"] == [("u3", 60), ("u2", 35)]
+    assert out["day"] == [("u2", 40)]
+    assert out["team_t2_feb"] == [("u3", 60), ("u2", 35)]
+    # all-time still ranks users.xp; zero grants are not recorded
+    assert [u for u, _ in out["all_time"]] == ["u2", "u3", "u1"]
+    assert (out["ledger"]["n"], out["ledger"]["xp"]) == (5, 235)
+
+
+def test_period_start_and_normalize():
+    assert xp_ledger.period_start("weekly", date(2025, 2, 2)) == "2025-01-27"
+    assert xp_ledger.period_start("weekly", date(2025, 2, 3)) == "2025-02-03"
+    assert xp_ledger.period_start("monthly", date(2025, 2, 28)) == "2025-02-01"
+    assert xp_ledger.normalize_period("Weekly") == "weekly"
+    assert xp_ledger.normalize_period("all") is None and xp_ledger.normalize_period(None) is None
+    with pytest.raises(ValueError):
+        xp_ledger.normalize_period("yearly")
+
+
+def test_grant_xp_writes_user_and_ledger_together(tmp_path, monkeypatch):
+    async def scenario(db):
+        user = {"user_id": "u1", "username": "A", "team_id": "t1", "level": 9, "xp": 60}
+        await db.grant_xp(user, 50, "calculate-xp", datetime(2025, 2, 3, 9))
+
+        async def broken(cursor, entries, add_bucket_sql):
+            raise RuntimeError("ledger write failed")
+        monkeypatch.setattr(xp_ledger, "append_entries", broken)
+        with pytest.raises(RuntimeError):
+            await db.grant_xp(dict(user, xp=110), 50, "calculate-xp", datetime(2025, 2, 3, 10))
+        return (await db.get_user("u1"))["xp"], await db.fetch_one("SELECT COUNT(*) AS n, SUM(xp) AS xp FROM xp_ledger")
+
+    xp, ledger = _run(tmp_path, scenario)
+    # the failed grant rolled back the user row too
+    assert xp == 60 and (ledger["n"], ledger["xp"]) == (1, 50)